@@ -31,6 +31,7 @@ from app.analysis.air_data import (
 from app.analysis.air_data import summarize_series as summarize_air_data_series
 from app.capabilities import CapabilityEvaluation, evaluate_capability_request
 from app.models import DataPoint, TestParameter
+from app.read_routing import dataset_version_visible, run_read
 
 
 @dataclass(frozen=True)
@@ -110,13 +111,20 @@ def _load_timeseries_rows(
     dataset_version_id: Optional[int],
     parameter_ids: Iterable[int],
 ):
-    rows_query = db.query(DataPoint.timestamp, DataPoint.parameter_id, DataPoint.value).filter(
-        DataPoint.flight_test_id == flight_test_id,
-        DataPoint.parameter_id.in_(list(parameter_ids)),
-    )
-    if dataset_version_id is not None:
-        rows_query = rows_query.filter(DataPoint.dataset_version_id == dataset_version_id)
-    return rows_query.order_by(DataPoint.timestamp.asc()).all()
+    parameter_ids = list(parameter_ids)
+
+    def load(read_db: Session):
+        rows_query = read_db.query(
+            DataPoint.timestamp, DataPoint.parameter_id, DataPoint.value
+        ).filter(
+            DataPoint.flight_test_id == flight_test_id,
+            DataPoint.parameter_id.in_(parameter_ids),
+        )
+        if dataset_version_id is not None:
+            rows_query = rows_query.filter(DataPoint.dataset_version_id == dataset_version_id)
+        return rows_query.order_by(DataPoint.timestamp.asc()).all()
+
+    return run_read(db, load, dataset_version_visible(dataset_version_id))
 
 
 def _score_ground_speed(name: str, unit: Optional[str]) -> float:
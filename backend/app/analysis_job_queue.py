@@ -0,0 +1,139 @@
+"""
+Background execution of queued AI analysis jobs.
+
+Goals:
+- run AI analyses off the request path so long LLM runs do not hold an API
+  worker thread and DB connection or hit proxy timeouts
+- bound concurrency with a fixed-size thread pool plus a per-user limit on
+  queued/running jobs
+- keep a handle per job id so queued work can be dropped on cancellation
+- heartbeat the jobs running in this process, so jobs orphaned by a restart
+  or crash can be told apart from slow ones and failed promptly
+
+Job state lives in ``analysis_jobs.status`` (queued -> running ->
+completed | failed | cancelled); this module only schedules the work.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_JOB_WORKERS = max(1, int(os.getenv("ANALYSIS_JOB_WORKERS", "2")))
+ANALYSIS_JOB_MAX_ACTIVE_PER_USER = max(1, int(os.getenv("ANALYSIS_JOB_MAX_ACTIVE_PER_USER", "2")))
+ANALYSIS_JOB_HEARTBEAT_S = max(1.0, float(os.getenv("ANALYSIS_JOB_HEARTBEAT_S", "30")))
+# Running jobs without a heartbeat for this long were orphaned by a restart or crash.
+ANALYSIS_JOB_STALE_AFTER_S = max(
+    3 * ANALYSIS_JOB_HEARTBEAT_S, float(os.getenv("ANALYSIS_JOB_STALE_AFTER_S", "120"))
+)
+ANALYSIS_JOB_RETRY_AFTER_S = 15
+
+ANALYSIS_JOB_ACTIVE_STATUSES = ("queued", "running")
+
+
+class AnalysisJobQueue:
+    """Thread pool that runs ``fn(job_id)`` for submitted analysis jobs."""
+
+    def __init__(
+        self, workers: int = ANALYSIS_JOB_WORKERS, heartbeat_s: float = ANALYSIS_JOB_HEARTBEAT_S
+    ):
+        self.workers = max(1, int(workers))
+        self.heartbeat_s = heartbeat_s
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._futures: Dict[int, Future] = {}
+        self._running: Set[int] = set()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+
+    def submit(self, job_id: int, fn: Callable[[int], None]) -> None:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="analysis-job",
+                )
+            future = self._executor.submit(self._run, fn, job_id)
+            self._futures[job_id] = future
+        future.add_done_callback(lambda _f: self._forget(job_id))
+
+    def cancel(self, job_id: int) -> bool:
+        """Drop a job that has not started yet; running jobs stop cooperatively."""
+        with self._lock:
+            future = self._futures.get(job_id)
+        return bool(future is not None and future.cancel())
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._futures)
+
+    def running_job_ids(self) -> List[int]:
+        with self._lock:
+            return sorted(self._running)
+
+    def start_heartbeat(self, beat: Callable[[List[int]], None]) -> None:
+        """Call ``beat(running_job_ids)`` every ``heartbeat_s`` until shutdown (idempotent)."""
+        with self._lock:
+            if self._heartbeat_thread is not None or self._stopped.is_set():
+                return
+            self._heartbeat_thread = threading.Thread(
+                target=self._heartbeat_loop,
+                args=(beat,),
+                name="analysis-job-heartbeat",
+                daemon=True,
+            )
+            self._heartbeat_thread.start()
+
+    def shutdown(self) -> None:
+        self._stopped.set()
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._futures.clear()
+        if executor is not None:
+            # Queued jobs stay "queued" in the database and are resubmitted on startup.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, fn: Callable[[int], None], job_id: int) -> None:
+        with self._lock:
+            self._running.add(job_id)
+        try:
+            fn(job_id)
+        finally:
+            with self._lock:
+                self._running.discard(job_id)
+
+    def _heartbeat_loop(self, beat: Callable[[List[int]], None]) -> None:
+        while not self._stopped.wait(self.heartbeat_s):
+            try:
+                beat(self.running_job_ids())
+            except Exception as exc:
+                logger.warning("Analysis job heartbeat failed: %s", exc)
+
+    def _forget(self, job_id: int) -> None:
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+
+_queue: Optional[AnalysisJobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_analysis_job_queue() -> AnalysisJobQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = AnalysisJobQueue()
+        return _queue
+
+
+def shutdown_analysis_job_queue() -> None:
+    global _queue
+    with _queue_lock:
+        queue, _queue = _queue, None
+    if queue is not None:
+        queue.shutdown()
@@ -3,35 +3,47 @@ FTIAS Backend - Authentication Utilities
 JWT token generation, validation, and password hashing
 """
 
+import hashlib
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from uuid import uuid4
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
 from app.config import settings
 from app.database import get_db
+from app.metrics import record_cache_lookup
 from app.models import User
-
-# Password hashing context
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+from app.password_hashing import PASSWORD_HASH_RETRY_AFTER_S, PasswordHashingBusy, password_hasher
+from app.principal_cache import AuthenticatedPrincipal, principal_cache
+from app.profiling import authorize_current_session
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a plain password against a hashed password"""
-    return pwd_context.verify(plain_password, hashed_password)
+    """Verify a plain password against a hashed password (on the hashing pool)"""
+    return password_hasher.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    """Hash a password"""
-    return pwd_context.hash(password)
+    """
+    Hash a password (on the hashing pool)
+
+    Raises 503 + Retry-After when the hashing pool is saturated, like login.
+    """
+    try:
+        return password_hasher.hash(password)
+    except PasswordHashingBusy as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent password operations. Please retry shortly.",
+            headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER_S)},
+        ) from exc
 
 
 def _create_jwt(
@@ -97,35 +109,74 @@ def decode_access_token(token: str) -> Optional[dict]:
     return payload
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-) -> User:
-    """Get the current authenticated user from JWT token"""
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def _access_token_subject(token: str) -> Tuple[int, str]:
+    """Return (user id, jti) of a valid access token or raise 401."""
     payload = decode_access_token(token)
     if payload is None:
-        raise credentials_exception
+        raise _credentials_exception()
 
     user_id_str: str = payload.get("sub")
     if user_id_str is None:
-        raise credentials_exception
+        raise _credentials_exception()
     try:
         user_id = int(user_id_str)
     except (ValueError, TypeError) as exc:
-        raise credentials_exception from exc
+        raise _credentials_exception() from exc
+    # Tokens minted before jti was added fall back to a per-token key.
+    jti = payload.get("jti") or hashlib.sha256(token.encode("utf-8")).hexdigest()
+    return user_id, jti
+
+
+def _note_profiling_permission(is_superuser: bool) -> None:
+    # Requested profiles (X-FTIAS-Profile) are only stored for superusers.
+    if is_superuser:
+        authorize_current_session()
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+    """Get the current authenticated user from JWT token"""
+    user_id, jti = _access_token_subject(token)
 
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
 
+    principal_cache.put(jti, AuthenticatedPrincipal.from_user(user))
+    _note_profiling_permission(user.is_superuser)
     return user
 
 
+def get_current_principal(
+    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+) -> AuthenticatedPrincipal:
+    """
+    Get the current principal (id, username, flags) for read endpoints that
+    only authorize by user id; served from the principal cache when warm.
+    """
+    user_id, jti = _access_token_subject(token)
+    principal = principal_cache.get(user_id, jti)
+    record_cache_lookup("principal", principal is not None)
+    if principal is not None:
+        _note_profiling_permission(principal.is_superuser)
+        return principal
+
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is None:
+        raise _credentials_exception()
+    principal = AuthenticatedPrincipal.from_user(user)
+    principal_cache.put(jti, principal)
+    _note_profiling_permission(principal.is_superuser)
+    return principal
+
+
 async def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
@@ -142,3 +193,12 @@ async def get_current_superuser(
     if not current_user.is_superuser:
         raise HTTPException(status_code=403, detail="The user doesn't have enough privileges")
     return current_user
+
+
+async def get_current_active_principal(
+    principal: AuthenticatedPrincipal = Depends(get_current_principal),
+) -> AuthenticatedPrincipal:
+    """Get the current principal, rejecting inactive accounts"""
+    if not principal.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return principal
@@ -0,0 +1,56 @@
+"""
+Batched, set-based deletes for very large child tables.
+
+Goals:
+- purge document chunks (with their embeddings) and flight test data points
+  with plain DELETE statements instead of loading ORM objects first
+- bound every statement to BULK_DELETE_BATCH_SIZE rows and commit between
+  batches, so a multi-million row purge never holds row locks or piles WAL
+  into one long transaction
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from typing import Any, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+BULK_DELETE_BATCH_SIZE = max(100, int(os.getenv("BULK_DELETE_BATCH_SIZE", "5000")))
+
+
+def delete_in_batches(
+    db: Session,
+    model: Any,
+    criterion: Any,
+    *,
+    batch_size: Optional[int] = None,
+) -> int:
+    """
+    Delete rows of ``model`` matching ``criterion`` in id-bounded batches,
+    committing after each one. Returns the number of rows deleted.
+
+    Earlier batches stay deleted if a later one fails, so callers must be
+    safe to re-run (the criterion simply matches fewer rows next time).
+    """
+    batch_size = max(1, int(batch_size or BULK_DELETE_BATCH_SIZE))
+    total = 0
+    while True:
+        batch_ids = select(model.id).where(criterion).limit(batch_size)
+        result = db.execute(
+            delete(model)
+            .where(model.id.in_(batch_ids))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        deleted = max(0, result.rowcount or 0)
+        total += deleted
+        if deleted < batch_size:
+            break
+    if total:
+        logger.info("Deleted %d %s rows in batches of %d", total, model.__tablename__, batch_size)
+    return total
@@ -0,0 +1,113 @@
+"""
+Content-hash chunk identity for incremental document re-indexing.
+
+Goals:
+- give every chunk a stable SHA-256 over its normalized text
+- reuse stored embeddings for identical text + embedding model instead of
+  paying the provider again
+- diff an existing chunk set against a re-parsed revision so a replace only
+  inserts/deletes the chunks that actually changed
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import unicodedata
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models import DocumentChunk
+
+_WHITESPACE_RE = re.compile(r"\s+")
+LOOKUP_BATCH_SIZE = 500
+
+
+def normalize_chunk_text(text_content: str) -> str:
+    """Canonical form used for hashing: NFC, collapsed whitespace, trimmed."""
+    normalized = unicodedata.normalize("NFC", text_content or "")
+    return _WHITESPACE_RE.sub(" ", normalized).strip()
+
+
+def chunk_content_sha256(text_content: str) -> str:
+    return hashlib.sha256(normalize_chunk_text(text_content).encode("utf-8")).hexdigest()
+
+
+def find_reusable_embeddings(
+    db: Session,
+    *,
+    content_hashes: Iterable[str],
+    embedding_model: str,
+) -> Dict[str, Any]:
+    """
+    Return ``{content_sha256: embedding}`` for hashes already embedded with
+    ``embedding_model``. Embeddings depend only on text and model, so any
+    stored chunk with the same hash is a valid source.
+    """
+    unique_hashes = sorted({h for h in content_hashes if h})
+    found: Dict[str, Any] = {}
+    for start in range(0, len(unique_hashes), LOOKUP_BATCH_SIZE):
+        batch = unique_hashes[start : start + LOOKUP_BATCH_SIZE]
+        rows = (
+            db.query(DocumentChunk.content_sha256, DocumentChunk.embedding)
+            .filter(
+                DocumentChunk.content_sha256.in_(batch),
+                DocumentChunk.embedding_model == embedding_model,
+                DocumentChunk.embedding.isnot(None),
+            )
+            .all()
+        )
+        for content_hash, embedding in rows:
+            if content_hash not in found:
+                found[content_hash] = embedding
+    return found
+
+
+@dataclass
+class ChunkSetDiff:
+    """Plan for turning an existing chunk set into a new revision."""
+
+    # (existing chunk id, new chunk index) pairs whose text is unchanged.
+    kept: List[Tuple[int, int]] = field(default_factory=list)
+    # New chunk indexes that need a row (and possibly an embedding).
+    inserted: List[int] = field(default_factory=list)
+    # Existing chunk ids no longer present in the new revision.
+    deleted: List[int] = field(default_factory=list)
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "kept": len(self.kept),
+            "inserted": len(self.inserted),
+            "deleted": len(self.deleted),
+        }
+
+
+def diff_chunk_sets(
+    existing: Sequence[Tuple[int, Optional[str]]],
+    new_hashes: Sequence[str],
+) -> ChunkSetDiff:
+    """
+    Match chunks by content hash (multiset semantics: repeated boilerplate
+    chunks are paired one-to-one, in document order).
+    """
+    available: Dict[str, Deque[int]] = defaultdict(deque)
+    for chunk_id, content_hash in existing:
+        if content_hash:
+            available[content_hash].append(chunk_id)
+
+    diff = ChunkSetDiff()
+    matched_ids = set()
+    for new_index, content_hash in enumerate(new_hashes):
+        candidates = available.get(content_hash)
+        if candidates:
+            chunk_id = candidates.popleft()
+            matched_ids.add(chunk_id)
+            diff.kept.append((chunk_id, new_index))
+        else:
+            diff.inserted.append(new_index)
+
+    diff.deleted = [chunk_id for chunk_id, _ in existing if chunk_id not in matched_ids]
+    return diff
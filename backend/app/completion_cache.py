@@ -0,0 +1,97 @@
+"""
+Opt-in cache of LLM completions for AI analysis.
+
+Goals:
+- skip the paid LLM call when an analysis is re-run with an identical,
+  snapshot-determined request (same model, sampling settings and prompts)
+- key entries by a SHA-256 fingerprint over the complete request so any
+  change in data, retrieved sources, mode or wording misses the cache
+- keep provenance: each entry points at the analysis job that produced it
+
+Enabled server-side by ANALYSIS_COMPLETION_CACHE_ENABLED; callers also opt in
+per request.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from typing import List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models import LlmCompletionCache
+
+logger = logging.getLogger(__name__)
+
+ANALYSIS_COMPLETION_CACHE_ENABLED = os.getenv(
+    "ANALYSIS_COMPLETION_CACHE_ENABLED", "false"
+).strip().lower() in {"1", "true", "yes", "on"}
+
+
+def completion_fingerprint(
+    *,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    messages: List[dict],
+) -> str:
+    payload = json.dumps(
+        {
+            "model": model,
+            "temperature": round(float(temperature), 4),
+            "max_tokens": int(max_tokens),
+            "messages": [
+                {"role": message.get("role"), "content": message.get("content")}
+                for message in messages
+            ],
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def lookup_completion(db: Session, fingerprint: str) -> Optional[LlmCompletionCache]:
+    """Return the cached completion for ``fingerprint`` and count the hit (no commit)."""
+    entry = (
+        db.query(LlmCompletionCache).filter(LlmCompletionCache.prompt_sha256 == fingerprint).first()
+    )
+    if entry is not None:
+        entry.hit_count = (entry.hit_count or 0) + 1
+        entry.last_hit_at = func.now()
+    return entry
+
+
+def store_completion(
+    db: Session,
+    *,
+    fingerprint: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    completion_text: str,
+    source_analysis_job_id: Optional[int],
+) -> None:
+    """Insert a cache entry and commit; an existing entry for the fingerprint wins."""
+    if not completion_text.strip():
+        return
+    db.add(
+        LlmCompletionCache(
+            prompt_sha256=fingerprint,
+            model_name=model,
+            temperature=float(temperature),
+            max_tokens=int(max_tokens),
+            completion_text=completion_text,
+            source_analysis_job_id=source_analysis_job_id,
+        )
+    )
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        logger.debug("Completion cache entry %s already stored", fingerprint)
@@ -57,6 +57,33 @@ class Settings(BaseSettings):
             f"{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
         )
 
+    # Connection pools (per API process). The request threadpool defaults to
+    # the sync pool's capacity so threads never queue on pool checkout.
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_S: int = 30
+    DB_POOL_RECYCLE_S: int = 1800
+    REQUEST_THREADPOOL_SIZE: int | None = None
+    # Optional read replicas (comma-separated URLs) for heavy analytical reads
+    DATABASE_READ_URLS: str | None = None
+    DB_READ_POOL_SIZE: int = 10
+    DB_READ_MAX_OVERFLOW: int = 10
+
+    @property
+    def database_read_urls(self) -> List[str]:
+        return [url.strip() for url in (self.DATABASE_READ_URLS or "").split(",") if url.strip()]
+
+    @property
+    def pool_capacity(self) -> int:
+        """Connections one process may hold on the sync primary pool."""
+        return max(1, self.DB_POOL_SIZE + self.DB_MAX_OVERFLOW)
+
+    @property
+    def request_threadpool_size(self) -> int:
+        if self.REQUEST_THREADPOOL_SIZE:
+            return max(1, self.REQUEST_THREADPOOL_SIZE)
+        return self.pool_capacity
+
     # Security
     SECRET_KEY: str = "dev-secret-key-change-in-production"
     JWT_SECRET_KEY: str = "dev-jwt-secret-key-change-in-production"
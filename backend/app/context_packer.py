@@ -0,0 +1,235 @@
+"""
+Token-budgeted packing of retrieved source excerpts into LLM prompts.
+
+Goals:
+- keep prompt size (and so latency and cost) bounded by a model-specific
+  token budget instead of by chunk counts and character limits
+- fill excerpts in retrieval rank order; lower-ranked chunks, and any chunk
+  that no longer fits, are cut down to their most question-relevant sentences
+- report tokens used and dropped so retrieval_debug shows what the model saw
+
+Tokens are counted with tiktoken's cl100k_base encoding when the package is
+installed and estimated as characters / 4 otherwise.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+LLM_PROMPT_TOKEN_BUDGET = max(1000, int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", "12000")))
+CONTEXT_PACK_MIN_EXCERPT_TOKENS = max(0, int(os.getenv("CONTEXT_PACK_MIN_EXCERPT_TOKENS", "800")))
+# Top-ranked excerpts that are kept whole while they fit the budget.
+CONTEXT_PACK_FULL_TEXT_SOURCES = max(0, int(os.getenv("CONTEXT_PACK_FULL_TEXT_SOURCES", "4")))
+# Per-excerpt ceiling for sources ranked below CONTEXT_PACK_FULL_TEXT_SOURCES.
+CONTEXT_PACK_LOW_RANK_TOKENS = max(32, int(os.getenv("CONTEXT_PACK_LOW_RANK_TOKENS", "350")))
+# Trimmed excerpts shorter than this are dropped rather than sent as fragments.
+CONTEXT_PACK_MIN_TRIMMED_TOKENS = 24
+
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+
+# Context window sizes by model-name prefix (longest prefix wins).
+_MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
+    "gpt-4o": 128_000,
+    "gpt-4.1": 1_000_000,
+    "gpt-4-turbo": 128_000,
+    "gpt-4": 8_192,
+    "gpt-3.5-turbo": 16_385,
+    "o1": 128_000,
+    "o3": 200_000,
+    "o4": 200_000,
+}
+_DEFAULT_CONTEXT_WINDOW = 128_000
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?;:])\s+|\n+")
+_TERM_PATTERN = re.compile(r"[a-z0-9][a-z0-9\-]{2,}")
+_STOPWORDS = frozenset(
+    "the and for with that this from are was were has have not but into onto over under "
+    "what which when where who how why shall should must may can will its their there "
+    "than then also such any all each per via".split()
+)
+
+_encoding: Any = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding() -> Any:
+    """cl100k_base encoder, imported on first use; None when tiktoken is missing."""
+    global _encoding, _encoding_loaded
+    if _encoding_loaded:
+        return _encoding
+    with _encoding_lock:
+        if not _encoding_loaded:
+            try:
+                import tiktoken
+
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                _encoding = None
+            _encoding_loaded = True
+    return _encoding
+
+
+def tokenizer_name() -> str:
+    return "cl100k_base" if _get_encoding() is not None else "chars/4"
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return int(math.ceil(len(text) / 4.0))
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def model_context_window(model: str) -> int:
+    name = (model or "").strip().lower()
+    matches = [prefix for prefix in _MODEL_CONTEXT_WINDOWS if name.startswith(prefix)]
+    if not matches:
+        return _DEFAULT_CONTEXT_WINDOW
+    return _MODEL_CONTEXT_WINDOWS[max(matches, key=len)]
+
+
+def prompt_token_budget(model: str, max_completion_tokens: int) -> int:
+    """Prompt tokens allowed for ``model`` after reserving room for the completion."""
+    window_room = model_context_window(model) - max(0, int(max_completion_tokens))
+    return max(0, min(LLM_PROMPT_TOKEN_BUDGET, window_room))
+
+
+def excerpt_token_budget(model: str, max_completion_tokens: int, fixed_prompt_tokens: int) -> int:
+    """Tokens left for source excerpts once the rest of the prompt is accounted for."""
+    remaining = prompt_token_budget(model, max_completion_tokens) - max(0, fixed_prompt_tokens)
+    return max(CONTEXT_PACK_MIN_EXCERPT_TOKENS, remaining)
+
+
+def _query_terms(question: str) -> set[str]:
+    return {term for term in _TERM_PATTERN.findall(question.lower()) if term not in _STOPWORDS}
+
+
+def _split_sentences(text: str) -> List[str]:
+    return [part.strip() for part in _SENTENCE_SPLIT.split(text or "") if part and part.strip()]
+
+
+def trim_to_relevant_sentences(text: str, question: str, max_tokens: int) -> str:
+    """
+    Keep the sentences of ``text`` that share the most terms with ``question``
+    within ``max_tokens``, in their original order.
+    """
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    sentences = _split_sentences(text)
+    terms = _query_terms(question)
+    scored: List[Tuple[float, int, str, int]] = []
+    for index, sentence in enumerate(sentences):
+        sentence_terms = set(_TERM_PATTERN.findall(sentence.lower()))
+        overlap = len(terms & sentence_terms)
+        # Term overlap first, earlier position as the tie-break.
+        scored.append((-float(overlap), index, sentence, count_tokens(sentence) + 1))
+    scored.sort()
+
+    chosen: List[Tuple[int, str]] = []
+    used = 0
+    for _neg_score, index, sentence, tokens in scored:
+        if used + tokens > max_tokens:
+            continue
+        chosen.append((index, sentence))
+        used += tokens
+    if not chosen and sentences:
+        # A single sentence longer than the budget: keep its leading part.
+        encoding = _get_encoding()
+        head = sentences[0]
+        if encoding is not None:
+            return encoding.decode(encoding.encode(head, disallowed_special=())[:max_tokens])
+        return head[: max_tokens * 4]
+    chosen.sort()
+    return " ".join(sentence for _index, sentence in chosen)
+
+
+@dataclass(frozen=True)
+class PackedContext:
+    sources: List[dict]
+    context_text: str
+    stats: Dict[str, Any]
+
+
+def pack_context(
+    sources: List[dict],
+    *,
+    question: str,
+    budget_tokens: int,
+    label_for: Callable[[dict], str],
+    full_text_sources: Optional[int] = None,
+    low_rank_max_tokens: Optional[int] = None,
+) -> PackedContext:
+    """
+    Build the excerpt block for ``sources`` (already in rank order) within
+    ``budget_tokens``. Sources that do not fit at all are left out of the
+    returned list so the prompt legend only names excerpts the model can see.
+    """
+    full_text_sources = (
+        CONTEXT_PACK_FULL_TEXT_SOURCES if full_text_sources is None else full_text_sources
+    )
+    low_rank_max_tokens = (
+        CONTEXT_PACK_LOW_RANK_TOKENS if low_rank_max_tokens is None else low_rank_max_tokens
+    )
+    separator_tokens = count_tokens(CONTEXT_SEPARATOR)
+
+    packed_sources: List[dict] = []
+    parts: List[str] = []
+    trimmed_ids: List[str] = []
+    dropped_ids: List[str] = []
+    used_tokens = 0
+    dropped_tokens = 0
+
+    for rank, source in enumerate(sources):
+        source_id = str(source.get("source_id") or f"S{rank + 1}")
+        header = f"[{source_id}] {label_for(source)}\n"
+        text = str(source.get("text") or "")
+        text_tokens = count_tokens(text)
+        overhead = count_tokens(header) + (separator_tokens if parts else 0)
+        allowance = budget_tokens - used_tokens - overhead
+        if rank >= full_text_sources:
+            allowance = min(allowance, low_rank_max_tokens)
+
+        if text_tokens <= allowance:
+            excerpt, excerpt_tokens = text, text_tokens
+        else:
+            excerpt = trim_to_relevant_sentences(text, question, allowance)
+            excerpt_tokens = count_tokens(excerpt)
+            if excerpt_tokens < min(CONTEXT_PACK_MIN_TRIMMED_TOKENS, text_tokens):
+                excerpt = ""
+
+        if not excerpt:
+            dropped_ids.append(source_id)
+            dropped_tokens += text_tokens
+            continue
+        if excerpt_tokens < text_tokens:
+            trimmed_ids.append(source_id)
+            dropped_tokens += text_tokens - excerpt_tokens
+        parts.append(header + excerpt)
+        packed_sources.append(source)
+        used_tokens += overhead + excerpt_tokens
+
+    stats = {
+        "tokenizer": tokenizer_name(),
+        "budget_tokens": int(budget_tokens),
+        "used_tokens": int(used_tokens),
+        "dropped_tokens": int(dropped_tokens),
+        "sources_in": len(sources),
+        "sources_packed": len(packed_sources),
+        "trimmed_source_ids": trimmed_ids,
+        "dropped_source_ids": dropped_ids,
+    }
+    return PackedContext(
+        sources=packed_sources,
+        context_text=CONTEXT_SEPARATOR.join(parts),
+        stats=stats,
+    )
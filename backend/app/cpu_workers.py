@@ -0,0 +1,96 @@
+"""
+Process pool for CPU-bound request work.
+
+Goals:
+- move CPU-heavy route work (PDF report rendering) out of the API worker
+  process, so one render cannot hold the GIL that every other in-flight
+  request on that worker needs
+- reuse the bounded, self-healing ``DocumentWorkerPool``: a full queue fails
+  fast with 503 + Retry-After, runaway renders hit a timeout and crashed
+  workers are replaced
+- ``CPU_WORKER_PROCESSES=0`` (the default outside ``app.serve``) runs the
+  work inline, which is what tests and single-process dev setups use
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException
+
+from app.docling_workers import (
+    DocumentWorkerError,
+    DocumentWorkerPool,
+    DocumentWorkerQueueFull,
+)
+
+CPU_WORKER_PROCESSES = max(0, int(os.getenv("CPU_WORKER_PROCESSES", "0")))
+CPU_WORKER_QUEUE_SIZE = max(0, int(os.getenv("CPU_WORKER_QUEUE_SIZE", "8")))
+CPU_WORKER_TIMEOUT_S = max(1.0, float(os.getenv("CPU_WORKER_TIMEOUT_S", "120")))
+CPU_WORKER_RETRY_AFTER_S = 5
+
+
+class _WorkerHTTPError(Exception):
+    """Picklable stand-in for an HTTPException raised inside a worker process."""
+
+    def __init__(self, status_code: int, detail: Any):
+        super().__init__(status_code, detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _call_in_worker(fn: Callable[..., Any], args: tuple) -> Any:
+    try:
+        return fn(*args)
+    except HTTPException as exc:
+        # Starlette's HTTPException cannot be unpickled in the parent.
+        raise _WorkerHTTPError(exc.status_code, exc.detail) from None
+
+
+_pool: Optional[DocumentWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_cpu_worker_pool() -> DocumentWorkerPool:
+    """Return the process-wide CPU pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DocumentWorkerPool(
+                processes=CPU_WORKER_PROCESSES,
+                queue_size=CPU_WORKER_QUEUE_SIZE,
+                timeout_s=CPU_WORKER_TIMEOUT_S,
+            )
+        return _pool
+
+
+def shutdown_cpu_worker_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool = _pool
+        _pool = None
+    if pool is not None:
+        pool.shutdown()
+
+
+def run_cpu_bound(fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run module-level ``fn(*args)`` on the CPU pool and return its result.
+
+    Call from sync handlers (request threadpool). Pool admission and worker
+    failures surface as HTTPExceptions.
+    """
+    try:
+        return get_cpu_worker_pool().run(_call_in_worker, fn, args)
+    except _WorkerHTTPError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail) from exc
+    except DocumentWorkerQueueFull as exc:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy rendering other reports. Retry shortly.",
+            headers={"Retry-After": str(CPU_WORKER_RETRY_AFTER_S)},
+        ) from exc
+    except DocumentWorkerError as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
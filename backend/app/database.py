@@ -3,21 +3,47 @@ FTIAS Backend - Database
 Database connection and session management
 """
 
+import itertools
+import threading
+from typing import Any, Dict, List, Optional
+
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.config import settings
+from app.metrics import METRICS_ENABLED, install_engine_metrics
+from app.query_insights import SLOW_QUERY_CAPTURE_ENABLED, install_query_insights
+
+
+def _pool_options(url: str, *, pool_size: int, max_overflow: int) -> Dict[str, Any]:
+    """QueuePool sizing for server databases; SQLite keeps its default pool."""
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": max(1, pool_size),
+        "max_overflow": max(0, max_overflow),
+        "pool_timeout": max(1, settings.DB_POOL_TIMEOUT_S),
+        "pool_recycle": settings.DB_POOL_RECYCLE_S,
+    }
+
 
-# Create database engine
+# Create database engine (sync: request threadpool, scripts, background workers)
 engine = create_engine(
     settings.database_url,
     echo=settings.DEBUG,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+    **_pool_options(
+        settings.database_url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+    ),
 )
 
+# Statement fingerprints, slow-query log and sampled EXPLAIN plans
+if SLOW_QUERY_CAPTURE_ENABLED:
+    install_query_insights(engine)
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -37,3 +63,59 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Read replicas (DATABASE_READ_URLS) for heavy read-only scans, created on
+# first use. Routing and read-your-writes checks live in app.read_routing.
+_read_engines: Optional[List[Any]] = None
+_read_session_factories: List[Any] = []
+_read_engines_lock = threading.Lock()
+_read_round_robin = itertools.count()
+
+
+def get_read_engines() -> List[Any]:
+    """Replica engines, one pool per URL; empty when no replicas are configured."""
+    global _read_engines, _read_session_factories
+    if _read_engines is None:
+        with _read_engines_lock:
+            if _read_engines is None:
+                engines = []
+                for url in settings.database_read_urls:
+                    read_engine = create_engine(
+                        url,
+                        echo=settings.DEBUG,
+                        pool_pre_ping=True,
+                        **_pool_options(
+                            url,
+                            pool_size=settings.DB_READ_POOL_SIZE,
+                            max_overflow=settings.DB_READ_MAX_OVERFLOW,
+                        ),
+                    )
+                    if SLOW_QUERY_CAPTURE_ENABLED:
+                        install_query_insights(read_engine)
+                    if METRICS_ENABLED:
+                        install_engine_metrics(read_engine, pool_name="replica")
+                    engines.append(read_engine)
+                _read_session_factories = [
+                    sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+                    for read_engine in engines
+                ]
+                _read_engines = engines
+    return _read_engines
+
+
+def new_read_session():
+    """A Session on the next replica (round robin), or None without replicas."""
+    if not get_read_engines():
+        return None
+    factories = _read_session_factories
+    return factories[next(_read_round_robin) % len(factories)]()
+
+
+def dispose_read_engines() -> None:
+    """Close pooled replica connections (application shutdown, forked workers)."""
+    global _read_engines, _read_session_factories
+    with _read_engines_lock:
+        engines, _read_engines, _read_session_factories = _read_engines or [], None, []
+    for read_engine in engines:
+        read_engine.dispose()
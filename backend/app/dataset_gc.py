@@ -0,0 +1,242 @@
+"""
+Background garbage collection of dataset versions.
+
+Goals:
+- reclaim failed (and abandoned "processing") dataset versions, and on
+  request superseded successful versions beyond a per-flight-test retention
+  count, without holding an API worker for the duration
+- drop each version's data points through ``remove_dataset_version_data``
+  (partition drop on PostgreSQL, batched deletes elsewhere), committing per
+  version so progress survives a crash and a re-run simply finds less work
+- never touch the active version or versions referenced by saved analysis
+  jobs or FRAT assessments
+
+Job state and progress live in ``dataset_gc_jobs`` (queued -> running ->
+completed | failed); ingestion sessions are kept as upload history and only
+lose their link to the reclaimed version.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.dataset_partitions import PartitionBusy, remove_dataset_version_data
+from app.models import (
+    AnalysisJob,
+    DatasetGcJob,
+    DatasetVersion,
+    FlightTest,
+    FratAssessment,
+    IngestionSession,
+)
+from app.workloads import workload_slot
+
+logger = logging.getLogger(__name__)
+
+# Superseded successful versions kept per flight test (newest first) when a
+# GC job asks to reclaim superseded versions at all.
+DATASET_GC_KEEP_SUPERSEDED_VERSIONS = max(
+    0, int(os.getenv("DATASET_GC_KEEP_SUPERSEDED_VERSIONS", "2"))
+)
+# "processing" versions and "running" GC jobs older than this are abandoned.
+DATASET_GC_STALE_AFTER_S = max(300, int(os.getenv("DATASET_GC_STALE_AFTER_S", "3600")))
+
+DATASET_GC_FAILED_STATUSES = ("failed", "cancelled", "canceled", "error")
+DATASET_GC_ACTIVE_STATUSES = ("queued", "running")
+
+
+def select_gc_candidates(
+    db: Session,
+    *,
+    owner_id: int,
+    flight_test_id: Optional[int] = None,
+    include_superseded: bool = False,
+    now: Optional[datetime] = None,
+) -> List[DatasetVersion]:
+    """Dataset versions owned by ``owner_id`` that a GC run would reclaim."""
+    now = now or datetime.now(timezone.utc)
+    stale_before = now - timedelta(seconds=DATASET_GC_STALE_AFTER_S)
+
+    query = (
+        db.query(DatasetVersion)
+        .join(FlightTest, FlightTest.id == DatasetVersion.flight_test_id)
+        .filter(FlightTest.created_by_id == owner_id)
+    )
+    if flight_test_id is not None:
+        query = query.filter(DatasetVersion.flight_test_id == flight_test_id)
+
+    candidates: List[DatasetVersion] = []
+    superseded_seen: dict[int, int] = {}
+    rows = query.order_by(DatasetVersion.flight_test_id, DatasetVersion.version_number.desc()).all()
+    for version in rows:
+        if version.flight_test.active_dataset_version_id == version.id:
+            continue
+        version_status = (version.status or "").lower()
+        if version_status in DATASET_GC_FAILED_STATUSES:
+            candidates.append(version)
+        elif version_status == "processing":
+            created_at = version.created_at
+            if created_at is not None and created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)
+            if created_at is not None and created_at < stale_before:
+                candidates.append(version)
+        elif version_status == "success" and include_superseded:
+            kept = superseded_seen.get(version.flight_test_id, 0)
+            if kept < DATASET_GC_KEEP_SUPERSEDED_VERSIONS:
+                superseded_seen[version.flight_test_id] = kept + 1
+            else:
+                candidates.append(version)
+    return candidates
+
+
+def reclaim_dataset_version(db: Session, dataset_version_id: int) -> Optional[int]:
+    """
+    Remove one dataset version and its data points. Returns the number of
+    data points removed, or None when the version is (now) not reclaimable
+    or its partition is busy (a later GC run retries it).
+    """
+    version = db.query(DatasetVersion).filter(DatasetVersion.id == dataset_version_id).first()
+    if version is None:
+        return None
+    if version.flight_test.active_dataset_version_id == version.id:
+        return None
+    referenced = (
+        db.query(AnalysisJob.id).filter(AnalysisJob.dataset_version_id == version.id).first()
+        or db.query(FratAssessment.id)
+        .filter(FratAssessment.dataset_version_id == version.id)
+        .first()
+    )
+    if referenced:
+        return None
+
+    known_count = version.data_points_count if version.status == "success" else None
+    try:
+        removed = remove_dataset_version_data(db, version.id, known_count=known_count)
+    except PartitionBusy as exc:
+        # Still reclaimable: the next GC run picks it up again.
+        logger.warning("Skipping dataset version %d for now: %s", dataset_version_id, exc)
+        return None
+
+    db.query(IngestionSession).filter(
+        IngestionSession.dataset_version_id == dataset_version_id
+    ).update({IngestionSession.dataset_version_id: None}, synchronize_session=False)
+    db.query(DatasetVersion).filter(DatasetVersion.id == dataset_version_id).delete(
+        synchronize_session=False
+    )
+    db.commit()
+    return removed
+
+
+def run_dataset_gc_job(job_id: int) -> None:
+    """Claim and run one queued GC job, persisting progress per version."""
+    with workload_slot("background", timeout=None):
+        _run_dataset_gc_job(job_id)
+
+
+def _run_dataset_gc_job(job_id: int) -> None:
+    db = SessionLocal()
+    try:
+        claimed = (
+            db.query(DatasetGcJob)
+            .filter(DatasetGcJob.id == job_id, DatasetGcJob.status == "queued")
+            .update(
+                {
+                    DatasetGcJob.status: "running",
+                    DatasetGcJob.started_at: datetime.now(timezone.utc),
+                },
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        if not claimed:
+            return
+        job = db.query(DatasetGcJob).filter(DatasetGcJob.id == job_id).one()
+        candidate_ids = [
+            version.id
+            for version in select_gc_candidates(
+                db,
+                owner_id=job.requested_by_id,
+                flight_test_id=job.flight_test_id,
+                include_superseded=bool(job.include_superseded),
+            )
+        ]
+        job.total_versions = len(candidate_ids)
+        db.commit()
+
+        for version_id in candidate_ids:
+            removed = reclaim_dataset_version(db, version_id)
+            job = db.query(DatasetGcJob).filter(DatasetGcJob.id == job_id).one()
+            job.processed_versions += 1
+            if removed is None:
+                job.skipped_versions += 1
+            else:
+                job.reclaimed_versions += 1
+                job.reclaimed_data_points += removed
+            db.commit()
+
+        job.status = "completed"
+        job.completed_at = datetime.now(timezone.utc)
+        db.commit()
+        logger.info(
+            "Dataset GC job %d reclaimed %d/%d version(s), %d data points",
+            job_id,
+            job.reclaimed_versions,
+            job.total_versions,
+            job.reclaimed_data_points,
+        )
+    except Exception as exc:
+        db.rollback()
+        logger.error("Dataset GC job %d failed: %s", job_id, exc)
+        db.query(DatasetGcJob).filter(DatasetGcJob.id == job_id).update(
+            {
+                DatasetGcJob.status: "failed",
+                DatasetGcJob.error_message: str(exc)[:4000],
+                DatasetGcJob.completed_at: datetime.now(timezone.utc),
+            },
+            synchronize_session=False,
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def resume_dataset_gc_jobs() -> None:
+    """
+    Requeue GC jobs orphaned by a restart and run queued ones off the
+    startup path. Re-running is safe: reclaimed versions are simply gone.
+    """
+    db = SessionLocal()
+    try:
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=DATASET_GC_STALE_AFTER_S)
+        db.query(DatasetGcJob).filter(
+            DatasetGcJob.status == "running",
+            DatasetGcJob.started_at < stale_before,
+        ).update({DatasetGcJob.status: "queued"}, synchronize_session=False)
+        db.commit()
+        job_ids = [
+            row.id
+            for row in db.query(DatasetGcJob.id)
+            .filter(DatasetGcJob.status == "queued")
+            .order_by(DatasetGcJob.id)
+        ]
+    except Exception as exc:
+        logger.warning("Could not resume dataset GC jobs: %s", exc)
+        return
+    finally:
+        db.close()
+    if not job_ids:
+        return
+
+    def _run_all() -> None:
+        for job_id in job_ids:
+            run_dataset_gc_job(job_id)
+
+    threading.Thread(target=_run_all, name="dataset-gc", daemon=True).start()
+    logger.info("Resuming %d dataset GC job(s)", len(job_ids))
@@ -0,0 +1,161 @@
+"""
+Per-dataset-version storage for flight test data points.
+
+Goals:
+- on PostgreSQL with the partitioned ``data_points`` table (see the
+  20261019 partition migration), give every dataset version its own LIST
+  partition so removing a version is a DETACH + DROP instead of a
+  row-by-row DELETE with its locks and WAL
+- attach new partitions with ATTACH PARTITION, which only needs a SHARE
+  UPDATE EXCLUSIVE lock on the parent, so readers of other versions are
+  never blocked by an upload
+- bound the DETACH: a plain DETACH PARTITION takes ACCESS EXCLUSIVE on the
+  ``data_points`` parent, and while it waits behind a long chart read every
+  later read of any version queues behind it. Each attempt therefore runs
+  with ``lock_timeout = PARTITION_LOCK_TIMEOUT_MS`` and is retried a few
+  times before ``PartitionBusy`` asks the caller to reschedule
+- fall back to batched deletes everywhere else (SQLite tests, databases
+  that have not run the migration, legacy rows without a version)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.bulk_delete import delete_in_batches
+from app.models import DataPoint
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "data_points"
+PARTITION_LOCK_TIMEOUT_MS = max(1, int(os.getenv("PARTITION_LOCK_TIMEOUT_MS", "2000")))
+PARTITION_DETACH_ATTEMPTS = max(1, int(os.getenv("PARTITION_DETACH_ATTEMPTS", "3")))
+PARTITION_DETACH_RETRY_DELAY_S = 1.0
+PARTITION_BUSY_RETRY_AFTER_S = 30
+# SQLSTATE lock_not_available, raised when lock_timeout expires.
+_LOCK_NOT_AVAILABLE = "55P03"
+
+
+class PartitionBusy(RuntimeError):
+    """Raised when a partition could not be detached within its lock timeout."""
+
+
+def _is_lock_timeout(exc: DBAPIError) -> bool:
+    orig = getattr(exc, "orig", None)
+    code = getattr(orig, "pgcode", None) or getattr(orig, "sqlstate", None)
+    return code == _LOCK_NOT_AVAILABLE
+
+
+def partition_name(dataset_version_id: int) -> str:
+    return f"{PARENT_TABLE}_v{int(dataset_version_id)}"
+
+
+def data_points_partitioned(db: Session) -> bool:
+    """True when ``data_points`` is a partitioned table on this database."""
+    connection = db.connection()
+    if connection.dialect.name != "postgresql":
+        return False
+    return bool(
+        connection.execute(
+            text(
+                "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+                "WHERE partrelid = to_regclass(:parent))"
+            ),
+            {"parent": PARENT_TABLE},
+        ).scalar()
+    )
+
+
+def _partition_exists(db: Session, dataset_version_id: int) -> bool:
+    return (
+        db.execute(
+            text("SELECT to_regclass(:name) IS NOT NULL"),
+            {"name": partition_name(dataset_version_id)},
+        ).scalar()
+        is True
+    )
+
+
+def ensure_dataset_partition(db: Session, dataset_version_id: int) -> bool:
+    """
+    Create and attach the partition for ``dataset_version_id`` inside the
+    session's current transaction (no commit). Returns False when data
+    points are not partitioned here and rows simply go to the one table.
+    """
+    if not data_points_partitioned(db):
+        return False
+    if _partition_exists(db, dataset_version_id):
+        return True
+    version_id = int(dataset_version_id)
+    name = partition_name(version_id)
+    db.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS)"))
+    # Proves the (empty) table matches its bound, so ATTACH skips validation.
+    db.execute(
+        text(
+            f"ALTER TABLE {name} ADD CONSTRAINT {name}_version_check "
+            f"CHECK (dataset_version_id IS NOT NULL AND dataset_version_id = {version_id})"
+        )
+    )
+    db.execute(
+        text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES IN ({version_id})")
+    )
+    logger.info("Attached data point partition %s", name)
+    return True
+
+
+def remove_dataset_version_data(
+    db: Session,
+    dataset_version_id: int,
+    *,
+    known_count: Optional[int] = None,
+) -> int:
+    """
+    Remove every data point of one dataset version, committing as it goes.
+    Returns the number of rows removed.
+
+    A partition-backed version is detached and dropped in O(1);
+    ``known_count`` (``dataset_versions.data_points_count``) is reported
+    when set, otherwise the partition is counted before the drop. Raises
+    PartitionBusy (nothing removed, session rolled back) when the DETACH
+    kept timing out on its lock; the caller should retry later.
+    """
+    version_id = int(dataset_version_id)
+    if data_points_partitioned(db) and _partition_exists(db, version_id):
+        name = partition_name(version_id)
+        if known_count is None:
+            known_count = int(db.execute(text(f"SELECT count(*) FROM {name}")).scalar() or 0)
+        _detach_and_drop(db, name)
+        logger.info("Dropped data point partition %s (%d rows)", name, known_count)
+        return int(known_count)
+    return delete_in_batches(db, DataPoint, DataPoint.dataset_version_id == version_id)
+
+
+def _detach_and_drop(db: Session, name: str) -> None:
+    for attempt in range(1, PARTITION_DETACH_ATTEMPTS + 1):
+        try:
+            # SET LOCAL: the timeout ends with this transaction.
+            db.execute(text(f"SET LOCAL lock_timeout = '{PARTITION_LOCK_TIMEOUT_MS}ms'"))
+            db.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+            db.execute(text(f"DROP TABLE {name}"))
+            db.commit()
+            return
+        except DBAPIError as exc:
+            db.rollback()
+            if not _is_lock_timeout(exc):
+                raise
+            logger.warning(
+                "Detaching %s timed out on its lock (attempt %d/%d)",
+                name,
+                attempt,
+                PARTITION_DETACH_ATTEMPTS,
+            )
+        if attempt < PARTITION_DETACH_ATTEMPTS:
+            time.sleep(PARTITION_DETACH_RETRY_DELAY_S * attempt)
+    raise PartitionBusy(f"Partition {name} is busy; could not detach it.")
@@ -0,0 +1,712 @@
+"""
+Warm Docling worker pool for PDF ingestion.
+
+Goals:
+- keep long-lived parser processes that build Docling converters/chunkers once
+  per pipeline configuration instead of once per uploaded document
+- bound the number of in-flight parse requests so uploads fail fast (503)
+  instead of piling up behind a saturated parser
+- isolate parser crashes and runaway documents from the API process; the
+  timeout starts when a parse starts running, and only the process running
+  a timed-out or crashed parse is replaced
+- shard large PDFs into page ranges parsed in parallel, so table structure
+  extraction stays affordable for 500+ page handbooks
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Per API process (app.serve divides the container total across its workers).
+# 0 disables the process pool and parses inline (converters are still cached).
+DOCLING_WORKER_PROCESSES = max(0, int(os.getenv("DOCLING_WORKER_PROCESSES", "1")))
+# Parse requests allowed to wait for a free worker on top of the running ones.
+DOCLING_WORKER_QUEUE_SIZE = max(0, int(os.getenv("DOCLING_WORKER_QUEUE_SIZE", "8")))
+DOCLING_PARSE_TIMEOUT_S = max(1.0, float(os.getenv("DOCLING_PARSE_TIMEOUT_S", "1800")))
+DOCLING_CHUNK_MAX_TOKENS = 512
+# Sharded parsing: large PDFs are split into page ranges parsed in parallel.
+DOCLING_SHARD_MIN_PAGES = max(2, int(os.getenv("DOCLING_SHARD_MIN_PAGES", "120")))
+DOCLING_SHARD_PAGES = max(1, int(os.getenv("DOCLING_SHARD_PAGES", "40")))
+
+
+@dataclass(frozen=True)
+class DoclingParseConfig:
+    """Pipeline settings that determine which warm converter a parse uses."""
+
+    use_table_structure: bool
+    num_threads: int
+    max_chunk_chars: int
+    chunk_max_tokens: int = DOCLING_CHUNK_MAX_TOKENS
+
+    @property
+    def converter_key(self) -> Tuple[bool, int]:
+        return (self.use_table_structure, self.num_threads)
+
+
+class DocumentWorkerError(RuntimeError):
+    """Base error raised when a document could not be parsed by the pool."""
+
+
+class DocumentWorkerQueueFull(DocumentWorkerError):
+    """Raised when the bounded parse queue has no free slot."""
+
+
+class DocumentWorkerTimeout(DocumentWorkerError):
+    """Raised when a document exceeds the per-document parse timeout."""
+
+
+class DocumentWorkerCrashed(DocumentWorkerError):
+    """Raised when the worker process died while parsing a document."""
+
+
+class DocumentWorkerReservation:
+    """
+    Admission slot taken when an upload is accepted and consumed by its parse.
+
+    Reserving at upload time means concurrent uploads cannot all pass the
+    capacity check and then fail in the background. ``release`` is idempotent.
+    """
+
+    def __init__(self, pool: "DocumentWorkerPool"):
+        self._pool = pool
+        self._released = False
+        self._lock = threading.Lock()
+
+    def release(self) -> None:
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self._pool._release_slot()
+
+
+# ---------------------------------------------------------------------------
+# Per-process warm state (lives inside each worker process)
+# ---------------------------------------------------------------------------
+_WARM_CONVERTERS: Dict[Tuple[bool, int], Any] = {}
+_WARM_CHUNKERS: Dict[int, Any] = {}
+_WARM_LOCK = threading.Lock()
+
+
+def _build_converter(config: DoclingParseConfig):
+    from docling.datamodel.accelerator_options import AcceleratorDevice, AcceleratorOptions
+    from docling.datamodel.base_models import InputFormat
+    from docling.datamodel.pipeline_options import PdfPipelineOptions, TableStructureOptions
+    from docling.document_converter import DocumentConverter, PdfFormatOption
+
+    pipeline_options = PdfPipelineOptions()
+
+    # OCR: disable for native-text PDFs (FAR, CS-25, RTCA DO-xxx, etc.)
+    pipeline_options.do_ocr = False
+
+    pipeline_options.do_table_structure = config.use_table_structure
+    if config.use_table_structure:
+        pipeline_options.table_structure_options = TableStructureOptions(do_cell_matching=True)
+
+    # Enrichments: disable all — not needed for text-based RAG
+    pipeline_options.do_picture_classification = False
+    pipeline_options.do_picture_description = False
+    pipeline_options.do_code_enrichment = False
+    pipeline_options.do_formula_enrichment = False
+
+    # Image generation: disable — we only need text output
+    pipeline_options.generate_page_images = False
+    pipeline_options.generate_picture_images = False
+    pipeline_options.generate_parsed_pages = False
+
+    pipeline_options.accelerator_options = AcceleratorOptions(
+        num_threads=config.num_threads,
+        device=AcceleratorDevice.CPU,
+    )
+
+    return DocumentConverter(
+        format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)}
+    )
+
+
+def get_warm_converter(config: DoclingParseConfig):
+    """Return the converter for this config, building it on first use."""
+    key = config.converter_key
+    with _WARM_LOCK:
+        converter = _WARM_CONVERTERS.get(key)
+        if converter is None:
+            logger.info(
+                "Building Docling converter (pid=%d table_structure=%s threads=%d)",
+                os.getpid(),
+                config.use_table_structure,
+                config.num_threads,
+            )
+            converter = _build_converter(config)
+            _WARM_CONVERTERS[key] = converter
+        return converter
+
+
+def get_warm_chunker(max_tokens: int = DOCLING_CHUNK_MAX_TOKENS):
+    """Return a cached HybridChunker (tokenizer load is the expensive part)."""
+    with _WARM_LOCK:
+        chunker = _WARM_CHUNKERS.get(max_tokens)
+        if chunker is None:
+            from docling_core.transforms.chunker.hybrid_chunker import HybridChunker
+
+            chunker = HybridChunker(max_tokens=max_tokens)
+            _WARM_CHUNKERS[max_tokens] = chunker
+        return chunker
+
+
+def split_long_text(text_content: str, max_chars: int) -> List[str]:
+    """Split oversized chunks into smaller pieces to avoid tokenizer slow paths."""
+    if max_chars <= 0 or len(text_content) <= max_chars:
+        return [text_content]
+
+    pieces: List[str] = []
+    current = ""
+    for paragraph in text_content.split("\n\n"):
+        if len(paragraph) > max_chars:
+            if current:
+                pieces.append(current.strip())
+                current = ""
+            for i in range(0, len(paragraph), max_chars):
+                part = paragraph[i : i + max_chars].strip()
+                if part:
+                    pieces.append(part)
+            continue
+
+        candidate = f"{current}\n\n{paragraph}".strip() if current else paragraph
+        if len(candidate) <= max_chars:
+            current = candidate
+        else:
+            if current:
+                pieces.append(current.strip())
+            current = paragraph
+
+    if current:
+        pieces.append(current.strip())
+
+    return pieces or [text_content]
+
+
+def chunk_docling_document(doc: Any, chunker: Any, max_chunk_chars: int) -> List[dict]:
+    """Convert Docling chunks into { text, page_numbers, section_title } dicts."""
+    chunks: List[dict] = []
+    for chunk in chunker.chunk(doc):
+        # Extract page numbers from chunk metadata
+        pages = set()
+        if hasattr(chunk, "meta") and chunk.meta:
+            for item in getattr(chunk.meta, "doc_items", []):
+                for prov in getattr(item, "prov", []):
+                    page = getattr(prov, "page_no", None)
+                    if page is not None:
+                        pages.add(page)
+
+        # Extract section heading
+        section_title = None
+        if hasattr(chunk, "meta") and chunk.meta:
+            headings = getattr(chunk.meta, "headings", None)
+            if headings:
+                section_title = " > ".join(headings)
+
+        text_content = chunk.text.strip()
+        if not text_content:
+            continue
+
+        for text_piece in split_long_text(text_content, max_chunk_chars):
+            chunks.append(
+                {
+                    "text": text_piece,
+                    "page_numbers": ("-".join(str(p) for p in sorted(pages)) if pages else None),
+                    "section_title": section_title,
+                }
+            )
+    return chunks
+
+
+def parse_pdf_with_warm_converter(
+    pdf_path: str,
+    config: DoclingParseConfig,
+) -> Tuple[List[dict], Optional[int]]:
+    """Parse and chunk one PDF using this process's warm converter/chunker."""
+    converter = get_warm_converter(config)
+    result = converter.convert(pdf_path)
+    doc = result.document
+
+    chunks = chunk_docling_document(
+        doc,
+        get_warm_chunker(config.chunk_max_tokens),
+        config.max_chunk_chars,
+    )
+
+    total_pages = None
+    pages_obj = getattr(doc, "pages", None)
+    if pages_obj is not None:
+        try:
+            total_pages = len(pages_obj)
+        except TypeError:
+            total_pages = None
+    return chunks, total_pages
+
+
+def parse_pdf_page_range(
+    pdf_path: str,
+    config: DoclingParseConfig,
+    page_range: Tuple[int, int],
+) -> List[dict]:
+    """Parse one shard (1-based, inclusive page range) of a PDF."""
+    converter = get_warm_converter(config)
+    result = converter.convert(pdf_path, page_range=page_range)
+    # Docling keeps absolute page numbers in provenance for page-range
+    # conversions, so chunk page_numbers need no offset.
+    return chunk_docling_document(
+        result.document,
+        get_warm_chunker(config.chunk_max_tokens),
+        config.max_chunk_chars,
+    )
+
+
+def count_pdf_pages(pdf_path: str) -> Optional[int]:
+    """Cheap page count via pypdfium2 (installed with Docling); None if unknown."""
+    try:
+        import pypdfium2 as pdfium
+    except ImportError:
+        return None
+    try:
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+    except Exception as exc:
+        logger.warning("Could not count pages for %s: %s", pdf_path, exc)
+        return None
+
+
+def plan_page_shards(total_pages: int, pages_per_shard: int) -> List[Tuple[int, int]]:
+    """Split ``1..total_pages`` into near-equal inclusive page ranges."""
+    if total_pages <= 0:
+        return []
+    pages_per_shard = max(1, pages_per_shard)
+    shard_count = max(1, -(-total_pages // pages_per_shard))
+    # Spread pages evenly so the last shard is not a tiny straggler.
+    base, extra = divmod(total_pages, shard_count)
+    shards: List[Tuple[int, int]] = []
+    start = 1
+    for index in range(shard_count):
+        size = base + (1 if index < extra else 0)
+        shards.append((start, start + size - 1))
+        start += size
+    return shards
+
+
+def merge_shard_chunks(shard_chunks: Sequence[List[dict]]) -> List[dict]:
+    """
+    Concatenate per-shard chunk lists (given in page order) into one list.
+
+    A shard that starts mid-section has no heading for its leading chunks;
+    those inherit the last section title seen in the preceding shards so
+    citations keep pointing at the right section across shard boundaries.
+    """
+    merged: List[dict] = []
+    last_section_title: Optional[str] = None
+    for chunks in shard_chunks:
+        inheriting = True
+        for chunk in chunks:
+            section_title = chunk.get("section_title")
+            if section_title:
+                inheriting = False
+            elif inheriting and last_section_title:
+                chunk = {**chunk, "section_title": last_section_title}
+            merged.append(chunk)
+            if chunk.get("section_title"):
+                last_section_title = chunk["section_title"]
+    return merged
+
+
+def _warm_worker_process(config: Optional[DoclingParseConfig]) -> None:
+    """Pool initializer: load models before the first document arrives."""
+    if config is None:
+        return
+    try:
+        get_warm_converter(config)
+        get_warm_chunker(config.chunk_max_tokens)
+    except Exception as exc:  # pragma: no cover - depends on docling install
+        # A failed warm-up must not kill the worker; the parse call reports
+        # the real error for the document that needs it.
+        logger.warning("Docling worker warm-up failed (pid=%d): %s", os.getpid(), exc)
+
+
+def _worker_main(conn: Any, warm_config: Optional[DoclingParseConfig]) -> None:
+    """Worker process loop: run ``fn(*args)`` requests from ``conn`` one at a time."""
+    _warm_worker_process(warm_config)
+    while True:
+        try:
+            fn, args = conn.recv()
+        except (EOFError, OSError):
+            return  # parent closed the pipe (shutdown or parent exit)
+        try:
+            reply = (True, fn(*args))
+        except BaseException as exc:
+            reply = (False, exc)
+        try:
+            conn.send(reply)
+        except Exception as exc:  # unpicklable result or exception
+            conn.send((False, DocumentWorkerError(f"Unpicklable worker reply: {exc!r}")))
+
+
+class _WorkerProcess:
+    """
+    One long-lived parser process with its own pipe.
+
+    A worker runs a single task at a time, so a timeout or crash only ever
+    affects the document it was parsing and only this process is replaced.
+    """
+
+    def __init__(self, context: Any, warm_config: Optional[DoclingParseConfig]):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, warm_config),
+            name="docling-worker",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid
+
+    def call(self, fn: Callable[..., Any], args: tuple, timeout_s: float) -> Any:
+        """
+        Run ``fn(*args)`` here. Raises FutureTimeoutError past ``timeout_s`` and
+        EOFError/OSError when the process died.
+        """
+        self.conn.send((fn, args))
+        if not self.conn.poll(max(0.0, timeout_s)):
+            raise FutureTimeoutError()
+        ok, value = self.conn.recv()
+        if ok:
+            return value
+        raise value
+
+    def kill(self) -> None:
+        try:
+            if self.process.is_alive():
+                self.process.terminate()
+            self.process.join(5)
+            if self.process.is_alive():
+                self.process.kill()
+                self.process.join(1)
+        except Exception:
+            pass
+        self.conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Pool
+# ---------------------------------------------------------------------------
+
+
+class DocumentWorkerPool:
+    """
+    Bounded, self-healing set of parser processes for CPU-heavy document work.
+
+    Each task is handed to an idle worker process; its timeout starts only
+    then, so documents waiting for a worker never time out in the queue. A
+    task that times out or crashes gets its own worker terminated and
+    replaced, leaving parses running on the other workers untouched.
+
+    ``processes=0`` runs work inline in the calling thread while keeping the
+    same admission control, which is what tests and single-process dev
+    setups use.
+    """
+
+    def __init__(
+        self,
+        *,
+        processes: int,
+        queue_size: int,
+        timeout_s: float,
+        warm_config: Optional[DoclingParseConfig] = None,
+        crash_retries: int = 1,
+    ):
+        self.processes = max(0, int(processes))
+        self.capacity = max(1, self.processes + max(0, int(queue_size)))
+        self.timeout_s = float(timeout_s)
+        self.crash_retries = max(0, int(crash_retries))
+        self._warm_config = warm_config
+        self._context = multiprocessing.get_context("spawn")
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._lock = threading.Lock()
+        self._worker_available = threading.Condition(self._lock)
+        self._idle: List[_WorkerProcess] = []
+        self._spawned = 0
+        self._closed = False
+        self._in_flight = 0
+        self._restarts = 0
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def _spawn(self) -> _WorkerProcess:
+        return _WorkerProcess(self._context, self._warm_config)
+
+    def _checkout(self) -> _WorkerProcess:
+        """Wait for an idle worker, starting one while below ``processes``."""
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise DocumentWorkerCrashed("Document worker pool is shut down.")
+                if self._idle:
+                    return self._idle.pop()
+                if self._spawned < self.processes:
+                    self._spawned += 1
+                    break
+                self._worker_available.wait()
+        try:
+            return self._spawn()
+        except BaseException:
+            with self._lock:
+                self._spawned -= 1
+                self._worker_available.notify()
+            raise
+
+    def _checkin(self, worker: _WorkerProcess) -> None:
+        with self._lock:
+            if not self._closed:
+                self._idle.append(worker)
+                self._worker_available.notify()
+                return
+            self._spawned -= 1
+        worker.kill()
+
+    def _replace(self, worker: _WorkerProcess, reason: str) -> None:
+        """Terminate ``worker`` (its task is abandoned) and start a warm replacement."""
+        logger.warning("Replacing Docling worker (pid=%s): %s", worker.pid, reason)
+        worker.kill()
+        with self._lock:
+            self._restarts += 1
+            self._spawned -= 1
+            if self._closed or self._spawned >= self.processes:
+                self._worker_available.notify()
+                return
+            self._spawned += 1
+        try:
+            replacement = self._spawn()
+        except BaseException:
+            with self._lock:
+                self._spawned -= 1
+                self._worker_available.notify()
+            raise
+        self._checkin(replacement)
+
+    def prewarm(self) -> None:
+        """Spawn workers up-front so model loading happens before first upload."""
+        if self.processes == 0:
+            if self._warm_config is not None:
+                _warm_worker_process(self._warm_config)
+            return
+        with self._lock:
+            missing = max(0, self.processes - self._spawned)
+            self._spawned += missing
+        for _ in range(missing):
+            self._checkin(self._spawn())
+
+    def shutdown(self) -> None:
+        """Stop idle workers now; busy ones are stopped when their task returns."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._spawned -= len(idle)
+            self._worker_available.notify_all()
+        for worker in idle:
+            worker.kill()
+
+    # -- admission ---------------------------------------------------------
+
+    def has_capacity(self) -> bool:
+        with self._lock:
+            return self._in_flight < self.capacity
+
+    def reserve(self) -> DocumentWorkerReservation:
+        """Take an admission slot now for a parse that runs later."""
+        self._acquire_slot()
+        return DocumentWorkerReservation(self)
+
+    def _acquire_slot(self) -> None:
+        if not self._slots.acquire(blocking=False):
+            raise DocumentWorkerQueueFull(
+                f"Document parse queue is full ({self.capacity} in flight)."
+            )
+        with self._lock:
+            self._in_flight += 1
+
+    def _release_slot(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "processes": self.processes,
+                "capacity": self.capacity,
+                "in_flight": self._in_flight,
+                "restarts": self._restarts,
+            }
+
+    def run(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        timeout_s: Optional[float] = None,
+        reservation: Optional[DocumentWorkerReservation] = None,
+    ) -> Any:
+        """
+        Run ``fn(*args)`` on a pool worker and wait for the result.
+
+        Uses ``reservation`` as the admission slot when given (and releases
+        it); otherwise raises DocumentWorkerQueueFull when no slot is free.
+        Raises DocumentWorkerTimeout when the call runs longer than its
+        timeout, and DocumentWorkerCrashed when its worker died (after
+        ``crash_retries`` retries on a fresh worker).
+        """
+        return self.run_many(fn, [args], timeout_s=timeout_s, reservation=reservation)[0]
+
+    def run_many(
+        self,
+        fn: Callable[..., Any],
+        arg_list: Sequence[tuple],
+        timeout_s: Optional[float] = None,
+        reservation: Optional[DocumentWorkerReservation] = None,
+    ) -> List[Any]:
+        """
+        Run ``fn`` once per argument tuple in parallel, returning results in order.
+
+        The whole batch counts as one admission slot (one document) and shares
+        a single running-time budget that starts when its first call starts,
+        so a sharded parse cannot starve other uploads of queue slots or
+        outlive the per-document timeout.
+        """
+        if reservation is None:
+            reservation = self.reserve()
+        try:
+            if self.processes == 0:
+                return [fn(*args) for args in arg_list]
+            return self._run_in_pool(
+                fn, list(arg_list), self.timeout_s if timeout_s is None else timeout_s
+            )
+        finally:
+            reservation.release()
+
+    def _run_in_pool(
+        self, fn: Callable[..., Any], arg_list: List[tuple], timeout_s: float
+    ) -> List[Any]:
+        batch = _BatchBudget(timeout_s)
+        if len(arg_list) == 1:
+            return [self._run_one(fn, arg_list[0], batch)]
+        with ThreadPoolExecutor(
+            max_workers=min(len(arg_list), max(1, self.processes)),
+            thread_name_prefix="docling-dispatch",
+        ) as dispatch:
+            futures = [dispatch.submit(self._run_one, fn, args, batch) for args in arg_list]
+            try:
+                return [future.result() for future in futures]
+            except BaseException:
+                batch.abandon()
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def _run_one(self, fn: Callable[..., Any], args: tuple, batch: "_BatchBudget") -> Any:
+        attempts = 0
+        while True:
+            worker = self._checkout()
+            remaining = batch.start()
+            if remaining is None:
+                self._checkin(worker)
+                raise DocumentWorkerTimeout(
+                    f"Document parsing exceeded the {batch.timeout_s:.0f}s timeout."
+                )
+            try:
+                result = worker.call(fn, args, remaining)
+            except FutureTimeoutError as exc:
+                self._replace(worker, f"parse exceeded {batch.timeout_s:.0f}s timeout")
+                raise DocumentWorkerTimeout(
+                    f"Document parsing exceeded the {batch.timeout_s:.0f}s timeout."
+                ) from exc
+            except (EOFError, OSError) as exc:
+                self._replace(worker, "worker process terminated unexpectedly")
+                attempts += 1
+                if attempts > self.crash_retries:
+                    raise DocumentWorkerCrashed(
+                        "Document parser process terminated unexpectedly."
+                    ) from exc
+                continue
+            except BaseException:
+                # fn raised inside the worker; the process itself is healthy.
+                self._checkin(worker)
+                raise
+            self._checkin(worker)
+            return result
+
+
+class _BatchBudget:
+    """Running-time budget shared by the calls of one ``run_many`` batch."""
+
+    def __init__(self, timeout_s: float):
+        self.timeout_s = timeout_s
+        self._deadline: Optional[float] = None
+        self._abandoned = False
+        self._lock = threading.Lock()
+
+    def start(self) -> Optional[float]:
+        """Seconds left for a call starting now; None once spent or abandoned."""
+        with self._lock:
+            if self._abandoned:
+                return None
+            now = time.monotonic()
+            if self._deadline is None:
+                self._deadline = now + self.timeout_s
+            remaining = self._deadline - now
+            return remaining if remaining > 0 else None
+
+    def abandon(self) -> None:
+        with self._lock:
+            self._abandoned = True
+
+
+_pool: Optional[DocumentWorkerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_document_worker_pool(
+    warm_config: Optional[DoclingParseConfig] = None,
+) -> DocumentWorkerPool:
+    """Return the process-wide ingestion pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DocumentWorkerPool(
+                processes=DOCLING_WORKER_PROCESSES,
+                queue_size=DOCLING_WORKER_QUEUE_SIZE,
+                timeout_s=DOCLING_PARSE_TIMEOUT_S,
+                warm_config=warm_config,
+            )
+        return _pool
+
+
+def shutdown_document_worker_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool = _pool
+        _pool = None
+    if pool is not None:
+        pool.shutdown()
@@ -7,13 +7,28 @@ import asyncio
 import sys
 import time
 
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.exc import OperationalError
 
+from app.analysis_job_queue import shutdown_analysis_job_queue
 from app.config import settings
-from app.database import Base, engine
+from app.cpu_workers import shutdown_cpu_worker_pool
+from app.database import Base, dispose_read_engines, engine
+from app.dataset_gc import resume_dataset_gc_jobs
+from app.docling_workers import shutdown_document_worker_pool
+from app.metrics import (
+    METRICS_ENABLED,
+    MetricsMiddleware,
+    install_engine_metrics,
+    start_snapshot_writer,
+    stop_snapshot_writer,
+)
+from app.password_hashing import password_hasher
+from app.profiling import ProfilingMiddleware
 from app.routers import admin, auth, documents, flight_tests, frat, health, parameters, users
+from app.serve import claim_background_leader
 
 # Initialize FastAPI application
 app = FastAPI(
@@ -28,6 +43,9 @@ app = FastAPI(
 @app.on_event("startup")
 async def startup_event():
     """Startup event handler"""
+    # Sync-Session handlers run in this threadpool; size it to the DB pool
+    # so in-flight requests scale with connections instead of 40 threads.
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.request_threadpool_size
     # Avoid touching the real DB during pytest runs; tests provide
     # their own in-memory DB.
     if "pytest" not in sys.modules:
@@ -57,6 +75,14 @@ async def startup_event():
                     raise exc
                 sleep_seconds = min(2 ** min(attempt, 5), max(1.0, remaining))
                 await asyncio.sleep(sleep_seconds)
+        # Every worker parses uploads with its own pool (app.serve divides the
+        # pool settings across workers); only one worker resumes jobs.
+        documents.prewarm_document_workers()
+        if claim_background_leader():
+            documents.resume_queued_analysis_jobs()
+            documents.resume_pending_document_deletions()
+            resume_dataset_gc_jobs()
+    start_snapshot_writer()
     print("🚀 FTIAS Backend starting...")
 
 
@@ -69,6 +95,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# On-demand / slow-request sampling profiles (listed under /api/admin/profiles)
+app.add_middleware(ProfilingMiddleware)
+
+# Request metrics (/api/metrics, Server-Timing); outermost so it times CORS too
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    install_engine_metrics(engine)
+
 # Include routers
 app.include_router(health.router, prefix="/api", tags=["Health"])
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
@@ -101,4 +135,11 @@ async def root():
 @app.on_event("shutdown")
 async def shutdown_event():
     """Shutdown event handler"""
+    shutdown_document_worker_pool()
+    shutdown_cpu_worker_pool()
+    shutdown_analysis_job_queue()
+    documents.shutdown_document_purges()
+    password_hasher.shutdown()
+    dispose_read_engines()
+    stop_snapshot_writer()
     print("👋 FTIAS Backend shutting down...")
@@ -0,0 +1,622 @@
+"""
+In-process request and pipeline metrics in Prometheus text format.
+
+Goals:
+- record per-route latency histograms, in-flight requests, DB pool checkout
+  wait and per-request SQL statement counts/time (SQLAlchemy engine events)
+- record pipeline throughput and dependency latency: ingest rows and
+  duration, embedding batch latency, LLM call latency and token counts,
+  cache hits/misses
+- expose everything at ``/api/metrics`` and summarize each response in a
+  ``Server-Timing`` header (``app``, ``db`` with the statement count)
+- cost nothing measurable when ``METRICS_ENABLED=false``: no middleware, no
+  engine listeners, and every ``record_*`` helper returns immediately
+
+Metrics are recorded per process. Under ``app.serve`` a scrape lands on one
+arbitrary worker, so every worker also writes a snapshot to
+``METRICS_MULTIPROC_DIR`` (set by ``app.serve``) and ``/api/metrics`` sums
+them: counters and histograms of exited workers are kept so totals never go
+backwards, gauges only count live workers.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").strip().lower() in {"1", "true", "yes", "on"}
+# When set, /api/metrics requires "Authorization: Bearer <token>".
+METRICS_SCRAPE_TOKEN = os.getenv("METRICS_SCRAPE_TOKEN", "")
+# Shared directory for per-worker snapshots; empty serves this process only.
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")
+METRICS_SNAPSHOT_INTERVAL_S = max(1.0, float(os.getenv("METRICS_SNAPSHOT_INTERVAL_S", "5")))
+
+LATENCY_BUCKETS_S = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+WAIT_BUCKETS_S = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+LLM_BUCKETS_S = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250, 1000)
+
+_LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> _LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def samples(self) -> Iterator[str]:  # pragma: no cover - abstract
+        raise NotImplementedError
+
+    def state(self) -> List[Any]:  # pragma: no cover - abstract
+        """JSON-serializable values, for ``merge_state`` in another process."""
+        raise NotImplementedError
+
+    def merge_state(self, state: List[Any]) -> None:  # pragma: no cover - abstract
+        raise NotImplementedError
+
+    def empty_copy(self) -> "_Metric":
+        return type(self)(self.name, self.documentation, self.label_names)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[_LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.label_names, key)} {_format_number(value)}"
+
+    def state(self) -> List[Any]:
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def merge_state(self, state: List[Any]) -> None:
+        with self._lock:
+            for key, value in state:
+                key = tuple(key)
+                self._values[key] = self._values.get(key, 0.0) + value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, label_names=(), buckets=LATENCY_BUCKETS_S):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+        # label values -> [per-bucket counts..., +Inf count], sum
+        self._values: Dict[_LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = ([0] * (len(self.buckets) + 1), [0.0])
+                self._values[key] = entry
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def count(self, **labels: Any) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return sum(entry[0]) if entry else 0
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted(
+                (key, (list(counts), total[0])) for key, (counts, total) in self._values.items()
+            )
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.label_names, key, f'le="{_format_number(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.label_names, key)
+            yield f"{self.name}_sum{labels} {_format_number(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+    def state(self) -> List[Any]:
+        with self._lock:
+            return [
+                [list(key), list(counts), total[0]] for key, (counts, total) in self._values.items()
+            ]
+
+    def merge_state(self, state: List[Any]) -> None:
+        with self._lock:
+            for key, counts, total in state:
+                if len(counts) != len(self.buckets) + 1:
+                    continue  # bucket layout changed between releases
+                entry = self._values.setdefault(tuple(key), ([0] * (len(self.buckets) + 1), [0.0]))
+                for index, count in enumerate(counts):
+                    entry[0][index] += count
+                entry[1][0] += total
+
+    def empty_copy(self) -> "Histogram":
+        return Histogram(self.name, self.documentation, self.label_names, self.buckets)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> Any:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Iterable[float] = LATENCY_BUCKETS_S,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = [self._metrics[name] for name in sorted(self._metrics)]
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, List[Any]]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.state() for metric in metrics}
+
+    def merge(self, snapshot: Dict[str, List[Any]], *, include_gauges: bool = True) -> None:
+        with self._lock:
+            metrics = dict(self._metrics)
+        for name, state in snapshot.items():
+            metric = metrics.get(name)
+            if metric is None or (metric.kind == "gauge" and not include_gauges):
+                continue
+            metric.merge_state(state)
+
+    def empty_copy(self) -> "MetricsRegistry":
+        copy = MetricsRegistry()
+        with self._lock:
+            for metric in self._metrics.values():
+                copy._register(metric.empty_copy())
+        return copy
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "ftias_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route", "status"),
+)
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "ftias_http_requests_in_flight", "HTTP requests currently being served."
+)
+HTTP_REQUEST_DB_STATEMENTS = REGISTRY.histogram(
+    "ftias_http_request_db_statements",
+    "SQL statements executed per HTTP request.",
+    ("method", "route"),
+    buckets=STATEMENT_BUCKETS,
+)
+DB_POOL_CHECKOUT_WAIT = REGISTRY.histogram(
+    "ftias_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled DB connection.",
+    ("pool",),
+    buckets=WAIT_BUCKETS_S,
+)
+INGEST_ROWS = REGISTRY.counter(
+    "ftias_ingest_rows_total", "Rows (CSV) or chunks (documents) ingested.", ("source",)
+)
+INGEST_DURATION = REGISTRY.histogram(
+    "ftias_ingest_duration_seconds",
+    "Wall time of an ingest; rows/s = rate(rows_total) / rate(duration_sum).",
+    ("source",),
+    buckets=LLM_BUCKETS_S,
+)
+EMBEDDING_BATCH_DURATION = REGISTRY.histogram(
+    "ftias_embedding_batch_duration_seconds",
+    "Embedding API call latency per batch.",
+    ("model",),
+    buckets=LLM_BUCKETS_S,
+)
+EMBEDDING_INPUTS = REGISTRY.counter(
+    "ftias_embedding_inputs_total", "Texts sent to the embedding API.", ("model",)
+)
+LLM_REQUEST_DURATION = REGISTRY.histogram(
+    "ftias_llm_request_duration_seconds",
+    "Chat completion latency (streams: until the last chunk).",
+    ("model", "stream", "outcome"),
+    buckets=LLM_BUCKETS_S,
+)
+LLM_TOKENS = REGISTRY.counter(
+    "ftias_llm_tokens_total", "Tokens reported by the LLM provider.", ("model", "kind")
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    "ftias_cache_lookups_total", "Cache lookups by cache and result.", ("cache", "result")
+)
+WORKLOAD_SLOTS_IN_USE = REGISTRY.gauge(
+    "ftias_workload_slots_in_use", "Admission slots held per workload class.", ("workload",)
+)
+WORKLOAD_REJECTIONS = REGISTRY.counter(
+    "ftias_workload_rejections_total",
+    "Requests rejected with 503 because their workload class was saturated.",
+    ("workload",),
+)
+DB_READ_ROUTING = REGISTRY.counter(
+    "ftias_db_read_routing_total",
+    "Analytical reads by target "
+    "(replica, primary_stale, primary_unavailable, primary_replica_failed).",
+    ("target",),
+)
+
+
+# ---------------------------------------------------------------------------
+# Multi-process aggregation (app.serve workers)
+# ---------------------------------------------------------------------------
+
+_snapshot_stop = threading.Event()
+
+
+def _snapshot_path(directory: str, pid: int) -> str:
+    return os.path.join(directory, f"metrics-{pid}.json")
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # exists, owned by someone else
+    return True
+
+
+def write_process_snapshot(directory: Optional[str] = None) -> None:
+    """Atomically replace this process's snapshot file in ``directory``."""
+    directory = directory or METRICS_MULTIPROC_DIR
+    if not directory:
+        return
+    path = _snapshot_path(directory, os.getpid())
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as handle:
+        json.dump(REGISTRY.snapshot(), handle)
+    os.replace(temp_path, path)
+
+
+def render_metrics() -> str:
+    """This process's metrics, or all workers' summed when snapshots are shared."""
+    directory = METRICS_MULTIPROC_DIR
+    if not directory:
+        return REGISTRY.render()
+    write_process_snapshot(directory)
+    merged = REGISTRY.empty_copy()
+    for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+        try:
+            pid = int(os.path.basename(path)[len("metrics-") : -len(".json")])
+            with open(path, encoding="utf-8") as handle:
+                snapshot = json.load(handle)
+        except (OSError, ValueError):
+            continue
+        merged.merge(snapshot, include_gauges=_process_alive(pid))
+    return merged.render()
+
+
+def start_snapshot_writer() -> None:
+    """Refresh this worker's snapshot every ``METRICS_SNAPSHOT_INTERVAL_S``."""
+    if not (METRICS_ENABLED and METRICS_MULTIPROC_DIR):
+        return
+
+    def _loop() -> None:
+        while not _snapshot_stop.wait(METRICS_SNAPSHOT_INTERVAL_S):
+            try:
+                write_process_snapshot()
+            except OSError:
+                logger.exception("Writing the metrics snapshot failed")
+
+    _snapshot_stop.clear()
+    threading.Thread(target=_loop, name="metrics-snapshot", daemon=True).start()
+
+
+def stop_snapshot_writer() -> None:
+    """Stop refreshing and leave a final snapshot so this worker's totals survive it."""
+    _snapshot_stop.set()
+    if METRICS_ENABLED and METRICS_MULTIPROC_DIR:
+        try:
+            write_process_snapshot()
+        except OSError:
+            logger.exception("Writing the final metrics snapshot failed")
+
+
+# ---------------------------------------------------------------------------
+# Per-request accounting
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class RequestStats:
+    db_statements: int = 0
+    db_seconds: float = 0.0
+
+
+_request_stats: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "ftias_request_stats", default=None
+)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+def server_timing_header(app_seconds: float, stats: RequestStats) -> str:
+    return (
+        f"app;dur={app_seconds * 1000.0:.1f}, "
+        f'db;dur={stats.db_seconds * 1000.0:.1f};desc="{stats.db_statements} queries"'
+    )
+
+
+def route_template(scope) -> str:
+    """Matched route path template (bounded label cardinality), else "unmatched"."""
+    path = getattr(scope.get("route"), "path", None)
+    if path is None:
+        return "unmatched"
+    # FastAPI keeps included routes unprefixed and records the include prefix.
+    included = (scope.get("fastapi") or {}).get("included_router")
+    prefix = getattr(getattr(included, "include_context", None), "prefix", "") or ""
+    return prefix + path
+
+
+class MetricsMiddleware:
+    """ASGI middleware: latency, in-flight gauge, SQL counts and Server-Timing."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status_holder = {"status": 500}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status_holder["status"] = message["status"]
+                elapsed = time.perf_counter() - started
+                headers = list(message.get("headers", []))
+                headers.append(
+                    (b"server-timing", server_timing_header(elapsed, stats).encode("latin-1"))
+                )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            _request_stats.reset(token)
+            route = route_template(scope)
+            method = scope.get("method", "")
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                method=method,
+                route=route,
+                status=status_holder["status"],
+            )
+            HTTP_REQUEST_DB_STATEMENTS.observe(stats.db_statements, method=method, route=route)
+
+
+def install_engine_metrics(engine, pool_name: str = "primary") -> None:
+    """Count statements/time per request and time pool checkouts on ``engine``."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("ftias_query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("ftias_query_started")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.db_statements += 1
+            stats.db_seconds += elapsed
+
+    # SQLAlchemy has no "checkout requested" event, so time raw_connection()
+    # itself. Wrapping the engine (not the pool) survives engine.dispose().
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return raw_connection(*args, **kwargs)
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started, pool=pool_name)
+
+    engine.raw_connection = timed_raw_connection
+
+
+# ---------------------------------------------------------------------------
+# Pipeline helpers (no-ops when metrics are disabled)
+# ---------------------------------------------------------------------------
+
+
+def record_ingest(source: str, rows: int, duration_s: float) -> None:
+    if not METRICS_ENABLED:
+        return
+    INGEST_ROWS.inc(rows, source=source)
+    INGEST_DURATION.observe(duration_s, source=source)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    if not METRICS_ENABLED:
+        return
+    CACHE_LOOKUPS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_workload_slots(workload: str, delta: int) -> None:
+    if not METRICS_ENABLED:
+        return
+    WORKLOAD_SLOTS_IN_USE.inc(delta, workload=workload)
+
+
+def record_workload_rejection(workload: str) -> None:
+    if not METRICS_ENABLED:
+        return
+    WORKLOAD_REJECTIONS.inc(workload=workload)
+
+
+def record_read_routing(target: str) -> None:
+    if not METRICS_ENABLED:
+        return
+    DB_READ_ROUTING.inc(target=target)
+
+
+def record_embedding_batch(model: str, inputs: int, duration_s: float) -> None:
+    if not METRICS_ENABLED:
+        return
+    EMBEDDING_BATCH_DURATION.observe(duration_s, model=model)
+    EMBEDDING_INPUTS.inc(inputs, model=model)
+
+
+def record_llm_call(
+    model: str, duration_s: float, *, stream: bool = False, ok: bool = True, usage: Any = None
+) -> None:
+    if not METRICS_ENABLED:
+        return
+    LLM_REQUEST_DURATION.observe(
+        duration_s,
+        model=model,
+        stream="true" if stream else "false",
+        outcome="ok" if ok else "error",
+    )
+    for kind in ("prompt_tokens", "completion_tokens"):
+        tokens = getattr(usage, kind, None) if usage is not None else None
+        if isinstance(tokens, int):
+            LLM_TOKENS.inc(tokens, model=model, kind=kind.split("_")[0])
+
+
+def _timed_stream(stream: Any, model: str, started: float) -> Iterator[Any]:
+    ok = False
+    usage = None
+    try:
+        for chunk in stream:
+            usage = getattr(chunk, "usage", None) or usage
+            yield chunk
+        ok = True
+    finally:
+        record_llm_call(model, time.perf_counter() - started, stream=True, ok=ok, usage=usage)
+
+
+def instrument_openai_client(client: Any) -> Any:
+    """Wrap chat.completions.create and embeddings.create with latency/token metrics."""
+    if not METRICS_ENABLED:
+        return client
+    completions = client.chat.completions
+    embeddings = client.embeddings
+    create_completion = completions.create
+    create_embedding = embeddings.create
+
+    def timed_completion(*args, **kwargs):
+        model = str(kwargs.get("model", ""))
+        started = time.perf_counter()
+        try:
+            result = create_completion(*args, **kwargs)
+        except Exception:
+            record_llm_call(model, time.perf_counter() - started, ok=False)
+            raise
+        if kwargs.get("stream"):
+            return _timed_stream(result, model, started)
+        record_llm_call(model, time.perf_counter() - started, usage=getattr(result, "usage", None))
+        return result
+
+    def timed_embedding(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return create_embedding(*args, **kwargs)
+        finally:
+            texts = kwargs.get("input")
+            record_embedding_batch(
+                str(kwargs.get("model", "")),
+                len(texts) if isinstance(texts, list) else 1,
+                time.perf_counter() - started,
+            )
+
+    completions.create = timed_completion
+    embeddings.create = timed_embedding
+    return client
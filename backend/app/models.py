@@ -14,11 +14,13 @@ except ImportError:
 
     _PGVECTOR_AVAILABLE = False
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -75,6 +77,7 @@ class FlightTest(Base):
         "DataPoint",
         back_populates="flight_test",
         cascade="all, delete-orphan",
+        passive_deletes=True,
     )
     ingestion_sessions = relationship(
         "IngestionSession",
@@ -199,7 +202,7 @@ class DataPoint(Base):
     id = Column(Integer, primary_key=True, index=True)
     flight_test_id = Column(
         Integer,
-        ForeignKey("flight_tests.id"),
+        ForeignKey("flight_tests.id", ondelete="CASCADE"),
         nullable=False,
         index=True,
     )
@@ -209,16 +212,28 @@ class DataPoint(Base):
         nullable=False,
         index=True,
     )
+    # Indexed by ix_data_points_version_param_ts (leading column).
     dataset_version_id = Column(
         Integer,
         ForeignKey("dataset_versions.id"),
         nullable=True,
-        index=True,
     )
     timestamp = Column(DateTime(timezone=True), nullable=False, index=True)
     value = Column(Float, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Series reads filter on (dataset version, parameter) and order by time;
+    # on PostgreSQL the INCLUDE columns make them index-only ordered scans.
+    __table_args__ = (
+        Index(
+            "ix_data_points_version_param_ts",
+            "dataset_version_id",
+            "parameter_id",
+            "timestamp",
+            postgresql_include=["value", "flight_test_id"],
+        ),
+    )
+
     # Relationships
     flight_test = relationship("FlightTest", back_populates="data_points")
     parameter = relationship("TestParameter", back_populates="data_points")
@@ -256,7 +271,7 @@ class Document(Base):
     aircraft_scope = Column(String(128), nullable=True)
     system_scope = Column(String(128), nullable=True)
     source_priority = Column(Integer, nullable=False, default=60)
-    status = Column(String(50), default="processing")  # processing | ready | error
+    status = Column(String(50), default="processing")  # processing | ready | error | deleting
     error_message = Column(Text, nullable=True)
     uploaded_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -264,10 +279,12 @@ class Document(Base):
 
     # Relationships
     uploaded_by = relationship("User", backref="documents")
+    # Chunks are removed by batched deletes / ON DELETE CASCADE, never loaded for deletion.
     chunks = relationship(
         "DocumentChunk",
         back_populates="document",
         cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
     def __repr__(self):
@@ -283,12 +300,17 @@ class DocumentChunk(Base):
     __tablename__ = "document_chunks"
 
     id = Column(Integer, primary_key=True, index=True)
-    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False, index=True)
+    document_id = Column(
+        Integer, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True
+    )
     chunk_index = Column(Integer, nullable=False)  # order within the document
     text = Column(Text, nullable=False)  # raw chunk text
     page_numbers = Column(String(255), nullable=True)  # e.g. "12-14"
     section_title = Column(String(512), nullable=True)  # heading from Docling
     embedding = Column(Vector(1536), nullable=True)  # OpenAI text-embedding-3-small
+    # SHA-256 of normalized text; with embedding_model it keys embedding reuse.
+    content_sha256 = Column(String(64), nullable=True, index=True)
+    embedding_model = Column(String(128), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
@@ -301,8 +323,32 @@ class DocumentChunk(Base):
         )
 
 
+class RetrievalCorpusVersion(Base):
+    """
+    Per-owner document library version. Bumped whenever the set of ready
+    documents changes so cached retrieval results keyed on it go stale.
+    """
+
+    __tablename__ = "retrieval_corpus_versions"
+
+    owner_user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return (
+            f"<RetrievalCorpusVersion(owner_user_id={self.owner_user_id}, "
+            f"version={self.version})>"
+        )
+
+
 class AnalysisJob(Base):
-    """Immutable persisted AI analysis artifact + provenance metadata."""
+    """
+    Immutable persisted AI analysis artifact + provenance metadata.
+
+    Jobs submitted through the queue start as placeholder rows and are filled
+    in once by the worker when they complete.
+    """
 
     __tablename__ = "analysis_jobs"
 
@@ -320,7 +366,13 @@ class AnalysisJob(Base):
         nullable=True,
         index=True,
     )
-    status = Column(String(32), nullable=False, default="completed")
+    # queued | running | completed | failed | cancelled
+    status = Column(String(32), nullable=False, default="completed", index=True)
+    progress_stage = Column(String(32), nullable=True)
+    error_message = Column(Text, nullable=True)
+    request_json = Column(Text, nullable=True)  # submitted AIAnalysisRequest (queued jobs)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # refreshed while running
     model_name = Column(String(128), nullable=False)
     model_version = Column(String(128), nullable=True)
     parameters_analysed = Column(Integer, nullable=False, default=0)
@@ -332,6 +384,13 @@ class AnalysisJob(Base):
     retrieved_sources_snapshot_json = Column(Text, nullable=False, default="[]")
     output_sha256 = Column(String(64), nullable=False, index=True)
     analysis_text = Column(Text, nullable=False)
+    # LLM completion cache provenance: prompt fingerprint, and the job whose
+    # completion was reused when this job was served from the cache.
+    completion_fingerprint = Column(String(64), nullable=True, index=True)
+    completion_cache_hit = Column(Boolean, nullable=False, default=False)
+    reused_from_analysis_job_id = Column(
+        Integer, ForeignKey("analysis_jobs.id", ondelete="SET NULL"), nullable=True
+    )
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -347,6 +406,34 @@ class AnalysisJob(Base):
         )
 
 
+class LlmCompletionCache(Base):
+    """
+    Stored LLM completion keyed by a SHA-256 fingerprint of the full request
+    (model, temperature, max_tokens, system and user prompts).
+    """
+
+    __tablename__ = "llm_completion_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    prompt_sha256 = Column(String(64), nullable=False, unique=True, index=True)
+    model_name = Column(String(128), nullable=False)
+    temperature = Column(Float, nullable=False)
+    max_tokens = Column(Integer, nullable=False)
+    completion_text = Column(Text, nullable=False)
+    source_analysis_job_id = Column(
+        Integer, ForeignKey("analysis_jobs.id", ondelete="SET NULL"), nullable=True
+    )
+    hit_count = Column(Integer, nullable=False, default=0)
+    last_hit_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return (
+            f"<LlmCompletionCache(id={self.id}, model_name={self.model_name}, "
+            f"hit_count={self.hit_count})>"
+        )
+
+
 class DatasetVersion(Base):
     """Immutable uploaded dataset version under a flight test."""
 
@@ -397,6 +484,37 @@ class DatasetVersion(Base):
         )
 
 
+class DatasetGcJob(Base):
+    """Background reclamation of failed/superseded dataset versions, with progress."""
+
+    __tablename__ = "dataset_gc_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    requested_by_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    flight_test_id = Column(
+        Integer, ForeignKey("flight_tests.id", ondelete="SET NULL"), nullable=True
+    )
+    status = Column(String(32), nullable=False, default="queued", index=True)
+    include_superseded = Column(Boolean, nullable=False, default=False)
+    total_versions = Column(Integer, nullable=False, default=0)
+    processed_versions = Column(Integer, nullable=False, default=0)
+    reclaimed_versions = Column(Integer, nullable=False, default=0)
+    skipped_versions = Column(Integer, nullable=False, default=0)
+    reclaimed_data_points = Column(BigInteger, nullable=False, default=0)
+    error_message = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return (
+            f"<DatasetGcJob(id={self.id}, status={self.status}, "
+            f"processed={self.processed_versions}/{self.total_versions})>"
+        )
+
+
 class FratAssessment(Base):
     """Persisted FRAT / mission-risk workflow artifact."""
 
@@ -0,0 +1,56 @@
+"""
+Deferred imports for heavy optional AI/ML and document dependencies.
+
+Goals:
+- keep ``import app.main`` (every API worker, pytest session and CLI script
+  such as ``reset_password.py``) from loading openai, docling's
+  torch/transformers stack, reportlab or sentence-transformers until an
+  endpoint actually needs them
+- answer "is it installed?" from the import system's module finder, which
+  locates the package without executing it
+- import each module at most once per process and report missing packages
+  by their pip name
+"""
+
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import threading
+from functools import lru_cache
+from types import ModuleType
+from typing import Dict, Iterable, List
+
+# pip distribution name -> top-level import name
+HEAVY_PACKAGES: Dict[str, str] = {
+    "openai": "openai",
+    "docling": "docling",
+    "reportlab": "reportlab",
+    "sentence-transformers": "sentence_transformers",
+}
+
+_import_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def is_installed(package: str) -> bool:
+    """True when ``package`` (pip name) can be imported; does not import it."""
+    module_name = HEAVY_PACKAGES.get(package, package)
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def missing_packages(packages: Iterable[str]) -> List[str]:
+    return [package for package in packages if not is_installed(package)]
+
+
+def load_module(module_name: str) -> ModuleType:
+    """Import ``module_name`` on first use (thread-safe; raises ImportError)."""
+    with _import_lock:
+        return importlib.import_module(module_name)
+
+
+def openai_client_class():
+    return load_module("openai").OpenAI
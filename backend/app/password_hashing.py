@@ -0,0 +1,108 @@
+"""
+Bounded off-loop password hashing and verification.
+
+Goals:
+- run pbkdf2_sha256 hashing/verification on a small dedicated thread pool
+  (hashlib's PBKDF2 releases the GIL, so workers hash in parallel) instead
+  of on the event loop or the shared request threadpool, so a login burst
+  cannot starve chart and polling requests
+- cap queued work: past PASSWORD_HASH_MAX_PENDING in-flight operations,
+  callers get ``PasswordHashingBusy`` and login answers 503 + Retry-After
+- upgrade stored hashes transparently on login when the configured
+  PASSWORD_HASH_ROUNDS rises (``verify_and_update``)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional, Tuple, TypeVar
+
+from passlib.context import CryptContext
+
+# passlib's pbkdf2_sha256 default; hashes below this are rehashed on login.
+PASSWORD_HASH_ROUNDS = max(1000, int(os.getenv("PASSWORD_HASH_ROUNDS", "29000")))
+PASSWORD_HASH_WORKERS = max(1, int(os.getenv("PASSWORD_HASH_WORKERS", "2")))
+PASSWORD_HASH_MAX_PENDING = max(1, int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64")))
+PASSWORD_HASH_RETRY_AFTER_S = 2
+
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=PASSWORD_HASH_ROUNDS,
+    pbkdf2_sha256__min_rounds=PASSWORD_HASH_ROUNDS,
+)
+
+T = TypeVar("T")
+
+
+class PasswordHashingBusy(RuntimeError):
+    """Raised when the hashing pool already has the maximum pending operations."""
+
+
+class PasswordHasher:
+    """Fixed-size thread pool with a bound on queued + running operations."""
+
+    def __init__(
+        self,
+        workers: int = PASSWORD_HASH_WORKERS,
+        max_pending: int = PASSWORD_HASH_MAX_PENDING,
+        context: CryptContext = pwd_context,
+    ):
+        self.workers = max(1, int(workers))
+        self.max_pending = max(1, int(max_pending))
+        self.context = context
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._pending
+
+    def _submit(self, fn: Callable[..., T], *args) -> "Future[T]":
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise PasswordHashingBusy("Too many concurrent password operations")
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="password-hash"
+                )
+            future = self._executor.submit(fn, *args)
+            self._pending += 1
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    # Blocking variants for sync handlers and scripts (wait on the pool).
+    def hash(self, password: str) -> str:
+        return self._submit(self.context.hash, password).result()
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return self._submit(self.context.verify, password, hashed_password).result()
+
+    # Awaitable variants for async handlers.
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit(self.context.hash, password))
+
+    async def verify_and_update_async(
+        self, password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """(matches, replacement hash or None) -- see CryptContext.verify_and_update."""
+        return await asyncio.wrap_future(
+            self._submit(self.context.verify_and_update, password, hashed_password)
+        )
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher()
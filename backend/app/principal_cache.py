@@ -0,0 +1,118 @@
+"""
+Short-lived cache of authenticated principals.
+
+Goals:
+- let high-frequency authenticated reads (chart pans, job status polls,
+  document list refreshes) authorize from the JWT plus a cached
+  ``AuthenticatedPrincipal`` instead of a ``users`` row lookup per request
+- key entries by (user id, token jti), so a new login never reuses an entry
+  and the cache stays bounded by live tokens, not by users
+- drop a user's entries explicitly on account changes (admin/user-router
+  update and delete, profile edits); the TTL bounds staleness in other API
+  processes, which this process cannot notify
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Set, Tuple
+
+PRINCIPAL_CACHE_TTL_S = max(0.0, float(os.getenv("PRINCIPAL_CACHE_TTL_S", "30")))
+PRINCIPAL_CACHE_MAX_ENTRIES = max(1, int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "4096")))
+
+_Key = Tuple[int, str]
+
+
+@dataclass(frozen=True)
+class AuthenticatedPrincipal:
+    """Authorization-relevant columns of a ``User``, detached from any Session."""
+
+    id: int
+    username: str
+    is_active: bool
+    is_superuser: bool
+
+    @classmethod
+    def from_user(cls, user) -> "AuthenticatedPrincipal":
+        return cls(
+            id=int(user.id),
+            username=user.username,
+            is_active=bool(user.is_active),
+            is_superuser=bool(user.is_superuser),
+        )
+
+
+class PrincipalCache:
+    """Thread-safe TTL + LRU map of (user_id, jti) -> AuthenticatedPrincipal."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = PRINCIPAL_CACHE_TTL_S,
+        max_entries: int = PRINCIPAL_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[_Key, Tuple[float, AuthenticatedPrincipal]]" = OrderedDict()
+        self._keys_by_user: Dict[int, Set[_Key]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def get(self, user_id: int, jti: str) -> Optional[AuthenticatedPrincipal]:
+        if not self.enabled:
+            return None
+        key = (int(user_id), jti)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if expires_at <= time.monotonic():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return principal
+
+    def put(self, jti: str, principal: AuthenticatedPrincipal) -> None:
+        if not self.enabled:
+            return
+        key = (principal.id, jti)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, principal)
+            self._entries.move_to_end(key)
+            self._keys_by_user.setdefault(principal.id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Forget every cached token of ``user_id`` (call after account changes)."""
+        with self._lock:
+            for key in list(self._keys_by_user.get(int(user_id), ())):
+                self._discard(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _discard(self, key: _Key) -> None:
+        self._entries.pop(key, None)
+        user_keys = self._keys_by_user.get(key[0])
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._keys_by_user[key[0]]
+
+
+principal_cache = PrincipalCache()
@@ -0,0 +1,423 @@
+"""
+On-demand sampling profiler for slow requests and analysis jobs.
+
+Goals:
+- answer "where did the 90 s go?" with a statistical profile (periodic
+  stack samples) plus explicit per-stage spans (stats aggregation,
+  deterministic calculators, retrieval, LLM, finalize)
+- trigger per request for superusers (``X-FTIAS-Profile: 1`` header or
+  ``?profile=1``; sampling only starts once auth has seen a superuser, so
+  other clients cannot turn the sampler on) and automatically for requests running longer than
+  ``PROFILE_SLOW_REQUEST_S`` and analysis jobs longer than
+  ``PROFILE_SLOW_JOB_S``; automatic profiles only start sampling once the
+  threshold has passed, so fast work is never sampled
+- store each profile as folded stacks (flamegraph.pl / speedscope input)
+  plus a JSON summary in ``PROFILE_DIR``, shared by all worker processes and
+  listed through the admin API
+- cost nothing when nothing is triggered: the sampler thread sleeps until
+  the next armed deadline and ``profile_span`` is a context-variable lookup
+
+Request profiles sample every busy thread of the worker process (sync
+handlers hop between threadpool threads), one lane per thread name; on a
+busy worker other requests show up in their own lanes. Job profiles sample
+only the job thread.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.getenv("PROFILE_DIR") or os.path.join(tempfile.gettempdir(), "ftias-profiles")
+PROFILE_SAMPLE_INTERVAL_S = max(0.001, float(os.getenv("PROFILE_SAMPLE_INTERVAL_S", "0.01")))
+# 0 disables automatic profiling of slow requests / jobs.
+PROFILE_SLOW_REQUEST_S = max(0.0, float(os.getenv("PROFILE_SLOW_REQUEST_S", "20")))
+PROFILE_SLOW_JOB_S = max(0.0, float(os.getenv("PROFILE_SLOW_JOB_S", "60")))
+PROFILE_MAX_ARTIFACTS = max(1, int(os.getenv("PROFILE_MAX_ARTIFACTS", "50")))
+PROFILE_MAX_STACK_DEPTH = 96
+PROFILE_REQUEST_HEADER = b"x-ftias-profile"
+
+_PROFILE_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+# Leaf frames of threads parked on a lock, queue or selector (idle pool threads,
+# the event loop waiting for I/O) are not samples of work.
+_IDLE_LEAF_FILES = frozenset({"threading.py", "queue.py", "selectors.py"})
+_IDLE_LEAF_FUNCTIONS = frozenset({"_worker", "select", "poll"})
+
+
+@dataclass
+class ProfileSession:
+    label: str
+    trigger: str  # "requested" | "slow_request" | "slow_job"
+    threshold_s: float = 0.0
+    thread_ids: Optional[frozenset] = None  # None = every busy thread
+    profile_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    started: float = field(default_factory=time.perf_counter)
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    authorized: bool = False
+    samples: Counter = field(default_factory=Counter)
+    sample_count: int = 0
+    spans: List[Dict[str, Any]] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    @property
+    def sample_from(self) -> float:
+        return self.started + self.threshold_s
+
+    def add_span(self, name: str, start: float, end: float) -> None:
+        with self._lock:
+            self.spans.append(
+                {
+                    "name": name,
+                    "start_ms": round((start - self.started) * 1000.0, 2),
+                    "duration_ms": round((end - start) * 1000.0, 2),
+                    "thread": threading.current_thread().name,
+                }
+            )
+
+
+_current_session: contextvars.ContextVar[Optional[ProfileSession]] = contextvars.ContextVar(
+    "ftias_profile_session", default=None
+)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (
+        code.co_name in _IDLE_LEAF_FUNCTIONS
+        or os.path.basename(code.co_filename) in _IDLE_LEAF_FILES
+    )
+
+
+def fold_stack(frame, thread_name: str) -> Optional[str]:
+    """Root-to-leaf ``thread;frame;...`` line, or None for an idle thread."""
+    if frame is None or _is_idle(frame):
+        return None
+    labels: List[str] = []
+    while frame is not None and len(labels) < PROFILE_MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame).replace(";", ":"))
+        frame = frame.f_back
+    labels.append(thread_name.replace(";", ":"))
+    return ";".join(reversed(labels))
+
+
+class _Sampler:
+    """One daemon thread sampling the frames of every due session."""
+
+    def __init__(self, interval_s: float):
+        self.interval_s = interval_s
+        self._sessions: Dict[str, ProfileSession] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, session: ProfileSession) -> None:
+        with self._cond:
+            self._sessions[session.profile_id] = session
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="ftias-profiler", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+
+    def remove(self, session: ProfileSession) -> None:
+        with self._cond:
+            self._sessions.pop(session.profile_id, None)
+
+    def _due_sessions(self) -> List[ProfileSession]:
+        with self._cond:
+            while True:
+                if not self._sessions:
+                    self._cond.wait()
+                    continue
+                now = time.perf_counter()
+                due = [s for s in self._sessions.values() if s.sample_from <= now]
+                if due:
+                    return due
+                next_due = min(s.sample_from for s in self._sessions.values())
+                self._cond.wait(timeout=max(0.0, next_due - now))
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while True:
+            due = self._due_sessions()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            frames = sys._current_frames()
+            for session in due:
+                for thread_id, frame in frames.items():
+                    if thread_id == own_id:
+                        continue
+                    if session.thread_ids is not None and thread_id not in session.thread_ids:
+                        continue
+                    folded = fold_stack(frame, names.get(thread_id, str(thread_id)))
+                    if folded is not None:
+                        with session._lock:
+                            session.samples[folded] += 1
+                with session._lock:
+                    session.sample_count += 1
+            del frames
+            time.sleep(self.interval_s)
+
+
+_sampler = _Sampler(PROFILE_SAMPLE_INTERVAL_S)
+
+
+def start_session(
+    label: str,
+    trigger: str,
+    *,
+    threshold_s: float = 0.0,
+    current_thread_only: bool = False,
+    sample: bool = True,
+) -> ProfileSession:
+    """Create a session; with ``sample=False`` it is armed later (see authorize)."""
+    session = ProfileSession(
+        label=label,
+        trigger=trigger,
+        threshold_s=threshold_s,
+        thread_ids=frozenset({threading.get_ident()}) if current_thread_only else None,
+    )
+    if sample:
+        _sampler.add(session)
+    return session
+
+
+def finish_session(session: ProfileSession) -> Optional[str]:
+    """Stop sampling; store the artifact when it qualifies and return its id."""
+    _sampler.remove(session)
+    duration_s = time.perf_counter() - session.started
+    if session.trigger == "requested":
+        keep = session.authorized
+    else:
+        keep = duration_s >= session.threshold_s and session.sample_count > 0
+    if not keep:
+        return None
+    try:
+        save_artifact(session, duration_s)
+    except OSError as exc:
+        logger.warning("Could not store profile %s: %s", session.profile_id, exc)
+        return None
+    logger.info(
+        "Stored %s profile %s for %s (%.2fs, %d samples)",
+        session.trigger,
+        session.profile_id,
+        session.label,
+        duration_s,
+        session.sample_count,
+    )
+    return session.profile_id
+
+
+def current_session() -> Optional[ProfileSession]:
+    return _current_session.get()
+
+
+def authorize_current_session() -> None:
+    """Allow the current request's requested profile (superuser) and start sampling it."""
+    session = _current_session.get()
+    if session is None or session.authorized:
+        return
+    session.authorized = True
+    if session.trigger == "requested":
+        _sampler.add(session)
+
+
+@contextmanager
+def profile_span(name: str) -> Iterator[None]:
+    """Record a named stage in the active profile; free when none is active."""
+    session = _current_session.get()
+    if session is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        session.add_span(name, start, time.perf_counter())
+
+
+@contextmanager
+def job_profile(label: str) -> Iterator[None]:
+    """Profile this thread's job automatically once it exceeds PROFILE_SLOW_JOB_S."""
+    if PROFILE_SLOW_JOB_S <= 0:
+        yield
+        return
+    session = start_session(
+        label, "slow_job", threshold_s=PROFILE_SLOW_JOB_S, current_thread_only=True
+    )
+    token = _current_session.set(session)
+    try:
+        yield
+    finally:
+        _current_session.reset(token)
+        finish_session(session)
+
+
+def record_span(name: str, started: float) -> None:
+    """Record a stage that began at ``time.perf_counter()`` value ``started``."""
+    session = _current_session.get()
+    if session is not None:
+        session.add_span(name, started, time.perf_counter())
+
+
+# ---------------------------------------------------------------------------
+# Request middleware
+# ---------------------------------------------------------------------------
+
+
+def _profile_requested(scope) -> bool:
+    for name, value in scope.get("headers") or ():
+        if name == PROFILE_REQUEST_HEADER and value.strip() in (b"1", b"true"):
+            return True
+    query = scope.get("query_string") or b""
+    return b"profile=1" in query.split(b"&") or b"profile=true" in query.split(b"&")
+
+
+class ProfilingMiddleware:
+    """ASGI middleware starting a profile session for requested or slow requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        requested = _profile_requested(scope)
+        if not requested and PROFILE_SLOW_REQUEST_S <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        label = f"{scope.get('method', '')} {scope.get('path', '')}"
+        if requested:
+            # Sampled only once authorize_current_session() sees a superuser.
+            session = start_session(label, "requested", sample=False)
+        else:
+            session = start_session(label, "slow_request", threshold_s=PROFILE_SLOW_REQUEST_S)
+        token = _current_session.set(session)
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start" and requested and session.authorized:
+                headers = list(message.get("headers", []))
+                headers.append((b"x-ftias-profile-id", session.profile_id.encode("ascii")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            _current_session.reset(token)
+            finish_session(session)
+
+
+# ---------------------------------------------------------------------------
+# Artifacts
+# ---------------------------------------------------------------------------
+
+
+def _artifact_path(profile_id: str, suffix: str) -> str:
+    if not _PROFILE_ID_RE.match(profile_id):
+        raise ValueError("invalid profile id")
+    return os.path.join(PROFILE_DIR, f"{profile_id}{suffix}")
+
+
+def save_artifact(session: ProfileSession, duration_s: float) -> None:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    with session._lock:
+        samples = dict(session.samples)
+        summary = {
+            "id": session.profile_id,
+            "label": session.label,
+            "trigger": session.trigger,
+            "started_at": session.started_at.isoformat(),
+            "duration_s": round(duration_s, 3),
+            "sampling_started_after_s": session.threshold_s,
+            "sample_interval_s": PROFILE_SAMPLE_INTERVAL_S,
+            "sample_count": session.sample_count,
+            "pid": os.getpid(),
+            "spans": list(session.spans),
+            "top_stacks": [
+                {"stack": stack, "samples": count}
+                for stack, count in Counter(samples).most_common(10)
+            ],
+        }
+    folded = "".join(f"{stack} {count}\n" for stack, count in sorted(samples.items()))
+    with open(_artifact_path(session.profile_id, ".folded"), "w", encoding="utf-8") as handle:
+        handle.write(folded)
+    # The JSON summary is written last: list_profiles only reports complete artifacts.
+    with open(_artifact_path(session.profile_id, ".json"), "w", encoding="utf-8") as handle:
+        json.dump(summary, handle)
+    _prune_artifacts()
+
+
+def _prune_artifacts() -> None:
+    summaries = sorted(
+        (entry for entry in os.scandir(PROFILE_DIR) if entry.name.endswith(".json")),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True,
+    )
+    for entry in summaries[PROFILE_MAX_ARTIFACTS:]:
+        stem = entry.name[: -len(".json")]
+        for suffix in (".json", ".folded"):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, stem + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """Newest-first summaries without the stack lists."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    entries = sorted(
+        (entry for entry in os.scandir(PROFILE_DIR) if entry.name.endswith(".json")),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True,
+    )
+    profiles = []
+    for entry in entries:
+        try:
+            with open(entry.path, encoding="utf-8") as handle:
+                summary = json.load(handle)
+        except (OSError, ValueError):
+            continue
+        summary.pop("top_stacks", None)
+        summary["span_count"] = len(summary.pop("spans", []))
+        profiles.append(summary)
+    return profiles
+
+
+def load_profile(profile_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(_artifact_path(profile_id, ".json"), encoding="utf-8") as handle:
+            return json.load(handle)
+    except (ValueError, OSError):
+        return None
+
+
+def load_folded_stacks(profile_id: str) -> Optional[str]:
+    try:
+        with open(_artifact_path(profile_id, ".folded"), encoding="utf-8") as handle:
+            return handle.read()
+    except (ValueError, OSError):
+        return None
@@ -0,0 +1,357 @@
+"""
+Slow-query capture and EXPLAIN plan collection for the SQLAlchemy engine.
+
+Goals:
+- give every statement (ORM and raw SQL) a fingerprint: the SQL text with
+  literals, bind parameters and IN-lists normalised, so the thousand
+  variants of one query aggregate into a single row
+- track calls, total / max duration and row counts per fingerprint and keep a
+  ring buffer of recent slow executions with the app function that issued
+  them (e.g. ``_load_timeseries_rows``)
+- for a sampled share of statements slower than ``SLOW_QUERY_THRESHOLD_MS``,
+  run ``EXPLAIN (ANALYZE, BUFFERS)`` on a separate connection in a background
+  thread, so index and partitioning work can start from real plans
+- surface the top offenders through ``GET /api/admin/slow-queries``
+
+EXPLAIN ANALYZE executes the statement again, so it is only run for
+read-only SELECTs on PostgreSQL, at most once per fingerprint per
+``SLOW_QUERY_EXPLAIN_COOLDOWN_S``, under a statement timeout, one at a time.
+Statistics are per worker process.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_CAPTURE_ENABLED = os.getenv("SLOW_QUERY_CAPTURE_ENABLED", "true").strip().lower() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+}
+SLOW_QUERY_THRESHOLD_MS = max(1.0, float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "500")))
+# Share of slow SELECTs that get an EXPLAIN (ANALYZE, BUFFERS); 0 disables plans.
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = max(
+    0.0, min(1.0, float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", "0.2")))
+)
+SLOW_QUERY_EXPLAIN_COOLDOWN_S = max(0.0, float(os.getenv("SLOW_QUERY_EXPLAIN_COOLDOWN_S", "600")))
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = max(100, int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "30000")))
+SLOW_QUERY_RECENT_SIZE = max(1, int(os.getenv("SLOW_QUERY_RECENT_SIZE", "200")))
+SLOW_QUERY_MAX_FINGERPRINTS = 1000
+SLOW_QUERY_EXPLAIN_QUEUE_SIZE = 4
+_SQL_SAMPLE_CHARS = 4000
+
+_EXPLAIN_CONN_KEY = "ftias_query_insights_explain"
+_STARTED_KEY = "ftias_query_insights_started"
+
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_BIND_RE = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<!:):\w+|\?")
+_IN_LIST_RE = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_VALUES_RE = re.compile(r"\bVALUES\s*\([?,\s]*\)(?:\s*,\s*\([?,\s]*\))*", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+_WRITE_KEYWORDS_RE = re.compile(
+    r"\b(INSERT|UPDATE|DELETE|MERGE|CREATE|ALTER|DROP|TRUNCATE|GRANT|LOCK|CALL|COPY)\b"
+    r"|\bFOR\s+(UPDATE|SHARE|NO\s+KEY\s+UPDATE|KEY\s+SHARE)\b|nextval\s*\(",
+    re.IGNORECASE,
+)
+
+
+@lru_cache(maxsize=4096)
+def normalize_statement(statement: str) -> str:
+    """SQL text with literals/binds replaced by ``?`` and whitespace collapsed."""
+    text = _STRING_LITERAL_RE.sub("?", statement)
+    text = _BIND_RE.sub("?", text)
+    text = _NUMBER_RE.sub("?", text)
+    text = _IN_LIST_RE.sub("IN (...)", text)
+    text = _VALUES_RE.sub("VALUES (...)", text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    return hashlib.sha1(normalize_statement(statement).encode("utf-8")).hexdigest()[:16]
+
+
+def is_explainable(statement: str) -> bool:
+    """Read-only SELECT / WITH ... SELECT that EXPLAIN ANALYZE may re-run."""
+    words = statement.lstrip(" \t\r\n(").split(None, 1)
+    if not words or words[0].upper() not in ("SELECT", "WITH"):
+        return False
+    return _WRITE_KEYWORDS_RE.search(statement) is None
+
+
+def _calling_site() -> Optional[str]:
+    """``module.py:function`` of the innermost app frame that issued the query."""
+    frame = sys._getframe(2)
+    marker = f"{os.sep}app{os.sep}"
+    this_file = __file__
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if marker in filename and filename != this_file and "sqlalchemy" not in filename:
+            return f"{os.path.basename(filename)}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+@dataclass
+class QueryStats:
+    fingerprint: str
+    statement: str
+    calls: int = 0
+    total_s: float = 0.0
+    max_s: float = 0.0
+    rows: int = 0
+    slow_calls: int = 0
+    callers: Dict[str, int] = field(default_factory=dict)
+    last_slow_at: Optional[datetime] = None
+    explain_plan: Optional[str] = None
+    explain_at: Optional[datetime] = None
+    explain_duration_ms: Optional[float] = None
+    explain_error: Optional[str] = None
+    _explain_requested: float = float("-inf")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "fingerprint": self.fingerprint,
+            "statement": self.statement,
+            "calls": self.calls,
+            "total_ms": round(self.total_s * 1000.0, 2),
+            "mean_ms": round(self.total_s * 1000.0 / self.calls, 2) if self.calls else 0.0,
+            "max_ms": round(self.max_s * 1000.0, 2),
+            "rows": self.rows,
+            "slow_calls": self.slow_calls,
+            "callers": dict(sorted(self.callers.items(), key=lambda item: -item[1])),
+            "last_slow_at": self.last_slow_at.isoformat() if self.last_slow_at else None,
+            "explain_plan": self.explain_plan,
+            "explain_at": self.explain_at.isoformat() if self.explain_at else None,
+            "explain_duration_ms": self.explain_duration_ms,
+            "explain_error": self.explain_error,
+        }
+
+
+class QueryInsights:
+    """Per-fingerprint statistics, recent slow executions and sampled plans."""
+
+    def __init__(
+        self,
+        *,
+        threshold_ms: float = SLOW_QUERY_THRESHOLD_MS,
+        explain_sample_rate: float = SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+        explain_cooldown_s: float = SLOW_QUERY_EXPLAIN_COOLDOWN_S,
+        recent_size: int = SLOW_QUERY_RECENT_SIZE,
+        max_fingerprints: int = SLOW_QUERY_MAX_FINGERPRINTS,
+    ):
+        self.threshold_s = threshold_ms / 1000.0
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_cooldown_s = explain_cooldown_s
+        self.max_fingerprints = max_fingerprints
+        self._stats: Dict[str, QueryStats] = {}
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=recent_size)
+        self._lock = threading.Lock()
+        self._explain_queue: "queue.Queue[tuple]" = queue.Queue(SLOW_QUERY_EXPLAIN_QUEUE_SIZE)
+        self._explain_thread: Optional[threading.Thread] = None
+
+    def record(
+        self,
+        statement: str,
+        duration_s: float,
+        rowcount: int,
+        *,
+        parameters: Any = None,
+        engine: Any = None,
+        executemany: bool = False,
+    ) -> None:
+        key = fingerprint(statement)
+        slow = duration_s >= self.threshold_s
+        caller = _calling_site() if slow else None
+        explain = False
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    self._evict_locked()
+                stats = QueryStats(
+                    fingerprint=key, statement=normalize_statement(statement)[:_SQL_SAMPLE_CHARS]
+                )
+                self._stats[key] = stats
+            stats.calls += 1
+            stats.total_s += duration_s
+            stats.max_s = max(stats.max_s, duration_s)
+            if rowcount > 0:
+                stats.rows += rowcount
+            if not slow:
+                return
+            now = datetime.now(timezone.utc)
+            stats.slow_calls += 1
+            stats.last_slow_at = now
+            if caller:
+                stats.callers[caller] = stats.callers.get(caller, 0) + 1
+            self._recent.append(
+                {
+                    "fingerprint": key,
+                    "duration_ms": round(duration_s * 1000.0, 2),
+                    "rows": rowcount if rowcount >= 0 else None,
+                    "caller": caller,
+                    "at": now.isoformat(),
+                }
+            )
+            monotonic_now = time.monotonic()
+            if (
+                engine is not None
+                and not executemany
+                and self.explain_sample_rate > 0
+                and monotonic_now - stats._explain_requested >= self.explain_cooldown_s
+                and random.random() < self.explain_sample_rate
+                and is_explainable(statement)
+            ):
+                stats._explain_requested = monotonic_now
+                explain = True
+        if explain:
+            self._submit_explain(engine, key, statement, parameters)
+
+    def _evict_locked(self) -> None:
+        # Drop the cheapest tenth so bursts of one-off statements cannot grow memory.
+        victims = sorted(self._stats.values(), key=lambda s: s.total_s)
+        for stats in victims[: max(1, len(victims) // 10)]:
+            del self._stats[stats.fingerprint]
+
+    def top(self, order_by: str = "total", limit: int = 20) -> List[Dict[str, Any]]:
+        sort_keys = {
+            "total": lambda s: s.total_s,
+            "max": lambda s: s.max_s,
+            "mean": lambda s: s.total_s / s.calls if s.calls else 0.0,
+            "calls": lambda s: s.calls,
+            "slow": lambda s: s.slow_calls,
+        }
+        if order_by not in sort_keys:
+            raise ValueError(f"order_by must be one of {sorted(sort_keys)}")
+        with self._lock:
+            ranked = sorted(self._stats.values(), key=sort_keys[order_by], reverse=True)
+            return [stats.to_dict() for stats in ranked[: max(0, limit)]]
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._recent)[::-1][: max(0, limit)]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._recent.clear()
+
+    # -- EXPLAIN ------------------------------------------------------------
+
+    def _submit_explain(self, engine, key: str, statement: str, parameters: Any) -> None:
+        with self._lock:
+            if self._explain_thread is None or not self._explain_thread.is_alive():
+                self._explain_thread = threading.Thread(
+                    target=self._explain_loop, name="ftias-query-explain", daemon=True
+                )
+                self._explain_thread.start()
+        try:
+            self._explain_queue.put_nowait((engine, key, statement, parameters))
+        except queue.Full:
+            logger.debug("EXPLAIN queue full; skipping plan for %s", key)
+
+    def _explain_loop(self) -> None:
+        while True:
+            engine, key, statement, parameters = self._explain_queue.get()
+            self.explain_now(engine, key, statement, parameters)
+
+    def explain_now(self, engine, key: str, statement: str, parameters: Any) -> None:
+        """Run EXPLAIN (ANALYZE, BUFFERS) for one statement and store the plan."""
+        started = time.perf_counter()
+        plan: Optional[str] = None
+        error: Optional[str] = None
+        try:
+            plan = _run_explain(engine, statement, parameters)
+        except Exception as exc:  # the plan is diagnostics; never fail the caller
+            error = str(exc).splitlines()[0][:500] if str(exc) else type(exc).__name__
+            logger.info("EXPLAIN for slow query %s failed: %s", key, error)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                return
+            stats.explain_plan = plan
+            stats.explain_error = error
+            stats.explain_at = datetime.now(timezone.utc)
+            stats.explain_duration_ms = round((time.perf_counter() - started) * 1000.0, 2)
+
+
+def _run_explain(engine, statement: str, parameters: Any) -> str:
+    if engine.dialect.name != "postgresql":
+        raise RuntimeError(f"EXPLAIN ANALYZE is not collected on {engine.dialect.name}")
+    with engine.connect() as conn:
+        conn.info[_EXPLAIN_CONN_KEY] = True
+        try:
+            # Belt and braces on top of is_explainable(): writes would error out.
+            conn.exec_driver_sql("SET TRANSACTION READ ONLY")
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {SLOW_QUERY_EXPLAIN_TIMEOUT_MS}")
+            result = conn.exec_driver_sql(
+                "EXPLAIN (ANALYZE, BUFFERS, FORMAT TEXT) " + statement, parameters or ()
+            )
+            return "\n".join(str(row[0]) for row in result)
+        finally:
+            conn.rollback()
+            conn.info.pop(_EXPLAIN_CONN_KEY, None)
+
+
+query_insights = QueryInsights()
+
+
+def install_query_insights(engine, insights: Optional[QueryInsights] = None) -> None:
+    """Record every statement executed through ``engine`` in ``insights``."""
+    from sqlalchemy import event
+
+    insights = insights or query_insights
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(_STARTED_KEY, []).append(time.perf_counter())
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        # A failed statement never reaches after_cursor_execute; drop its start
+        # so the stack stays paired for the connection's next statement.
+        conn = context.connection
+        if conn is None or context.statement is None:
+            return
+        starts = conn.info.get(_STARTED_KEY)
+        if starts:
+            starts.pop()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get(_STARTED_KEY)
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        if conn.info.get(_EXPLAIN_CONN_KEY):
+            return
+        try:
+            rowcount = cursor.rowcount
+        except Exception:
+            rowcount = -1
+        insights.record(
+            statement,
+            elapsed,
+            rowcount if isinstance(rowcount, int) else -1,
+            parameters=parameters,
+            engine=engine,
+            executemany=executemany,
+        )
@@ -0,0 +1,127 @@
+"""
+Read-replica routing for heavy analytical reads.
+
+Goals:
+- run chart data, deterministic-calculator time series and retrieval scans
+  on replica pools (``DATABASE_READ_URLS``) so they stop competing with
+  ingestion writes and FRAT transactions for primary connections
+- keep read-your-writes: the caller resolves what it needs on the primary
+  (active dataset version, corpus version) and the replica is used only when
+  it already shows that state; a replica that lags, cannot be reached, or
+  fails mid-query (``run_read``) falls back to the primary session for that
+  read
+- change nothing without replicas: the primary session is used as is
+
+Freshness markers are committed in the same transaction as the data they
+guard, so a replica that shows the marker has replayed the data too:
+``dataset_versions.status = 'success'`` is written with the last batch of an
+ingest's data points, and the owner's corpus version is bumped in the
+transaction that makes a document's chunks searchable.
+"""
+
+from __future__ import annotations
+
+import logging
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional, TypeVar
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.database import new_read_session
+from app.metrics import record_read_routing
+from app.models import DatasetVersion
+from app.retrieval_cache import get_corpus_version
+from app.workloads import allow_connection_release
+
+logger = logging.getLogger(__name__)
+
+FreshnessCheck = Callable[[Session], bool]
+T = TypeVar("T")
+
+
+@contextmanager
+def read_session(db: Session, is_fresh: Optional[FreshnessCheck] = None) -> Iterator[Session]:
+    """
+    Session for a read-only query: a replica when one is configured and
+    ``is_fresh(replica_session)`` holds, otherwise ``db`` (the primary).
+
+    Only use the yielded session for reads, and do not keep ORM instances
+    loaded from it beyond the ``with`` block (the replica session is closed).
+    Replica errors raised inside the block propagate; use ``run_read`` to
+    re-run the read on the primary instead.
+    """
+    replica = new_read_session()
+    if replica is None:
+        yield db
+        return
+    try:
+        try:
+            fresh = is_fresh(replica) if is_fresh is not None else _reachable(replica)
+        except DBAPIError as exc:
+            logger.warning("Read replica unavailable, reading from primary: %s", exc)
+            record_read_routing("primary_unavailable")
+            replica.close()
+            yield db
+            return
+        if not fresh:
+            record_read_routing("primary_stale")
+            replica.close()
+            yield db
+            return
+        record_read_routing("replica")
+        # Read-only and owned here, so helpers may always release it.
+        with allow_connection_release(replica):
+            yield replica
+    finally:
+        replica.close()
+
+
+def run_read(
+    db: Session, fn: Callable[[Session], T], is_fresh: Optional[FreshnessCheck] = None
+) -> T:
+    """
+    ``fn(session)`` on the session ``read_session`` picks; when a replica
+    fails mid-query (connection lost, recovery conflict), ``fn`` runs again
+    on ``db``. ``fn`` must only read, so running it twice is harmless.
+    """
+    with read_session(db, is_fresh) as read_db:
+        if read_db is db:
+            return fn(db)
+        try:
+            return fn(read_db)
+        except DBAPIError as exc:
+            logger.warning("Read replica query failed, re-running on primary: %s", exc)
+            record_read_routing("primary_replica_failed")
+    return fn(db)
+
+
+def _reachable(replica: Session) -> bool:
+    replica.connection()
+    return True
+
+
+def dataset_version_visible(dataset_version_id: Optional[int]) -> FreshnessCheck:
+    """Fresh when the replica has the (successfully ingested) dataset version."""
+
+    def check(replica: Session) -> bool:
+        if dataset_version_id is None:
+            # Legacy rows without a dataset version have no marker to compare.
+            return False
+        status = (
+            replica.query(DatasetVersion.status)
+            .filter(DatasetVersion.id == dataset_version_id)
+            .scalar()
+        )
+        return status == "success"
+
+    return check
+
+
+def corpus_version_at_least(owner_user_id: int, corpus_version: int) -> FreshnessCheck:
+    """Fresh when the replica has replayed the owner's corpus up to ``corpus_version``."""
+
+    def check(replica: Session) -> bool:
+        return get_corpus_version(replica, owner_user_id) >= corpus_version
+
+    return check
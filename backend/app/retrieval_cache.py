@@ -0,0 +1,220 @@
+"""
+Corpus-versioned cache for hybrid retrieval results.
+
+Goals:
+- skip embedding, candidate SQL, fusion and reranking for repeated questions
+  against an unchanged document library
+- key entries on (owner, normalized question, mode, capability, top_k,
+  retrieval config) plus the owner's corpus version, so a document becoming
+  ready, being replaced or deleted makes earlier entries unreachable
+- keep a bounded in-process LRU tier and an optional shared Redis tier
+  (RETRIEVAL_CACHE_REDIS_URL) for multi-worker deployments
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.chunk_dedup import normalize_chunk_text
+from app.models import RetrievalCorpusVersion
+
+try:
+    import redis as _redis
+
+    _REDIS_AVAILABLE = True
+except ImportError:
+    _redis = None  # type: ignore[assignment]
+    _REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_CACHE_ENABLED = os.getenv("RETRIEVAL_CACHE_ENABLED", "true").strip().lower() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+}
+RETRIEVAL_CACHE_MAX_ENTRIES = max(1, int(os.getenv("RETRIEVAL_CACHE_MAX_ENTRIES", "512")))
+RETRIEVAL_CACHE_TTL_S = max(1, int(os.getenv("RETRIEVAL_CACHE_TTL_S", "900")))
+RETRIEVAL_CACHE_REDIS_URL = os.getenv("RETRIEVAL_CACHE_REDIS_URL", "").strip()
+_REDIS_KEY_PREFIX = "ftias:retrieval:"
+
+RetrievalResult = Tuple[list, str, dict]
+
+
+# ---------------------------------------------------------------------------
+# Corpus version
+# ---------------------------------------------------------------------------
+
+
+def get_corpus_version(db: Session, owner_user_id: int) -> int:
+    version = (
+        db.query(RetrievalCorpusVersion.version)
+        .filter(RetrievalCorpusVersion.owner_user_id == owner_user_id)
+        .scalar()
+    )
+    return int(version or 0)
+
+
+def bump_corpus_version(db: Session, owner_user_id: Optional[int]) -> None:
+    """Increment the owner's corpus version inside the caller's transaction (no commit)."""
+    if owner_user_id is None:
+        return
+
+    def _increment() -> int:
+        return (
+            db.query(RetrievalCorpusVersion)
+            .filter(RetrievalCorpusVersion.owner_user_id == owner_user_id)
+            .update(
+                {RetrievalCorpusVersion.version: RetrievalCorpusVersion.version + 1},
+                synchronize_session=False,
+            )
+        )
+
+    if _increment():
+        return
+    try:
+        with db.begin_nested():
+            db.add(RetrievalCorpusVersion(owner_user_id=owner_user_id, version=1))
+    except IntegrityError:
+        # A concurrent request created the row first.
+        _increment()
+
+
+# ---------------------------------------------------------------------------
+# Cache key
+# ---------------------------------------------------------------------------
+
+
+def build_retrieval_cache_key(
+    *,
+    owner_user_id: int,
+    corpus_version: int,
+    question: str,
+    analysis_mode: Optional[str],
+    capability_key: Optional[str],
+    top_k: int,
+    retrieval_config: Dict[str, Any],
+) -> str:
+    payload = json.dumps(
+        {
+            "question": normalize_chunk_text(question),
+            "analysis_mode": (analysis_mode or "general"),
+            "capability_key": capability_key,
+            "top_k": int(top_k),
+            "config": retrieval_config,
+        },
+        sort_keys=True,
+    )
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return f"{int(owner_user_id)}:{int(corpus_version)}:{digest}"
+
+
+# ---------------------------------------------------------------------------
+# Cache tiers
+# ---------------------------------------------------------------------------
+
+
+class RetrievalResultCache:
+    """
+    LRU + TTL cache of serialized retrieval results.
+
+    Values are stored as JSON so callers can mutate returned sources freely
+    and the same payload can be shared through Redis.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = RETRIEVAL_CACHE_MAX_ENTRIES,
+        ttl_s: int = RETRIEVAL_CACHE_TTL_S,
+        redis_url: str = "",
+    ):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_s = max(1, int(ttl_s))
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+        if redis_url:
+            if _REDIS_AVAILABLE:
+                self._redis = _redis.Redis.from_url(redis_url, socket_timeout=0.25)
+            else:
+                logger.warning(
+                    "RETRIEVAL_CACHE_REDIS_URL is set but the redis package is not installed; "
+                    "using the in-process retrieval cache only."
+                )
+
+    def get(self, key: str) -> Optional[RetrievalResult]:
+        payload = self._get_local(key)
+        if payload is None and self._redis is not None:
+            payload = self._get_shared(key)
+            if payload is not None:
+                self._put_local(key, payload)
+        if payload is None:
+            return None
+        sources, context, debug = json.loads(payload)
+        return sources, context, debug
+
+    def put(self, key: str, result: RetrievalResult) -> None:
+        sources, context, debug = result
+        try:
+            payload = json.dumps([sources, context, debug], default=str)
+        except (TypeError, ValueError) as exc:
+            logger.warning("Retrieval result not cacheable: %s", exc)
+            return
+        self._put_local(key, payload)
+        if self._redis is not None:
+            try:
+                self._redis.set(_REDIS_KEY_PREFIX + key, payload, ex=self.ttl_s)
+            except Exception as exc:
+                logger.warning("Shared retrieval cache write failed: %s", exc)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _get_local(self, key: str) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def _put_local(self, key: str, payload: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_s, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_shared(self, key: str) -> Optional[str]:
+        try:
+            raw = self._redis.get(_REDIS_KEY_PREFIX + key)
+        except Exception as exc:
+            logger.warning("Shared retrieval cache read failed: %s", exc)
+            return None
+        if raw is None:
+            return None
+        return raw.decode("utf-8") if isinstance(raw, bytes) else str(raw)
+
+
+retrieval_result_cache = RetrievalResultCache(redis_url=RETRIEVAL_CACHE_REDIS_URL)
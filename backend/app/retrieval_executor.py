@@ -0,0 +1,77 @@
+"""
+Concurrent execution helpers for hybrid retrieval.
+
+Goals:
+- overlap independent retrieval stages (lexical SQL vs. embedding + vector SQL)
+  so end-to-end latency tracks the slowest branch, not the sum of stages
+- record per-stage wall-clock timings for retrieval_debug
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+RETRIEVAL_EXECUTOR_WORKERS = max(1, int(os.getenv("RETRIEVAL_EXECUTOR_WORKERS", "8")))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_retrieval_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=RETRIEVAL_EXECUTOR_WORKERS,
+                thread_name_prefix="retrieval",
+            )
+        return _executor
+
+
+class StageTimings:
+    """Thread-safe collector of per-stage durations in milliseconds."""
+
+    def __init__(self) -> None:
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - started) * 1000.0)
+
+    def record(self, name: str, duration_ms: float) -> None:
+        with self._lock:
+            self._timings[name] = self._timings.get(name, 0.0) + duration_ms
+
+    def as_dict(self) -> Dict[str, float]:
+        with self._lock:
+            timings = {name: round(value, 2) for name, value in self._timings.items()}
+        timings["total"] = round((time.perf_counter() - self._started) * 1000.0, 2)
+        return timings
+
+
+def submit_stage(
+    timings: StageTimings,
+    name: str,
+    fn: Callable[..., T],
+    *args: Any,
+) -> "Future[T]":
+    """Run ``fn(*args)`` on the retrieval executor, timing it as ``name``."""
+
+    def _run() -> T:
+        with timings.stage(name):
+            return fn(*args)
+
+    return get_retrieval_executor().submit(_run)
@@ -5,12 +5,15 @@ P2.3 goals:
 - persist structured metadata for document retrieval
 - derive sane defaults for legacy/unclassified docs
 - enable explainable mode-aware soft filtering/ranking with safe fallback
+- cache pre-parsed per-document metadata so ranking does not re-decode tags
 """
 
 from __future__ import annotations
 
 import json
 import re
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
@@ -418,3 +421,87 @@ def rerank_candidates_with_metadata(
         "authority_weighting_enabled": True,
     }
     return ranked, debug
+
+
+@dataclass(frozen=True)
+class DocumentRetrievalEntry:
+    """Pre-parsed per-document fields used for ranking and source labels."""
+
+    document_id: int
+    filename: str
+    title: Optional[str]
+    metadata: Dict[str, Any]
+    version_marker: Optional[str] = None
+
+
+def document_version_marker(updated_at: Any) -> Optional[str]:
+    """Stable string for ``documents.updated_at`` used to detect stale cache entries."""
+    if updated_at is None:
+        return None
+    if hasattr(updated_at, "isoformat"):
+        return updated_at.isoformat()
+    return str(updated_at)
+
+
+def build_document_retrieval_entry(row: Any) -> DocumentRetrievalEntry:
+    return DocumentRetrievalEntry(
+        document_id=int(getattr(row, "id")),
+        filename=getattr(row, "filename", None) or "",
+        title=getattr(row, "title", None),
+        metadata=extract_row_retrieval_metadata(row),
+        version_marker=document_version_marker(getattr(row, "updated_at", None)),
+    )
+
+
+class DocumentMetadataCache:
+    """
+    Process-local LRU of DocumentRetrievalEntry keyed by document id.
+
+    Entries carry the document's ``updated_at`` marker; candidate queries
+    return the current marker, so an entry refreshed by another worker
+    process (replace, status change) is detected and reloaded.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[int, DocumentRetrievalEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_fresh(
+        self, markers: Dict[int, Optional[str]]
+    ) -> Tuple[Dict[int, DocumentRetrievalEntry], List[int]]:
+        """Split ``{document_id: current marker}`` into cached entries and ids to load."""
+        found: Dict[int, DocumentRetrievalEntry] = {}
+        missing: List[int] = []
+        with self._lock:
+            for document_id, marker in markers.items():
+                entry = self._entries.get(document_id)
+                if entry is None or entry.version_marker != marker:
+                    missing.append(document_id)
+                    continue
+                self._entries.move_to_end(document_id)
+                found[document_id] = entry
+        return found, missing
+
+    def put_many(self, entries: Iterable[DocumentRetrievalEntry]) -> None:
+        with self._lock:
+            for entry in entries:
+                self._entries[entry.document_id] = entry
+                self._entries.move_to_end(entry.document_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, document_id: int) -> None:
+        with self._lock:
+            self._entries.pop(int(document_id), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+document_metadata_cache = DocumentMetadataCache()
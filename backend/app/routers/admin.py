@@ -8,20 +8,25 @@ Superuser-only endpoints:
 import io
 import json
 import logging
+import os
 import re
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session
 
+from app import profiling
 from app.analysis_controls import parse_analysis_controls
 from app.auth import get_current_superuser, get_password_hash
 from app.capabilities import get_capability_definition
 from app.database import get_db
 from app.models import AnalysisJob, FlightTest, User
+from app.principal_cache import principal_cache
+from app.query_insights import query_insights
+from app.workloads import get_analysis_db
 
 logger = logging.getLogger(__name__)
 
@@ -538,6 +543,7 @@ def update_user(
         user.hashed_password = get_password_hash(payload.new_password)
 
     db.commit()
+    principal_cache.invalidate_user(user_id)
     db.refresh(user)
     logger.info("Admin %s updated user %d", admin.username, user_id)
     return _user_to_out(user)
@@ -564,10 +570,79 @@ def delete_user(
 
     db.delete(user)
     db.commit()
+    principal_cache.invalidate_user(user_id)
     logger.info("Admin %s deleted user %d (%s)", admin.username, user_id, user.username)
     return {"message": f"User '{user.username}' deleted successfully."}
 
 
+# ---------------------------------------------------------------------------
+# GET /api/admin/profiles  (stored request / job profiles, see app.profiling)
+# ---------------------------------------------------------------------------
+
+
+@router.get("/profiles")
+def list_profiles(_admin: User = Depends(get_current_superuser)):
+    """Stored profiles of this deployment, newest first."""
+    return profiling.list_profiles()
+
+
+@router.get("/profiles/{profile_id}")
+def get_profile(profile_id: str, _admin: User = Depends(get_current_superuser)):
+    """Profile summary: stage spans and the hottest sampled stacks."""
+    profile = profiling.load_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found.")
+    return profile
+
+
+@router.get("/profiles/{profile_id}/flamegraph", response_class=PlainTextResponse)
+def get_profile_flamegraph(profile_id: str, _admin: User = Depends(get_current_superuser)):
+    """Folded stacks (flamegraph.pl / speedscope input) for one profile."""
+    folded = profiling.load_folded_stacks(profile_id)
+    if folded is None:
+        raise HTTPException(status_code=404, detail="Profile not found.")
+    return PlainTextResponse(
+        folded,
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.folded"'},
+    )
+
+
+# ---------------------------------------------------------------------------
+# GET /api/admin/slow-queries  (statement fingerprints, see app.query_insights)
+# ---------------------------------------------------------------------------
+
+
+@router.get("/slow-queries")
+def list_slow_queries(
+    order_by: str = "total",
+    limit: int = Query(20, ge=1, le=200),
+    recent_limit: int = Query(50, ge=0, le=500),
+    _admin: User = Depends(get_current_superuser),
+):
+    """
+    Top statement fingerprints of this worker process (ordered by total, max,
+    mean, calls or slow) with sampled EXPLAIN (ANALYZE, BUFFERS) plans, plus
+    the most recent slow executions.
+    """
+    try:
+        top = query_insights.top(order_by=order_by, limit=limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    return {
+        "pid": os.getpid(),
+        "threshold_ms": query_insights.threshold_s * 1000.0,
+        "explain_sample_rate": query_insights.explain_sample_rate,
+        "top": top,
+        "recent": query_insights.recent(limit=recent_limit),
+    }
+
+
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+def reset_slow_queries(_admin: User = Depends(get_current_superuser)):
+    """Clear the statistics of this worker process (e.g. after adding an index)."""
+    query_insights.reset()
+
+
 # ---------------------------------------------------------------------------
 # GET /api/admin/flight-tests/{flight_test_id}/report.pdf
 # ---------------------------------------------------------------------------
@@ -577,7 +652,7 @@ def delete_user(
 def export_ai_analysis_pdf(
     flight_test_id: int,
     analysis_job_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_analysis_db),
     current_user: User = Depends(get_current_superuser),
 ):
     """
@@ -597,6 +672,11 @@ def export_ai_analysis_pdf(
     )
     if not analysis_job:
         raise HTTPException(status_code=404, detail="Analysis job not found for this flight test.")
+    if analysis_job.status != "completed":
+        raise HTTPException(
+            status_code=409,
+            detail=f"Analysis job is {analysis_job.status}; reports need a completed analysis.",
+        )
 
     pdf_bytes = _build_pdf(
         flight_test=ft,
@@ -651,6 +731,11 @@ def export_ai_analysis_pdf_post(
     )
     if not analysis_job:
         raise HTTPException(status_code=404, detail="Analysis job not found for this flight test.")
+    if analysis_job.status != "completed":
+        raise HTTPException(
+            status_code=409,
+            detail=f"Analysis job is {analysis_job.status}; reports need a completed analysis.",
+        )
 
     pdf_bytes = _build_pdf(
         flight_test=ft,
@@ -7,6 +7,7 @@ from datetime import timedelta
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, EmailStr
 from sqlalchemy import or_
 from sqlalchemy.orm import Session
@@ -15,35 +16,70 @@ from app import auth, schemas
 from app.config import settings
 from app.database import get_db
 from app.models import User
+from app.password_hashing import (
+    PASSWORD_HASH_RETRY_AFTER_S,
+    PasswordHashingBusy,
+    password_hasher,
+)
+from app.principal_cache import principal_cache
 
 router = APIRouter()
 
 
-@router.post("/login", response_model=schemas.Token)
-async def login(login_data: schemas.LoginRequest, db: Session = Depends(get_db)):
-    """
-    Login endpoint - authenticate user and return JWT token
-    """
+def _find_login_user(db: Session, username: str) -> Optional[User]:
     # Find user by username or email (frontend allows either)
-    user = (
+    return (
         db.query(User)
         .filter(
             or_(
-                User.username == login_data.username,
-                User.email == login_data.username,
+                User.username == username,
+                User.email == username,
             )
         )
         .first()
     )
 
+
+def _store_rehashed_password(db: Session, user: User, new_hash: str) -> None:
+    user.hashed_password = new_hash
+    db.add(user)
+    db.commit()
+
+
+@router.post("/login", response_model=schemas.Token)
+async def login(login_data: schemas.LoginRequest, db: Session = Depends(get_db)):
+    """
+    Login endpoint - authenticate user and return JWT token
+
+    DB work runs in the request threadpool and password verification on the
+    bounded hashing pool, so the event loop keeps serving other requests.
+    """
+    user = await run_in_threadpool(_find_login_user, db, login_data.username)
+
     # Verify user exists and password is correct
-    if not user or not auth.verify_password(login_data.password, user.hashed_password):
+    verified, new_hash = False, None
+    if user:
+        try:
+            verified, new_hash = await password_hasher.verify_and_update_async(
+                login_data.password, user.hashed_password
+            )
+        except PasswordHashingBusy as exc:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent logins. Please retry shortly.",
+                headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER_S)},
+            ) from exc
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Stored hash predates the current PASSWORD_HASH_ROUNDS: upgrade it.
+    if new_hash:
+        await run_in_threadpool(_store_rehashed_password, db, user, new_hash)
+
     # Check if user is active
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
@@ -64,7 +100,7 @@ async def login(login_data: schemas.LoginRequest, db: Session = Depends(get_db))
 
 
 @router.post("/logout")
-async def logout(_: User = Depends(auth.get_current_active_user)):
+def logout(_: User = Depends(auth.get_current_active_user)):
     """
     Logout endpoint - invalidate token (client-side)
     Note: JWT tokens are stateless, so logout is handled
@@ -74,7 +110,7 @@ async def logout(_: User = Depends(auth.get_current_active_user)):
 
 
 @router.get("/me", response_model=schemas.UserResponse)
-async def get_current_user_info(
+def get_current_user_info(
     current_user: User = Depends(auth.get_current_active_user),
 ):
     """
@@ -91,7 +127,7 @@ class ProfileUpdate(BaseModel):
 
 
 @router.patch("/me", response_model=schemas.UserResponse)
-async def update_current_user(
+def update_current_user(
     update: ProfileUpdate,
     db: Session = Depends(get_db),
     current_user: User = Depends(auth.get_current_active_user),
@@ -116,12 +152,13 @@ async def update_current_user(
 
     db.add(current_user)
     db.commit()
+    principal_cache.invalidate_user(current_user.id)
     db.refresh(current_user)
     return current_user
 
 
 @router.post("/refresh", response_model=schemas.Token)
-async def refresh_token(
+def refresh_token(
     refresh: schemas.RefreshRequest,
     db: Session = Depends(get_db),
 ):
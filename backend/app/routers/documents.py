@@ -11,27 +11,17 @@ import logging
 import os
 import re
 import tempfile
+import threading
 import time
-from typing import Any, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-
-try:
-    from openai import OpenAI as _OpenAI
-
-    _OPENAI_AVAILABLE = True
-except ImportError:
-    _OpenAI = None  # type: ignore[assignment,misc]
-    _OPENAI_AVAILABLE = False
-
-try:
-    from docling.document_converter import DocumentConverter as _DocumentConverter
-
-    _DOCLING_AVAILABLE = True
-except ImportError:
-    _DocumentConverter = None  # type: ignore[assignment,misc]
-    _DOCLING_AVAILABLE = False
 from sqlalchemy import func, text
 from sqlalchemy.orm import Session
 
@@ -66,6 +56,13 @@ from app.analysis_controls import (
     evaluate_analysis_controls,
     parse_analysis_controls,
 )
+from app.analysis_job_queue import (
+    ANALYSIS_JOB_ACTIVE_STATUSES,
+    ANALYSIS_JOB_MAX_ACTIVE_PER_USER,
+    ANALYSIS_JOB_RETRY_AFTER_S,
+    ANALYSIS_JOB_STALE_AFTER_S,
+    get_analysis_job_queue,
+)
 from app.analysis_modes import (
     AnalysisModeDefinition,
     analysis_mode_authority,
@@ -74,7 +71,8 @@ from app.analysis_modes import (
     list_analysis_modes,
     resolve_analysis_mode,
 )
-from app.auth import get_current_user
+from app.auth import get_current_principal, get_current_user
+from app.bulk_delete import delete_in_batches
 from app.capabilities import (
     CapabilityAuthority,
     CapabilityEvaluation,
@@ -82,7 +80,34 @@ from app.capabilities import (
     CapabilityOutcome,
     evaluate_capability_request,
 )
+from app.chunk_dedup import (
+    chunk_content_sha256,
+    diff_chunk_sets,
+    find_reusable_embeddings,
+)
+from app.chunk_writer import build_chunk_row, write_document_chunks
+from app.completion_cache import (
+    ANALYSIS_COMPLETION_CACHE_ENABLED,
+    completion_fingerprint,
+    lookup_completion,
+    store_completion,
+)
+from app.context_packer import count_tokens, excerpt_token_budget, pack_context
 from app.database import SessionLocal, get_db
+from app.docling_workers import (
+    DOCLING_SHARD_MIN_PAGES,
+    DOCLING_SHARD_PAGES,
+    DoclingParseConfig,
+    DocumentWorkerQueueFull,
+    DocumentWorkerReservation,
+    count_pdf_pages,
+    get_document_worker_pool,
+    merge_shard_chunks,
+    parse_pdf_page_range,
+    parse_pdf_with_warm_converter,
+    plan_page_shards,
+)
+from app.metrics import instrument_openai_client, record_cache_lookup, record_ingest
 from app.models import (
     AnalysisJob,
     DataPoint,
@@ -90,20 +115,44 @@ from app.models import (
     Document,
     DocumentChunk,
     FlightTest,
+    LlmCompletionCache,
     TestParameter,
     User,
 )
+from app.optional_deps import is_installed, missing_packages, openai_client_class
+from app.principal_cache import AuthenticatedPrincipal
+from app.profiling import job_profile, profile_span, record_span
 from app.prompt_mode_guard import (
     PromptModeGuardSnapshot,
     evaluate_prompt_mode_guard,
     parse_prompt_mode_guard,
 )
+from app.read_routing import corpus_version_at_least, run_read
+from app.retrieval_cache import (
+    RETRIEVAL_CACHE_ENABLED,
+    build_retrieval_cache_key,
+    bump_corpus_version,
+    get_corpus_version,
+    retrieval_result_cache,
+)
+from app.retrieval_executor import StageTimings, submit_stage
 from app.retrieval_metadata import (
+    DocumentRetrievalEntry,
+    build_document_retrieval_entry,
     build_retrieval_mode_profile,
     derive_document_retrieval_metadata,
-    extract_row_retrieval_metadata,
+    document_metadata_cache,
+    document_version_marker,
     rerank_candidates_with_metadata,
 )
+from app.workloads import (
+    allow_connection_release,
+    get_analysis_db,
+    get_ingest_db,
+    release_connection,
+    release_connection_if_allowed,
+    workload_slot,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -123,6 +172,7 @@ def _env_flag(name: str, default: bool) -> bool:
 # ---------------------------------------------------------------------------
 _openai_client = None
 EMBEDDING_BATCH_SIZE = max(1, int(os.getenv("EMBEDDING_BATCH_SIZE", "32")))
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
 DOCLING_NUM_THREADS = max(1, int(os.getenv("DOCLING_NUM_THREADS", "4")))
 DOCLING_FAST_THRESHOLD_MB = max(1, int(os.getenv("DOCLING_FAST_THRESHOLD_MB", "25")))
 DOCLING_MAX_CHUNK_CHARS = max(0, int(os.getenv("DOCLING_MAX_CHUNK_CHARS", "5000")))
@@ -162,13 +212,9 @@ QUERY_STRICT_CITATIONS = _env_flag("QUERY_STRICT_CITATIONS", True)
 
 
 def _require_ai_packages():
-    """Raise a clear 503 if optional AI packages are not installed."""
-    if not _OPENAI_AVAILABLE or not _DOCLING_AVAILABLE:
-        missing = []
-        if not _OPENAI_AVAILABLE:
-            missing.append("openai")
-        if not _DOCLING_AVAILABLE:
-            missing.append("docling")
+    """Raise a clear 503 if optional AI packages are not installed (checked, not imported)."""
+    missing = missing_packages(("openai", "docling"))
+    if missing:
         raise HTTPException(
             status_code=503,
             detail=(
@@ -189,10 +235,46 @@ def get_openai_client():
                 detail="OPENAI_API_KEY is not configured. "
                 "Add it to your .env file to enable AI features.",
             )
-        _openai_client = _OpenAI(api_key=api_key)
+        _openai_client = instrument_openai_client(openai_client_class()(api_key=api_key))
     return _openai_client
 
 
+def _stream_chat_completion(client, **kwargs) -> Iterator[str]:
+    """Yield content deltas from a streamed chat completion."""
+    stream = client.chat.completions.create(stream=True, **kwargs)
+    for chunk in stream:
+        choices = getattr(chunk, "choices", None) or []
+        if not choices:
+            continue
+        delta = getattr(choices[0], "delta", None)
+        content = getattr(delta, "content", None) if delta is not None else None
+        if content:
+            yield content
+
+
+def _sse_event(event: str, data: Any) -> str:
+    """Encode one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _event_stream_response(events: Iterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        # Disable proxy buffering so tokens reach the client as they arrive.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _exception_detail(exc: Exception) -> str:
+    return str(exc.detail) if isinstance(exc, HTTPException) else str(exc)
+
+
+def _public_sources(sources: List[dict]) -> List[dict]:
+    """Sources as returned to clients: chunk text stays server-side."""
+    return [{k: v for k, v in s.items() if k != "text"} for s in sources]
+
+
 # ---------------------------------------------------------------------------
 # Pydantic schemas
 # ---------------------------------------------------------------------------
@@ -254,6 +336,8 @@ class QueryRetrievalMetadata(BaseModel):
     mode_filter_fallback_used: bool = False
     metadata_coverage_ratio: float = 0.0
     authority_weighting_enabled: bool = True
+    stage_timings_ms: Dict[str, float] = Field(default_factory=dict)
+    context_packing: Dict[str, Any] = Field(default_factory=dict)
 
 
 class QueryResponse(BaseModel):
@@ -287,6 +371,8 @@ class AIAnalysisResponse(BaseModel):
     retrieved_sources_snapshot: List[dict] = Field(default_factory=list)
     analysis_controls: AnalysisControlSnapshot
     prompt_mode_guard: PromptModeGuardSnapshot
+    completion_cache_hit: bool = False
+    reused_from_analysis_job_id: Optional[int] = None
 
 
 class AnalysisJobResponse(BaseModel):
@@ -298,6 +384,9 @@ class AnalysisJobResponse(BaseModel):
     dataset_version_id: Optional[int] = None
     parameters_analysed: int
     status: str
+    progress_stage: Optional[str] = None
+    error_message: Optional[str] = None
+    started_at: Optional[str] = None
     model_name: str
     model_version: Optional[str] = None
     prompt_text: str
@@ -310,6 +399,20 @@ class AnalysisJobResponse(BaseModel):
     parameter_stats_snapshot: List[dict] = Field(default_factory=list)
     analysis_controls: AnalysisControlSnapshot
     prompt_mode_guard: PromptModeGuardSnapshot
+    completion_cache_hit: bool = False
+    reused_from_analysis_job_id: Optional[int] = None
+
+
+class AnalysisJobStatusOut(BaseModel):
+    id: int
+    flight_test_id: int
+    analysis_mode: str
+    status: str
+    progress_stage: Optional[str] = None
+    error_message: Optional[str] = None
+    created_at: str
+    started_at: Optional[str] = None
+    updated_at: Optional[str] = None
 
 
 class AnalysisModeOut(BaseModel):
@@ -331,7 +434,7 @@ def embed_text(text_content: str) -> List[float]:
     """Return a 1536-dim embedding vector for the given text."""
     client = get_openai_client()
     response = client.embeddings.create(
-        model="text-embedding-3-small",
+        model=EMBEDDING_MODEL,
         input=text_content,
     )
     return response.data[0].embedding
@@ -343,7 +446,7 @@ def embed_texts(texts: List[str]) -> List[List[float]]:
         return []
     client = get_openai_client()
     response = client.embeddings.create(
-        model="text-embedding-3-small",
+        model=EMBEDDING_MODEL,
         input=texts,
     )
     return [item.embedding for item in response.data]
@@ -697,53 +800,90 @@ def _build_source_label(row: Any) -> str:
     return base
 
 
-def _retrieve_hybrid_sources(
-    db: Session,
+def _source_dict_label(source: dict) -> str:
+    return _build_source_label(
+        SimpleNamespace(
+            title=source.get("title"),
+            filename=source.get("filename"),
+            page_numbers=source.get("page_numbers"),
+            section_title=source.get("section_title"),
+            authority_type=source.get("authority_type"),
+            document_revision=source.get("document_revision"),
+        )
+    )
+
+
+def _pack_prompt_context(
+    sources: List[dict],
+    *,
     question: str,
-    requested_top_k: int,
-    owner_user_id: int,
-    analysis_mode: Optional[str] = None,
-    capability_key: Optional[str] = None,
-) -> tuple[list[dict], str, dict]:
-    """Hybrid retrieval (vector + lexical), returns ranked sources and context text."""
-    try:
-        query_embedding = embed_text(question)
-    except HTTPException:
-        raise
-    except Exception as exc:
-        raise HTTPException(status_code=503, detail=f"Embedding failed: {exc}")
+    model: str,
+    max_tokens: int,
+    fixed_prompt_tokens: int,
+    retrieval_debug: dict,
+) -> tuple[list[dict], str]:
+    """
+    Fit ranked source excerpts into the model's prompt budget after the rest
+    of the prompt (``fixed_prompt_tokens``); usage lands in retrieval_debug.
+    """
+    packed = pack_context(
+        sources,
+        question=question,
+        budget_tokens=excerpt_token_budget(model, max_tokens, fixed_prompt_tokens),
+        label_for=_source_dict_label,
+    )
+    retrieval_debug["context_packing"] = {
+        **packed.stats,
+        "fixed_prompt_tokens": int(fixed_prompt_tokens),
+    }
+    return packed.sources, packed.context_text
 
-    embedding_str = "[" + ",".join(str(v) for v in query_embedding) + "]"
 
-    vector_sql = text(
-        """
-        SELECT
-            dc.id,
-            dc.document_id,
-            dc.chunk_index,
-            dc.text,
-            dc.page_numbers,
-            dc.section_title,
-            d.filename,
-            d.title,
-            d.authority_type,
-            d.document_revision,
-            d.domain_tags_json,
-            d.capability_tags_json,
-            d.aircraft_scope,
-            d.system_scope,
-            d.source_priority
-        FROM document_chunks dc
-        JOIN documents d ON d.id = dc.document_id
-        WHERE d.status = 'ready'
-          AND d.uploaded_by_id = :owner_user_id
-          AND dc.embedding IS NOT NULL
-        ORDER BY dc.embedding <=> :embedding ::vector
-        LIMIT :limit_n
-        """
-    )
-    vector_rows = db.execute(
-        vector_sql,
+# Candidate phase: ids plus the document version marker only. Chunk text is
+# hydrated for the selected context rows after fusion and reranking.
+_VECTOR_CANDIDATES_SQL = text(
+    """
+    SELECT
+        dc.id,
+        dc.document_id,
+        d.updated_at AS document_updated_at
+    FROM document_chunks dc
+    JOIN documents d ON d.id = dc.document_id
+    WHERE d.status = 'ready'
+      AND d.uploaded_by_id = :owner_user_id
+      AND dc.embedding IS NOT NULL
+    ORDER BY dc.embedding <=> :embedding ::vector
+    LIMIT :limit_n
+    """
+)
+
+_LEXICAL_CANDIDATES_SQL = text(
+    """
+    SELECT
+        dc.id,
+        dc.document_id,
+        d.updated_at AS document_updated_at,
+        ts_rank_cd(
+            to_tsvector('english', dc.text),
+            websearch_to_tsquery('english', :question)
+        ) AS lexical_score
+    FROM document_chunks dc
+    JOIN documents d ON d.id = dc.document_id
+    WHERE d.status = 'ready'
+      AND d.uploaded_by_id = :owner_user_id
+      AND websearch_to_tsquery('english', :question) @@ to_tsvector('english', dc.text)
+    ORDER BY lexical_score DESC
+    LIMIT :limit_n
+    """
+)
+
+
+def _fetch_vector_candidates(
+    db: Session, query_embedding: List[float], owner_user_id: int
+) -> List[Any]:
+    embedding_str = "[" + ",".join(str(v) for v in query_embedding) + "]"
+    return db.execute(
+        _VECTOR_CANDIDATES_SQL,
         {
             "embedding": embedding_str,
             "limit_n": QUERY_VECTOR_CANDIDATES,
@@ -751,41 +891,13 @@ def _retrieve_hybrid_sources(
         },
     ).fetchall()
 
-    lexical_rows = []
-    lexical_sql = text(
-        """
-        SELECT
-            dc.id,
-            dc.document_id,
-            dc.chunk_index,
-            dc.text,
-            dc.page_numbers,
-            dc.section_title,
-            d.filename,
-            d.title,
-            d.authority_type,
-            d.document_revision,
-            d.domain_tags_json,
-            d.capability_tags_json,
-            d.aircraft_scope,
-            d.system_scope,
-            d.source_priority,
-            ts_rank_cd(
-                to_tsvector('english', dc.text),
-                websearch_to_tsquery('english', :question)
-            ) AS lexical_score
-        FROM document_chunks dc
-        JOIN documents d ON d.id = dc.document_id
-        WHERE d.status = 'ready'
-          AND d.uploaded_by_id = :owner_user_id
-          AND websearch_to_tsquery('english', :question) @@ to_tsvector('english', dc.text)
-        ORDER BY lexical_score DESC
-        LIMIT :limit_n
-        """
-    )
+
+def _fetch_lexical_candidates(bind: Any, question: str, owner_user_id: int) -> List[Any]:
+    """Run the lexical query on its own session; failures degrade to vector-only."""
+    lexical_db = Session(bind=bind)
     try:
-        lexical_rows = db.execute(
-            lexical_sql,
+        return lexical_db.execute(
+            _LEXICAL_CANDIDATES_SQL,
             {
                 "question": question,
                 "limit_n": QUERY_LEXICAL_CANDIDATES,
@@ -794,7 +906,185 @@ def _retrieve_hybrid_sources(
         ).fetchall()
     except Exception as lex_exc:
         logger.warning("Lexical retrieval fallback to vector-only: %s", lex_exc)
-        lexical_rows = []
+        return []
+    finally:
+        lexical_db.close()
+
+
+def _load_document_entries(
+    db: Session, candidate_rows: List[Any]
+) -> Dict[int, DocumentRetrievalEntry]:
+    """
+    Resolve per-document ranking metadata for the candidate rows.
+
+    Entries come from the process-local cache when their ``updated_at``
+    marker still matches; stale or unseen documents are loaded in one query.
+    """
+    markers: Dict[int, Optional[str]] = {}
+    for row in candidate_rows:
+        markers[int(row.document_id)] = document_version_marker(
+            getattr(row, "document_updated_at", None)
+        )
+    entries, missing = document_metadata_cache.get_fresh(markers)
+    record_cache_lookup("document_metadata", not missing)
+    if missing:
+        loaded = [
+            build_document_retrieval_entry(doc_row)
+            for doc_row in db.query(
+                Document.id,
+                Document.filename,
+                Document.title,
+                Document.authority_type,
+                Document.document_revision,
+                Document.domain_tags_json,
+                Document.capability_tags_json,
+                Document.aircraft_scope,
+                Document.system_scope,
+                Document.source_priority,
+                Document.updated_at,
+            )
+            .filter(Document.id.in_(missing))
+            .all()
+        ]
+        document_metadata_cache.put_many(loaded)
+        entries.update({entry.document_id: entry for entry in loaded})
+    return entries
+
+
+def _hydrate_chunk_rows(db: Session, chunk_ids: List[int]) -> Dict[int, Any]:
+    """Fetch text and page/section fields for the selected chunks in one query."""
+    if not chunk_ids:
+        return {}
+    rows = (
+        db.query(
+            DocumentChunk.id,
+            DocumentChunk.text,
+            DocumentChunk.page_numbers,
+            DocumentChunk.section_title,
+        )
+        .filter(DocumentChunk.id.in_(chunk_ids))
+        .all()
+    )
+    return {int(row.id): row for row in rows}
+
+
+def _retrieval_cache_config() -> Dict[str, Any]:
+    """Settings that change retrieval output and therefore belong in the cache key."""
+    return {
+        "embedding_model": EMBEDDING_MODEL,
+        "vector_candidates": QUERY_VECTOR_CANDIDATES,
+        "lexical_candidates": QUERY_LEXICAL_CANDIDATES,
+        "context_limit": QUERY_CONTEXT_LIMIT,
+        "min_unique_documents": QUERY_MIN_UNIQUE_DOCUMENTS,
+        "max_chunks_per_document": QUERY_MAX_CHUNKS_PER_DOCUMENT,
+    }
+
+
+def _retrieve_hybrid_sources(
+    db: Session,
+    question: str,
+    requested_top_k: int,
+    owner_user_id: int,
+    analysis_mode: Optional[str] = None,
+    capability_key: Optional[str] = None,
+) -> tuple[list[dict], str, dict]:
+    """
+    Hybrid retrieval with a corpus-versioned result cache in front.
+
+    Cache keys include the owner's corpus version, which is bumped whenever a
+    document becomes ready, is replaced or is deleted, so stale entries are
+    never served. ``retrieval_debug["cache_hit"]`` reports the outcome.
+    """
+    # Read on the primary: it decides both the cache key and whether a replica
+    # is fresh enough to run the scans.
+    corpus_version = get_corpus_version(db, owner_user_id)
+    # Cache hits and replica scans need no primary connection from here on.
+    release_connection_if_allowed(db)
+    fresh_replica = corpus_version_at_least(owner_user_id, corpus_version)
+
+    def run_retrieval(read_db: Session) -> tuple[list[dict], str, dict]:
+        return _run_hybrid_retrieval(
+            read_db, question, requested_top_k, owner_user_id, analysis_mode, capability_key
+        )
+
+    if not RETRIEVAL_CACHE_ENABLED:
+        sources, context_text, retrieval_debug = run_read(db, run_retrieval, fresh_replica)
+        retrieval_debug["cache_hit"] = False
+        return sources, context_text, retrieval_debug
+
+    lookup_started = time.perf_counter()
+    cache_key = build_retrieval_cache_key(
+        owner_user_id=owner_user_id,
+        corpus_version=corpus_version,
+        question=question,
+        analysis_mode=analysis_mode,
+        capability_key=capability_key,
+        top_k=requested_top_k,
+        retrieval_config=_retrieval_cache_config(),
+    )
+    cached = retrieval_result_cache.get(cache_key)
+    record_cache_lookup("retrieval", cached is not None)
+    if cached is not None:
+        sources, context_text, retrieval_debug = cached
+        lookup_ms = round((time.perf_counter() - lookup_started) * 1000.0, 2)
+        retrieval_debug["cache_hit"] = True
+        retrieval_debug["stage_timings_ms"] = {"cache_lookup": lookup_ms, "total": lookup_ms}
+        return sources, context_text, retrieval_debug
+
+    result = run_read(db, run_retrieval, fresh_replica)
+    retrieval_result_cache.put(cache_key, result)
+    sources, context_text, retrieval_debug = result
+    retrieval_debug["cache_hit"] = False
+    return sources, context_text, retrieval_debug
+
+
+def _run_hybrid_retrieval(
+    db: Session,
+    question: str,
+    requested_top_k: int,
+    owner_user_id: int,
+    analysis_mode: Optional[str] = None,
+    capability_key: Optional[str] = None,
+) -> tuple[list[dict], str, dict]:
+    """
+    Hybrid retrieval (vector + lexical), returns ranked sources and context text.
+
+    The lexical query only needs the question, so it runs on its own pooled
+    connection while the question is embedded and the vector query runs on
+    ``db``; fusion starts once both branches finish. Candidates carry only
+    ids, are ranked against cached per-document metadata, and chunk text is
+    hydrated for the selected context rows only. Per-stage timings are
+    reported in ``retrieval_debug["stage_timings_ms"]``. Inside the caller's
+    ``allow_connection_release`` block, ``db`` holds no connection while the
+    question is embedded.
+    """
+    timings = StageTimings()
+    lexical_future = submit_stage(
+        timings,
+        "lexical_sql",
+        _fetch_lexical_candidates,
+        db.get_bind(),
+        question,
+        owner_user_id,
+    )
+    release_connection_if_allowed(db)
+    try:
+        try:
+            with timings.stage("embed"):
+                query_embedding = embed_text(question)
+        except HTTPException:
+            raise
+        except Exception as exc:
+            raise HTTPException(status_code=503, detail=f"Embedding failed: {exc}")
+
+        with timings.stage("vector_sql"):
+            vector_rows = _fetch_vector_candidates(db, query_embedding, owner_user_id)
+    except BaseException:
+        lexical_future.cancel()
+        raise
+
+    with timings.stage("lexical_wait"):
+        lexical_rows = lexical_future.result()
 
     if not vector_rows and not lexical_rows:
         return (
@@ -808,9 +1098,14 @@ def _retrieve_hybrid_sources(
                 "mode_filter_fallback_used": False,
                 "metadata_coverage_ratio": 0.0,
                 "authority_weighting_enabled": True,
+                "stage_timings_ms": timings.as_dict(),
             },
         )
 
+    with timings.stage("document_metadata"):
+        document_entries = _load_document_entries(db, list(vector_rows) + list(lexical_rows))
+
+    fusion_started = time.perf_counter()
     # Reciprocal rank fusion
     rrf_k = 60
     rrf_scores: Dict[int, float] = {}
@@ -826,13 +1121,16 @@ def _retrieve_hybrid_sources(
     candidates = []
     for row_id, base_score in rrf_scores.items():
         row = row_by_id[row_id]
-        metadata = extract_row_retrieval_metadata(row)
+        entry = document_entries.get(int(row.document_id))
+        if entry is None:
+            # Document deleted between the candidate query and the metadata load.
+            continue
         candidates.append(
             {
                 "id": row_id,
                 "row": row,
                 "base_score": base_score,
-                "metadata": metadata,
+                "metadata": entry.metadata,
             }
         )
     ranked_candidates, retrieval_debug = rerank_candidates_with_metadata(
@@ -841,7 +1139,7 @@ def _retrieve_hybrid_sources(
     )
     ranked_rows = [item["row"] for item in ranked_candidates]
     ranked_scores = {item["id"]: item["final_score"] for item in ranked_candidates}
-    ranked_metadata = {item["id"]: item["metadata"] for item in ranked_candidates}
+    timings.record("fusion_rerank", (time.perf_counter() - fusion_started) * 1000.0)
 
     context_limit = min(max(requested_top_k, QUERY_CONTEXT_LIMIT), len(ranked_rows))
     desired_unique_docs = min(QUERY_MIN_UNIQUE_DOCUMENTS, context_limit)
@@ -882,19 +1180,36 @@ def _retrieve_hybrid_sources(
     if not context_rows:
         context_rows = ranked_rows[:context_limit]
 
+    with timings.stage("hydrate_sql"):
+        hydrated = _hydrate_chunk_rows(db, [int(row.id) for row in context_rows])
+
     sources: List[dict] = []
     context_parts: List[str] = []
-    for idx, row in enumerate(context_rows, start=1):
-        source_id = f"S{idx}"
-        source_label = _build_source_label(row)
-        metadata = ranked_metadata.get(row.id) or extract_row_retrieval_metadata(row)
+    for row in context_rows:
+        chunk = hydrated.get(int(row.id))
+        if chunk is None:
+            # Chunk replaced or deleted since the candidate query.
+            continue
+        entry = document_entries[int(row.document_id)]
+        metadata = entry.metadata
+        source_id = f"S{len(sources) + 1}"
+        source_label = _build_source_label(
+            SimpleNamespace(
+                title=entry.title,
+                filename=entry.filename,
+                page_numbers=chunk.page_numbers,
+                section_title=chunk.section_title,
+                authority_type=metadata.get("authority_type"),
+                document_revision=metadata.get("document_revision"),
+            )
+        )
         sources.append(
             {
                 "source_id": source_id,
-                "filename": row.filename,
-                "title": row.title,
-                "page_numbers": row.page_numbers,
-                "section_title": row.section_title,
+                "filename": entry.filename,
+                "title": entry.title,
+                "page_numbers": chunk.page_numbers,
+                "section_title": chunk.section_title,
                 "similarity": round(ranked_scores.get(row.id, 0.0), 4),
                 "authority_type": metadata.get("authority_type"),
                 "document_revision": metadata.get("document_revision"),
@@ -903,15 +1218,18 @@ def _retrieve_hybrid_sources(
                 "aircraft_scope": metadata.get("aircraft_scope"),
                 "system_scope": metadata.get("system_scope"),
                 "source_priority": metadata.get("source_priority"),
-                "text": row.text,
+                "text": chunk.text,
             }
         )
-        context_parts.append(f"[{source_id}] {source_label}\n{row.text}")
+        context_parts.append(f"[{source_id}] {source_label}\n{chunk.text}")
 
     retrieval_debug.update(
         {
             "analysis_mode": profile.mode_key,
             "capability_key": profile.capability_key,
+            "candidate_rows": len(row_by_id),
+            "hydrated_rows": len(hydrated),
+            "stage_timings_ms": timings.as_dict(),
         }
     )
     return sources, "\n\n---\n\n".join(context_parts), retrieval_debug
@@ -1089,42 +1407,63 @@ def _build_deterministic_handling_qualities_section(metrics: dict) -> str:
 # ---------------------------------------------------------------------------
 
 
-def _split_long_text(text_content: str, max_chars: int) -> List[str]:
-    """Split oversized chunks into smaller pieces to avoid tokenizer slow paths."""
-    if max_chars <= 0 or len(text_content) <= max_chars:
-        return [text_content]
-
-    pieces: List[str] = []
-    current = ""
-    for paragraph in text_content.split("\n\n"):
-        if len(paragraph) > max_chars:
-            if current:
-                pieces.append(current.strip())
-                current = ""
-            for i in range(0, len(paragraph), max_chars):
-                part = paragraph[i : i + max_chars].strip()
-                if part:
-                    pieces.append(part)
-            continue
+def _resolve_docling_parse_config(
+    file_size_bytes: Optional[int] = None,
+    sharded: bool = False,
+) -> DoclingParseConfig:
+    """
+    Pick the Docling pipeline configuration for one document.
+
+    Sharded parses spread table-structure cost across workers, so large files
+    keep table extraction instead of being auto-downgraded to fast mode.
+    """
+    force_fast_mode = _env_flag("DOCLING_FAST_MODE", False)
+    auto_fast_for_large = _env_flag("DOCLING_AUTO_FAST_FOR_LARGE_FILES", True)
+    table_structure_enabled = _env_flag("DOCLING_TABLE_STRUCTURE", True)
+
+    file_size_mb = (file_size_bytes / (1024 * 1024)) if file_size_bytes is not None else None
+    is_large_file = file_size_mb is not None and file_size_mb >= DOCLING_FAST_THRESHOLD_MB
+    use_fast_mode = force_fast_mode or (auto_fast_for_large and is_large_file and not sharded)
+
+    # Table extraction is accurate but expensive. In fast mode we disable it.
+    use_table_structure = table_structure_enabled and not use_fast_mode
+
+    logger.debug(
+        "Docling parse config: fast_mode=%s auto_fast=%s sharded=%s file_size_mb=%s "
+        "table_structure=%s",
+        force_fast_mode,
+        auto_fast_for_large,
+        sharded,
+        round(file_size_mb, 2) if file_size_mb is not None else "unknown",
+        use_table_structure,
+    )
+    return DoclingParseConfig(
+        use_table_structure=use_table_structure,
+        num_threads=DOCLING_NUM_THREADS,
+        max_chunk_chars=DOCLING_MAX_CHUNK_CHARS,
+    )
 
-        candidate = f"{current}\n\n{paragraph}".strip() if current else paragraph
-        if len(candidate) <= max_chars:
-            current = candidate
-        else:
-            if current:
-                pieces.append(current.strip())
-            current = paragraph
 
-    if current:
-        pieces.append(current.strip())
+def _document_worker_pool():
+    """Shared ingestion pool; workers pre-load the default (no size hint) config."""
+    return get_document_worker_pool(warm_config=_resolve_docling_parse_config())
 
-    return pieces or [text_content]
+
+def prewarm_document_workers() -> None:
+    """Start ingestion workers at boot so the first upload skips model loading."""
+    if not is_installed("docling") or not _env_flag("DOCLING_WORKER_PREWARM", True):
+        return
+    try:
+        _document_worker_pool().prewarm()
+    except Exception as exc:
+        logger.warning("Docling worker pre-warm failed: %s", exc)
 
 
 def parse_and_chunk_pdf(
     pdf_path: str,
     file_size_bytes: Optional[int] = None,
     doc_id: Optional[int] = None,
+    reservation: Optional[DocumentWorkerReservation] = None,
 ) -> Tuple[List[dict], Optional[int]]:
     """
     Use Docling to parse a PDF and return a list of chunk dicts:
@@ -1133,6 +1472,12 @@ def parse_and_chunk_pdf(
     Docling's HybridChunker respects section boundaries and keeps
     tables intact as single chunks — critical for standards/handbooks.
 
+    Parsing runs on the warm worker pool (app.docling_workers): converters and
+    the chunker tokenizer are built once per worker and pipeline config, not
+    once per document. PDFs of DOCLING_SHARD_MIN_PAGES or more are split into
+    page ranges parsed in parallel and merged back in page order. The parse
+    uses the admission slot ``reservation`` taken when the upload was accepted.
+
     Performance tuning applied (see Project_Documents/42_Docling_Performance_Analysis.md):
     - do_ocr=False  : aviation standards are text-based PDFs (not scanned images)
                       OCR is the single biggest bottleneck (~70% of processing time)
@@ -1142,121 +1487,40 @@ def parse_and_chunk_pdf(
     - AcceleratorOptions(num_threads=4) : use all available CPU cores in the container
     - HybridChunker with tiktoken cl100k_base : avoids downloading BAAI model at runtime
     """
+    pool = _document_worker_pool()
     try:
-        from docling.datamodel.accelerator_options import AcceleratorDevice, AcceleratorOptions
-        from docling.datamodel.base_models import InputFormat
-        from docling.datamodel.pipeline_options import PdfPipelineOptions, TableStructureOptions
-        from docling.document_converter import DocumentConverter, PdfFormatOption
-        from docling_core.transforms.chunker.hybrid_chunker import HybridChunker
-
-        # ----------------------------------------------------------------
-        # Pipeline options: optimised for text-based aviation PDFs
-        # ----------------------------------------------------------------
-        pipeline_options = PdfPipelineOptions()
-
-        # OCR: disable for native-text PDFs (FAR, CS-25, RTCA DO-xxx, etc.)
-        # Enable only if you are ingesting scanned/image-only documents.
-        pipeline_options.do_ocr = False
-
-        force_fast_mode = _env_flag("DOCLING_FAST_MODE", False)
-        auto_fast_for_large = _env_flag("DOCLING_AUTO_FAST_FOR_LARGE_FILES", True)
-        table_structure_enabled = _env_flag("DOCLING_TABLE_STRUCTURE", True)
-
-        file_size_mb = (file_size_bytes / (1024 * 1024)) if file_size_bytes is not None else None
-        is_large_file = file_size_mb is not None and file_size_mb >= DOCLING_FAST_THRESHOLD_MB
-        use_fast_mode = force_fast_mode or (auto_fast_for_large and is_large_file)
-
-        # Table extraction is accurate but expensive. In fast mode we disable it.
-        use_table_structure = table_structure_enabled and not use_fast_mode
-        pipeline_options.do_table_structure = use_table_structure
-        if use_table_structure:
-            pipeline_options.table_structure_options = TableStructureOptions(do_cell_matching=True)
-
-        # Enrichments: disable all — not needed for text-based RAG
-        pipeline_options.do_picture_classification = False
-        pipeline_options.do_picture_description = False
-        pipeline_options.do_code_enrichment = False
-        pipeline_options.do_formula_enrichment = False
-
-        # Image generation: disable — we only need text output
-        pipeline_options.generate_page_images = False
-        pipeline_options.generate_picture_images = False
-        pipeline_options.generate_parsed_pages = False
-
-        # CPU acceleration: configurable thread count for container tuning
-        pipeline_options.accelerator_options = AcceleratorOptions(
-            num_threads=DOCLING_NUM_THREADS,
-            device=AcceleratorDevice.CPU,
+        shards: List[Tuple[int, int]] = []
+        page_count = None
+        # Sharding only pays off when several workers can parse in parallel.
+        if _env_flag("DOCLING_SHARDED_MODE", True) and pool.processes > 1:
+            page_count = count_pdf_pages(pdf_path)
+            if page_count is not None and page_count >= DOCLING_SHARD_MIN_PAGES:
+                shards = plan_page_shards(page_count, DOCLING_SHARD_PAGES)
+
+        config = _resolve_docling_parse_config(
+            file_size_bytes=file_size_bytes,
+            sharded=len(shards) > 1,
         )
-
         logger.info(
-            "Document %s parse config: fast_mode=%s auto_fast=%s file_size_mb=%s "
-            "table_structure=%s threads=%d",
+            "Document %s parse config: table_structure=%s threads=%d file_size_bytes=%s "
+            "pages=%s shards=%d",
             doc_id if doc_id is not None else "?",
-            force_fast_mode,
-            auto_fast_for_large,
-            round(file_size_mb, 2) if file_size_mb is not None else "unknown",
-            use_table_structure,
-            DOCLING_NUM_THREADS,
-        )
-
-        converter = DocumentConverter(
-            format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)}
-        )
-
-        result = converter.convert(pdf_path)
-        doc = result.document
-
-        # Use default HybridChunker tokenizer (sentence-transformers/all-MiniLM-L6-v2)
-        # This is downloaded once and cached in ~/.cache/huggingface inside the container.
-        # It is 80 MB and significantly smaller than BAAI/bge-small-en-v1.5 (130 MB).
-        # To pre-warm the cache, run: docker exec ftias-backend python /app/prewarm_docling.py
-        chunker = HybridChunker(max_tokens=512)
-        chunks_iter = chunker.chunk(doc)
-
-        chunks = []
-        for chunk in chunks_iter:
-            # Extract page numbers from chunk metadata
-            pages = set()
-            if hasattr(chunk, "meta") and chunk.meta:
-                for item in getattr(chunk.meta, "doc_items", []):
-                    for prov in getattr(item, "prov", []):
-                        page = getattr(prov, "page_no", None)
-                        if page is not None:
-                            pages.add(page)
-
-            # Extract section heading
-            section_title = None
-            if hasattr(chunk, "meta") and chunk.meta:
-                headings = getattr(chunk.meta, "headings", None)
-                if headings:
-                    section_title = " > ".join(headings)
-
-            text_content = chunk.text.strip()
-            if not text_content:
-                continue
-
-            for text_piece in _split_long_text(text_content, DOCLING_MAX_CHUNK_CHARS):
-                chunks.append(
-                    {
-                        "text": text_piece,
-                        "page_numbers": (
-                            "-".join(str(p) for p in sorted(pages)) if pages else None
-                        ),
-                        "section_title": section_title,
-                    }
-                )
-
-        total_pages = None
-        pages_obj = getattr(doc, "pages", None)
-        if pages_obj is not None:
-            try:
-                total_pages = len(pages_obj)
-            except TypeError:
-                total_pages = None
+            config.use_table_structure,
+            config.num_threads,
+            file_size_bytes if file_size_bytes is not None else "unknown",
+            page_count if page_count is not None else "unknown",
+            len(shards),
+        )
 
-        return chunks, total_pages
+        if len(shards) > 1:
+            shard_chunks = pool.run_many(
+                parse_pdf_page_range,
+                [(pdf_path, config, page_range) for page_range in shards],
+                reservation=reservation,
+            )
+            return merge_shard_chunks(shard_chunks), page_count
 
+        return pool.run(parse_pdf_with_warm_converter, pdf_path, config, reservation=reservation)
     except Exception as exc:
         logger.error("Docling parsing failed: %s", exc)
         raise RuntimeError(f"PDF parsing failed: {exc}") from exc
@@ -1267,19 +1531,73 @@ def parse_and_chunk_pdf(
 # ---------------------------------------------------------------------------
 
 
-def _process_document_upload(doc_id: int, pdf_path: str):
+def _embed_chunk_texts(doc_id: int, chunk_texts: List[str]) -> List[Optional[List[float]]]:
+    """Embed texts in provider batches, falling back to single calls per batch."""
+    embeddings: List[Optional[List[float]]] = [None] * len(chunk_texts)
+    total_batches = (
+        (len(chunk_texts) + EMBEDDING_BATCH_SIZE - 1) // EMBEDDING_BATCH_SIZE if chunk_texts else 0
+    )
+    for batch_num, start in enumerate(
+        range(0, len(chunk_texts), EMBEDDING_BATCH_SIZE),
+        start=1,
+    ):
+        batch = chunk_texts[start : start + EMBEDDING_BATCH_SIZE]
+        if batch_num == 1 or batch_num == total_batches or batch_num % 10 == 0:
+            logger.info(
+                "Document %d embedding progress: batch %d/%d",
+                doc_id,
+                batch_num,
+                total_batches,
+            )
+        try:
+            batch_embeddings = embed_texts(batch)
+            for idx, embedding in enumerate(batch_embeddings):
+                embeddings[start + idx] = embedding
+        except Exception as batch_exc:
+            logger.warning(
+                "Batch embedding failed for doc %d chunks %d-%d: %s",
+                doc_id,
+                start,
+                min(start + EMBEDDING_BATCH_SIZE - 1, len(chunk_texts) - 1),
+                batch_exc,
+            )
+            # Fallback to single-chunk calls so one transient error does not
+            # fail the entire document.
+            for idx, text_content in enumerate(batch):
+                absolute_idx = start + idx
+                try:
+                    embeddings[absolute_idx] = embed_text(text_content)
+                except Exception as emb_exc:
+                    logger.warning(
+                        "Embedding failed for doc %d chunk %d: %s",
+                        doc_id,
+                        absolute_idx,
+                        emb_exc,
+                    )
+    return embeddings
+
+
+def _process_document_upload(
+    doc_id: int,
+    pdf_path: str,
+    replace_existing: bool = False,
+    reservation: Optional[DocumentWorkerReservation] = None,
+):
     """
     Parse, chunk, embed and persist a document in a background worker.
     This keeps the upload HTTP request fast and avoids client-side timeouts.
+
+    Embeddings are reused for any chunk whose normalized-text hash was already
+    embedded with EMBEDDING_MODEL. With ``replace_existing`` the new chunk set
+    is diffed against the stored one: unchanged chunks keep their rows (only
+    order/page metadata is refreshed), and only added/removed chunks are
+    inserted/deleted.
     """
     started = time.monotonic()
     parse_chunk_duration_s = 0.0
     embed_duration_s = 0.0
     persist_duration_s = 0.0
     finalize_duration_s = 0.0
-    total_batches = 0
-    embedded_count = 0
-    missing_embeddings = 0
     db = SessionLocal()
     try:
         doc = db.query(Document).filter(Document.id == doc_id).first()
@@ -1287,11 +1605,18 @@ def _process_document_upload(doc_id: int, pdf_path: str):
             logger.error("Document %d not found for background processing", doc_id)
             return
 
+        # Releasing expires ``doc``; reading its attributes afterwards would
+        # open a new transaction and hold it through the parse.
+        file_size_bytes = doc.file_size_bytes
+        owner_user_id = doc.uploaded_by_id
+        # Parsing and embedding take minutes; do not sit on a pooled connection.
+        release_connection(db)
         parse_chunk_started = time.monotonic()
         chunks_data, total_pages = parse_and_chunk_pdf(
             pdf_path=pdf_path,
-            file_size_bytes=doc.file_size_bytes,
+            file_size_bytes=file_size_bytes,
             doc_id=doc_id,
+            reservation=reservation,
         )
         parse_chunk_duration_s = time.monotonic() - parse_chunk_started
         logger.info(
@@ -1302,109 +1627,142 @@ def _process_document_upload(doc_id: int, pdf_path: str):
             parse_chunk_duration_s,
         )
 
-        embed_started = time.monotonic()
-        embeddings: List[Optional[List[float]]] = [None] * len(chunks_data)
-        chunk_texts = [chunk["text"] for chunk in chunks_data]
+        content_hashes = [chunk_content_sha256(chunk["text"]) for chunk in chunks_data]
+        diff = None
+        if replace_existing:
+            existing_rows = (
+                db.query(
+                    DocumentChunk.id,
+                    DocumentChunk.content_sha256,
+                    DocumentChunk.text,
+                    DocumentChunk.embedding_model,
+                    DocumentChunk.embedding.isnot(None).label("has_embedding"),
+                )
+                .filter(DocumentChunk.document_id == doc_id)
+                .order_by(DocumentChunk.chunk_index.asc())
+                .all()
+            )
+            # Chunks without a usable embedding (an earlier embedding failure,
+            # or another model) are not kept: they are replaced and re-embedded.
+            diff = diff_chunk_sets(
+                [
+                    (
+                        row.id,
+                        (
+                            row.content_sha256 or chunk_content_sha256(row.text)
+                            if row.has_embedding and row.embedding_model == EMBEDDING_MODEL
+                            else None
+                        ),
+                    )
+                    for row in existing_rows
+                ],
+                content_hashes,
+            )
+            new_indexes = diff.inserted
+            logger.info("Document %d replace diff: %s", doc_id, diff.as_dict())
+        else:
+            new_indexes = list(range(len(chunks_data)))
 
-        total_batches = (
-            (len(chunk_texts) + EMBEDDING_BATCH_SIZE - 1) // EMBEDDING_BATCH_SIZE
-            if chunk_texts
-            else 0
+        embed_started = time.monotonic()
+        embeddings_by_hash = find_reusable_embeddings(
+            db,
+            content_hashes=[content_hashes[idx] for idx in new_indexes],
+            embedding_model=EMBEDDING_MODEL,
         )
-        for batch_num, start in enumerate(
-            range(0, len(chunk_texts), EMBEDDING_BATCH_SIZE),
-            start=1,
-        ):
-            batch = chunk_texts[start : start + EMBEDDING_BATCH_SIZE]
-            if batch_num == 1 or batch_num == total_batches or batch_num % 10 == 0:
-                logger.info(
-                    "Document %d embedding progress: batch %d/%d",
-                    doc_id,
-                    batch_num,
-                    total_batches,
-                )
-            try:
-                batch_embeddings = embed_texts(batch)
-                for idx, embedding in enumerate(batch_embeddings):
-                    embeddings[start + idx] = embedding
-            except Exception as batch_exc:
-                logger.warning(
-                    "Batch embedding failed for doc %d chunks %d-%d: %s",
-                    doc_id,
-                    start,
-                    min(start + EMBEDDING_BATCH_SIZE - 1, len(chunk_texts) - 1),
-                    batch_exc,
-                )
-                # Fallback to single-chunk calls so one transient error does not
-                # fail the entire document.
-                for idx, text_content in enumerate(batch):
-                    absolute_idx = start + idx
-                    try:
-                        embeddings[absolute_idx] = embed_text(text_content)
-                    except Exception as emb_exc:
-                        logger.warning(
-                            "Embedding failed for doc %d chunk %d: %s",
-                            doc_id,
-                            absolute_idx,
-                            emb_exc,
-                        )
+        reused_count = sum(1 for idx in new_indexes if content_hashes[idx] in embeddings_by_hash)
+        # Embed each distinct missing text once, even if it repeats in the document.
+        texts_to_embed: Dict[str, str] = {}
+        for idx in new_indexes:
+            content_hash = content_hashes[idx]
+            if content_hash not in embeddings_by_hash and content_hash not in texts_to_embed:
+                texts_to_embed[content_hash] = chunks_data[idx]["text"]
+        release_connection(db)
+        fresh_embeddings = _embed_chunk_texts(doc_id, list(texts_to_embed.values()))
+        for content_hash, embedding in zip(texts_to_embed.keys(), fresh_embeddings):
+            if embedding is not None:
+                embeddings_by_hash[content_hash] = embedding
         embed_duration_s = time.monotonic() - embed_started
-        embedded_count = sum(1 for e in embeddings if e is not None)
-        missing_embeddings = len(embeddings) - embedded_count
+        missing_embeddings = sum(
+            1 for idx in new_indexes if content_hashes[idx] not in embeddings_by_hash
+        )
         logger.info(
-            "Document %d embedding complete: chunks=%d embedded=%d missing=%d batches=%d duration=%.2fs",
+            "Document %d embedding complete: chunks=%d new=%d reused=%d embedded=%d "
+            "missing=%d duration=%.2fs",
             doc_id,
-            len(chunk_texts),
-            embedded_count,
+            len(chunks_data),
+            len(new_indexes),
+            reused_count,
+            len(texts_to_embed) - sum(1 for e in fresh_embeddings if e is None),
             missing_embeddings,
-            total_batches,
             embed_duration_s,
         )
 
-        chunk_objects = []
-        for idx, chunk_info in enumerate(chunks_data):
-            chunk_objects.append(
-                DocumentChunk(
-                    document_id=doc_id,
-                    chunk_index=idx,
-                    text=chunk_info["text"],
-                    page_numbers=chunk_info.get("page_numbers"),
-                    section_title=chunk_info.get("section_title"),
-                    embedding=embeddings[idx],
-                )
+        chunk_rows = [
+            build_chunk_row(
+                document_id=doc_id,
+                chunk_index=idx,
+                chunk_info=chunks_data[idx],
+                embedding=embeddings_by_hash.get(content_hashes[idx]),
+                content_sha256=content_hashes[idx],
+                embedding_model=EMBEDDING_MODEL,
             )
+            for idx in new_indexes
+        ]
 
+        # Chunk writes and the status flip share one transaction: a crash
+        # mid-way leaves no half-indexed document behind.
         persist_started = time.monotonic()
-        batch_size = 100
-        for i in range(0, len(chunk_objects), batch_size):
-            db.bulk_save_objects(chunk_objects[i : i + batch_size])
-            db.commit()
+        if diff is not None:
+            for i in range(0, len(diff.deleted), 500):
+                db.query(DocumentChunk).filter(
+                    DocumentChunk.id.in_(diff.deleted[i : i + 500])
+                ).delete(synchronize_session=False)
+            db.bulk_update_mappings(
+                DocumentChunk,
+                [
+                    {
+                        "id": chunk_id,
+                        "chunk_index": new_index,
+                        "page_numbers": chunks_data[new_index].get("page_numbers"),
+                        "section_title": chunks_data[new_index].get("section_title"),
+                        "content_sha256": content_hashes[new_index],
+                    }
+                    for chunk_id, new_index in diff.kept
+                ],
+            )
+        persist_mode = write_document_chunks(db, chunk_rows)
         persist_duration_s = time.monotonic() - persist_started
 
         finalize_started = time.monotonic()
         doc.total_pages = total_pages
-        doc.total_chunks = len(chunk_objects)
+        doc.total_chunks = len(chunks_data)
         doc.status = "ready"
         doc.error_message = None
+        bump_corpus_version(db, owner_user_id)
         db.commit()
+        document_metadata_cache.invalidate(doc_id)
         finalize_duration_s = time.monotonic() - finalize_started
 
         elapsed = time.monotonic() - started
+        record_ingest("document_chunks", len(chunks_data), elapsed)
         logger.info(
             "Document %d indexed: pages=%s chunks=%d duration=%.1fs",
             doc_id,
             total_pages,
-            len(chunk_objects),
+            len(chunks_data),
             elapsed,
         )
         logger.info(
-            "Document %d ingestion timings: parse_chunk=%.2fs embed=%.2fs persist=%.2fs finalize=%.2fs total=%.2fs",
+            "Document %d ingestion timings: parse_chunk=%.2fs embed=%.2fs persist=%.2fs finalize=%.2fs total=%.2fs "
+            "persist_mode=%s rows=%d",
             doc_id,
             parse_chunk_duration_s,
             embed_duration_s,
             persist_duration_s,
             finalize_duration_s,
             elapsed,
+            persist_mode,
+            len(chunk_rows),
         )
 
     except Exception as exc:
@@ -1420,6 +1778,7 @@ def _process_document_upload(doc_id: int, pdf_path: str):
             elapsed,
         )
         try:
+            db.rollback()
             doc = db.query(Document).filter(Document.id == doc_id).first()
             if doc:
                 doc.status = "error"
@@ -1428,6 +1787,8 @@ def _process_document_upload(doc_id: int, pdf_path: str):
         except Exception:
             logger.exception("Failed to mark document %d as error", doc_id)
     finally:
+        if reservation is not None:
+            reservation.release()
         db.close()
         try:
             os.unlink(pdf_path)
@@ -1440,36 +1801,20 @@ def _process_document_upload(doc_id: int, pdf_path: str):
 # ---------------------------------------------------------------------------
 
 
-@router.post("/upload", response_model=DocumentOut)
-async def upload_document(
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(...),
-    title: Optional[str] = Form(None),
-    doc_type: Optional[str] = Form(None),
-    description: Optional[str] = Form(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
+def _save_upload_to_tempfile(file: UploadFile) -> Tuple[str, int]:
     """
-    Upload a PDF document (standard, handbook, regulation).
-    Docling parses it, HybridChunker splits it, OpenAI embeds each chunk,
-    and the embeddings are stored in pgvector for semantic search.
-    """
-    _require_ai_packages()
-    # Validate API key up-front so we fail fast instead of creating a stuck
-    # "processing" record that will error in the background worker.
-    get_openai_client()
-
-    if not file.filename or not file.filename.lower().endswith(".pdf"):
-        raise HTTPException(status_code=400, detail="Only PDF files are supported.")
+    Copy an uploaded PDF to a temp file; returns (path, size in bytes).
 
+    Reads the spooled ``file.file`` synchronously, so call it from a sync
+    handler (request threadpool), never on the event loop.
+    """
     tmp_path = ""
     file_size = 0
     try:
         with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
             tmp_path = tmp.name
             while True:
-                chunk = await file.read(1024 * 1024)
+                chunk = file.file.read(1024 * 1024)
                 if not chunk:
                     break
                 file_size += len(chunk)
@@ -1482,73 +1827,113 @@ async def upload_document(
                 pass
         raise HTTPException(status_code=500, detail=f"Failed to save uploaded file: {exc}")
     finally:
-        await file.close()
-
-    derived_metadata = derive_document_retrieval_metadata(
-        filename=file.filename,
-        title=title or file.filename,
-        doc_type=doc_type,
-        description=description,
-    )
-
-    # Create the Document record immediately so the frontend can poll status
-    doc = Document(
-        filename=file.filename,
-        title=title or file.filename,
-        doc_type=doc_type,
-        description=description,
-        authority_type=derived_metadata["authority_type"],
-        document_revision=derived_metadata["document_revision"],
-        domain_tags_json=json.dumps(derived_metadata["domain_tags"]),
-        capability_tags_json=json.dumps(derived_metadata["capability_tags"]),
-        aircraft_scope=derived_metadata["aircraft_scope"],
-        system_scope=derived_metadata["system_scope"],
-        source_priority=derived_metadata["source_priority"],
-        file_size_bytes=file_size,
-        status="processing",
-        uploaded_by_id=current_user.id,
-    )
-    db.add(doc)
-    db.commit()
-    db.refresh(doc)
+        file.file.close()
+    return tmp_path, file_size
 
-    background_tasks.add_task(_process_document_upload, doc.id, tmp_path)
 
-    return _doc_to_out(doc)
+def _ensure_document_upload_ready(file: UploadFile) -> DocumentWorkerReservation:
+    """
+    Shared pre-flight checks for upload and replace.
 
+    Returns the parse slot reserved for the upload; the caller hands it to
+    the background task, or releases it if the request fails first.
+    """
+    _require_ai_packages()
+    # Validate API key up-front so we fail fast instead of creating a stuck
+    # "processing" record that will error in the background worker.
+    get_openai_client()
 
-# ---------------------------------------------------------------------------
-# GET /api/documents
-# ---------------------------------------------------------------------------
+    if not file.filename or not file.filename.lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Only PDF files are supported.")
 
+    try:
+        return _document_worker_pool().reserve()
+    except DocumentWorkerQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Document processing queue is full. Retry the upload shortly.",
+            headers={"Retry-After": "30"},
+        )
 
-@router.get("/", response_model=List[DocumentOut])
-def list_documents(
-    db: Session = Depends(get_db),
+
+@router.post("/upload", response_model=DocumentOut)
+def upload_document(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    title: Optional[str] = Form(None),
+    doc_type: Optional[str] = Form(None),
+    description: Optional[str] = Form(None),
+    db: Session = Depends(get_ingest_db),
     current_user: User = Depends(get_current_user),
 ):
-    """List all documents in the library, newest first."""
-    docs = (
-        db.query(Document)
-        .filter(Document.uploaded_by_id == current_user.id)
-        .order_by(Document.created_at.desc())
-        .all()
-    )
-    return [_doc_to_out(d) for d in docs]
+    """
+    Upload a PDF document (standard, handbook, regulation).
+    Docling parses it, HybridChunker splits it, OpenAI embeds each chunk,
+    and the embeddings are stored in pgvector for semantic search.
+    """
+    reservation = _ensure_document_upload_ready(file)
+    try:
+        # Nothing is pending yet: hand the connection back while copying.
+        release_connection(db)
+        tmp_path, file_size = _save_upload_to_tempfile(file)
+
+        derived_metadata = derive_document_retrieval_metadata(
+            filename=file.filename,
+            title=title or file.filename,
+            doc_type=doc_type,
+            description=description,
+        )
+
+        # Create the Document record immediately so the frontend can poll status
+        doc = Document(
+            filename=file.filename,
+            title=title or file.filename,
+            doc_type=doc_type,
+            description=description,
+            authority_type=derived_metadata["authority_type"],
+            document_revision=derived_metadata["document_revision"],
+            domain_tags_json=json.dumps(derived_metadata["domain_tags"]),
+            capability_tags_json=json.dumps(derived_metadata["capability_tags"]),
+            aircraft_scope=derived_metadata["aircraft_scope"],
+            system_scope=derived_metadata["system_scope"],
+            source_priority=derived_metadata["source_priority"],
+            file_size_bytes=file_size,
+            status="processing",
+            uploaded_by_id=current_user.id,
+        )
+        db.add(doc)
+        db.commit()
+        db.refresh(doc)
+
+        background_tasks.add_task(_process_document_upload, doc.id, tmp_path, False, reservation)
+    except BaseException:
+        reservation.release()
+        raise
+
+    return _doc_to_out(doc)
 
 
 # ---------------------------------------------------------------------------
-# DELETE /api/documents/{doc_id}
+# POST /api/documents/{doc_id}/replace
 # ---------------------------------------------------------------------------
 
 
-@router.delete("/{doc_id}")
-def delete_document(
+@router.post("/{doc_id}/replace", response_model=DocumentOut)
+def replace_document(
     doc_id: int,
-    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    title: Optional[str] = Form(None),
+    doc_type: Optional[str] = Form(None),
+    description: Optional[str] = Form(None),
+    db: Session = Depends(get_ingest_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Delete a document and all its chunks from the library."""
+    """
+    Upload a new revision of an existing document.
+    Chunks are diffed by content hash so only changed text is re-embedded
+    and only added/removed chunks are written.
+    """
     doc = (
         db.query(Document)
         .filter(Document.id == doc_id, Document.uploaded_by_id == current_user.id)
@@ -1556,28 +1941,227 @@ def delete_document(
     )
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found.")
-    db.delete(doc)
-    db.commit()
-    return {"message": f"Document '{doc.filename}' deleted successfully."}
+    if doc.status == "processing":
+        raise HTTPException(
+            status_code=409,
+            detail="Document is still processing. Wait for it to finish before replacing it.",
+        )
+    if doc.status == "deleting":
+        raise HTTPException(status_code=409, detail="Document is being deleted.")
+
+    reservation = _ensure_document_upload_ready(file)
+    try:
+        # Nothing is pending yet: hand the connection back while copying.
+        release_connection(db)
+        tmp_path, file_size = _save_upload_to_tempfile(file)
+
+        new_title = title or doc.title or file.filename
+        new_doc_type = doc_type if doc_type is not None else doc.doc_type
+        new_description = description if description is not None else doc.description
+        derived_metadata = derive_document_retrieval_metadata(
+            filename=file.filename,
+            title=new_title,
+            doc_type=new_doc_type,
+            description=new_description,
+        )
+
+        doc.filename = file.filename
+        doc.title = new_title
+        doc.doc_type = new_doc_type
+        doc.description = new_description
+        doc.authority_type = derived_metadata["authority_type"]
+        doc.document_revision = derived_metadata["document_revision"]
+        doc.domain_tags_json = json.dumps(derived_metadata["domain_tags"])
+        doc.capability_tags_json = json.dumps(derived_metadata["capability_tags"])
+        doc.aircraft_scope = derived_metadata["aircraft_scope"]
+        doc.system_scope = derived_metadata["system_scope"]
+        doc.source_priority = derived_metadata["source_priority"]
+        doc.file_size_bytes = file_size
+        doc.status = "processing"
+        doc.error_message = None
+        bump_corpus_version(db, doc.uploaded_by_id)
+        db.commit()
+        db.refresh(doc)
+        document_metadata_cache.invalidate(doc.id)
+
+        background_tasks.add_task(_process_document_upload, doc.id, tmp_path, True, reservation)
+    except BaseException:
+        reservation.release()
+        raise
+
+    return _doc_to_out(doc)
 
 
 # ---------------------------------------------------------------------------
-# POST /api/documents/query  — semantic search + LLM answer
+# GET /api/documents
 # ---------------------------------------------------------------------------
 
 
-@router.post("/query", response_model=QueryResponse)
-def query_documents(
-    request: QueryRequest,
+@router.get("/", response_model=List[DocumentOut])
+def list_documents(
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedPrincipal = Depends(get_current_principal),
+):
+    """List all documents in the library, newest first."""
+    docs = (
+        db.query(Document)
+        .filter(Document.uploaded_by_id == current_user.id, Document.status != "deleting")
+        .order_by(Document.created_at.desc())
+        .all()
+    )
+    return [_doc_to_out(d) for d in docs]
+
+
+# ---------------------------------------------------------------------------
+# DELETE /api/documents/{doc_id}
+# ---------------------------------------------------------------------------
+
+
+_document_purge_executor: Optional[ThreadPoolExecutor] = None
+_document_purge_lock = threading.Lock()
+
+
+def _document_purges() -> ThreadPoolExecutor:
+    """
+    Single thread that runs document purges in submission order, so waiting
+    for a "background" workload slot never parks a request threadpool thread.
+    """
+    global _document_purge_executor
+    with _document_purge_lock:
+        if _document_purge_executor is None:
+            _document_purge_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="document-purge"
+            )
+        return _document_purge_executor
+
+
+def shutdown_document_purges() -> None:
+    """Drop queued purges; their documents stay "deleting" and resume on startup."""
+    global _document_purge_executor
+    with _document_purge_lock:
+        executor, _document_purge_executor = _document_purge_executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _purge_deleted_document(doc_id: int) -> None:
+    """
+    Remove a document marked "deleting": chunks go in batched set-based
+    deletes (no ORM loading of embeddings), then the document row itself.
+    """
+    with workload_slot("background", timeout=None):
+        _purge_document_rows(doc_id)
+
+
+def _purge_document_rows(doc_id: int) -> None:
+    db = SessionLocal()
+    try:
+        deleted_chunks = delete_in_batches(db, DocumentChunk, DocumentChunk.document_id == doc_id)
+        db.query(Document).filter(Document.id == doc_id, Document.status == "deleting").delete(
+            synchronize_session=False
+        )
+        db.commit()
+        logger.info("Purged document %d (%d chunks)", doc_id, deleted_chunks)
+    except Exception as exc:
+        db.rollback()
+        # The row stays "deleting" and is retried on the next startup.
+        logger.error("Purging document %d failed: %s", doc_id, exc)
+    finally:
+        db.close()
+
+
+def resume_pending_document_deletions() -> None:
+    """Finish purges interrupted by a restart; runs off the startup path."""
+    db = SessionLocal()
+    try:
+        doc_ids = [row.id for row in db.query(Document.id).filter(Document.status == "deleting")]
+    except Exception as exc:
+        logger.warning("Could not resume pending document deletions: %s", exc)
+        return
+    finally:
+        db.close()
+    if not doc_ids:
+        return
+
+    purges = _document_purges()
+    for doc_id in doc_ids:
+        purges.submit(_purge_deleted_document, doc_id)
+    logger.info("Resuming purge of %d deleted document(s)", len(doc_ids))
+
+
+@router.delete("/{doc_id}")
+def delete_document(
+    doc_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
-    Semantic search over the document library.
-    1. Embed the question.
-    2. Find the top-k most similar chunks via pgvector cosine distance.
-    3. Pass the chunks as context to the LLM and return its answer.
+    Delete a document and all its chunks from the library.
+
+    The document is marked "deleting" (dropping it from retrieval at once) and
+    its chunks are purged in batches on the document purge thread.
     """
+    doc = (
+        db.query(Document)
+        .filter(Document.id == doc_id, Document.uploaded_by_id == current_user.id)
+        .first()
+    )
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found.")
+    filename = doc.filename
+    if doc.status != "deleting":
+        doc.status = "deleting"
+        bump_corpus_version(db, doc.uploaded_by_id)
+        db.commit()
+        document_metadata_cache.invalidate(doc_id)
+    _document_purges().submit(_purge_deleted_document, doc_id)
+    return {"message": f"Document '{filename}' deleted successfully."}
+
+
+# ---------------------------------------------------------------------------
+# POST /api/documents/query  — semantic search + LLM answer
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class _QueryPlan:
+    """Retrieval results and prompts for one /query request, ready for the LLM."""
+
+    question: str
+    requested_top_k: int
+    selected_mode: AnalysisModeDefinition
+    sources: List[dict]
+    context: str
+    retrieval_debug: Dict[str, Any]
+    brief_request: bool = False
+    risk_request: bool = False
+    answer_type: str = "technical_explanation"
+    messages: List[dict] = field(default_factory=list)
+
+
+def _build_query_retrieval_metadata(plan: _QueryPlan) -> QueryRetrievalMetadata:
+    retrieval_debug = plan.retrieval_debug
+    return QueryRetrievalMetadata(
+        requested_top_k=plan.requested_top_k,
+        context_limit=QUERY_CONTEXT_LIMIT,
+        vector_candidates=QUERY_VECTOR_CANDIDATES,
+        lexical_candidates=QUERY_LEXICAL_CANDIDATES,
+        min_unique_documents=QUERY_MIN_UNIQUE_DOCUMENTS,
+        max_chunks_per_document=QUERY_MAX_CHUNKS_PER_DOCUMENT,
+        analysis_mode=plan.selected_mode.key,
+        capability_key=plan.selected_mode.capability_key,
+        mode_filter_enabled=bool(retrieval_debug.get("mode_filter_enabled", False)),
+        mode_filter_matched_chunks=int(retrieval_debug.get("mode_filter_matched_chunks", 0)),
+        mode_filter_fallback_used=bool(retrieval_debug.get("mode_filter_fallback_used", False)),
+        metadata_coverage_ratio=float(retrieval_debug.get("metadata_coverage_ratio", 0.0)),
+        authority_weighting_enabled=bool(retrieval_debug.get("authority_weighting_enabled", True)),
+        stage_timings_ms=dict(retrieval_debug.get("stage_timings_ms") or {}),
+        context_packing=dict(retrieval_debug.get("context_packing") or {}),
+    )
+
+
+def _prepare_query(db: Session, request: QueryRequest, current_user: User) -> _QueryPlan:
+    """Validate the request, retrieve sources and build the LLM prompt."""
     _require_ai_packages()
 
     requested_top_k = max(1, min(20, request.top_k or QUERY_TOP_K_DEFAULT))
@@ -1601,68 +2185,27 @@ def query_documents(
         analysis_mode=selected_mode.key,
         capability_key=selected_mode.capability_key,
     )
+    plan = _QueryPlan(
+        question=request.question,
+        requested_top_k=requested_top_k,
+        selected_mode=selected_mode,
+        sources=sources,
+        context=context,
+        retrieval_debug=retrieval_debug,
+    )
     if not sources:
-        return QueryResponse(
-            answer=(
-                "No relevant documents found in the library. "
-                "Please upload some standards or handbooks first."
-            ),
-            summary="No indexed evidence was found for this query.",
-            answer_type="insufficient_evidence",
-            technical_scope="standards_query",
-            assumptions=[],
-            limitations=["No relevant source documents were retrieved."],
-            calculation_notes=[],
-            recommended_next_queries=[
-                "Upload standards/handbooks relevant to this topic and rerun the query.",
-                "Ask a narrower question including target system, test phase, and regulation family.",
-            ],
-            sources=[],
-            warnings=["No relevant source evidence was retrieved for this query."],
-            coverage=QueryCoverage(
-                citation_density=0.0,
-                warning_threshold=QUERY_WARNING_CITATION_DENSITY,
-                repair_threshold=QUERY_MIN_CITATION_DENSITY,
-                has_inline_citations=False,
-                retrieved_sources_count=0,
-                cited_sources_count=0,
-                unique_documents_retrieved=0,
-                unique_documents_cited=0,
-            ),
-            retrieval_metadata=QueryRetrievalMetadata(
-                requested_top_k=requested_top_k,
-                context_limit=QUERY_CONTEXT_LIMIT,
-                vector_candidates=QUERY_VECTOR_CANDIDATES,
-                lexical_candidates=QUERY_LEXICAL_CANDIDATES,
-                min_unique_documents=QUERY_MIN_UNIQUE_DOCUMENTS,
-                max_chunks_per_document=QUERY_MAX_CHUNKS_PER_DOCUMENT,
-                analysis_mode=selected_mode.key,
-                capability_key=selected_mode.capability_key,
-                mode_filter_enabled=bool(retrieval_debug.get("mode_filter_enabled", False)),
-                mode_filter_matched_chunks=int(
-                    retrieval_debug.get("mode_filter_matched_chunks", 0)
-                ),
-                mode_filter_fallback_used=bool(
-                    retrieval_debug.get("mode_filter_fallback_used", False)
-                ),
-                metadata_coverage_ratio=float(retrieval_debug.get("metadata_coverage_ratio", 0.0)),
-                authority_weighting_enabled=bool(
-                    retrieval_debug.get("authority_weighting_enabled", True)
-                ),
-            ),
-        )
+        return plan
 
-    brief_request = _is_brief_request(request.question)
-    risk_request = _is_risk_assessment_request(request.question)
-    answer_type = _infer_answer_type(request.question, risk_request)
-    source_legend = _build_query_source_legend(sources)
+    plan.brief_request = _is_brief_request(request.question)
+    plan.risk_request = _is_risk_assessment_request(request.question)
+    plan.answer_type = _infer_answer_type(request.question, plan.risk_request)
 
     format_instructions = (
         "- Keep the response succinct (max 220 words), but technically specific.\n"
-        if brief_request
+        if plan.brief_request
         else "- Provide specialist depth with concrete engineering detail.\n"
     )
-    if risk_request:
+    if plan.risk_request:
         format_instructions += (
             "- Use this structure:\n"
             "  1) Assumptions\n"
@@ -1681,34 +2224,85 @@ def query_documents(
         "Use plain-text equations and markdown tables where helpful."
     )
 
-    user_prompt = (
-        f"Question:\n{request.question}\n\n"
-        "Source ID legend:\n"
-        f"{source_legend}\n\n"
-        "Formatting requirements:\n"
-        f"{format_instructions}"
-        "- Keep citations tightly mapped to claims.\n\n"
-        f"Source excerpts:\n\n{context}"
+    def _user_prompt(prompt_sources: List[dict], excerpts: str) -> str:
+        return (
+            f"Question:\n{request.question}\n\n"
+            "Source ID legend:\n"
+            f"{_build_query_source_legend(prompt_sources)}\n\n"
+            "Formatting requirements:\n"
+            f"{format_instructions}"
+            "- Keep citations tightly mapped to claims.\n\n"
+            f"Source excerpts:\n\n{excerpts}"
+        )
+
+    # The legend of every retrieved source bounds the fixed part of the prompt.
+    packed_sources, context = _pack_prompt_context(
+        sources,
+        question=request.question,
+        model=QUERY_MODEL,
+        max_tokens=QUERY_MAX_TOKENS,
+        fixed_prompt_tokens=count_tokens(system_prompt) + count_tokens(_user_prompt(sources, "")),
+        retrieval_debug=retrieval_debug,
     )
+    # Never fall back to the unpacked context: it is the over-budget prompt.
+    # With nothing packed the caller returns the no-evidence response.
+    plan.sources, plan.context = packed_sources, context
+    if not plan.sources:
+        return plan
+    user_prompt = _user_prompt(plan.sources, plan.context)
+    plan.messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+    return plan
 
-    try:
-        client = get_openai_client()
-        completion = client.chat.completions.create(
-            model=QUERY_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=QUERY_TEMPERATURE,
-            max_tokens=QUERY_MAX_TOKENS,
-        )
-        answer = completion.choices[0].message.content or ""
-    except Exception as exc:
-        raise HTTPException(
-            status_code=503,
-            detail=f"LLM call failed: {exc}",
+
+def _build_empty_query_response(plan: _QueryPlan) -> QueryResponse:
+    response = QueryResponse(
+        answer=(
+            "No relevant documents found in the library. "
+            "Please upload some standards or handbooks first."
+        ),
+        summary="No indexed evidence was found for this query.",
+        answer_type="insufficient_evidence",
+        technical_scope="standards_query",
+        assumptions=[],
+        limitations=["No relevant source documents were retrieved."],
+        calculation_notes=[],
+        recommended_next_queries=[
+            "Upload standards/handbooks relevant to this topic and rerun the query.",
+            "Ask a narrower question including target system, test phase, and regulation family.",
+        ],
+        sources=[],
+        warnings=["No relevant source evidence was retrieved for this query."],
+        coverage=QueryCoverage(
+            citation_density=0.0,
+            warning_threshold=QUERY_WARNING_CITATION_DENSITY,
+            repair_threshold=QUERY_MIN_CITATION_DENSITY,
+            has_inline_citations=False,
+            retrieved_sources_count=0,
+            cited_sources_count=0,
+            unique_documents_retrieved=0,
+            unique_documents_cited=0,
+        ),
+        retrieval_metadata=_build_query_retrieval_metadata(plan),
+    )
+    packing = plan.retrieval_debug.get("context_packing") or {}
+    if packing.get("sources_in") and not packing.get("sources_packed"):
+        # Sources were retrieved, but no excerpt fit the model's prompt budget.
+        response.answer = (
+            "Relevant excerpts were found, but none fit the model's prompt budget. "
+            "Ask a narrower question."
         )
+        response.summary = "Retrieved evidence exceeded the prompt budget for this query."
+        response.limitations = ["No retrieved excerpt fit within the model's context budget."]
+        response.warnings = ["Retrieved source evidence was dropped by context packing."]
+    return response
+
 
+def _finalize_query_answer(plan: _QueryPlan, answer: str, client) -> QueryResponse:
+    """Citation repair, coverage checks and response assembly for a raw LLM answer."""
+    sources = plan.sources
     answer = _strip_used_sources_footer(answer)
     allowed_source_ids = {str(s.get("source_id")) for s in sources if s.get("source_id")}
     warnings: List[str] = []
@@ -1732,11 +2326,11 @@ def query_documents(
         try:
             repaired = _repair_query_answer_citations(
                 client=client,
-                question=request.question,
+                question=plan.question,
                 answer=answer,
                 sources=sources,
-                is_brief=brief_request,
-                is_risk_assessment=risk_request,
+                is_brief=plan.brief_request,
+                is_risk_assessment=plan.risk_request,
             )
             if repaired:
                 answer = repaired
@@ -1796,10 +2390,10 @@ def query_documents(
     )
     if not recommended_next_queries:
         recommended_next_queries = _default_recommended_next_queries(
-            question=request.question,
+            question=plan.question,
             has_coverage_warning=coverage_warning_present,
-            is_risk_assessment=risk_request,
-            answer_type=answer_type,
+            is_risk_assessment=plan.risk_request,
+            answer_type=plan.answer_type,
         )
 
     cited_unique_doc_labels = {
@@ -1808,11 +2402,11 @@ def query_documents(
         if (s.get("title") or s.get("filename"))
     }
 
-    response_sources = [{k: v for k, v in s.items() if k != "text"} for s in sources]
+    response_sources = _public_sources(sources)
     return QueryResponse(
         answer=answer,
         summary=_extract_summary(answer),
-        answer_type=answer_type,
+        answer_type=plan.answer_type,
         technical_scope="standards_query",
         assumptions=assumptions,
         limitations=limitations,
@@ -1830,26 +2424,104 @@ def query_documents(
             unique_documents_retrieved=len(retrieved_unique_doc_labels),
             unique_documents_cited=len(cited_unique_doc_labels),
         ),
-        retrieval_metadata=QueryRetrievalMetadata(
-            requested_top_k=requested_top_k,
-            context_limit=QUERY_CONTEXT_LIMIT,
-            vector_candidates=QUERY_VECTOR_CANDIDATES,
-            lexical_candidates=QUERY_LEXICAL_CANDIDATES,
-            min_unique_documents=QUERY_MIN_UNIQUE_DOCUMENTS,
-            max_chunks_per_document=QUERY_MAX_CHUNKS_PER_DOCUMENT,
-            analysis_mode=selected_mode.key,
-            capability_key=selected_mode.capability_key,
-            mode_filter_enabled=bool(retrieval_debug.get("mode_filter_enabled", False)),
-            mode_filter_matched_chunks=int(retrieval_debug.get("mode_filter_matched_chunks", 0)),
-            mode_filter_fallback_used=bool(retrieval_debug.get("mode_filter_fallback_used", False)),
-            metadata_coverage_ratio=float(retrieval_debug.get("metadata_coverage_ratio", 0.0)),
-            authority_weighting_enabled=bool(
-                retrieval_debug.get("authority_weighting_enabled", True)
-            ),
-        ),
+        retrieval_metadata=_build_query_retrieval_metadata(plan),
     )
 
 
+@router.post("/query", response_model=QueryResponse)
+def query_documents(
+    request: QueryRequest,
+    db: Session = Depends(get_analysis_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Semantic search over the document library.
+    1. Embed the question.
+    2. Find the top-k most similar chunks via pgvector cosine distance.
+    3. Pass the chunks as context to the LLM and return its answer.
+    """
+    with allow_connection_release(db):
+        plan = _prepare_query(db, request, current_user)
+    if not plan.sources:
+        return _build_empty_query_response(plan)
+
+    release_connection(db)
+    try:
+        client = get_openai_client()
+        completion = client.chat.completions.create(
+            model=QUERY_MODEL,
+            messages=plan.messages,
+            temperature=QUERY_TEMPERATURE,
+            max_tokens=QUERY_MAX_TOKENS,
+        )
+        answer = completion.choices[0].message.content or ""
+    except Exception as exc:
+        raise HTTPException(
+            status_code=503,
+            detail=f"LLM call failed: {exc}",
+        )
+
+    return _finalize_query_answer(plan, answer, client)
+
+
+@router.post("/query/stream")
+def query_documents_stream(
+    request: QueryRequest,
+    db: Session = Depends(get_analysis_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Streaming variant of POST /query (text/event-stream).
+
+    Events: ``sources`` (retrieved evidence, sent before the LLM call),
+    ``token`` (answer deltas), then ``final`` with the same payload as
+    POST /query. The final answer may differ from the concatenated tokens
+    when citation repair rewrote it (``answer_revised``). LLM failures after
+    the stream has started are reported as an ``error`` event.
+    """
+    with allow_connection_release(db):
+        plan = _prepare_query(db, request, current_user)
+    # Everything after this point is LLM streaming; no further queries.
+    release_connection(db)
+
+    def _events() -> Iterator[str]:
+        yield _sse_event(
+            "sources",
+            {
+                "sources": _public_sources(plan.sources),
+                "retrieval_metadata": _build_query_retrieval_metadata(plan).model_dump(),
+            },
+        )
+        if not plan.sources:
+            yield _sse_event("final", _build_empty_query_response(plan).model_dump())
+            return
+
+        streamed_parts: List[str] = []
+        try:
+            client = get_openai_client()
+            for delta in _stream_chat_completion(
+                client,
+                model=QUERY_MODEL,
+                messages=plan.messages,
+                temperature=QUERY_TEMPERATURE,
+                max_tokens=QUERY_MAX_TOKENS,
+            ):
+                streamed_parts.append(delta)
+                yield _sse_event("token", {"text": delta})
+            streamed_answer = "".join(streamed_parts)
+            response = _finalize_query_answer(plan, streamed_answer, client)
+        except Exception as exc:
+            logger.warning("Streaming query failed: %s", exc)
+            yield _sse_event("error", {"detail": f"LLM call failed: {_exception_detail(exc)}"})
+            return
+
+        payload = response.model_dump()
+        payload["answer_revised"] = response.answer != _strip_used_sources_footer(streamed_answer)
+        yield _sse_event("final", payload)
+
+    return _event_stream_response(_events())
+
+
 # ---------------------------------------------------------------------------
 # GET /api/documents/analysis-modes
 # ---------------------------------------------------------------------------
@@ -1885,7 +2557,7 @@ def _get_accessible_flight_test(
     *,
     db: Session,
     flight_test_id: int,
-    current_user: User,
+    current_user: User | AuthenticatedPrincipal,
 ) -> FlightTest:
     query = db.query(FlightTest).filter(FlightTest.id == flight_test_id)
     if not current_user.is_superuser:
@@ -2286,6 +2958,8 @@ def _analysis_job_to_response(
         retrieved_sources_snapshot=retrieved_sources_snapshot,
         analysis_controls=analysis_controls,
         prompt_mode_guard=prompt_mode_guard,
+        completion_cache_hit=bool(job.completion_cache_hit),
+        reused_from_analysis_job_id=job.reused_from_analysis_job_id,
     )
 
 
@@ -2330,7 +3004,7 @@ def get_ai_analysis_job(
     flight_test_id: int,
     analysis_job_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedPrincipal = Depends(get_current_principal),
 ):
     ft = _get_accessible_flight_test(
         db=db,
@@ -2390,6 +3064,9 @@ def get_ai_analysis_job(
         dataset_version_id=job.dataset_version_id,
         parameters_analysed=job.parameters_analysed,
         status=job.status,
+        progress_stage=job.progress_stage,
+        error_message=job.error_message,
+        started_at=job.started_at.isoformat() if job.started_at else None,
         model_name=job.model_name,
         model_version=job.model_version,
         prompt_text=clean_prompt_text,
@@ -2402,6 +3079,8 @@ def get_ai_analysis_job(
         parameter_stats_snapshot=parameter_stats_snapshot,
         analysis_controls=analysis_controls,
         prompt_mode_guard=prompt_mode_guard,
+        completion_cache_hit=bool(job.completion_cache_hit),
+        reused_from_analysis_job_id=job.reused_from_analysis_job_id,
     )
 
 
@@ -2414,29 +3093,65 @@ class AIAnalysisRequest(BaseModel):
     user_prompt: str | None = None
     dataset_version_id: Optional[int] = None
     analysis_mode: Optional[str] = None
+    # Reuse a stored completion for an identical LLM request when the server
+    # has ANALYSIS_COMPLETION_CACHE_ENABLED.
+    reuse_cached_completion: bool = False
 
 
-@router.post(
-    "/flight-tests/{flight_test_id}/ai-analysis",
-    response_model=AIAnalysisResponse,
-)
-def ai_analysis(
-    flight_test_id: int,
-    body: AIAnalysisRequest = AIAnalysisRequest(),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    """
-    Generate an AI analysis report for a flight test.
+def _analysis_model_name() -> str:
+    return os.getenv("ANALYSIS_LLM_MODEL", os.getenv("LLM_MODEL", "gpt-4o-mini"))
 
-    Computes per-parameter statistics (min, max, mean, std dev, sample count),
-    retrieves the most relevant document chunks from the library as context,
-    and asks the LLM to produce a structured analysis report.
 
-    Optional body field:
-    - user_prompt: Free-text analysis goal from the user (e.g. 'Analyse takeoff performance').
-      When provided, this replaces the default generic analysis instruction.
-    """
+def _resolve_requested_analysis_mode(analysis_mode: Optional[str]) -> AnalysisModeDefinition:
+    requested_mode_key = (analysis_mode or "").strip().lower()
+    if requested_mode_key and not get_analysis_mode_definition(requested_mode_key):
+        supported = ", ".join([mode.key for mode in list_analysis_modes()])
+        raise HTTPException(
+            status_code=400,
+            detail=(
+                f"Unsupported analysis_mode '{requested_mode_key}'. "
+                f"Supported modes: {supported}."
+            ),
+        )
+    return resolve_analysis_mode(requested_mode_key or None)
+
+
+@dataclass
+class _AnalysisPlan:
+    """Everything ai_analysis computes before (and independently of) the LLM call."""
+
+    flight_test: FlightTest
+    dataset_version_id: Optional[int]
+    stats_rows: List[Any]
+    selected_mode: AnalysisModeDefinition
+    effective_mode: AnalysisModeDefinition
+    prompt_mode_guard: PromptModeGuardSnapshot
+    prompt_mode_guard_section: str
+    mode_eval: Any
+    mode_routing_section: str
+    analysis_goal: str
+    deterministic_section: str
+    deterministic_metrics: Optional[dict]
+    run_llm: bool
+    analysis_model: str
+    analysis_temperature: float
+    analysis_max_tokens: int
+    sources: List[dict] = field(default_factory=list)
+    context_text: str = ""
+    retrieval_debug: Dict[str, Any] = field(default_factory=dict)
+    llm_user_prompt: str = ""
+    llm_messages: List[dict] = field(default_factory=list)
+    completion_fingerprint: Optional[str] = None
+    reuse_cached_completion: bool = False
+
+
+def _prepare_ai_analysis(
+    db: Session,
+    flight_test_id: int,
+    body: "AIAnalysisRequest",
+    current_user: User,
+) -> _AnalysisPlan:
+    """Statistics, mode routing, deterministic metrics, retrieval and LLM prompts."""
     _require_ai_packages()
     ft = _get_accessible_flight_test(
         db=db,
@@ -2451,6 +3166,7 @@ def ai_analysis(
     dataset_version_id = dataset_version.id if dataset_version else None
 
     # Compute statistics per parameter
+    stats_started = time.perf_counter()
     stats_query = (
         db.query(
             TestParameter.name,
@@ -2467,6 +3183,7 @@ def ai_analysis(
     if dataset_version_id is not None:
         stats_query = stats_query.filter(DataPoint.dataset_version_id == dataset_version_id)
     stats_rows = stats_query.group_by(TestParameter.name, TestParameter.unit).all()
+    record_span("stats_aggregation", stats_started)
 
     if not stats_rows:
         raise HTTPException(
@@ -2486,17 +3203,7 @@ def ai_analysis(
         )
     stats_table = "\n".join(stats_lines)
 
-    requested_mode_key = (body.analysis_mode or "").strip().lower()
-    if requested_mode_key and not get_analysis_mode_definition(requested_mode_key):
-        supported = ", ".join([mode.key for mode in list_analysis_modes()])
-        raise HTTPException(
-            status_code=400,
-            detail=(
-                f"Unsupported analysis_mode '{requested_mode_key}'. "
-                f"Supported modes: {supported}."
-            ),
-        )
-    selected_mode = resolve_analysis_mode(requested_mode_key or None)
+    selected_mode = _resolve_requested_analysis_mode(body.analysis_mode)
     prompt_mode_guard = evaluate_prompt_mode_guard(
         selected_mode_key=selected_mode.key,
         user_prompt=body.user_prompt,
@@ -2544,21 +3251,21 @@ def ai_analysis(
     )
     prompt_mode_guard_section = _build_prompt_mode_guard_section(prompt_mode_guard)
 
-    analysis_model = os.getenv("ANALYSIS_LLM_MODEL", os.getenv("LLM_MODEL", "gpt-4o-mini"))
+    analysis_model = _analysis_model_name()
     analysis_temperature = max(0.0, min(1.0, float(os.getenv("ANALYSIS_TEMPERATURE", "0.2"))))
     analysis_max_tokens = max(1200, min(4096, int(os.getenv("ANALYSIS_MAX_TOKENS", "2600"))))
 
     deterministic_section = ""
-    llm_analysis_text = ""
-    persisted_prompt_text = ""
     sources: List[dict] = []
-    cited_sources: List[dict] = []
     context_text = ""
     retrieval_debug: Dict[str, Any] = {}
     run_llm = False
+    system_prompt = ""
+    llm_user_prompt = ""
 
     certification_requested = _is_certification_result_requested(analysis_goal)
     deterministic_metrics = None
+    deterministic_started = time.perf_counter()
 
     if effective_mode.key == "takeoff":
         deterministic_metrics = _compute_takeoff_metrics(
@@ -2623,6 +3330,7 @@ def ai_analysis(
         )
         # Only "general" currently runs routed LLM guidance path.
         run_llm = effective_mode.key == "general"
+    record_span("deterministic_metrics", deterministic_started)
 
     if deterministic_metrics is not None:
         mode_eval = _capability_eval_from_deterministic_metrics(
@@ -2644,14 +3352,15 @@ def ai_analysis(
             f"Aircraft: {ft.aircraft_type or ''}\n"
             f"Flight test parameter names: {'; '.join(param_names)}"
         )
-        sources, context_text, retrieval_debug = _call_retrieve_hybrid_sources(
-            db=db,
-            question=retrieval_question,
-            requested_top_k=8,
-            owner_user_id=current_user.id,
-            analysis_mode=effective_mode.key,
-            capability_key=effective_mode.capability_key,
-        )
+        with profile_span("retrieval"):
+            sources, context_text, retrieval_debug = _call_retrieve_hybrid_sources(
+                db=db,
+                question=retrieval_question,
+                requested_top_k=8,
+                owner_user_id=current_user.id,
+                analysis_mode=effective_mode.key,
+                capability_key=effective_mode.capability_key,
+            )
 
         if effective_mode.key == "takeoff":
             system_prompt = (
@@ -2709,78 +3418,162 @@ def ai_analysis(
                 "(3) Standards/Context Guidance, (4) Recommendations.\n"
             )
 
-        if context_text:
-            llm_user_prompt += f"\n\nReference Document Excerpts:\n\n{context_text}"
-
-        try:
-            client = get_openai_client()
-            completion = client.chat.completions.create(
+        if sources:
+            packed_sources, packed_context = _pack_prompt_context(
+                sources,
+                question=retrieval_question,
                 model=analysis_model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": llm_user_prompt},
-                ],
-                temperature=analysis_temperature,
                 max_tokens=analysis_max_tokens,
+                fixed_prompt_tokens=count_tokens(system_prompt) + count_tokens(llm_user_prompt),
+                retrieval_debug=retrieval_debug,
             )
-            llm_analysis_text = completion.choices[0].message.content or ""
-        except Exception as exc:
-            raise HTTPException(
-                status_code=503,
-                detail=f"LLM analysis failed: {exc}",
-            )
+            # An empty pack means the analysis runs without reference excerpts.
+            sources, context_text = packed_sources, packed_context
+        if context_text:
+            llm_user_prompt += f"\n\nReference Document Excerpts:\n\n{context_text}"
 
-        llm_analysis_text = re.sub(r"(?im)^USED_SOURCES:\s*.*$", "", llm_analysis_text).strip()
+    plan = _AnalysisPlan(
+        flight_test=ft,
+        dataset_version_id=dataset_version_id,
+        stats_rows=stats_rows,
+        selected_mode=selected_mode,
+        effective_mode=effective_mode,
+        prompt_mode_guard=prompt_mode_guard,
+        prompt_mode_guard_section=prompt_mode_guard_section,
+        mode_eval=mode_eval,
+        mode_routing_section=mode_routing_section,
+        analysis_goal=analysis_goal,
+        deterministic_section=deterministic_section,
+        deterministic_metrics=deterministic_metrics,
+        run_llm=run_llm,
+        analysis_model=analysis_model,
+        analysis_temperature=analysis_temperature,
+        analysis_max_tokens=analysis_max_tokens,
+        sources=sources,
+        context_text=context_text,
+        retrieval_debug=retrieval_debug,
+        llm_user_prompt=llm_user_prompt,
+        llm_messages=(
+            [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": llm_user_prompt},
+            ]
+            if run_llm
+            else []
+        ),
+    )
+    if run_llm and ANALYSIS_COMPLETION_CACHE_ENABLED:
+        plan.completion_fingerprint = completion_fingerprint(
+            model=analysis_model,
+            temperature=analysis_temperature,
+            max_tokens=analysis_max_tokens,
+            messages=plan.llm_messages,
+        )
+        plan.reuse_cached_completion = bool(body.reuse_cached_completion)
+    return plan
 
-        # Optional strict citation-density repair for takeoff standards cross-check.
-        if effective_mode.key == "takeoff":
-            min_citation_density = max(
-                0.0, min(1.0, float(os.getenv("ANALYSIS_MIN_CITATION_DENSITY", "0.75")))
-            )
-            standards_section = _extract_standards_cross_check_section(llm_analysis_text)
-            standards_density = _citation_density(standards_section)
-            if sources and standards_section and standards_density < min_citation_density:
-                source_lines: List[str] = []
-                for s in sources:
-                    ref_label = (
-                        f"{s.get('title') or s.get('filename')}"
-                        + (f", p.{s.get('page_numbers')}" if s.get("page_numbers") else "")
-                        + (f" — {s.get('section_title')}" if s.get("section_title") else "")
-                    )
-                    source_lines.append(f"- {s.get('source_id')}: {ref_label}")
-                source_legend = "\n".join(source_lines)
-                repair_system_prompt = (
-                    "You are a technical editor. Revise the analysis to improve citation coverage only. "
-                    "Preserve structure, numbers, and conclusions. "
-                    "For Standards Cross-Check statements, ensure each substantive sentence has an inline [Sx] citation "
-                    "using only source IDs from the provided legend. "
-                    "Do not add a references section. Do not emit USED_SOURCES."
+
+def _cached_analysis_completion(db: Session, plan: _AnalysisPlan) -> Optional[LlmCompletionCache]:
+    """Stored (post-repair) LLM text for an identical request, when reuse was requested."""
+    if not (plan.reuse_cached_completion and plan.completion_fingerprint):
+        return None
+    cached = lookup_completion(db, plan.completion_fingerprint)
+    record_cache_lookup("llm_completion", cached is not None)
+    return cached
+
+
+def _repair_ai_analysis_text(plan: _AnalysisPlan, client, llm_analysis_text: str) -> str:
+    """Strip USED_SOURCES footers and run the takeoff citation-density repair pass."""
+    effective_mode = plan.effective_mode
+    sources = plan.sources
+    analysis_model = plan.analysis_model
+    analysis_max_tokens = plan.analysis_max_tokens
+
+    llm_analysis_text = re.sub(r"(?im)^USED_SOURCES:\s*.*$", "", llm_analysis_text).strip()
+
+    # Optional strict citation-density repair for takeoff standards cross-check.
+    if effective_mode.key == "takeoff":
+        min_citation_density = max(
+            0.0, min(1.0, float(os.getenv("ANALYSIS_MIN_CITATION_DENSITY", "0.75")))
+        )
+        standards_section = _extract_standards_cross_check_section(llm_analysis_text)
+        standards_density = _citation_density(standards_section)
+        if sources and standards_section and standards_density < min_citation_density:
+            source_lines: List[str] = []
+            for s in sources:
+                ref_label = (
+                    f"{s.get('title') or s.get('filename')}"
+                    + (f", p.{s.get('page_numbers')}" if s.get("page_numbers") else "")
+                    + (f" — {s.get('section_title')}" if s.get("section_title") else "")
                 )
-                repair_user_prompt = (
-                    "Source ID legend:\n"
-                    f"{source_legend}\n\n"
-                    "Revise the analysis below for citation density compliance:\n\n"
-                    f"{llm_analysis_text}"
+                source_lines.append(f"- {s.get('source_id')}: {ref_label}")
+            source_legend = "\n".join(source_lines)
+            repair_system_prompt = (
+                "You are a technical editor. Revise the analysis to improve citation coverage only. "
+                "Preserve structure, numbers, and conclusions. "
+                "For Standards Cross-Check statements, ensure each substantive sentence has an inline [Sx] citation "
+                "using only source IDs from the provided legend. "
+                "Do not add a references section. Do not emit USED_SOURCES."
+            )
+            repair_user_prompt = (
+                "Source ID legend:\n"
+                f"{source_legend}\n\n"
+                "Revise the analysis below for citation density compliance:\n\n"
+                f"{llm_analysis_text}"
+            )
+            try:
+                repaired = client.chat.completions.create(
+                    model=analysis_model,
+                    messages=[
+                        {"role": "system", "content": repair_system_prompt},
+                        {"role": "user", "content": repair_user_prompt},
+                    ],
+                    temperature=0.0,
+                    max_tokens=analysis_max_tokens,
                 )
-                try:
-                    repaired = client.chat.completions.create(
-                        model=analysis_model,
-                        messages=[
-                            {"role": "system", "content": repair_system_prompt},
-                            {"role": "user", "content": repair_user_prompt},
-                        ],
-                        temperature=0.0,
-                        max_tokens=analysis_max_tokens,
-                    )
-                    repaired_text = (repaired.choices[0].message.content or "").strip()
-                    repaired_text = re.sub(r"(?im)^USED_SOURCES:\s*.*$", "", repaired_text).strip()
-                    if repaired_text:
-                        llm_analysis_text = repaired_text
-                except Exception as repair_exc:
-                    logger.warning(
-                        "Citation density repair skipped due to LLM error: %s", repair_exc
-                    )
+                repaired_text = (repaired.choices[0].message.content or "").strip()
+                repaired_text = re.sub(r"(?im)^USED_SOURCES:\s*.*$", "", repaired_text).strip()
+                if repaired_text:
+                    llm_analysis_text = repaired_text
+            except Exception as repair_exc:
+                logger.warning("Citation density repair skipped due to LLM error: %s", repair_exc)
+
+    return llm_analysis_text
 
+
+def _finalize_ai_analysis(
+    db: Session,
+    plan: _AnalysisPlan,
+    current_user: User,
+    llm_analysis_text: str,
+    analysis_job: Optional[AnalysisJob] = None,
+    cached_completion: Optional[LlmCompletionCache] = None,
+) -> AnalysisJob:
+    """
+    Compose the final report around the LLM text and persist it as an
+    immutable AnalysisJob; ``output_sha256`` covers the composed text.
+
+    Queued jobs pass their placeholder row, which is completed in place.
+    When the completion cache is enabled, a freshly generated LLM text is
+    stored under the request fingerprint with this job as its provenance.
+    """
+    ft = plan.flight_test
+    effective_mode = plan.effective_mode
+    mode_eval = plan.mode_eval
+    deterministic_metrics = plan.deterministic_metrics
+    sources = plan.sources
+    retrieval_debug = plan.retrieval_debug
+    mode_routing_section = plan.mode_routing_section
+    prompt_mode_guard_section = plan.prompt_mode_guard_section
+    deterministic_section = plan.deterministic_section
+    analysis_goal = plan.analysis_goal
+    stats_rows = plan.stats_rows
+    dataset_version_id = plan.dataset_version_id
+    analysis_model = plan.analysis_model
+    prompt_mode_guard = plan.prompt_mode_guard
+    llm_user_prompt = plan.llm_user_prompt
+
+    if plan.run_llm:
         inline_source_ids = _extract_inline_source_ids(llm_analysis_text)
         if inline_source_ids and sources:
             cited_sources = [s for s in sources if s.get("source_id") in set(inline_source_ids)]
@@ -2863,7 +3656,7 @@ def ai_analysis(
     parameter_stats_snapshot = _serialize_parameter_stats_snapshot(stats_rows)
     output_sha256 = hashlib.sha256(final_analysis.encode("utf-8")).hexdigest()
 
-    analysis_job = AnalysisJob(
+    job_fields = dict(
         flight_test_id=ft.id,
         created_by_id=current_user.id,
         dataset_version_id=dataset_version_id,
@@ -2879,17 +3672,511 @@ def ai_analysis(
         retrieved_sources_snapshot_json=json.dumps(retrieved_sources_snapshot),
         output_sha256=output_sha256,
         analysis_text=final_analysis,
+        completion_fingerprint=plan.completion_fingerprint,
+        completion_cache_hit=cached_completion is not None,
+        reused_from_analysis_job_id=(
+            cached_completion.source_analysis_job_id if cached_completion is not None else None
+        ),
     )
-    db.add(analysis_job)
+    if analysis_job is None:
+        analysis_job = AnalysisJob(**job_fields)
+        db.add(analysis_job)
+    else:
+        for name, value in job_fields.items():
+            setattr(analysis_job, name, value)
+        analysis_job.progress_stage = "completed"
+        analysis_job.error_message = None
     db.commit()
     db.refresh(analysis_job)
 
+    if plan.completion_fingerprint and cached_completion is None and llm_analysis_text:
+        store_completion(
+            db,
+            fingerprint=plan.completion_fingerprint,
+            model=plan.analysis_model,
+            temperature=plan.analysis_temperature,
+            max_tokens=plan.analysis_max_tokens,
+            completion_text=llm_analysis_text,
+            source_analysis_job_id=analysis_job.id,
+        )
+    return analysis_job
+
+
+@router.post(
+    "/flight-tests/{flight_test_id}/ai-analysis",
+    response_model=AIAnalysisResponse,
+)
+def ai_analysis(
+    flight_test_id: int,
+    body: AIAnalysisRequest = AIAnalysisRequest(),
+    db: Session = Depends(get_analysis_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Generate an AI analysis report for a flight test.
+
+    Computes per-parameter statistics (min, max, mean, std dev, sample count),
+    retrieves the most relevant document chunks from the library as context,
+    and asks the LLM to produce a structured analysis report.
+
+    Optional body field:
+    - user_prompt: Free-text analysis goal from the user (e.g. 'Analyse takeoff performance').
+      When provided, this replaces the default generic analysis instruction.
+    """
+    with allow_connection_release(db):
+        plan = _prepare_ai_analysis(db, flight_test_id, body, current_user)
+
+    llm_analysis_text = ""
+    cached_completion = _cached_analysis_completion(db, plan) if plan.run_llm else None
+    if cached_completion is not None:
+        llm_analysis_text = cached_completion.completion_text
+    elif plan.run_llm:
+        release_connection(db)
+        llm_started = time.perf_counter()
+        try:
+            client = get_openai_client()
+            completion = client.chat.completions.create(
+                model=plan.analysis_model,
+                messages=plan.llm_messages,
+                temperature=plan.analysis_temperature,
+                max_tokens=plan.analysis_max_tokens,
+            )
+            llm_analysis_text = completion.choices[0].message.content or ""
+        except Exception as exc:
+            raise HTTPException(
+                status_code=503,
+                detail=f"LLM analysis failed: {exc}",
+            )
+        llm_analysis_text = _repair_ai_analysis_text(plan, client, llm_analysis_text)
+        record_span("llm", llm_started)
+
+    with profile_span("finalize"):
+        analysis_job = _finalize_ai_analysis(
+            db, plan, current_user, llm_analysis_text, cached_completion=cached_completion
+        )
     return _analysis_job_to_response(
         job=analysis_job,
-        flight_test_name=ft.test_name,
+        flight_test_name=plan.flight_test.test_name,
+    )
+
+
+@router.post("/flight-tests/{flight_test_id}/ai-analysis/stream")
+def ai_analysis_stream(
+    flight_test_id: int,
+    body: AIAnalysisRequest = AIAnalysisRequest(),
+    db: Session = Depends(get_analysis_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Streaming variant of the AI analysis endpoint (text/event-stream).
+
+    Events: ``sources`` (retrieved evidence and routing, sent before the LLM
+    call), ``token`` (LLM deltas), then ``final`` with the persisted
+    AnalysisJob payload. The persisted report and its ``output_sha256`` are
+    built from the final text, including any citation repair applied after
+    streaming (``analysis_revised``). LLM or persistence failures are
+    reported as an ``error`` event and nothing is persisted.
+    """
+    with allow_connection_release(db):
+        plan = _prepare_ai_analysis(db, flight_test_id, body, current_user)
+
+    def _events() -> Iterator[str]:
+        yield _sse_event(
+            "sources",
+            {
+                "analysis_mode": plan.effective_mode.key,
+                "capability_key": plan.effective_mode.capability_key,
+                "run_llm": plan.run_llm,
+                "sources": _public_sources(plan.sources),
+            },
+        )
+
+        llm_analysis_text = ""
+        streamed_text = ""
+        cached_completion = None
+        try:
+            if plan.run_llm:
+                cached_completion = _cached_analysis_completion(db, plan)
+            if cached_completion is not None:
+                llm_analysis_text = streamed_text = cached_completion.completion_text
+                yield _sse_event("token", {"text": streamed_text})
+            elif plan.run_llm:
+                release_connection(db)
+                client = get_openai_client()
+                streamed_parts: List[str] = []
+                for delta in _stream_chat_completion(
+                    client,
+                    model=plan.analysis_model,
+                    messages=plan.llm_messages,
+                    temperature=plan.analysis_temperature,
+                    max_tokens=plan.analysis_max_tokens,
+                ):
+                    streamed_parts.append(delta)
+                    yield _sse_event("token", {"text": delta})
+                streamed_text = "".join(streamed_parts)
+                llm_analysis_text = _repair_ai_analysis_text(plan, client, streamed_text)
+        except Exception as exc:
+            logger.warning("Streaming AI analysis failed: %s", exc)
+            yield _sse_event("error", {"detail": f"LLM analysis failed: {_exception_detail(exc)}"})
+            return
+
+        try:
+            analysis_job = _finalize_ai_analysis(
+                db, plan, current_user, llm_analysis_text, cached_completion=cached_completion
+            )
+            payload = _analysis_job_to_response(
+                job=analysis_job,
+                flight_test_name=plan.flight_test.test_name,
+            ).model_dump()
+        except Exception as exc:
+            logger.warning("Persisting streamed AI analysis failed: %s", exc)
+            db.rollback()
+            yield _sse_event(
+                "error", {"detail": f"Saving the analysis failed: {_exception_detail(exc)}"}
+            )
+            return
+        payload["analysis_revised"] = (
+            llm_analysis_text != re.sub(r"(?im)^USED_SOURCES:\s*.*$", "", streamed_text).strip()
+        )
+        yield _sse_event("final", payload)
+
+    return _event_stream_response(_events())
+
+
+# ---------------------------------------------------------------------------
+# Queued AI analysis jobs
+# ---------------------------------------------------------------------------
+
+
+def _analysis_job_status_out(job: AnalysisJob) -> AnalysisJobStatusOut:
+    analysis_mode, _clean_prompt = _decode_prompt_mode(job.prompt_text or "")
+    return AnalysisJobStatusOut(
+        id=job.id,
+        flight_test_id=job.flight_test_id,
+        analysis_mode=analysis_mode or resolve_analysis_mode(None).key,
+        status=job.status,
+        progress_stage=job.progress_stage,
+        error_message=job.error_message,
+        created_at=job.created_at.isoformat() if job.created_at else "",
+        started_at=job.started_at.isoformat() if job.started_at else None,
+        updated_at=job.updated_at.isoformat() if job.updated_at else None,
+    )
+
+
+def _set_analysis_job_stage(db: Session, job_id: int, stage: str) -> bool:
+    """Advance a running job's progress; False when it was cancelled meanwhile."""
+    updated = (
+        db.query(AnalysisJob)
+        .filter(AnalysisJob.id == job_id, AnalysisJob.status == "running")
+        .update({AnalysisJob.progress_stage: stage}, synchronize_session=False)
+    )
+    db.commit()
+    return bool(updated)
+
+
+def _run_analysis_job(job_id: int) -> None:
+    """Worker entry point for a queued analysis job (profiled when it runs slow)."""
+    with workload_slot("background", timeout=None), job_profile(f"analysis job {job_id}"):
+        _execute_analysis_job(job_id)
+
+
+def _execute_analysis_job(job_id: int) -> None:
+    """
+    Run one queued analysis job.
+
+    Uses its own DB session. Progress is committed at each stage so
+    get_ai_analysis_job can report it, and cancellation is honoured at
+    stage boundaries.
+    """
+    db = SessionLocal()
+    try:
+        claimed = (
+            db.query(AnalysisJob)
+            .filter(AnalysisJob.id == job_id, AnalysisJob.status == "queued")
+            .update(
+                {
+                    AnalysisJob.status: "running",
+                    AnalysisJob.progress_stage: "preparing",
+                    AnalysisJob.started_at: func.now(),
+                    AnalysisJob.heartbeat_at: func.now(),
+                },
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        if not claimed:
+            # Cancelled before it started, or claimed by another worker process.
+            return
+
+        job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).one()
+        user = db.query(User).filter(User.id == job.created_by_id).one()
+        body = AIAnalysisRequest.model_validate_json(job.request_json or "{}")
+
+        with allow_connection_release(db):
+            plan = _prepare_ai_analysis(db, job.flight_test_id, body, user)
+        if not _set_analysis_job_stage(db, job_id, "llm" if plan.run_llm else "finalizing"):
+            return
+
+        llm_analysis_text = ""
+        cached_completion = _cached_analysis_completion(db, plan) if plan.run_llm else None
+        if cached_completion is not None:
+            llm_analysis_text = cached_completion.completion_text
+        elif plan.run_llm:
+            release_connection(db)
+            llm_started = time.perf_counter()
+            client = get_openai_client()
+            completion = client.chat.completions.create(
+                model=plan.analysis_model,
+                messages=plan.llm_messages,
+                temperature=plan.analysis_temperature,
+                max_tokens=plan.analysis_max_tokens,
+            )
+            llm_analysis_text = completion.choices[0].message.content or ""
+            llm_analysis_text = _repair_ai_analysis_text(plan, client, llm_analysis_text)
+            record_span("llm", llm_started)
+            if not _set_analysis_job_stage(db, job_id, "finalizing"):
+                return
+
+        # Row lock so a concurrent cancel either lands first or waits for completion.
+        job = (
+            db.query(AnalysisJob)
+            .filter(AnalysisJob.id == job_id)
+            .populate_existing()
+            .with_for_update()
+            .one()
+        )
+        if job.status != "running":
+            db.rollback()
+            return
+        with profile_span("finalize"):
+            _finalize_ai_analysis(
+                db,
+                plan,
+                user,
+                llm_analysis_text,
+                analysis_job=job,
+                cached_completion=cached_completion,
+            )
+        logger.info("Analysis job %d completed", job_id)
+    except Exception as exc:
+        db.rollback()
+        detail = _exception_detail(exc)
+        logger.warning("Analysis job %d failed: %s", job_id, detail)
+        db.query(AnalysisJob).filter(
+            AnalysisJob.id == job_id,
+            AnalysisJob.status.in_(ANALYSIS_JOB_ACTIVE_STATUSES),
+        ).update(
+            {
+                AnalysisJob.status: "failed",
+                AnalysisJob.progress_stage: "failed",
+                AnalysisJob.error_message: detail[:2000],
+            },
+            synchronize_session=False,
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def _fail_orphaned_analysis_jobs(db: Session) -> int:
+    """Fail running jobs whose worker stopped heartbeating (restart or crash); no commit."""
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=ANALYSIS_JOB_STALE_AFTER_S)
+    return (
+        db.query(AnalysisJob)
+        .filter(
+            AnalysisJob.status == "running",
+            func.coalesce(AnalysisJob.heartbeat_at, AnalysisJob.started_at) < stale_before,
+        )
+        .update(
+            {
+                AnalysisJob.status: "failed",
+                AnalysisJob.progress_stage: "failed",
+                AnalysisJob.error_message: "Analysis job was interrupted by a server restart.",
+            },
+            synchronize_session=False,
+        )
     )
 
 
+def _analysis_job_heartbeat(running_job_ids: List[int]) -> None:
+    """
+    Periodic job maintenance: refresh the heartbeat of jobs running in this
+    process, then fail running jobs nobody has heartbeated recently.
+    """
+    db = SessionLocal()
+    try:
+        if running_job_ids:
+            db.query(AnalysisJob).filter(
+                AnalysisJob.id.in_(running_job_ids),
+                AnalysisJob.status == "running",
+            ).update({AnalysisJob.heartbeat_at: func.now()}, synchronize_session=False)
+        failed = _fail_orphaned_analysis_jobs(db)
+        db.commit()
+        if failed:
+            logger.warning("Failed %d orphaned analysis job(s)", failed)
+    finally:
+        db.close()
+
+
+def _submit_analysis_job(job_id: int) -> None:
+    queue = get_analysis_job_queue()
+    queue.start_heartbeat(_analysis_job_heartbeat)
+    queue.submit(job_id, _run_analysis_job)
+
+
+def resume_queued_analysis_jobs() -> None:
+    """
+    Resubmit jobs left queued by a previous process and fail orphaned running ones.
+
+    Called once at startup. Resubmitting is safe with several API processes
+    because a job only runs after its queued -> running claim succeeds.
+    Running jobs interrupted less than ANALYSIS_JOB_STALE_AFTER_S ago are
+    failed by the periodic heartbeat sweep started here.
+    """
+    db = SessionLocal()
+    try:
+        _fail_orphaned_analysis_jobs(db)
+        db.commit()
+        queued_ids = [
+            row.id
+            for row in db.query(AnalysisJob.id)
+            .filter(AnalysisJob.status == "queued")
+            .order_by(AnalysisJob.id)
+        ]
+    except Exception as exc:
+        logger.warning("Could not resume queued analysis jobs: %s", exc)
+        return
+    finally:
+        db.close()
+    get_analysis_job_queue().start_heartbeat(_analysis_job_heartbeat)
+    for job_id in queued_ids:
+        _submit_analysis_job(job_id)
+    if queued_ids:
+        logger.info("Resubmitted %d queued analysis job(s)", len(queued_ids))
+
+
+@router.post(
+    "/flight-tests/{flight_test_id}/ai-analysis/jobs",
+    response_model=AnalysisJobStatusOut,
+    status_code=202,
+)
+def submit_ai_analysis_job(
+    flight_test_id: int,
+    body: AIAnalysisRequest = AIAnalysisRequest(),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Queue an AI analysis and return immediately (202).
+
+    Poll GET .../ai-analysis/jobs/{id} for status and progress_stage; the
+    completed job carries the same artifact as the synchronous endpoint.
+    """
+    _require_ai_packages()
+    ft = _get_accessible_flight_test(
+        db=db,
+        flight_test_id=flight_test_id,
+        current_user=current_user,
+    )
+    selected_mode = _resolve_requested_analysis_mode(body.analysis_mode)
+    dataset_version = _resolve_dataset_version_for_analysis(
+        db=db,
+        flight_test=ft,
+        requested_dataset_version_id=body.dataset_version_id,
+    )
+
+    # Row lock on the user serialises their submissions, so two concurrent
+    # requests cannot both pass the active-job limit.
+    db.query(User.id).filter(User.id == current_user.id).with_for_update().one()
+    active_jobs = (
+        db.query(func.count(AnalysisJob.id))
+        .filter(
+            AnalysisJob.created_by_id == current_user.id,
+            AnalysisJob.status.in_(ANALYSIS_JOB_ACTIVE_STATUSES),
+        )
+        .scalar()
+    )
+    if active_jobs >= ANALYSIS_JOB_MAX_ACTIVE_PER_USER:
+        raise HTTPException(
+            status_code=429,
+            detail=(
+                f"You already have {active_jobs} analysis job(s) queued or running. "
+                "Wait for one to finish or cancel it."
+            ),
+            headers={"Retry-After": str(ANALYSIS_JOB_RETRY_AFTER_S)},
+        )
+
+    job = AnalysisJob(
+        flight_test_id=ft.id,
+        created_by_id=current_user.id,
+        dataset_version_id=dataset_version.id if dataset_version else None,
+        status="queued",
+        progress_stage="queued",
+        request_json=body.model_dump_json(),
+        model_name=_analysis_model_name(),
+        model_version=os.getenv("ANALYSIS_MODEL_VERSION"),
+        parameters_analysed=0,
+        prompt_text=_encode_prompt_with_mode(body.user_prompt or "", selected_mode.key),
+        output_sha256="",
+        analysis_text="",
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    _submit_analysis_job(job.id)
+    return _analysis_job_status_out(job)
+
+
+@router.post(
+    "/flight-tests/{flight_test_id}/ai-analysis/jobs/{analysis_job_id}/cancel",
+    response_model=AnalysisJobStatusOut,
+)
+def cancel_ai_analysis_job(
+    flight_test_id: int,
+    analysis_job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Cancel a queued or running analysis job. Running jobs stop at the next stage."""
+    ft = _get_accessible_flight_test(
+        db=db,
+        flight_test_id=flight_test_id,
+        current_user=current_user,
+    )
+    job = (
+        db.query(AnalysisJob)
+        .filter(
+            AnalysisJob.id == analysis_job_id,
+            AnalysisJob.flight_test_id == ft.id,
+        )
+        .first()
+    )
+    if not job or (not current_user.is_superuser and job.created_by_id != current_user.id):
+        raise HTTPException(status_code=404, detail="Analysis job not found.")
+
+    cancelled = (
+        db.query(AnalysisJob)
+        .filter(
+            AnalysisJob.id == job.id,
+            AnalysisJob.status.in_(ANALYSIS_JOB_ACTIVE_STATUSES),
+        )
+        .update(
+            {AnalysisJob.status: "cancelled", AnalysisJob.progress_stage: "cancelled"},
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    db.refresh(job)
+    if not cancelled:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Analysis job is already {job.status}.",
+        )
+    get_analysis_job_queue().cancel(job.id)
+    return _analysis_job_status_out(job)
+
+
 # ---------------------------------------------------------------------------
 # Helper
 # ---------------------------------------------------------------------------
@@ -6,18 +6,38 @@ Flight test data management and CSV upload endpoints
 import csv
 import io
 import re
+import time
 from datetime import datetime, timedelta
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    UploadFile,
+    status,
+)
 from sqlalchemy import and_, func
 from sqlalchemy.orm import Session
 
 from app import auth, schemas
+from app.bulk_delete import delete_in_batches
 from app.database import get_db
+from app.dataset_gc import DATASET_GC_ACTIVE_STATUSES, run_dataset_gc_job
+from app.dataset_partitions import (
+    PARTITION_BUSY_RETRY_AFTER_S,
+    PartitionBusy,
+    ensure_dataset_partition,
+    remove_dataset_version_data,
+)
+from app.metrics import record_ingest
 from app.models import (
     AnalysisJob,
     DataPoint,
+    DatasetGcJob,
     DatasetVersion,
     FlightTest,
     FratAssessment,
@@ -25,6 +45,9 @@ from app.models import (
     TestParameter,
     User,
 )
+from app.principal_cache import AuthenticatedPrincipal
+from app.read_routing import dataset_version_visible, run_read
+from app.workloads import get_ingest_db
 
 router = APIRouter()
 
@@ -38,6 +61,14 @@ FAILED_CLEANUP_DATASET_STATUSES = {
 }
 
 
+def _partition_busy_response(exc: PartitionBusy) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"{exc} Long-running reads hold the data points table; retry shortly.",
+        headers={"Retry-After": str(PARTITION_BUSY_RETRY_AFTER_S)},
+    )
+
+
 def _coerce_timestamp(value) -> datetime | None:
     if value is None:
         return None
@@ -202,7 +233,7 @@ def _resolve_dataset_version_id(
 
 
 @router.post("/", response_model=schemas.FlightTestResponse, status_code=status.HTTP_201_CREATED)
-async def create_flight_test(
+def create_flight_test(
     flight_test: schemas.FlightTestCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(auth.get_current_active_user),
@@ -238,11 +269,11 @@ async def create_flight_test(
 
 
 @router.get("/", response_model=List[schemas.FlightTestResponse])
-async def get_flight_tests(
+def get_flight_tests(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
-    current_user: User = Depends(auth.get_current_active_user),
+    current_user: AuthenticatedPrincipal = Depends(auth.get_current_active_principal),
 ):
     """
     Get all flight tests for current user
@@ -258,11 +289,85 @@ async def get_flight_tests(
     return flight_tests
 
 
+@router.post(
+    "/dataset-gc-jobs",
+    response_model=schemas.DatasetGcJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def start_dataset_gc_job(
+    payload: schemas.DatasetGcJobCreate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(auth.get_current_active_user),
+):
+    """
+    Queue reclamation of failed dataset versions (and, with include_superseded,
+    successful versions beyond the retention count) across the current user's
+    flight tests. Poll the returned job for progress.
+    """
+    if payload.flight_test_id is not None:
+        flight_test = (
+            db.query(FlightTest.id)
+            .filter(
+                FlightTest.id == payload.flight_test_id,
+                FlightTest.created_by_id == current_user.id,
+            )
+            .first()
+        )
+        if not flight_test:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Flight test not found"
+            )
+
+    active_job = (
+        db.query(DatasetGcJob.id)
+        .filter(
+            DatasetGcJob.requested_by_id == current_user.id,
+            DatasetGcJob.status.in_(DATASET_GC_ACTIVE_STATUSES),
+        )
+        .first()
+    )
+    if active_job:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Dataset GC job {active_job.id} is already queued or running.",
+        )
+
+    job = DatasetGcJob(
+        requested_by_id=current_user.id,
+        flight_test_id=payload.flight_test_id,
+        status="queued",
+        include_superseded=payload.include_superseded,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    background_tasks.add_task(run_dataset_gc_job, job.id)
+    return job
+
+
+@router.get("/dataset-gc-jobs/{job_id}", response_model=schemas.DatasetGcJobResponse)
+def get_dataset_gc_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: AuthenticatedPrincipal = Depends(auth.get_current_active_principal),
+):
+    """Get progress of one dataset GC job owned by the current user."""
+    job = (
+        db.query(DatasetGcJob)
+        .filter(DatasetGcJob.id == job_id, DatasetGcJob.requested_by_id == current_user.id)
+        .first()
+    )
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="GC job not found")
+    return job
+
+
 @router.get("/{test_id}", response_model=schemas.FlightTestResponse)
-async def get_flight_test(
+def get_flight_test(
     test_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(auth.get_current_active_user),
+    current_user: AuthenticatedPrincipal = Depends(auth.get_current_active_principal),
 ):
     """
     Get a specific flight test by ID
@@ -283,10 +388,10 @@ async def get_flight_test(
     "/{test_id}/ingestion-sessions",
     response_model=List[schemas.IngestionSessionResponse],
 )
-async def list_ingestion_sessions(
+def list_ingestion_sessions(
     test_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(auth.get_current_active_user),
+    current_user: AuthenticatedPrincipal = Depends(auth.get_current_active_principal),
 ):
     """List persisted ingestion sessions for a flight test, newest first."""
     flight_test = (
@@ -313,10 +418,10 @@ async def list_ingestion_sessions(
     "/{test_id}/dataset-versions",
     response_model=List[schemas.DatasetVersionResponse],
 )
-async def list_dataset_versions(
+def list_dataset_versions(
     test_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(auth.get_current_active_user),
+    current_user: AuthenticatedPrincipal = Depends(auth.get_current_active_principal),
 ):
     """List dataset versions for a flight test, newest first."""
     flight_test = (
@@ -387,7 +492,7 @@ async def list_dataset_versions(
     "/{test_id}/dataset-versions/{dataset_version_id}/activate",
     response_model=schemas.FlightTestResponse,
 )
-async def activate_dataset_version(
+def activate_dataset_version(
     test_id: int,
     dataset_version_id: int,
     db: Session = Depends(get_db),
@@ -432,11 +537,11 @@ async def activate_dataset_version(
     "/{test_id}/ingestion-sessions/{session_id}",
     response_model=schemas.IngestionSessionResponse,
 )
-async def get_ingestion_session(
+def get_ingestion_session(
     test_id: int,
     session_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(auth.get_current_active_user),
+    current_user: AuthenticatedPrincipal = Depends(auth.get_current_active_principal),
 ):
     """Get one ingestion session record scoped to current user + flight test."""
     session = (
@@ -462,7 +567,7 @@ async def get_ingestion_session(
     "/{test_id}/ingestion-sessions/{session_id}/cleanup",
     response_model=schemas.IngestionCleanupResponse,
 )
-async def cleanup_failed_ingestion_session(
+def cleanup_failed_ingestion_session(
     test_id: int,
     session_id: int,
     db: Session = Depends(get_db),
@@ -597,14 +702,10 @@ async def cleanup_failed_ingestion_session(
     deleted_data_points = 0
     try:
         if dataset_ids:
-            deleted_data_points = (
-                db.query(DataPoint)
-                .filter(
-                    DataPoint.flight_test_id == test_id,
-                    DataPoint.dataset_version_id.in_(dataset_ids),
-                )
-                .delete(synchronize_session=False)
-            )
+            # Partition drop (or committed batches) per version; a failure
+            # here leaves the session in place so cleanup can be retried.
+            for dataset_id in dataset_ids:
+                deleted_data_points += remove_dataset_version_data(db, dataset_id)
 
             session.dataset_version_id = None
             db.add(session)
@@ -623,6 +724,9 @@ async def cleanup_failed_ingestion_session(
 
         db.delete(session)
         db.commit()
+    except PartitionBusy as exc:
+        db.rollback()
+        raise _partition_busy_response(exc) from exc
     except Exception as exc:
         db.rollback()
         raise HTTPException(
@@ -649,7 +753,7 @@ async def cleanup_failed_ingestion_session(
 
 
 @router.put("/{test_id}", response_model=schemas.FlightTestResponse)
-async def update_flight_test(
+def update_flight_test(
     test_id: int,
     flight_test: schemas.FlightTestUpdate,
     db: Session = Depends(get_db),
@@ -697,7 +801,7 @@ async def update_flight_test(
 
 
 @router.delete("/{test_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_flight_test(
+def delete_flight_test(
     test_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(auth.get_current_active_user),
@@ -717,22 +821,36 @@ async def delete_flight_test(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Flight test not found")
 
     try:
+        # Data points can run to millions of rows: drop each dataset
+        # version's partition, then purge any unversioned rows in committed
+        # batches so no single statement holds long locks or a huge WAL
+        # burst. A failure after this point leaves an empty flight test that
+        # a repeated DELETE finishes off.
+        dataset_version_rows = (
+            db.query(DatasetVersion.id, DatasetVersion.status, DatasetVersion.data_points_count)
+            .filter(DatasetVersion.flight_test_id == test_id)
+            .all()
+        )
+        for version_id, version_status, data_points_count in dataset_version_rows:
+            remove_dataset_version_data(
+                db,
+                version_id,
+                known_count=data_points_count if version_status == "success" else None,
+            )
+        delete_in_batches(db, DataPoint, DataPoint.flight_test_id == test_id)
+
         # Break the direct FlightTest -> DatasetVersion linkage first so
         # downstream deletes cannot trip over active dataset FK ordering.
         flight_test.active_dataset_version_id = None
         db.add(flight_test)
         db.flush()
 
-        # Delete dependent rows explicitly in a safe order for current model graph:
-        # 1) data points
-        # 2) analysis jobs
-        # 3) FRAT assessments (may point to dataset versions)
-        # 4) dataset versions
-        # 5) ingestion sessions
-        # 6) flight test
-        db.query(DataPoint).filter(DataPoint.flight_test_id == test_id).delete(
-            synchronize_session=False
-        )
+        # Delete remaining dependent rows explicitly in a safe order for current model graph:
+        # 1) analysis jobs
+        # 2) FRAT assessments (may point to dataset versions)
+        # 3) dataset versions
+        # 4) ingestion sessions
+        # 5) flight test
         db.query(AnalysisJob).filter(AnalysisJob.flight_test_id == test_id).delete(
             synchronize_session=False
         )
@@ -748,6 +866,9 @@ async def delete_flight_test(
 
         db.delete(flight_test)
         db.commit()
+    except PartitionBusy as exc:
+        db.rollback()
+        raise _partition_busy_response(exc) from exc
     except Exception as exc:
         db.rollback()
         raise HTTPException(
@@ -759,10 +880,10 @@ async def delete_flight_test(
 
 
 @router.post("/{test_id}/upload-csv", status_code=status.HTTP_201_CREATED)
-async def upload_flight_data_csv(
+def upload_flight_data_csv(
     test_id: int,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_ingest_db),
     current_user: User = Depends(auth.get_current_active_user),
 ):
     """
@@ -819,6 +940,9 @@ async def upload_flight_data_csv(
     )
     db.add(dataset_version)
     db.flush()
+    # Give the version its own data point partition (PostgreSQL) before any
+    # rows arrive, so removing it later is a partition drop.
+    ensure_dataset_partition(db, dataset_version.id)
     ingestion_session.dataset_version_id = dataset_version.id
     db.add(ingestion_session)
     db.commit()
@@ -826,9 +950,10 @@ async def upload_flight_data_csv(
     db.refresh(dataset_version)
 
     row_count = 0
+    ingest_started = time.perf_counter()
 
     try:
-        contents = await file.read()
+        contents = file.file.read()
         try:
             text = contents.decode("utf-8")
         except UnicodeDecodeError:
@@ -1030,6 +1155,7 @@ async def upload_flight_data_csv(
         db.add(dataset_version)
         db.add(flight_test)
         db.commit()
+        record_ingest("csv", row_count, time.perf_counter() - ingest_started)
 
         return {
             "message": "CSV data uploaded successfully",
@@ -1069,14 +1195,14 @@ async def upload_flight_data_csv(
 
 
 @router.get("/{test_id}/data", response_model=List[schemas.DataPointResponse])
-async def get_flight_test_data(
+def get_flight_test_data(
     test_id: int,
     parameter_id: Optional[int] = None,
     dataset_version_id: Optional[int] = Query(default=None),
     skip: int = 0,
     limit: int = 1000,
     db: Session = Depends(get_db),
-    current_user: User = Depends(auth.get_current_active_user),
+    current_user: AuthenticatedPrincipal = Depends(auth.get_current_active_principal),
 ):
     """
     Get data points for a flight test, optionally filtered by parameter
@@ -1108,11 +1234,11 @@ async def get_flight_test_data(
 
 
 @router.get("/{test_id}/parameters")
-async def get_flight_test_parameters(
+def get_flight_test_parameters(
     test_id: int,
     dataset_version_id: Optional[int] = Query(default=None),
     db: Session = Depends(get_db),
-    current_user: User = Depends(auth.get_current_active_user),
+    current_user: AuthenticatedPrincipal = Depends(auth.get_current_active_principal),
 ):
     """
     Return the list of parameters that have data for this flight test,
@@ -1172,14 +1298,42 @@ async def get_flight_test_parameters(
     ]
 
 
+def _load_parameter_series(
+    db: Session,
+    *,
+    test_id: int,
+    dataset_version_id: int | None,
+    parameter_names: List[str],
+    limit: int,
+) -> list:
+    """(name, unit, [(timestamp, value), ...]) for each known parameter name."""
+    series = []
+    for param_name in parameter_names:
+        param = db.query(TestParameter).filter(TestParameter.name == param_name).first()
+        if not param:
+            continue
+
+        # Only (timestamp, value) so PostgreSQL can answer from the covering
+        # (dataset_version_id, parameter_id, timestamp) index.
+        points_query = db.query(DataPoint.timestamp, DataPoint.value).filter(
+            DataPoint.flight_test_id == test_id,
+            DataPoint.parameter_id == param.id,
+        )
+        if dataset_version_id is not None:
+            points_query = points_query.filter(DataPoint.dataset_version_id == dataset_version_id)
+        points = points_query.order_by(DataPoint.timestamp).limit(limit).all()
+        series.append((param.name, param.unit, points))
+    return series
+
+
 @router.get("/{test_id}/parameters/data")
-async def get_flight_test_parameter_data(
+def get_flight_test_parameter_data(
     test_id: int,
     parameters: Optional[List[str]] = Query(default=None),
     dataset_version_id: Optional[int] = Query(default=None),
     limit: int = 50000,
     db: Session = Depends(get_db),
-    current_user: User = Depends(auth.get_current_active_user),
+    current_user: AuthenticatedPrincipal = Depends(auth.get_current_active_principal),
 ):
     """
     Return time-series data for one or more named parameters of a flight test.
@@ -1207,22 +1361,22 @@ async def get_flight_test_parameter_data(
     if not parameters:
         return []
 
-    result = []
-    for param_name in parameters:
-        param = db.query(TestParameter).filter(TestParameter.name == param_name).first()
-        if not param:
-            continue
-
-        points_query = db.query(DataPoint).filter(
-            DataPoint.flight_test_id == test_id,
-            DataPoint.parameter_id == param.id,
-        )
-        if effective_dataset_version_id is not None:
-            points_query = points_query.filter(
-                DataPoint.dataset_version_id == effective_dataset_version_id
-            )
-        points = points_query.order_by(DataPoint.timestamp).limit(limit).all()
+    # The dataset version was resolved on the primary; the scans go to a
+    # replica once it has that version.
+    series = run_read(
+        db,
+        lambda read_db: _load_parameter_series(
+            read_db,
+            test_id=test_id,
+            dataset_version_id=effective_dataset_version_id,
+            parameter_names=parameters,
+            limit=limit,
+        ),
+        dataset_version_visible(effective_dataset_version_id),
+    )
 
+    result = []
+    for param_name, param_unit, points in series:
         if not points:
             continue
 
@@ -1261,8 +1415,8 @@ async def get_flight_test_parameter_data(
 
         result.append(
             {
-                "parameter_name": param.name,
-                "unit": param.unit,
+                "parameter_name": param_name,
+                "unit": param_unit,
                 "data": chart_data,
                 "statistics": {
                     "min": min(values),
@@ -18,7 +18,8 @@ from sqlalchemy.orm import Session
 
 from app.analysis_controls import parse_analysis_controls
 from app.analysis_modes import get_analysis_mode_definition
-from app.auth import get_current_user
+from app.auth import get_current_principal, get_current_user
+from app.cpu_workers import run_cpu_bound
 from app.database import get_db
 from app.frat import (
     CATEGORY_KEYS,
@@ -33,6 +34,8 @@ from app.frat import (
     normalize_frat_inputs,
 )
 from app.models import AnalysisJob, DatasetVersion, FlightTest, FratAssessment, User
+from app.principal_cache import AuthenticatedPrincipal
+from app.workloads import get_analysis_db
 
 router = APIRouter()
 
@@ -154,6 +157,7 @@ def _load_analysis_jobs_for_assessment(
         .filter(
             AnalysisJob.flight_test_id == flight_test_id,
             AnalysisJob.id.in_(analysis_job_ids),
+            AnalysisJob.status == "completed",
         )
         .all()
     )
@@ -474,7 +478,7 @@ def _get_accessible_flight_test(
     *,
     db: Session,
     flight_test_id: int,
-    current_user: User,
+    current_user: User | AuthenticatedPrincipal,
 ) -> FlightTest:
     query = db.query(FlightTest).filter(FlightTest.id == flight_test_id)
     if not current_user.is_superuser:
@@ -547,6 +551,7 @@ def _load_analysis_controls_for_assessment(
         .filter(
             AnalysisJob.flight_test_id == flight_test_id,
             AnalysisJob.id.in_(analysis_job_ids),
+            AnalysisJob.status == "completed",
         )
         .all()
     )
@@ -659,6 +664,11 @@ def _assert_transition_allowed(current_status: str, target_status: str):
         )
 
 
+def _render_frat_pdf(report_snapshot: dict, generated_by: str) -> bytes:
+    """Positional entry point for the CPU worker pool."""
+    return _build_frat_pdf(report_snapshot=report_snapshot, generated_by=generated_by)
+
+
 def _build_frat_pdf(
     *,
     report_snapshot: dict,
@@ -952,7 +962,7 @@ def create_frat_assessment(
 def list_frat_assessments(
     flight_test_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedPrincipal = Depends(get_current_principal),
 ):
     _get_accessible_flight_test(
         db=db,
@@ -973,14 +983,17 @@ def list_frat_assessments(
 def list_flight_test_analysis_jobs(
     flight_test_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedPrincipal = Depends(get_current_principal),
 ):
     _get_accessible_flight_test(
         db=db,
         flight_test_id=flight_test_id,
         current_user=current_user,
     )
-    query = db.query(AnalysisJob).filter(AnalysisJob.flight_test_id == flight_test_id)
+    query = db.query(AnalysisJob).filter(
+        AnalysisJob.flight_test_id == flight_test_id,
+        AnalysisJob.status == "completed",
+    )
     if not current_user.is_superuser:
         query = query.filter(AnalysisJob.created_by_id == current_user.id)
     rows = query.order_by(AnalysisJob.created_at.desc(), AnalysisJob.id.desc()).limit(50).all()
@@ -1235,7 +1248,7 @@ def finalize_frat_assessment(
 @router.get("/assessments/{assessment_id}/report.pdf")
 def export_frat_assessment_pdf(
     assessment_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_analysis_db),
     current_user: User = Depends(get_current_user),
 ):
     assessment = _get_accessible_assessment(
@@ -1245,10 +1258,8 @@ def export_frat_assessment_pdf(
     )
     report_snapshot = _build_report_snapshot(db=db, assessment=assessment)
 
-    pdf_bytes = _build_frat_pdf(
-        report_snapshot=report_snapshot,
-        generated_by=current_user.username,
-    )
+    # Rendering is pure CPU on plain dicts: run it off this API worker.
+    pdf_bytes = run_cpu_bound(_render_frat_pdf, report_snapshot, current_user.username)
     filename = f"FRAT_{assessment.id}_{datetime.utcnow().strftime('%Y%m%d')}.pdf"
     return StreamingResponse(
         io.BytesIO(pdf_bytes),
@@ -3,13 +3,17 @@ FTIAS Backend - Health Check Router
 Health check and status endpoints
 """
 
+import hmac
 from datetime import datetime
+from typing import Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
 from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
+from app import auth, metrics
 from app.database import get_db
 from app.schemas import HealthResponse
 
@@ -17,7 +21,7 @@ router = APIRouter()
 
 
 @router.get("/health", response_model=HealthResponse)
-async def health_check(db: Session = Depends(get_db)):
+def health_check(db: Session = Depends(get_db)):
     """
     Health check endpoint
 
@@ -51,3 +55,31 @@ async def ping():
         dict: Pong response
     """
     return {"message": "pong", "timestamp": datetime.utcnow()}
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """
+    Prometheus text-format metrics, summed over all API workers
+
+    Requires "Authorization: Bearer <METRICS_SCRAPE_TOKEN>" (for scrapers) or
+    a superuser's access token.
+    """
+    if not metrics.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled.")
+    scheme, _, credentials = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not credentials:
+        raise HTTPException(
+            status_code=401,
+            detail="Metrics require a scrape token or an admin login.",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if not (
+        metrics.METRICS_SCRAPE_TOKEN
+        and hmac.compare_digest(credentials, metrics.METRICS_SCRAPE_TOKEN)
+    ):
+        if not auth.get_current_user(credentials, db).is_superuser:
+            raise HTTPException(status_code=403, detail="The user doesn't have enough privileges")
+    return PlainTextResponse(
+        metrics.render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
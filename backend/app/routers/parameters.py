@@ -7,12 +7,12 @@ import io
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
-from openpyxl import load_workbook
 from sqlalchemy.orm import Session
 
 from app import auth, schemas
 from app.database import get_db
 from app.models import TestParameter, User
+from app.workloads import get_ingest_db
 
 router = APIRouter()
 
@@ -30,7 +30,7 @@ def _validate_min_max(min_value: Optional[float], max_value: Optional[float]) ->
     response_model=schemas.TestParameterResponse,
     status_code=status.HTTP_201_CREATED,
 )
-async def create_parameter(
+def create_parameter(
     parameter: schemas.TestParameterCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(auth.get_current_active_user),
@@ -52,7 +52,7 @@ async def create_parameter(
 
 
 @router.get("/", response_model=List[schemas.TestParameterResponse])
-async def get_parameters(
+def get_parameters(
     skip: int = 0,
     limit: int = 100,
     search: Optional[str] = None,
@@ -73,7 +73,7 @@ async def get_parameters(
 
 
 @router.get("/{parameter_id:int}", response_model=schemas.TestParameterResponse)
-async def get_parameter(
+def get_parameter(
     parameter_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(auth.get_current_active_user),
@@ -85,7 +85,7 @@ async def get_parameter(
 
 
 @router.put("/{parameter_id:int}", response_model=schemas.TestParameterResponse)
-async def update_parameter(
+def update_parameter(
     parameter_id: int,
     parameter: schemas.TestParameterUpdate,
     db: Session = Depends(get_db),
@@ -123,7 +123,7 @@ async def update_parameter(
 
 
 @router.delete("/{parameter_id:int}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_parameter(
+def delete_parameter(
     parameter_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(auth.get_current_active_user),
@@ -138,7 +138,7 @@ async def delete_parameter(
 
 
 @router.post("/bulk", status_code=status.HTTP_201_CREATED)
-async def bulk_create_parameters(
+def bulk_create_parameters(
     request: schemas.BulkParametersCreateRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(auth.get_current_active_user),
@@ -158,7 +158,7 @@ async def bulk_create_parameters(
 
 
 @router.put("/bulk")
-async def bulk_update_parameters(
+def bulk_update_parameters(
     request: schemas.BulkParametersUpdateRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(auth.get_current_active_user),
@@ -197,7 +197,7 @@ async def bulk_update_parameters(
 
 
 @router.delete("/bulk", status_code=status.HTTP_204_NO_CONTENT)
-async def bulk_delete_parameters(
+def bulk_delete_parameters(
     request: schemas.BulkParametersDeleteRequest,
     db: Session = Depends(get_db),
     current_user: User = Depends(auth.get_current_active_user),
@@ -211,9 +211,9 @@ async def bulk_delete_parameters(
 
 
 @router.post("/upload-excel")
-async def upload_parameters_excel(
+def upload_parameters_excel(
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_ingest_db),
     current_user: User = Depends(auth.get_current_active_user),
 ):
     """
@@ -225,8 +225,11 @@ async def upload_parameters_excel(
             detail="File must be an Excel file",
         )
 
+    # Imported here: openpyxl pulls in numpy, which only this endpoint needs.
+    from openpyxl import load_workbook
+
     try:
-        contents = await file.read()
+        contents = file.file.read()
         workbook = load_workbook(filename=io.BytesIO(contents))
         sheet = workbook.active
 
@@ -6,32 +6,19 @@ User management endpoints
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
-from app.auth import get_current_superuser
+from app.auth import get_current_superuser, get_password_hash
 from app.database import get_db
 from app.models import User
+from app.principal_cache import principal_cache
 from app.schemas import UserCreate, UserResponse, UserUpdate
 
 router = APIRouter(dependencies=[Depends(get_current_superuser)])
 
-# Password hashing
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
-
-
-def hash_password(password: str) -> str:
-    """Hash a password"""
-    return pwd_context.hash(password)
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password"""
-    return pwd_context.verify(plain_password, hashed_password)
-
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def create_user(user: UserCreate, db: Session = Depends(get_db)):
+def create_user(user: UserCreate, db: Session = Depends(get_db)):
     """
     Create a new user
 
@@ -58,7 +45,7 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
         email=user.email,
         username=user.username,
         full_name=user.full_name,
-        hashed_password=hash_password(user.password),
+        hashed_password=get_password_hash(user.password),
     )
 
     db.add(db_user)
@@ -69,7 +56,7 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/", response_model=List[UserResponse])
-async def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     """
     Get all users
 
@@ -86,7 +73,7 @@ async def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_d
 
 
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user(user_id: int, db: Session = Depends(get_db)):
+def get_user(user_id: int, db: Session = Depends(get_db)):
     """
     Get a user by ID
 
@@ -109,7 +96,7 @@ async def get_user(user_id: int, db: Session = Depends(get_db)):
 
 
 @router.put("/{user_id}", response_model=UserResponse)
-async def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get_db)):
+def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get_db)):
     """
     Update a user
 
@@ -133,19 +120,20 @@ async def update_user(user_id: int, user_update: UserUpdate, db: Session = Depen
     update_data = user_update.model_dump(exclude_unset=True)
 
     if "password" in update_data:
-        update_data["hashed_password"] = hash_password(update_data.pop("password"))
+        update_data["hashed_password"] = get_password_hash(update_data.pop("password"))
 
     for field, value in update_data.items():
         setattr(user, field, value)
 
     db.commit()
+    principal_cache.invalidate_user(user_id)
     db.refresh(user)
 
     return user
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_200_OK)
-async def delete_user(user_id: int, db: Session = Depends(get_db)):
+def delete_user(user_id: int, db: Session = Depends(get_db)):
     """
     Delete a user
 
@@ -163,5 +151,6 @@ async def delete_user(user_id: int, db: Session = Depends(get_db)):
 
     db.delete(user)
     db.commit()
+    principal_cache.invalidate_user(user_id)
 
     return {"message": "User deleted successfully"}
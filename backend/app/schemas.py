@@ -227,6 +227,34 @@ class IngestionCleanupResponse(BaseModel):
     message: str
 
 
+class DatasetGcJobCreate(BaseModel):
+    """Request to reclaim failed (and optionally superseded) dataset versions."""
+
+    flight_test_id: Optional[int] = None
+    include_superseded: bool = False
+
+
+class DatasetGcJobResponse(BaseModel):
+    """Dataset-version GC job state and progress."""
+
+    id: int
+    status: str
+    flight_test_id: Optional[int] = None
+    include_superseded: bool = False
+    total_versions: int = 0
+    processed_versions: int = 0
+    reclaimed_versions: int = 0
+    skipped_versions: int = 0
+    reclaimed_data_points: int = 0
+    error_message: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 # Test Parameter Schemas
 
 
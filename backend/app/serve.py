@@ -0,0 +1,204 @@
+"""
+Production launcher: a gunicorn master supervising preloaded uvicorn workers.
+
+Goals:
+- run several API worker processes (sized from the CPUs this container may
+  use), so one CPU-heavy request blocks one worker instead of the whole API
+- import the app and build read-only state (capability registry, analysis
+  modes, tokenizer) once in the master before forking, then freeze it out
+  of the garbage collector so workers share those pages copy-on-write
+- replace workers gracefully: SIGHUP or ``SERVE_MAX_REQUESTS`` recycling lets
+  in-flight requests finish within ``SERVE_GRACEFUL_TIMEOUT_S``
+- run process-wide background duties (job resumption) in exactly one
+  worker, elected via a lock file that is released when that worker exits
+- give each worker its own warm Docling pool, pre-warmed at startup:
+  ``DOCLING_WORKER_PROCESSES`` and ``DOCLING_WORKER_QUEUE_SIZE`` are totals
+  for the container and are divided across the workers (see
+  ``split_docling_pool``), so any worker can parse without a cold start
+- give each worker a CPU process pool for PDF rendering
+  (``CPU_WORKER_PROCESSES``, see app.cpu_workers)
+
+Usage (from backend/)::
+
+    python -m app.serve
+
+Where gunicorn is unavailable (native Windows), this falls back to a single
+uvicorn process.
+"""
+
+from __future__ import annotations
+
+import gc
+import logging
+import os
+import sys
+import tempfile
+from typing import Any, Dict, Mapping, MutableMapping, Optional
+
+from app.optional_deps import is_installed
+
+logger = logging.getLogger(__name__)
+
+LEADER_LOCK_ENV = "FTIAS_BACKGROUND_LEADER_LOCK"
+DEFAULT_CPU_WORKER_PROCESSES = "1"
+
+_leader_lock_file: Optional[Any] = None
+
+
+def available_cpus() -> int:
+    """CPUs this process may run on (respects container cpusets)."""
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return max(1, os.cpu_count() or 1)
+
+
+def default_worker_count(cpus: int) -> int:
+    # Async workers: one per CPU; more only adds GIL contention.
+    return max(2, min(int(cpus), 8))
+
+
+def build_gunicorn_options(
+    env: Mapping[str, str] = os.environ, cpus: Optional[int] = None
+) -> Dict[str, Any]:
+    """Gunicorn settings from the environment (WEB_CONCURRENCY + SERVE_*)."""
+    cpus = available_cpus() if cpus is None else cpus
+    workers = int(env.get("WEB_CONCURRENCY") or default_worker_count(cpus))
+    return {
+        "bind": env.get("SERVE_BIND", "0.0.0.0:8000"),
+        "workers": max(1, workers),
+        "worker_class": _uvicorn_worker_class(),
+        "preload_app": True,
+        # Async workers heartbeat from the event loop, so this only fires for
+        # a worker whose loop is wedged, not for slow requests.
+        "timeout": max(10, int(env.get("SERVE_TIMEOUT_S", "120"))),
+        "graceful_timeout": max(1, int(env.get("SERVE_GRACEFUL_TIMEOUT_S", "30"))),
+        "keepalive": max(1, int(env.get("SERVE_KEEPALIVE_S", "5"))),
+        "max_requests": max(0, int(env.get("SERVE_MAX_REQUESTS", "0"))),
+        "max_requests_jitter": max(0, int(env.get("SERVE_MAX_REQUESTS_JITTER", "0"))),
+        "forwarded_allow_ips": env.get("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+        "accesslog": "-",
+        "errorlog": "-",
+        "post_fork": _post_fork,
+    }
+
+
+def split_docling_pool(env: MutableMapping[str, str], workers: int) -> Dict[str, int]:
+    """
+    Rewrite the container-wide Docling pool settings as per-worker shares.
+
+    Each API worker builds its own pool, so the totals are divided by the
+    worker count and rounded up; a non-zero process total still gives every
+    worker at least one parser process. 0 processes keeps inline parsing.
+    """
+    workers = max(1, int(workers))
+    processes = max(0, int(env.get("DOCLING_WORKER_PROCESSES") or "1"))
+    queue_size = max(0, int(env.get("DOCLING_WORKER_QUEUE_SIZE") or "8"))
+    shares = {
+        "DOCLING_WORKER_PROCESSES": -(-processes // workers),
+        "DOCLING_WORKER_QUEUE_SIZE": -(-queue_size // workers),
+    }
+    for key, value in shares.items():
+        env[key] = str(value)
+    return shares
+
+
+def _uvicorn_worker_class() -> str:
+    # uvicorn.workers is deprecated in favour of the uvicorn-worker package.
+    if is_installed("uvicorn_worker"):
+        return "uvicorn_worker.UvicornWorker"
+    return "uvicorn.workers.UvicornWorker"
+
+
+def preload_shared_state():
+    """Import the app and warm read-only caches before workers fork."""
+    from app import context_packer
+    from app.main import app
+
+    # Loads tiktoken's cl100k_base ranks when installed (tens of MB).
+    context_packer.tokenizer_name()
+    # Objects created so far survive for the process lifetime; moving them to
+    # the permanent generation stops GC passes in workers from touching (and
+    # thereby copying) the shared pages.
+    gc.collect()
+    gc.freeze()
+    return app
+
+
+def _post_fork(server, worker) -> None:
+    """Drop DB connections inherited from the master; each worker opens its own."""
+    from app.database import engine
+
+    engine.dispose(close=False)
+
+
+def claim_background_leader() -> bool:
+    """
+    True when this process should run process-wide background duties.
+
+    Outside ``app.serve`` (uvicorn, tests, scripts) every process is its own
+    leader. Under ``app.serve`` the first worker to lock the shared lock file
+    wins and holds it until it exits; the worker gunicorn starts in its place
+    then takes it over.
+    """
+    global _leader_lock_file
+    path = os.getenv(LEADER_LOCK_ENV)
+    if not path:
+        return True
+    if _leader_lock_file is not None:
+        return True
+    try:
+        import fcntl
+    except ImportError:
+        return True
+    handle = open(path, "a+")
+    try:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return False
+    _leader_lock_file = handle
+    return True
+
+
+def run() -> int:
+    os.environ.setdefault("CPU_WORKER_PROCESSES", DEFAULT_CPU_WORKER_PROCESSES)
+    if not os.environ.get("WEB_CONCURRENCY", "x").strip():
+        # gunicorn parses WEB_CONCURRENCY at import and rejects an empty value.
+        del os.environ["WEB_CONCURRENCY"]
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        import uvicorn
+
+        logger.warning("gunicorn is not installed; serving with a single uvicorn process.")
+        host, _, port = os.getenv("SERVE_BIND", "0.0.0.0:8000").rpartition(":")
+        uvicorn.run("app.main:app", host=host or "0.0.0.0", port=int(port))
+        return 0
+
+    lock_dir = tempfile.mkdtemp(prefix="ftias-serve-")
+    os.environ[LEADER_LOCK_ENV] = os.path.join(lock_dir, "background-leader.lock")
+    # Workers write metrics snapshots here; /api/metrics sums them (app.metrics).
+    os.environ.setdefault("METRICS_MULTIPROC_DIR", lock_dir)
+    options = build_gunicorn_options()
+    # Read by app.docling_workers when preload_shared_state imports the app.
+    split_docling_pool(os.environ, options["workers"])
+
+    class FtiasApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return preload_shared_state()
+
+    print(
+        f"FTIAS serving on {options['bind']} with {options['workers']} workers "
+        f"({options['worker_class']})"
+    )
+    FtiasApplication().run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,182 @@
+"""
+Per-workload admission control in front of the shared database pool.
+
+Goals:
+- keep cheap interactive requests (health, auth, listings, chart reads) from
+  queueing for a connection behind long-running work: CSV/Excel/PDF ingest,
+  AI analysis and document queries, report rendering and background jobs
+  each get a bounded number of concurrent slots, sized so that together they
+  leave part of ``DB_POOL_SIZE + DB_MAX_OVERFLOW`` to interactive traffic
+- fail fast: a request whose workload is saturated waits at most
+  ``WORKLOAD_ADMISSION_WAIT_S`` and then gets 503 + Retry-After instead of
+  piling up on pool checkout until ``DB_POOL_TIMEOUT_S``
+- hand the pooled connection back while a handler waits on network I/O
+  (embeddings, chat completions) with ``release_connection``; shared helpers
+  only do so inside the caller's ``allow_connection_release`` block
+
+Interactive requests are not limited; they use ``get_db`` directly. Workers
+of background jobs wait for their slot instead of failing.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+from fastapi import Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import get_db
+from app.metrics import record_workload_rejection, record_workload_slots
+
+logger = logging.getLogger(__name__)
+
+WORKLOAD_SLOTS: Dict[str, int] = {
+    "ingest": max(1, int(os.getenv("WORKLOAD_INGEST_SLOTS", "4"))),
+    "analysis": max(1, int(os.getenv("WORKLOAD_ANALYSIS_SLOTS", "8"))),
+    "background": max(1, int(os.getenv("WORKLOAD_BACKGROUND_SLOTS", "4"))),
+}
+WORKLOAD_ADMISSION_WAIT_S = max(0.0, float(os.getenv("WORKLOAD_ADMISSION_WAIT_S", "0.25")))
+WORKLOAD_RETRY_AFTER_S = 5
+# Session.info flag set by allow_connection_release.
+_RELEASE_ALLOWED_KEY = "ftias_release_allowed"
+
+
+class WorkloadSaturated(Exception):
+    """Raised when a workload has no free slot within the admission wait."""
+
+    def __init__(self, workload: str):
+        super().__init__(f"{workload} workload is saturated")
+        self.workload = workload
+
+
+class WorkloadLimiter:
+    """Counting semaphore with a visible in-use count."""
+
+    def __init__(self, name: str, slots: int):
+        self.name = name
+        self.slots = max(1, int(slots))
+        self._semaphore = threading.BoundedSemaphore(self.slots)
+        self._in_use = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float]) -> bool:
+        if timeout is None:
+            acquired = self._semaphore.acquire()
+        else:
+            acquired = self._semaphore.acquire(timeout=timeout)
+        if acquired:
+            with self._lock:
+                self._in_use += 1
+            record_workload_slots(self.name, 1)
+        return acquired
+
+    def release(self) -> None:
+        with self._lock:
+            self._in_use -= 1
+        self._semaphore.release()
+        record_workload_slots(self.name, -1)
+
+    def in_use(self) -> int:
+        with self._lock:
+            return self._in_use
+
+
+_limiters: Dict[str, WorkloadLimiter] = {
+    name: WorkloadLimiter(name, slots) for name, slots in WORKLOAD_SLOTS.items()
+}
+
+_limited_total = sum(WORKLOAD_SLOTS.values())
+if _limited_total >= settings.pool_capacity:
+    logger.warning(
+        "Workload slots (%d) leave no pool headroom for interactive requests (pool capacity %d).",
+        _limited_total,
+        settings.pool_capacity,
+    )
+
+
+def get_limiter(workload: str) -> WorkloadLimiter:
+    return _limiters[workload]
+
+
+@contextmanager
+def workload_slot(
+    workload: str, *, timeout: Optional[float] = WORKLOAD_ADMISSION_WAIT_S
+) -> Iterator[None]:
+    """Hold one ``workload`` slot; ``timeout=None`` waits for it."""
+    limiter = _limiters[workload]
+    if not limiter.acquire(timeout):
+        record_workload_rejection(workload)
+        raise WorkloadSaturated(workload)
+    try:
+        yield
+    finally:
+        limiter.release()
+
+
+def saturated_response(exc: WorkloadSaturated) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=f"Server is busy with other {exc.workload} requests. Retry shortly.",
+        headers={"Retry-After": str(WORKLOAD_RETRY_AFTER_S)},
+    )
+
+
+def workload_db(workload: str) -> Callable[..., Iterator[Session]]:
+    """``get_db`` behind an admission slot of ``workload`` (FastAPI dependency)."""
+    limiter = _limiters[workload]
+
+    def dependency(db: Session = Depends(get_db)) -> Iterator[Session]:
+        if not limiter.acquire(WORKLOAD_ADMISSION_WAIT_S):
+            record_workload_rejection(workload)
+            raise saturated_response(WorkloadSaturated(workload))
+        try:
+            yield db
+        finally:
+            limiter.release()
+
+    dependency.__name__ = f"get_{workload}_db"
+    return dependency
+
+
+get_ingest_db = workload_db("ingest")
+get_analysis_db = workload_db("analysis")
+
+
+def release_connection(db: Session) -> None:
+    """
+    Return the session's pooled connection before slow non-database work.
+
+    Ends the current transaction (committing whatever it holds, so no work
+    is lost); the session checks out a connection again on its next query.
+    Loaded objects are expired and reload on first access.
+    """
+    if db.in_transaction():
+        db.commit()
+
+
+@contextmanager
+def allow_connection_release(db: Session) -> Iterator[Session]:
+    """
+    Let shared helpers release ``db``'s connection while inside this block.
+
+    For routes and jobs whose session holds nothing uncommitted (flush and
+    commit first): helpers such as hybrid retrieval then end the transaction
+    before their embedding call with ``release_connection_if_allowed``.
+    """
+    previous = db.info.get(_RELEASE_ALLOWED_KEY, False)
+    db.info[_RELEASE_ALLOWED_KEY] = True
+    try:
+        yield db
+    finally:
+        db.info[_RELEASE_ALLOWED_KEY] = previous
+
+
+def release_connection_if_allowed(db: Session) -> None:
+    """``release_connection`` when the session's owner allowed it, else a no-op."""
+    if db.info.get(_RELEASE_ALLOWED_KEY):
+        release_connection(db)
@@ -0,0 +1,7 @@
+"""
+Offline benchmark harnesses for the FTIAS backend.
+
+Run from the backend directory, e.g.::
+
+    python -m benchmarks.rag_benchmark --profiles benchmarks/profiles.json --out bench-reports
+"""
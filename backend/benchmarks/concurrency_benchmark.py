@@ -0,0 +1,181 @@
+"""
+Closed-loop concurrency benchmark for a running FTIAS API.
+
+Goals:
+- show whether request throughput scales with in-flight requests or
+  flat-lines (the symptom of handlers blocking the event loop)
+- drive N concurrent clients per level against a fixed set of authenticated
+  read endpoints for a fixed duration, recording throughput, latency
+  percentiles and errors per level plus scaling efficiency against the
+  single-client level
+
+Usage (server already running, from backend/)::
+
+    python -m benchmarks.concurrency_benchmark --base-url http://localhost:8000 \\
+        --username bench --password secret --levels 1,2,4,8,16,32 --duration 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+
+DEFAULT_PATHS = ("/api/health", "/api/flight-tests/", "/api/parameters/")
+
+
+def _percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize_level(
+    concurrency: int, latencies_ms: Sequence[float], errors: int, elapsed_s: float
+) -> Dict[str, Any]:
+    completed = len(latencies_ms)
+    return {
+        "concurrency": concurrency,
+        "requests": completed,
+        "errors": errors,
+        "throughput_rps": round(completed / elapsed_s, 2) if elapsed_s > 0 else 0.0,
+        "latency_ms": {
+            "p50": _percentile(latencies_ms, 50),
+            "p95": _percentile(latencies_ms, 95),
+            "mean": statistics.fmean(latencies_ms) if latencies_ms else None,
+        },
+    }
+
+
+def add_scaling_efficiency(levels: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Annotate each level with throughput relative to the lowest level scaled
+    by concurrency (1.0 = perfectly linear, ~1/concurrency = flat-lined).
+    """
+    if not levels:
+        return levels
+    base = levels[0]
+    base_rate = base["throughput_rps"] / max(1, base["concurrency"])
+    for level in levels:
+        expected = base_rate * level["concurrency"]
+        level["scaling_efficiency"] = (
+            round(level["throughput_rps"] / expected, 3) if expected > 0 else None
+        )
+    return levels
+
+
+async def _client_loop(
+    client: httpx.AsyncClient,
+    paths: Sequence[str],
+    deadline: float,
+    latencies_ms: List[float],
+    errors: List[int],
+    offset: int,
+) -> None:
+    index = offset
+    while time.perf_counter() < deadline:
+        path = paths[index % len(paths)]
+        index += 1
+        started = time.perf_counter()
+        try:
+            response = await client.get(path)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        if ok:
+            latencies_ms.append((time.perf_counter() - started) * 1000.0)
+        else:
+            errors.append(1)
+
+
+async def run_level(
+    base_url: str,
+    headers: Dict[str, str],
+    paths: Sequence[str],
+    concurrency: int,
+    duration_s: float,
+) -> Dict[str, Any]:
+    latencies_ms: List[float] = []
+    errors: List[int] = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, headers=headers, limits=limits, timeout=60.0
+    ) as client:
+        started = time.perf_counter()
+        deadline = started + duration_s
+        await asyncio.gather(
+            *(
+                _client_loop(client, paths, deadline, latencies_ms, errors, offset)
+                for offset in range(concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - started
+    return summarize_level(concurrency, latencies_ms, len(errors), elapsed)
+
+
+async def _login(base_url: str, username: str, password: str) -> Dict[str, str]:
+    async with httpx.AsyncClient(base_url=base_url, timeout=30.0) as client:
+        response = await client.post(
+            "/api/auth/login", json={"username": username, "password": password}
+        )
+        response.raise_for_status()
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def _main(args: argparse.Namespace) -> Dict[str, Any]:
+    headers = await _login(args.base_url, args.username, args.password)
+    levels: List[Dict[str, Any]] = []
+    for concurrency in args.levels:
+        summary = await run_level(args.base_url, headers, args.paths, concurrency, args.duration)
+        levels.append(summary)
+        print(
+            f"c={concurrency}: {summary['throughput_rps']} req/s "
+            f"p50={summary['latency_ms']['p50']}ms p95={summary['latency_ms']['p95']}ms "
+            f"errors={summary['errors']}"
+        )
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "base_url": args.base_url,
+        "paths": list(args.paths),
+        "duration_s": args.duration,
+        "levels": add_scaling_efficiency(levels),
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument(
+        "--levels",
+        type=lambda raw: [int(part) for part in raw.split(",") if part.strip()],
+        default=[1, 2, 4, 8, 16, 32],
+    )
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per level")
+    parser.add_argument("--path", dest="paths", action="append", help="GET path (repeatable)")
+    parser.add_argument("--out", type=Path, default=Path("bench-reports"))
+    args = parser.parse_args(argv)
+    args.paths = args.paths or list(DEFAULT_PATHS)
+
+    report = asyncio.run(_main(args))
+    args.out.mkdir(parents=True, exist_ok=True)
+    path = args.out / "concurrency-benchmark.json"
+    path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"report -> {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
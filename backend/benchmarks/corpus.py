@@ -0,0 +1,341 @@
+"""
+Fixed synthetic corpus and labelled question set for the RAG benchmark.
+
+Chunk keys (``<document>:<chunk>``) are the labels used for recall@k; the
+text is written so relevant chunks share vocabulary with their questions
+while neighbouring chunks compete on overlapping aviation terms.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models import DataPoint, Document, DocumentChunk, FlightTest, TestParameter, User
+from benchmarks.stub_providers import hash_embedding
+
+
+@dataclass(frozen=True)
+class CorpusChunk:
+    key: str
+    section_title: str
+    page_numbers: str
+    text: str
+
+
+@dataclass(frozen=True)
+class CorpusDocument:
+    key: str
+    filename: str
+    title: str
+    authority_type: str
+    domain_tags: Tuple[str, ...]
+    chunks: Tuple[CorpusChunk, ...]
+
+
+@dataclass(frozen=True)
+class BenchmarkQuestion:
+    question_id: str
+    kind: str  # "query" | "analysis"
+    text: str
+    relevant_keys: Tuple[str, ...]
+    analysis_mode: str = "general"
+    top_k: int = 8
+
+
+@dataclass
+class LoadedCorpus:
+    owner: User
+    chunk_key_by_text: Dict[str, str] = field(default_factory=dict)
+    document_ids: List[int] = field(default_factory=list)
+    flight_test_id: int = 0
+    parameter_ids: List[int] = field(default_factory=list)
+
+
+def _doc(key, filename, title, authority, tags, chunks) -> CorpusDocument:
+    return CorpusDocument(
+        key=key,
+        filename=filename,
+        title=title,
+        authority_type=authority,
+        domain_tags=tuple(tags),
+        chunks=tuple(
+            CorpusChunk(
+                key=f"{key}:{chunk_key}", section_title=section, page_numbers=pages, text=body
+            )
+            for chunk_key, section, pages, body in chunks
+        ),
+    )
+
+
+CORPUS: Tuple[CorpusDocument, ...] = (
+    _doc(
+        "ac25-7",
+        "AC_25-7D_Flight_Test_Guide.pdf",
+        "AC 25-7D Flight Test Guide for Certification of Transport Category Airplanes",
+        "regulatory_guidance",
+        ["performance", "takeoff"],
+        [
+            (
+                "takeoff-speeds",
+                "Takeoff Speeds",
+                "41-43",
+                "Takeoff speeds V1, VR and V2 are scheduled from flight test data. Rotation "
+                "speed VR may not be less than V1 or 1.05 VMCA. V2 must be at least 1.13 "
+                "VSR and 1.10 VMCA for the critical engine inoperative case.",
+            ),
+            (
+                "takeoff-distance",
+                "Takeoff Distance",
+                "44-46",
+                "Takeoff distance is measured from brake release to the point where the "
+                "airplane reaches 35 ft above the takeoff surface. All-engines distance is "
+                "factored by 1.15; the one-engine-inoperative distance is not factored.",
+            ),
+            (
+                "climb-gradient",
+                "Takeoff Climb Gradients",
+                "52-53",
+                "Second segment climb gradient with the critical engine inoperative must be "
+                "at least 2.4 percent for two-engine airplanes with landing gear retracted "
+                "and takeoff flaps at V2.",
+            ),
+        ],
+    ),
+    _doc(
+        "cs25",
+        "CS-25_Amendment_27.pdf",
+        "CS-25 Certification Specifications for Large Aeroplanes",
+        "regulation",
+        ["stall", "controllability"],
+        [
+            (
+                "stall-speed",
+                "CS 25.103 Stall speed",
+                "B-4",
+                "The reference stall speed VSR is a calibrated airspeed not less than the "
+                "1-g stall speed. Stall speed is determined with engines idle, the "
+                "centre of gravity in the most unfavourable position and a deceleration "
+                "rate not exceeding 1 knot per second.",
+            ),
+            (
+                "stall-warning",
+                "CS 25.207 Stall warning",
+                "B-12",
+                "Stall warning must give clear and distinctive warning with sufficient "
+                "margin to prevent inadvertent stalling, beginning at a speed exceeding "
+                "the stall speed by at least 5 knots or 5 percent CAS.",
+            ),
+            (
+                "vmca",
+                "CS 25.149 Minimum control speed",
+                "B-9",
+                "VMCA is the calibrated airspeed at which, with the critical engine "
+                "suddenly made inoperative, it is possible to maintain control with a bank "
+                "angle of not more than 5 degrees. VMCA may not exceed 1.13 VSR.",
+            ),
+        ],
+    ),
+    _doc(
+        "ftm-brakes",
+        "Flight_Test_Manual_Braking.pdf",
+        "Flight Test Manual - Braking and Rejected Takeoff",
+        "handbook",
+        ["braking", "rto"],
+        [
+            (
+                "rto",
+                "Rejected Takeoff Testing",
+                "88-90",
+                "Rejected takeoff tests are flown at maximum brake energy with worn brakes. "
+                "Accelerate-stop distance includes the distance to accelerate to V1 and "
+                "bring the airplane to a full stop, with 2 seconds of continued acceleration.",
+            ),
+            (
+                "brake-energy",
+                "Brake Energy Limits",
+                "91-92",
+                "Brake energy absorbed during a rejected takeoff is computed from aircraft "
+                "mass and ground speed at brake application. Fuse plug release must not "
+                "occur within 5 minutes after the stop.",
+            ),
+        ],
+    ),
+    _doc(
+        "ftm-airdata",
+        "Flight_Test_Manual_Air_Data.pdf",
+        "Flight Test Manual - Air Data Calibration",
+        "handbook",
+        ["air_data", "instrumentation"],
+        [
+            (
+                "pitot-static",
+                "Pitot-Static Position Error",
+                "12-15",
+                "Airspeed position error is calibrated with a trailing cone or tower fly-by. "
+                "Static source error corrections are applied to indicated airspeed and "
+                "altitude before computing calibrated airspeed.",
+            ),
+            (
+                "pacer",
+                "Pacer Aircraft Method",
+                "16-17",
+                "The pacer method compares test aircraft airspeed and altitude against a "
+                "calibrated pacer flying in close formation at stabilised conditions.",
+            ),
+        ],
+    ),
+    _doc(
+        "ftm-handling",
+        "Flight_Test_Manual_Handling_Qualities.pdf",
+        "Flight Test Manual - Handling Qualities",
+        "handbook",
+        ["handling", "controllability"],
+        [
+            (
+                "cooper-harper",
+                "Cooper-Harper Rating",
+                "30-31",
+                "Handling qualities are rated by the pilot on the Cooper-Harper scale. "
+                "Level 1 corresponds to ratings 1 to 3.5 with satisfactory handling "
+                "without improvement.",
+            ),
+            (
+                "pio",
+                "Pilot-Induced Oscillation",
+                "34-35",
+                "Pilot-induced oscillation tendency is evaluated with high-gain tracking "
+                "tasks. Any divergent oscillation during tracking is a safety-of-flight "
+                "finding and requires control law review.",
+            ),
+        ],
+    ),
+)
+
+
+QUESTIONS: Tuple[BenchmarkQuestion, ...] = (
+    BenchmarkQuestion(
+        "Q1",
+        "query",
+        "What are the minimum values of rotation speed VR and takeoff safety speed V2?",
+        ("ac25-7:takeoff-speeds", "cs25:vmca"),
+    ),
+    BenchmarkQuestion(
+        "Q2",
+        "query",
+        "How is takeoff distance measured and factored for all engines operating?",
+        ("ac25-7:takeoff-distance",),
+        analysis_mode="takeoff",
+    ),
+    BenchmarkQuestion(
+        "Q3",
+        "query",
+        "What second segment climb gradient is required with one engine inoperative?",
+        ("ac25-7:climb-gradient",),
+    ),
+    BenchmarkQuestion(
+        "Q4",
+        "query",
+        "How is the reference stall speed determined and what stall warning margin is needed?",
+        ("cs25:stall-speed", "cs25:stall-warning"),
+    ),
+    BenchmarkQuestion(
+        "Q5",
+        "query",
+        "What defines accelerate-stop distance in a rejected takeoff at maximum brake energy?",
+        ("ftm-brakes:rto", "ftm-brakes:brake-energy"),
+    ),
+    BenchmarkQuestion(
+        "Q6",
+        "query",
+        "How is airspeed position error calibrated for the pitot-static system?",
+        ("ftm-airdata:pitot-static", "ftm-airdata:pacer"),
+    ),
+    BenchmarkQuestion(
+        "Q7",
+        "query",
+        "How are handling qualities and pilot-induced oscillation tendencies evaluated?",
+        ("ftm-handling:cooper-harper", "ftm-handling:pio"),
+    ),
+    BenchmarkQuestion(
+        "A1",
+        "analysis",
+        "Assess takeoff rotation and climb performance against certification requirements.",
+        ("ac25-7:takeoff-speeds", "ac25-7:climb-gradient"),
+    ),
+)
+
+
+# Synthetic flight test used by the analysis questions: (parameter, unit, values).
+FLIGHT_TEST_SERIES: Tuple[Tuple[str, str, Tuple[float, ...]], ...] = (
+    ("IAS", "kt", tuple(100.0 + 2.5 * i for i in range(40))),
+    ("PITCH_ANGLE", "deg", tuple(min(15.0, 0.5 * i) for i in range(40))),
+    ("ALTITUDE_AGL", "ft", tuple(max(0.0, 12.0 * (i - 20)) for i in range(40))),
+)
+
+
+def load_corpus(db: Session, owner: User, embedding_model: str, run_tag: str) -> LoadedCorpus:
+    """
+    Insert the corpus (ready documents with stub embeddings) and the flight
+    test for ``owner``; ``run_tag`` keeps parameter names unique per run.
+    """
+    loaded = LoadedCorpus(owner=owner)
+    for document in CORPUS:
+        row = Document(
+            filename=document.filename,
+            title=document.title,
+            doc_type="benchmark",
+            authority_type=document.authority_type,
+            domain_tags_json=json.dumps(list(document.domain_tags)),
+            status="ready",
+            total_chunks=len(document.chunks),
+            uploaded_by_id=owner.id,
+        )
+        db.add(row)
+        db.flush()
+        loaded.document_ids.append(row.id)
+        for index, chunk in enumerate(document.chunks):
+            db.add(
+                DocumentChunk(
+                    document_id=row.id,
+                    chunk_index=index,
+                    text=chunk.text,
+                    page_numbers=chunk.page_numbers,
+                    section_title=chunk.section_title,
+                    embedding=hash_embedding(chunk.text),
+                    embedding_model=embedding_model,
+                )
+            )
+            loaded.chunk_key_by_text[chunk.text] = chunk.key
+
+    flight_test = FlightTest(
+        test_name="RAG benchmark takeoff",
+        aircraft_type="Benchmark twin",
+        description="Synthetic takeoff run for the offline RAG benchmark.",
+        created_by_id=owner.id,
+    )
+    db.add(flight_test)
+    db.flush()
+    loaded.flight_test_id = flight_test.id
+
+    started = datetime(2026, 1, 1, 12, 0, 0)
+    for name, unit, values in FLIGHT_TEST_SERIES:
+        parameter = TestParameter(name=f"BENCH_{run_tag}_{name}", unit=unit)
+        db.add(parameter)
+        db.flush()
+        loaded.parameter_ids.append(parameter.id)
+        db.add_all(
+            DataPoint(
+                flight_test_id=flight_test.id,
+                parameter_id=parameter.id,
+                timestamp=started + timedelta(seconds=0.5 * index),
+                value=value,
+            )
+            for index, value in enumerate(values)
+        )
+    db.commit()
+    return loaded
@@ -0,0 +1,184 @@
+"""
+Login-storm benchmark for a running FTIAS API.
+
+Goals:
+- show whether a burst of password logins (start of a shift, a reconnect
+  wave) degrades unrelated authenticated reads
+- measure probe-request latency percentiles on a cheap read endpoint first
+  alone (baseline) and then while N concurrent clients hammer /api/auth/login,
+  and report login throughput, 503 (hashing pool busy) answers and the
+  probe p99 inflation factor
+
+Usage (server already running, from backend/)::
+
+    python -m benchmarks.login_storm_benchmark --base-url http://localhost:8000 \\
+        --username bench --password secret --login-clients 32 --duration 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+
+from benchmarks.concurrency_benchmark import _login, _percentile
+
+DEFAULT_PROBE_PATH = "/api/flight-tests/"
+
+
+def summarize_probe(latencies_ms: Sequence[float], errors: int) -> Dict[str, Any]:
+    return {
+        "requests": len(latencies_ms),
+        "errors": errors,
+        "latency_ms": {
+            "p50": _percentile(latencies_ms, 50),
+            "p95": _percentile(latencies_ms, 95),
+            "p99": _percentile(latencies_ms, 99),
+        },
+    }
+
+
+def summarize_storm(
+    baseline: Dict[str, Any],
+    during: Dict[str, Any],
+    login_statuses: Sequence[int],
+    elapsed_s: float,
+) -> Dict[str, Any]:
+    """Combine probe summaries and login outcomes into the report body."""
+    succeeded = sum(1 for code in login_statuses if code == 200)
+    busy = sum(1 for code in login_statuses if code == 503)
+    base_p99 = baseline["latency_ms"]["p99"]
+    storm_p99 = during["latency_ms"]["p99"]
+    return {
+        "baseline_probe": baseline,
+        "storm_probe": during,
+        "logins": {
+            "attempted": len(login_statuses),
+            "succeeded": succeeded,
+            "busy_503": busy,
+            "failed": len(login_statuses) - succeeded - busy,
+            "throughput_rps": round(succeeded / elapsed_s, 2) if elapsed_s > 0 else 0.0,
+        },
+        "probe_p99_inflation": (
+            round(storm_p99 / base_p99, 2) if base_p99 and storm_p99 is not None else None
+        ),
+    }
+
+
+async def _probe_loop(
+    client: httpx.AsyncClient,
+    path: str,
+    deadline: float,
+    latencies_ms: List[float],
+    errors: List[int],
+) -> None:
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            response = await client.get(path)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        if ok:
+            latencies_ms.append((time.perf_counter() - started) * 1000.0)
+        else:
+            errors.append(1)
+
+
+async def _login_loop(
+    client: httpx.AsyncClient,
+    credentials: Dict[str, str],
+    deadline: float,
+    statuses: List[int],
+) -> None:
+    while time.perf_counter() < deadline:
+        try:
+            response = await client.post("/api/auth/login", json=credentials)
+            statuses.append(response.status_code)
+        except httpx.HTTPError:
+            statuses.append(0)
+
+
+async def run_probes(
+    base_url: str, headers: Dict[str, str], path: str, clients: int, duration_s: float
+) -> Dict[str, Any]:
+    latencies_ms: List[float] = []
+    errors: List[int] = []
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, timeout=60.0) as client:
+        deadline = time.perf_counter() + duration_s
+        await asyncio.gather(
+            *(_probe_loop(client, path, deadline, latencies_ms, errors) for _ in range(clients))
+        )
+    return summarize_probe(latencies_ms, len(errors))
+
+
+async def _main(args: argparse.Namespace) -> Dict[str, Any]:
+    credentials = {"username": args.username, "password": args.password}
+    headers = await _login(args.base_url, args.username, args.password)
+
+    baseline = await run_probes(
+        args.base_url, headers, args.probe_path, args.probe_clients, args.duration
+    )
+
+    statuses: List[int] = []
+    limits = httpx.Limits(max_connections=args.login_clients)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60.0) as client:
+        started = time.perf_counter()
+        deadline = started + args.duration
+        storm = asyncio.gather(
+            *(
+                _login_loop(client, credentials, deadline, statuses)
+                for _ in range(args.login_clients)
+            )
+        )
+        during, _ = await asyncio.gather(
+            run_probes(args.base_url, headers, args.probe_path, args.probe_clients, args.duration),
+            storm,
+        )
+        elapsed = time.perf_counter() - started
+
+    report = summarize_storm(baseline, during, statuses, elapsed)
+    print(
+        f"probe p99 baseline={baseline['latency_ms']['p99']}ms "
+        f"storm={during['latency_ms']['p99']}ms "
+        f"logins={report['logins']['succeeded']} busy={report['logins']['busy_503']}"
+    )
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "base_url": args.base_url,
+        "probe_path": args.probe_path,
+        "probe_clients": args.probe_clients,
+        "login_clients": args.login_clients,
+        "duration_s": args.duration,
+        **report,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--login-clients", type=int, default=32)
+    parser.add_argument("--probe-clients", type=int, default=4)
+    parser.add_argument("--probe-path", default=DEFAULT_PROBE_PATH)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per phase")
+    parser.add_argument("--out", type=Path, default=Path("bench-reports"))
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(_main(args))
+    args.out.mkdir(parents=True, exist_ok=True)
+    path = args.out / "login-storm-benchmark.json"
+    path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"report -> {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,471 @@
+"""
+Offline end-to-end RAG latency and recall benchmark.
+
+Goals:
+- replace the manual restart-per-profile A/B runs of the query benchmark plan
+  with one command that replays a fixed question set per retrieval profile
+- run ``query_documents`` and ``ai_analysis`` in-process against stub
+  embedding/chat providers, so no network access or API key is needed
+- record per-stage latency (embed, vector SQL, lexical SQL, rerank, LLM,
+  repair), candidate recall@k against labelled chunks and memory (process
+  max RSS; per-question peak allocations with --trace-memory), and write one
+  JSON report per profile plus a side-by-side comparison
+
+The retrieval SQL uses pgvector and PostgreSQL full-text search, so the
+database must be PostgreSQL with the vector extension (e.g. the compose
+``db`` service). The harness creates its own user, corpus and flight test
+and deletes them when it finishes.
+
+Usage (from backend/)::
+
+    python -m benchmarks.rag_benchmark --profiles benchmarks/profiles.json \\
+        --out bench-reports --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app import context_packer
+from app.routers import documents as documents_router
+from benchmarks.corpus import QUESTIONS, BenchmarkQuestion, LoadedCorpus, load_corpus
+from benchmarks.stub_providers import StubOpenAIClient
+
+RECALL_KS: Tuple[int, ...] = (1, 3, 5, 8)
+LATENCY_STAGES: Tuple[str, ...] = (
+    "embed",
+    "vector_sql",
+    "lexical_sql",
+    "lexical_wait",
+    "document_metadata",
+    "fusion_rerank",
+    "hydrate_sql",
+    "retrieval_total",
+    "llm",
+    "repair",
+    "end_to_end",
+)
+
+# Profile keys use the .env names; these map onto differently named constants.
+_SETTING_ALIASES: Dict[str, str] = {"QUERY_LLM_MODEL": "QUERY_MODEL"}
+_SETTING_MODULES: Tuple[ModuleType, ...] = (documents_router, context_packer)
+
+# Benchmarks measure retrieval, so the result cache is off unless a profile enables it.
+_BASE_SETTINGS: Dict[str, Any] = {"RETRIEVAL_CACHE_ENABLED": False}
+
+
+# ---------------------------------------------------------------------------
+# Profiles
+# ---------------------------------------------------------------------------
+
+
+def _coerce_setting(current: Any, value: Any) -> Any:
+    if isinstance(current, bool):
+        if isinstance(value, str):
+            return value.strip().lower() in {"1", "true", "yes", "on"}
+        return bool(value)
+    if isinstance(current, int):
+        return int(value)
+    if isinstance(current, float):
+        return float(value)
+    return value if current is None else str(value)
+
+
+def _resolve_setting(name: str) -> Tuple[ModuleType, str]:
+    attribute = _SETTING_ALIASES.get(name, name)
+    for module in _SETTING_MODULES:
+        if attribute.isupper() and hasattr(module, attribute):
+            return module, attribute
+    raise ValueError(f"Unknown benchmark setting '{name}'")
+
+
+@contextmanager
+def apply_profile(settings: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Temporarily override backend settings; yields the effective values."""
+    merged = {**_BASE_SETTINGS, **settings}
+    targets = {name: _resolve_setting(name) for name in merged}
+    saved = {name: getattr(module, attribute) for name, (module, attribute) in targets.items()}
+    effective: Dict[str, Any] = {}
+    try:
+        for name, (module, attribute) in targets.items():
+            value = _coerce_setting(saved[name], merged[name])
+            setattr(module, attribute, value)
+            effective[name] = value
+        yield effective
+    finally:
+        for name, (module, attribute) in targets.items():
+            setattr(module, attribute, saved[name])
+
+
+def load_profiles(path: Optional[Path]) -> List[Dict[str, Any]]:
+    if path is None:
+        return [{"name": "current", "settings": {}}]
+    profiles = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(profiles, list) or not profiles:
+        raise ValueError("Profiles file must contain a non-empty JSON list")
+    for profile in profiles:
+        if not profile.get("name"):
+            raise ValueError("Every profile needs a name")
+        for name in profile.get("settings") or {}:
+            _resolve_setting(name)
+    return profiles
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+
+def recall_at_k(retrieved_keys: Sequence[str], relevant_keys: Sequence[str], k: int) -> float:
+    relevant = set(relevant_keys)
+    if not relevant:
+        return 1.0
+    return round(len(relevant.intersection(retrieved_keys[:k])) / len(relevant), 4)
+
+
+def _percentile(values: Sequence[float], fraction: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize_runs(runs: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """Aggregate per-question records into latency percentiles and mean recall."""
+    latency: Dict[str, Dict[str, float]] = {}
+    for stage in LATENCY_STAGES:
+        values = [run["latency_ms"][stage] for run in runs if stage in run["latency_ms"]]
+        if values:
+            latency[stage] = {
+                "count": len(values),
+                "mean": round(statistics.fmean(values), 3),
+                "p50": round(_percentile(values, 0.50), 3),
+                "p95": round(_percentile(values, 0.95), 3),
+                "max": round(max(values), 3),
+            }
+    recall = {
+        f"recall@{k}": round(statistics.fmean(run["recall"][f"recall@{k}"] for run in runs), 4)
+        for k in RECALL_KS
+        if runs
+    }
+    return {
+        "questions": len(runs),
+        "errors": sum(1 for run in runs if run.get("error")),
+        "latency_ms": latency,
+        "recall": recall,
+        "peak_traced_kib": max(
+            (run["peak_traced_kib"] for run in runs if run["peak_traced_kib"] is not None),
+            default=None,
+        ),
+    }
+
+
+def build_comparison(reports: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """Side-by-side view of the headline numbers of several profile reports."""
+    rows = []
+    for report in reports:
+        summary = report["summary"]
+        latency = summary["latency_ms"]
+        rows.append(
+            {
+                "profile": report["profile"],
+                "end_to_end_p50_ms": latency.get("end_to_end", {}).get("p50"),
+                "end_to_end_p95_ms": latency.get("end_to_end", {}).get("p95"),
+                "retrieval_p50_ms": latency.get("retrieval_total", {}).get("p50"),
+                **summary["recall"],
+                "errors": summary["errors"],
+                "peak_traced_kib": summary["peak_traced_kib"],
+                "max_rss_kib": report["max_rss_kib"],
+            }
+        )
+    return {"generated_at": _utc_now(), "profiles": rows}
+
+
+# ---------------------------------------------------------------------------
+# Execution
+# ---------------------------------------------------------------------------
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _max_rss_kib() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and KiB on Linux.
+    return int(rss / 1024) if sys.platform == "darwin" else int(rss)
+
+
+class _RetrievalProbe:
+    """Wraps the router's retrieval entry point to capture sources and timings."""
+
+    def __init__(self) -> None:
+        self.calls: List[Tuple[list, dict]] = []
+        self._original = documents_router._retrieve_hybrid_sources
+
+    def __call__(self, **kwargs):
+        sources, context_text, retrieval_debug = self._original(**kwargs)
+        self.calls.append(([dict(source) for source in sources], dict(retrieval_debug)))
+        return sources, context_text, retrieval_debug
+
+    @contextmanager
+    def installed(self) -> Iterator["_RetrievalProbe"]:
+        documents_router._retrieve_hybrid_sources = self
+        try:
+            yield self
+        finally:
+            documents_router._retrieve_hybrid_sources = self._original
+
+
+def _run_question(db, corpus: LoadedCorpus, question: BenchmarkQuestion) -> None:
+    if question.kind == "analysis":
+        documents_router.ai_analysis(
+            flight_test_id=corpus.flight_test_id,
+            body=documents_router.AIAnalysisRequest(
+                user_prompt=question.text, analysis_mode=question.analysis_mode
+            ),
+            db=db,
+            current_user=corpus.owner,
+        )
+    else:
+        documents_router.query_documents(
+            documents_router.QueryRequest(
+                question=question.text,
+                top_k=question.top_k,
+                analysis_mode=question.analysis_mode,
+            ),
+            db=db,
+            current_user=corpus.owner,
+        )
+
+
+def run_profile(
+    db,
+    corpus: LoadedCorpus,
+    client: StubOpenAIClient,
+    profile: Dict[str, Any],
+    questions: Sequence[BenchmarkQuestion] = QUESTIONS,
+    repeat: int = 1,
+) -> Dict[str, Any]:
+    runs: List[Dict[str, Any]] = []
+    probe = _RetrievalProbe()
+    with apply_profile(profile.get("settings") or {}) as effective, probe.installed():
+        documents_router.document_metadata_cache.clear()
+        documents_router.retrieval_result_cache.clear()
+        for iteration in range(max(1, repeat)):
+            for question in questions:
+                probe.calls.clear()
+                client.timings.drain()
+                tracing = tracemalloc.is_tracing()
+                if tracing:
+                    tracemalloc.reset_peak()
+                error = None
+                started = time.perf_counter()
+                try:
+                    _run_question(db, corpus, question)
+                except Exception as exc:  # recorded, the run continues
+                    db.rollback()
+                    error = f"{type(exc).__name__}: {exc}"
+                end_to_end_ms = (time.perf_counter() - started) * 1000.0
+                peak = tracemalloc.get_traced_memory()[1] if tracing else None
+
+                sources, retrieval_debug = probe.calls[0] if probe.calls else ([], {})
+                stage_timings = dict(retrieval_debug.get("stage_timings_ms") or {})
+                latency = {
+                    stage: float(value)
+                    for stage, value in stage_timings.items()
+                    if stage != "total"
+                }
+                if "total" in stage_timings:
+                    latency["retrieval_total"] = float(stage_timings["total"])
+                latency.update(client.timings.drain())
+                latency["end_to_end"] = round(end_to_end_ms, 3)
+
+                retrieved_keys = [
+                    corpus.chunk_key_by_text.get(str(source.get("text") or ""), "?")
+                    for source in sources
+                ]
+                runs.append(
+                    {
+                        "question_id": question.question_id,
+                        "kind": question.kind,
+                        "iteration": iteration,
+                        "error": error,
+                        "latency_ms": latency,
+                        "retrieved_keys": retrieved_keys,
+                        "relevant_keys": list(question.relevant_keys),
+                        "recall": {
+                            f"recall@{k}": recall_at_k(retrieved_keys, question.relevant_keys, k)
+                            for k in RECALL_KS
+                        },
+                        "context_packing": retrieval_debug.get("context_packing"),
+                        "peak_traced_kib": int(peak / 1024) if peak is not None else None,
+                    }
+                )
+
+    return {
+        "benchmark": "rag_end_to_end",
+        "generated_at": _utc_now(),
+        "profile": profile["name"],
+        "settings": effective,
+        "repeat": max(1, repeat),
+        "llm_latency_ms": client.llm_latency_ms,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": db.get_bind().dialect.name,
+            "tokenizer": context_packer.tokenizer_name(),
+        },
+        "summary": summarize_runs(runs),
+        "max_rss_kib": _max_rss_kib(),
+        "runs": runs,
+    }
+
+
+def _create_owner(db, run_tag: str):
+    from app.auth import get_password_hash
+    from app.models import User
+
+    owner = User(
+        email=f"rag-bench-{run_tag}@benchmark.invalid",
+        username=f"rag-bench-{run_tag}",
+        full_name="RAG benchmark",
+        hashed_password=get_password_hash(uuid.uuid4().hex),
+        is_active=True,
+    )
+    db.add(owner)
+    db.commit()
+    db.refresh(owner)
+    return owner
+
+
+def _cleanup(db, corpus: Optional[LoadedCorpus], owner) -> None:
+    from app.models import (
+        AnalysisJob,
+        DataPoint,
+        Document,
+        DocumentChunk,
+        FlightTest,
+        RetrievalCorpusVersion,
+        TestParameter,
+    )
+
+    db.rollback()
+    if corpus is not None:
+        if corpus.flight_test_id:
+            db.query(AnalysisJob).filter(
+                AnalysisJob.flight_test_id == corpus.flight_test_id
+            ).delete(synchronize_session=False)
+            db.query(DataPoint).filter(DataPoint.flight_test_id == corpus.flight_test_id).delete(
+                synchronize_session=False
+            )
+            db.query(FlightTest).filter(FlightTest.id == corpus.flight_test_id).delete(
+                synchronize_session=False
+            )
+        if corpus.parameter_ids:
+            db.query(TestParameter).filter(TestParameter.id.in_(corpus.parameter_ids)).delete(
+                synchronize_session=False
+            )
+        if corpus.document_ids:
+            db.query(DocumentChunk).filter(
+                DocumentChunk.document_id.in_(corpus.document_ids)
+            ).delete(synchronize_session=False)
+            db.query(Document).filter(Document.id.in_(corpus.document_ids)).delete(
+                synchronize_session=False
+            )
+    if owner is not None:
+        db.query(RetrievalCorpusVersion).filter(
+            RetrievalCorpusVersion.owner_user_id == owner.id
+        ).delete(synchronize_session=False)
+        db.delete(owner)
+    db.commit()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--profiles", type=Path, help="JSON list of {name, settings}")
+    parser.add_argument("--out", type=Path, default=Path("bench-reports"))
+    parser.add_argument("--repeat", type=int, default=1, help="Replays of the question set")
+    parser.add_argument(
+        "--llm-latency-ms",
+        type=float,
+        default=0.0,
+        help="Simulated latency per stub chat completion",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Record per-question peak Python allocations (tracemalloc slows every stage)",
+    )
+    args = parser.parse_args(argv)
+
+    from app.database import SessionLocal
+
+    profiles = load_profiles(args.profiles)
+    client = StubOpenAIClient(llm_latency_ms=args.llm_latency_ms)
+    run_tag = uuid.uuid4().hex[:8]
+    args.out.mkdir(parents=True, exist_ok=True)
+
+    original_client = documents_router.get_openai_client
+    original_require = documents_router._require_ai_packages
+    documents_router.get_openai_client = lambda: client
+    documents_router._require_ai_packages = lambda: None
+
+    db = SessionLocal()
+    owner = corpus = None
+    reports: List[Dict[str, Any]] = []
+    if args.trace_memory:
+        tracemalloc.start()
+    try:
+        if db.get_bind().dialect.name != "postgresql":
+            print("The RAG benchmark needs PostgreSQL with pgvector (DATABASE_URL).")
+            return 2
+        owner = _create_owner(db, run_tag)
+        corpus = load_corpus(db, owner, documents_router.EMBEDDING_MODEL, run_tag)
+        for profile in profiles:
+            report = run_profile(db, corpus, client, profile, repeat=args.repeat)
+            reports.append(report)
+            path = args.out / f"rag-benchmark-{profile['name']}.json"
+            path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+            summary = report["summary"]
+            end_to_end = summary["latency_ms"].get("end_to_end", {})
+            print(
+                f"{profile['name']}: p50={end_to_end.get('p50')}ms "
+                f"p95={end_to_end.get('p95')}ms recall@5={summary['recall'].get('recall@5')} "
+                f"errors={summary['errors']} -> {path}"
+            )
+        comparison_path = args.out / "rag-benchmark-comparison.json"
+        comparison_path.write_text(
+            json.dumps(build_comparison(reports), indent=2), encoding="utf-8"
+        )
+        print(f"comparison -> {comparison_path}")
+    finally:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        try:
+            _cleanup(db, corpus, owner)
+        finally:
+            db.close()
+            documents_router.get_openai_client = original_client
+            documents_router._require_ai_packages = original_require
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,140 @@
+"""
+Deterministic stand-ins for the OpenAI embedding and chat-completion APIs.
+
+Goals:
+- no network access and no API key: the RAG pipeline runs unchanged against
+  an object exposing ``embeddings.create`` and ``chat.completions.create``
+- hash-based bag-of-words embeddings, so texts sharing terms land close in
+  cosine space and vector retrieval behaves plausibly on a synthetic corpus
+- canned answers that cite the sources present in the prompt, so citation
+  coverage and repair paths execute as they would with a real model
+- per-call latency recorded by stage (``llm`` / ``repair`` / ``embed``)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+from typing import Dict, List, Sequence
+
+EMBEDDING_DIM = 1536
+
+_TERM_PATTERN = re.compile(r"[a-z0-9]+")
+_LEGEND_ID_PATTERN = re.compile(r"^- (S\d+):", re.MULTILINE)
+_EXCERPT_ID_PATTERN = re.compile(r"^\[(S\d+)\]", re.MULTILINE)
+
+_ANALYSIS_SECTIONS = (
+    "Executive Summary",
+    "Standards Cross-Check",
+    "Risks/Assumptions",
+    "Recommendations",
+)
+
+
+def hash_embedding(text: str, dim: int = EMBEDDING_DIM) -> List[float]:
+    """Unit-length signed feature-hashing vector of the lower-cased terms of ``text``."""
+    vector = [0.0] * dim
+    for term in _TERM_PATTERN.findall((text or "").lower()):
+        digest = hashlib.sha256(term.encode("utf-8")).digest()
+        index = int.from_bytes(digest[:4], "big") % dim
+        vector[index] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(value * value for value in vector))
+    if norm == 0.0:
+        vector[0] = 1.0
+        return vector
+    return [value / norm for value in vector]
+
+
+class ProviderTimings:
+    """Thread-safe per-stage call durations in milliseconds."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._durations: Dict[str, List[float]] = defaultdict(list)
+
+    def record(self, stage: str, duration_ms: float) -> None:
+        with self._lock:
+            self._durations[stage].append(duration_ms)
+
+    def drain(self) -> Dict[str, float]:
+        """Summed durations per stage since the last drain."""
+        with self._lock:
+            totals = {stage: round(sum(values), 3) for stage, values in self._durations.items()}
+            self._durations.clear()
+        return totals
+
+
+def _cited_ids(messages: Sequence[dict]) -> List[str]:
+    text = "\n".join(str(message.get("content") or "") for message in messages)
+    ids = _LEGEND_ID_PATTERN.findall(text) or _EXCERPT_ID_PATTERN.findall(text)
+    return list(dict.fromkeys(ids))
+
+
+def canned_answer(messages: Sequence[dict]) -> str:
+    """Answer text citing the sources offered in ``messages``."""
+    ids = _cited_ids(messages) or ["S1"]
+    system = str(messages[0].get("content") or "") if messages else ""
+
+    def _cite(index: int) -> str:
+        return f"[{ids[index % len(ids)]}]"
+
+    user = str(messages[-1].get("content") or "") if messages else ""
+    if "flight test engineer" in system and user.startswith("Flight Test:"):
+        lines: List[str] = []
+        for number, section in enumerate(_ANALYSIS_SECTIONS, start=1):
+            lines.append(f"({number}) {section}")
+            lines.append(f"Recorded parameters are consistent with the guidance {_cite(number)}.")
+            lines.append(f"Confirm margins against the cited limits {_cite(number + 1)}.")
+            lines.append("")
+        return "\n".join(lines).strip()
+    return " ".join(
+        f"Requirement {index + 1} is stated in the retrieved excerpt {_cite(index)}."
+        for index in range(min(4, len(ids)))
+    )
+
+
+class _Embeddings:
+    def __init__(self, owner: "StubOpenAIClient") -> None:
+        self._owner = owner
+
+    def create(self, *, model: str, input):  # noqa: A002 - mirrors the OpenAI signature
+        started = time.perf_counter()
+        texts = [input] if isinstance(input, str) else list(input)
+        data = [
+            SimpleNamespace(index=index, embedding=hash_embedding(text, self._owner.embedding_dim))
+            for index, text in enumerate(texts)
+        ]
+        self._owner.timings.record("embed", (time.perf_counter() - started) * 1000.0)
+        return SimpleNamespace(data=data, model=model)
+
+
+class _ChatCompletions:
+    def __init__(self, owner: "StubOpenAIClient") -> None:
+        self._owner = owner
+
+    def create(self, *, model: str, messages: List[dict], **_kwargs):
+        started = time.perf_counter()
+        system = str(messages[0].get("content") or "") if messages else ""
+        stage = "repair" if "technical editor" in system else "llm"
+        if self._owner.llm_latency_ms:
+            time.sleep(self._owner.llm_latency_ms / 1000.0)
+        content = canned_answer(messages)
+        self._owner.timings.record(stage, (time.perf_counter() - started) * 1000.0)
+        message = SimpleNamespace(content=content, role="assistant")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], model=model)
+
+
+class StubOpenAIClient:
+    """Offline client exposing the subset of the OpenAI SDK the backend uses."""
+
+    def __init__(self, embedding_dim: int = EMBEDDING_DIM, llm_latency_ms: float = 0.0) -> None:
+        self.embedding_dim = embedding_dim
+        self.llm_latency_ms = max(0.0, float(llm_latency_ms))
+        self.timings = ProviderTimings()
+        self.embeddings = _Embeddings(self)
+        self.chat = SimpleNamespace(completions=_ChatCompletions(self))
@@ -0,0 +1,263 @@
+"""
+Time-series read benchmark for the data_points covering index.
+
+Goals:
+- measure the two hot data_points reads (chart series for one parameter and
+  the deterministic-analysis multi-parameter load) on a synthetic table of
+  production shape and size (default 50M rows), before and after adding
+  ix_data_points_version_param_ts
+- capture EXPLAIN (ANALYZE, BUFFERS) per run so the report shows plan shape
+  (index-only scan, explicit sort, heap fetches) next to the timings rather
+  than timings alone
+
+The table is LIST-partitioned by dataset_version_id like the migrated
+``data_points`` and lives in a scratch schema that is dropped afterwards
+(``--keep`` leaves it for manual EXPLAIN work). PostgreSQL 12+ only.
+
+Usage (from backend/)::
+
+    python -m benchmarks.timeseries_index_benchmark --rows 50000000 \\
+        --out bench-reports --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+FLIGHT_TEST_ID = 1
+SAMPLE_INTERVAL_MS = 50  # 20 Hz telemetry
+
+QUERIES: Dict[str, str] = {
+    # Chart endpoint: one parameter of the active dataset version.
+    "chart_series": (
+        "SELECT timestamp, value FROM {table} "
+        "WHERE flight_test_id = :flight_test_id AND dataset_version_id = :version_id "
+        "AND parameter_id = :parameter_id ORDER BY timestamp LIMIT 50000"
+    ),
+    # _load_timeseries_rows: a handful of parameters of one dataset version.
+    "analysis_timeseries": (
+        "SELECT timestamp, parameter_id, value FROM {table} "
+        "WHERE flight_test_id = :flight_test_id AND dataset_version_id = :version_id "
+        "AND parameter_id IN (:parameter_id, :parameter_id_2, :parameter_id_3) "
+        "ORDER BY timestamp"
+    ),
+}
+
+
+def _walk(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []) or []:
+        yield from _walk(child)
+
+
+def summarize_plan(explain_json: Any) -> Dict[str, Any]:
+    """Reduce EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) output to comparable fields."""
+    document = explain_json[0] if isinstance(explain_json, list) else explain_json
+    root = document["Plan"]
+    nodes = list(_walk(root))
+    scan_types = sorted({node["Node Type"] for node in nodes if node["Node Type"].endswith("Scan")})
+    return {
+        "execution_ms": float(document.get("Execution Time", 0.0)),
+        "planning_ms": float(document.get("Planning Time", 0.0)),
+        "rows": int(root.get("Actual Rows", 0)),
+        "scan_types": scan_types,
+        "index_only": bool(scan_types) and scan_types == ["Index Only Scan"],
+        "explicit_sort": any(node["Node Type"] == "Sort" for node in nodes),
+        "heap_fetches": sum(int(node.get("Heap Fetches", 0)) for node in nodes),
+        "shared_hit_blocks": int(root.get("Shared Hit Blocks", 0)),
+        "shared_read_blocks": int(root.get("Shared Read Blocks", 0)),
+    }
+
+
+def summarize_runs(plans: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    timings = sorted(plan["execution_ms"] for plan in plans)
+    return {
+        "runs": len(plans),
+        "execution_ms": {
+            "min": timings[0],
+            "p50": statistics.median(timings),
+            "max": timings[-1],
+        },
+        # Plan shape is stable across warm runs; report the last one.
+        "plan": {key: value for key, value in plans[-1].items() if key != "execution_ms"},
+    }
+
+
+def _create_table(conn: Connection, schema: str, versions: int) -> str:
+    table = f"{schema}.data_points"
+    conn.execute(text(f"CREATE SCHEMA {schema}"))
+    conn.execute(
+        text(
+            f"CREATE TABLE {table} ("
+            "id BIGINT NOT NULL, flight_test_id INTEGER NOT NULL, "
+            "parameter_id INTEGER NOT NULL, dataset_version_id INTEGER NULL, "
+            "timestamp TIMESTAMPTZ NOT NULL, value DOUBLE PRECISION NOT NULL, "
+            "created_at TIMESTAMPTZ DEFAULT NOW()"
+            ") PARTITION BY LIST (dataset_version_id)"
+        )
+    )
+    for version_id in range(1, versions + 1):
+        conn.execute(
+            text(
+                f"CREATE TABLE {schema}.data_points_v{version_id} "
+                f"PARTITION OF {table} FOR VALUES IN ({version_id})"
+            )
+        )
+    return table
+
+
+def _load_rows(conn: Connection, table: str, rows: int, versions: int, parameters: int) -> None:
+    samples_per_version = max(1, rows // (versions * parameters))
+    for version_id in range(1, versions + 1):
+        # Rows arrive in timestamp order across all parameters, like a CSV upload.
+        conn.execute(
+            text(
+                f"INSERT INTO {table} "
+                "(id, flight_test_id, parameter_id, dataset_version_id, timestamp, value) "
+                "SELECT (:version_id - 1) * :per_version + s * :parameters + p, "
+                ":flight_test_id, p, :version_id, "
+                "TIMESTAMPTZ '2026-01-01' + s * (:interval_ms * INTERVAL '1 millisecond'), "
+                "sin(s / 100.0 + p) * 100 "
+                "FROM generate_series(0, :samples - 1) AS s, "
+                "generate_series(1, :parameters) AS p"
+            ),
+            {
+                "version_id": version_id,
+                "per_version": samples_per_version * parameters,
+                "parameters": parameters,
+                "flight_test_id": FLIGHT_TEST_ID,
+                "interval_ms": SAMPLE_INTERVAL_MS,
+                "samples": samples_per_version,
+            },
+        )
+        print(f"  loaded dataset version {version_id}/{versions}")
+
+
+def _create_baseline_indexes(conn: Connection, table: str) -> None:
+    for column in ("flight_test_id", "parameter_id", "dataset_version_id", "timestamp"):
+        conn.execute(text(f"CREATE INDEX ON {table} ({column})"))
+
+
+def _create_covering_index(conn: Connection, table: str) -> None:
+    conn.execute(
+        text(
+            f"CREATE INDEX ON {table} (dataset_version_id, parameter_id, timestamp) "
+            "INCLUDE (value, flight_test_id)"
+        )
+    )
+
+
+def _vacuum_analyze(conn: Connection, table: str) -> None:
+    # Index-only scans need an up-to-date visibility map. VACUUM cannot run
+    # in a transaction, so the connection stays in autocommit from here on.
+    conn.commit()
+    conn.execution_options(isolation_level="AUTOCOMMIT").execute(text(f"VACUUM (ANALYZE) {table}"))
+
+
+def _explain(conn: Connection, sql: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    result = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), params)
+    raw = result.scalar()
+    return summarize_plan(json.loads(raw) if isinstance(raw, str) else raw)
+
+
+def run_queries(
+    conn: Connection, table: str, *, versions: int, parameters: int, repeat: int
+) -> Dict[str, Any]:
+    params = {
+        "flight_test_id": FLIGHT_TEST_ID,
+        "version_id": versions,  # newest version, like the active one
+        "parameter_id": 1,
+        "parameter_id_2": min(2, parameters),
+        "parameter_id_3": min(3, parameters),
+    }
+    results: Dict[str, Any] = {}
+    for name, template in QUERIES.items():
+        sql = template.format(table=table)
+        _explain(conn, sql, params)  # warm-up
+        results[name] = summarize_runs([_explain(conn, sql, params) for _ in range(repeat)])
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=50_000_000)
+    parser.add_argument("--versions", type=int, default=10, help="Dataset versions (partitions)")
+    parser.add_argument("--parameters", type=int, default=50, help="Parameters per version")
+    parser.add_argument("--repeat", type=int, default=5, help="Measured runs per query")
+    parser.add_argument("--out", type=Path, default=Path("bench-reports"))
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch schema")
+    args = parser.parse_args(argv)
+
+    from app.database import engine
+
+    if engine.dialect.name != "postgresql":
+        print("The time-series index benchmark needs PostgreSQL (DATABASE_URL).")
+        return 2
+
+    schema = f"ftias_bench_{uuid.uuid4().hex[:8]}"
+    args.out.mkdir(parents=True, exist_ok=True)
+    report: Dict[str, Any] = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "rows": args.rows,
+        "versions": args.versions,
+        "parameters": args.parameters,
+        "repeat": args.repeat,
+        "variants": {},
+    }
+    with engine.connect() as conn:
+        report["server_version"] = conn.execute(text("SHOW server_version")).scalar()
+        try:
+            table = _create_table(conn, schema, args.versions)
+            started = time.perf_counter()
+            _load_rows(conn, table, args.rows, args.versions, args.parameters)
+            _create_baseline_indexes(conn, table)
+            conn.commit()
+            report["load_s"] = round(time.perf_counter() - started, 1)
+            report["rows_loaded"] = conn.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+            _vacuum_analyze(conn, table)
+
+            variants: List[str] = ["single_column_indexes", "covering_index"]
+            for variant in variants:
+                if variant == "covering_index":
+                    _create_covering_index(conn, table)
+                    conn.commit()
+                    _vacuum_analyze(conn, table)
+                report["variants"][variant] = run_queries(
+                    conn,
+                    table,
+                    versions=args.versions,
+                    parameters=args.parameters,
+                    repeat=args.repeat,
+                )
+                conn.commit()
+                for name, summary in report["variants"][variant].items():
+                    plan = summary["plan"]
+                    print(
+                        f"{variant} {name}: p50={summary['execution_ms']['p50']:.1f}ms "
+                        f"scans={','.join(plan['scan_types'])} sort={plan['explicit_sort']} "
+                        f"heap_fetches={plan['heap_fetches']}"
+                    )
+        finally:
+            conn.rollback()
+            if not args.keep:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {schema} CASCADE"))
+                conn.commit()
+
+    path = args.out / "timeseries-index-benchmark.json"
+    path.write_text(json.dumps(report, indent=2, default=str), encoding="utf-8")
+    print(f"report -> {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
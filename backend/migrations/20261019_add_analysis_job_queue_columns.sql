@@ -0,0 +1,22 @@
+-- FTIAS DB Migration
+-- Revision date: 2026-10-19
+-- Purpose: queued/asynchronous AI analysis execution (progress, errors, submitted request).
+-- Target DB: PostgreSQL
+
+BEGIN;
+
+ALTER TABLE analysis_jobs
+    ADD COLUMN IF NOT EXISTS progress_stage VARCHAR(32),
+    ADD COLUMN IF NOT EXISTS error_message TEXT,
+    ADD COLUMN IF NOT EXISTS request_json TEXT,
+    ADD COLUMN IF NOT EXISTS started_at TIMESTAMPTZ,
+    ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS ix_analysis_jobs_status ON analysis_jobs (status);
+
+-- Per-user active-job limit lookups.
+CREATE INDEX IF NOT EXISTS ix_analysis_jobs_active_by_user
+    ON analysis_jobs (created_by_id)
+    WHERE status IN ('queued', 'running');
+
+COMMIT;
@@ -0,0 +1,25 @@
+-- FTIAS DB Migration
+-- Revision date: 2026-10-19
+-- Purpose: content-hash chunk identity for embedding reuse and incremental document re-indexing.
+-- Target DB: PostgreSQL
+
+BEGIN;
+
+ALTER TABLE document_chunks
+    ADD COLUMN IF NOT EXISTS content_sha256 VARCHAR(64),
+    ADD COLUMN IF NOT EXISTS embedding_model VARCHAR(128);
+
+-- Legacy chunks were all embedded with the only model used so far. Their hashes
+-- are backfilled lazily by the next replace of the owning document.
+UPDATE document_chunks
+SET embedding_model = 'text-embedding-3-small'
+WHERE embedding IS NOT NULL AND embedding_model IS NULL;
+
+CREATE INDEX IF NOT EXISTS ix_document_chunks_content_sha256
+    ON document_chunks (content_sha256);
+
+CREATE INDEX IF NOT EXISTS ix_document_chunks_hash_model
+    ON document_chunks (content_sha256, embedding_model)
+    WHERE embedding IS NOT NULL;
+
+COMMIT;
@@ -0,0 +1,32 @@
+-- FTIAS DB Migration
+-- Revision date: 2026-10-19
+-- Purpose: opt-in LLM completion cache for repeat AI analyses, plus reuse provenance on analysis jobs.
+-- Target DB: PostgreSQL
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS llm_completion_cache (
+    id SERIAL PRIMARY KEY,
+    prompt_sha256 VARCHAR(64) NOT NULL,
+    model_name VARCHAR(128) NOT NULL,
+    temperature DOUBLE PRECISION NOT NULL,
+    max_tokens INTEGER NOT NULL,
+    completion_text TEXT NOT NULL,
+    source_analysis_job_id INTEGER NULL REFERENCES analysis_jobs(id),
+    hit_count INTEGER NOT NULL DEFAULT 0,
+    last_hit_at TIMESTAMPTZ NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ix_llm_completion_cache_prompt_sha256
+    ON llm_completion_cache (prompt_sha256);
+
+ALTER TABLE analysis_jobs
+    ADD COLUMN IF NOT EXISTS completion_fingerprint VARCHAR(64),
+    ADD COLUMN IF NOT EXISTS completion_cache_hit BOOLEAN NOT NULL DEFAULT FALSE,
+    ADD COLUMN IF NOT EXISTS reused_from_analysis_job_id INTEGER NULL REFERENCES analysis_jobs(id);
+
+CREATE INDEX IF NOT EXISTS ix_analysis_jobs_completion_fingerprint
+    ON analysis_jobs (completion_fingerprint);
+
+COMMIT;
@@ -0,0 +1,22 @@
+-- FTIAS DB Migration
+-- Revision date: 2026-10-19
+-- Purpose: per-owner document library version used to invalidate cached retrieval results.
+-- Target DB: PostgreSQL
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS retrieval_corpus_versions (
+    owner_user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Databases that created the table without the cascade: deleting a user
+-- must not be blocked by their corpus version row.
+ALTER TABLE retrieval_corpus_versions
+    DROP CONSTRAINT IF EXISTS retrieval_corpus_versions_owner_user_id_fkey;
+ALTER TABLE retrieval_corpus_versions
+    ADD CONSTRAINT retrieval_corpus_versions_owner_user_id_fkey
+    FOREIGN KEY (owner_user_id) REFERENCES users(id) ON DELETE CASCADE;
+
+COMMIT;
@@ -0,0 +1,98 @@
+-- FTIAS DB Migration
+-- Revision date: 2026-10-19
+-- Purpose: LIST-partition data_points by dataset_version_id so removing a dataset version is a
+--          partition drop, and add dataset_gc_jobs for background dataset-version reclamation.
+-- Target DB: PostgreSQL 12+
+
+BEGIN;
+
+DO $$
+DECLARE
+    version_id INTEGER;
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('data_points')
+    ) THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE data_points RENAME TO data_points_unpartitioned;
+
+    -- A partitioned table's primary key must include the partition key, and
+    -- dataset_version_id is nullable (legacy uploads), so ids stay unique via
+    -- the shared sequence and are indexed rather than constrained.
+    CREATE TABLE data_points (
+        id INTEGER NOT NULL DEFAULT nextval('data_points_id_seq'::regclass),
+        flight_test_id INTEGER NOT NULL
+            REFERENCES flight_tests(id) ON DELETE CASCADE,
+        parameter_id INTEGER NOT NULL REFERENCES test_parameters(id),
+        dataset_version_id INTEGER NULL
+            REFERENCES dataset_versions(id) ON DELETE SET NULL,
+        timestamp TIMESTAMPTZ NOT NULL,
+        value DOUBLE PRECISION NOT NULL,
+        created_at TIMESTAMPTZ DEFAULT NOW()
+    ) PARTITION BY LIST (dataset_version_id);
+
+    -- Rows without a dataset version (pre-versioning uploads) live here.
+    CREATE TABLE data_points_default PARTITION OF data_points DEFAULT;
+
+    FOR version_id IN
+        SELECT DISTINCT dataset_version_id
+        FROM data_points_unpartitioned
+        WHERE dataset_version_id IS NOT NULL
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF data_points FOR VALUES IN (%s)',
+            'data_points_v' || version_id,
+            version_id
+        );
+    END LOOP;
+
+    INSERT INTO data_points (
+        id, flight_test_id, parameter_id, dataset_version_id, timestamp, value, created_at
+    )
+    SELECT id, flight_test_id, parameter_id, dataset_version_id, timestamp, value, created_at
+    FROM data_points_unpartitioned;
+
+    ALTER SEQUENCE data_points_id_seq OWNED BY data_points.id;
+    DROP TABLE data_points_unpartitioned;
+
+    -- Lets ATTACH PARTITION for a new dataset version skip scanning the
+    -- default partition for rows that would belong to it.
+    ALTER TABLE data_points_default
+        ADD CONSTRAINT data_points_default_unversioned_check
+        CHECK (dataset_version_id IS NULL);
+END $$;
+
+CREATE INDEX IF NOT EXISTS ix_data_points_id ON data_points(id);
+CREATE INDEX IF NOT EXISTS ix_data_points_flight_test_id ON data_points(flight_test_id);
+CREATE INDEX IF NOT EXISTS ix_data_points_parameter_id ON data_points(parameter_id);
+CREATE INDEX IF NOT EXISTS ix_data_points_dataset_version_id ON data_points(dataset_version_id);
+CREATE INDEX IF NOT EXISTS ix_data_points_timestamp ON data_points(timestamp);
+CREATE INDEX IF NOT EXISTS ix_data_points_flight_test_dataset
+    ON data_points(flight_test_id, dataset_version_id);
+
+CREATE TABLE IF NOT EXISTS dataset_gc_jobs (
+    id SERIAL PRIMARY KEY,
+    requested_by_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    flight_test_id INTEGER NULL REFERENCES flight_tests(id) ON DELETE SET NULL,
+    status VARCHAR(32) NOT NULL DEFAULT 'queued',
+    include_superseded BOOLEAN NOT NULL DEFAULT FALSE,
+    total_versions INTEGER NOT NULL DEFAULT 0,
+    processed_versions INTEGER NOT NULL DEFAULT 0,
+    reclaimed_versions INTEGER NOT NULL DEFAULT 0,
+    skipped_versions INTEGER NOT NULL DEFAULT 0,
+    reclaimed_data_points BIGINT NOT NULL DEFAULT 0,
+    error_message TEXT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    started_at TIMESTAMPTZ NULL,
+    completed_at TIMESTAMPTZ NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_dataset_gc_jobs_requested_by_id
+    ON dataset_gc_jobs(requested_by_id);
+
+CREATE INDEX IF NOT EXISTS ix_dataset_gc_jobs_status
+    ON dataset_gc_jobs(status);
+
+COMMIT;
@@ -0,0 +1,36 @@
+-- FTIAS DB Migration
+-- Revision date: 2026-10-19
+-- Purpose: database-level cascades so document/flight test deletes never need ORM-loaded children.
+-- Target DB: PostgreSQL
+--
+-- Run after 20261019_add_llm_completion_cache.sql (alters llm_completion_cache and
+-- analysis_jobs.reused_from_analysis_job_id, both added there).
+
+BEGIN;
+
+-- Chunks (and their embeddings) go with their document.
+ALTER TABLE document_chunks DROP CONSTRAINT IF EXISTS document_chunks_document_id_fkey;
+ALTER TABLE document_chunks
+    ADD CONSTRAINT document_chunks_document_id_fkey
+    FOREIGN KEY (document_id) REFERENCES documents(id) ON DELETE CASCADE;
+
+-- Data points go with their flight test.
+ALTER TABLE data_points DROP CONSTRAINT IF EXISTS data_points_flight_test_id_fkey;
+ALTER TABLE data_points
+    ADD CONSTRAINT data_points_flight_test_id_fkey
+    FOREIGN KEY (flight_test_id) REFERENCES flight_tests(id) ON DELETE CASCADE;
+
+-- Completion-reuse provenance must not block deleting the analysis job it points at.
+ALTER TABLE llm_completion_cache
+    DROP CONSTRAINT IF EXISTS llm_completion_cache_source_analysis_job_id_fkey;
+ALTER TABLE llm_completion_cache
+    ADD CONSTRAINT llm_completion_cache_source_analysis_job_id_fkey
+    FOREIGN KEY (source_analysis_job_id) REFERENCES analysis_jobs(id) ON DELETE SET NULL;
+
+ALTER TABLE analysis_jobs
+    DROP CONSTRAINT IF EXISTS analysis_jobs_reused_from_analysis_job_id_fkey;
+ALTER TABLE analysis_jobs
+    ADD CONSTRAINT analysis_jobs_reused_from_analysis_job_id_fkey
+    FOREIGN KEY (reused_from_analysis_job_id) REFERENCES analysis_jobs(id) ON DELETE SET NULL;
+
+COMMIT;
@@ -0,0 +1,23 @@
+-- FTIAS DB Migration
+-- Revision date: 2026-10-19
+-- Purpose: composite covering index for time-series reads on data_points
+--          (dataset_version_id, parameter_id, timestamp) INCLUDE (value, flight_test_id).
+-- Target DB: PostgreSQL 12+
+--
+-- Run after 20261019_partition_data_points_by_dataset_version.sql (the
+-- file name sorts after it). On the partitioned table the index is created
+-- on every partition (and on partitions attached later). The build blocks writes to data_points, so
+-- apply it outside upload hours on large installations.
+
+BEGIN;
+
+CREATE INDEX IF NOT EXISTS ix_data_points_version_param_ts
+    ON data_points(dataset_version_id, parameter_id, timestamp)
+    INCLUDE (value, flight_test_id);
+
+-- Leading column of the composite index; the single-column index only adds write cost.
+DROP INDEX IF EXISTS ix_data_points_dataset_version_id;
+
+ANALYZE data_points;
+
+COMMIT;
@@ -9,9 +9,9 @@ import os
 # Add /app to path so app.* imports work
 sys.path.insert(0, "/app")
 
-from app.auth import pwd_context
 from app.database import SessionLocal
 from app.models import User
+from app.password_hashing import password_hasher
 
 NEW_PASSWORD = "Ftias2026!"
 USERNAME = "testuser"
@@ -23,14 +23,15 @@ try:
         print(f"ERROR: user '{USERNAME}' not found")
         sys.exit(1)
 
-    new_hash = pwd_context.hash(NEW_PASSWORD)
+    new_hash = password_hasher.hash(NEW_PASSWORD)
     user.hashed_password = new_hash
     db.commit()
     print(f"Password for '{USERNAME}' reset successfully.")
     print(f"New hash: {new_hash}")
 
     # Verify it works
-    ok = pwd_context.verify(NEW_PASSWORD, new_hash)
+    ok = password_hasher.verify(NEW_PASSWORD, new_hash)
     print(f"Verification: {'PASS' if ok else 'FAIL'}")
 finally:
     db.close()
+    password_hasher.shutdown()
@@ -12,6 +12,7 @@ from app.auth import get_password_hash
 from app.database import Base, get_db
 from app.main import app
 from app.models import User
+from app.principal_cache import principal_cache
 
 # Test database URL (in-memory SQLite for fast tests)
 SQLALCHEMY_TEST_DATABASE_URL = "sqlite:///:memory:"
@@ -55,6 +56,8 @@ def client(db_session):
             pass
 
     app.dependency_overrides[get_db] = override_get_db
+    # User ids are reused across tests' fresh databases.
+    principal_cache.clear()
 
     with TestClient(app) as test_client:
         yield test_client
@@ -0,0 +1,219 @@
+"""Tests for queued AI analysis jobs: submit, worker execution, limits and cancel."""
+
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.analysis_job_queue import AnalysisJobQueue
+from app.models import AnalysisJob, DataPoint, FlightTest, TestParameter
+from app.routers import documents as documents_router
+
+
+class _RecordingQueue:
+    def __init__(self):
+        self.submitted = []
+        self.cancelled = []
+
+    def submit(self, job_id, fn):
+        self.submitted.append(job_id)
+
+    def cancel(self, job_id):
+        self.cancelled.append(job_id)
+        return True
+
+    def start_heartbeat(self, beat):
+        pass
+
+
+def _fake_client(answer="Guidance [S1].", error=None):
+    def _create(**kwargs):
+        if error is not None:
+            raise error
+        message = SimpleNamespace(content=answer)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=_create)))
+
+
+@pytest.fixture
+def job_env(db_session, test_user, monkeypatch):
+    flight_test = FlightTest(
+        test_name="Queued Test", aircraft_type="F-16", created_by_id=test_user["id"]
+    )
+    parameter = TestParameter(name="QUEUE_SPEED", unit="kt")
+    db_session.add_all([flight_test, parameter])
+    db_session.commit()
+    db_session.add(
+        DataPoint(
+            flight_test_id=flight_test.id,
+            parameter_id=parameter.id,
+            timestamp=datetime(2026, 10, 19, 10, 0, 0),
+            value=120.0,
+        )
+    )
+    db_session.commit()
+
+    queue = _RecordingQueue()
+    monkeypatch.setattr(documents_router, "get_analysis_job_queue", lambda: queue)
+    monkeypatch.setattr(documents_router, "SessionLocal", lambda: db_session)
+    monkeypatch.setattr(documents_router, "_require_ai_packages", lambda: None)
+    monkeypatch.setattr(documents_router.func, "stddev", lambda col: documents_router.func.avg(col))
+    monkeypatch.setattr(
+        documents_router,
+        "_retrieve_hybrid_sources",
+        lambda **kwargs: (
+            [
+                {
+                    "source_id": "S1",
+                    "filename": "std.pdf",
+                    "title": "Standard",
+                    "page_numbers": "1",
+                    "section_title": "General",
+                    "similarity": 0.9,
+                    "text": "excerpt",
+                }
+            ],
+            "[S1] excerpt",
+            {},
+        ),
+    )
+    return SimpleNamespace(flight_test_id=flight_test.id, queue=queue)
+
+
+def _submit(client, auth_headers, flight_test_id):
+    return client.post(
+        f"/api/documents/flight-tests/{flight_test_id}/ai-analysis/jobs",
+        headers=auth_headers,
+        json={"analysis_mode": "general", "user_prompt": "Summarise the test"},
+    )
+
+
+def test_submitted_job_runs_to_completion(client, auth_headers, db_session, job_env, monkeypatch):
+    monkeypatch.setattr(documents_router, "get_openai_client", lambda: _fake_client())
+
+    response = _submit(client, auth_headers, job_env.flight_test_id)
+    assert response.status_code == 202
+    payload = response.json()
+    assert payload["status"] == "queued"
+    assert payload["analysis_mode"] == "general"
+    assert job_env.queue.submitted == [payload["id"]]
+
+    documents_router._run_analysis_job(payload["id"])
+
+    job_url = (
+        f"/api/documents/flight-tests/{job_env.flight_test_id}/ai-analysis/jobs/{payload['id']}"
+    )
+    job = client.get(job_url, headers=auth_headers).json()
+    assert job["status"] == "completed"
+    assert job["progress_stage"] == "completed"
+    assert job["started_at"]
+    assert "Guidance [S1]." in job["analysis"]
+    assert job["output_sha256"] == hashlib.sha256(job["analysis"].encode("utf-8")).hexdigest()
+    assert job["parameters_analysed"] == 1
+
+
+def test_llm_failure_marks_job_failed(client, auth_headers, db_session, job_env, monkeypatch):
+    monkeypatch.setattr(
+        documents_router, "get_openai_client", lambda: _fake_client(error=RuntimeError("quota"))
+    )
+    job_id = _submit(client, auth_headers, job_env.flight_test_id).json()["id"]
+
+    documents_router._run_analysis_job(job_id)
+
+    job = db_session.query(AnalysisJob).filter(AnalysisJob.id == job_id).one()
+    assert job.status == "failed"
+    assert "quota" in job.error_message
+
+
+def test_per_user_active_job_limit(client, auth_headers, job_env, monkeypatch):
+    monkeypatch.setattr(documents_router, "ANALYSIS_JOB_MAX_ACTIVE_PER_USER", 1)
+
+    assert _submit(client, auth_headers, job_env.flight_test_id).status_code == 202
+    response = _submit(client, auth_headers, job_env.flight_test_id)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"]
+
+
+def test_cancelled_job_is_never_run(client, auth_headers, db_session, job_env):
+    job_id = _submit(client, auth_headers, job_env.flight_test_id).json()["id"]
+    cancel_url = (
+        f"/api/documents/flight-tests/{job_env.flight_test_id}/ai-analysis/jobs/{job_id}/cancel"
+    )
+
+    response = client.post(cancel_url, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+    assert job_env.queue.cancelled == [job_id]
+
+    documents_router._run_analysis_job(job_id)
+    job = db_session.query(AnalysisJob).filter(AnalysisJob.id == job_id).one()
+    assert job.status == "cancelled"
+    assert client.post(cancel_url, headers=auth_headers).status_code == 409
+
+
+def test_queue_cancels_jobs_that_have_not_started():
+    queue = AnalysisJobQueue(workers=1)
+    release = threading.Event()
+    ran = []
+    try:
+        queue.submit(1, lambda job_id: release.wait(timeout=5))
+        queue.submit(2, ran.append)
+
+        assert queue.cancel(2) is True
+        release.set()
+    finally:
+        queue.shutdown()
+    assert ran == []
+
+
+def test_heartbeat_sweep_fails_only_orphaned_running_jobs(
+    client, auth_headers, db_session, job_env, monkeypatch
+):
+    live_id = _submit(client, auth_headers, job_env.flight_test_id).json()["id"]
+    orphan_id = _submit(client, auth_headers, job_env.flight_test_id).json()["id"]
+    long_ago = datetime.now(timezone.utc) - timedelta(hours=2)
+    for job_id in (live_id, orphan_id):
+        db_session.query(AnalysisJob).filter(AnalysisJob.id == job_id).update(
+            {"status": "running", "started_at": long_ago, "heartbeat_at": long_ago},
+            synchronize_session=False,
+        )
+    db_session.commit()
+
+    # live_id is still running in this process; orphan_id was left by a restart.
+    documents_router._analysis_job_heartbeat([live_id])
+
+    db_session.expire_all()
+    live = db_session.query(AnalysisJob).filter(AnalysisJob.id == live_id).one()
+    orphan = db_session.query(AnalysisJob).filter(AnalysisJob.id == orphan_id).one()
+    assert live.status == "running"
+    assert orphan.status == "failed"
+    assert "interrupted" in orphan.error_message
+    # Only the live job counts toward the per-user limit now.
+    monkeypatch.setattr(documents_router, "ANALYSIS_JOB_MAX_ACTIVE_PER_USER", 1)
+    assert _submit(client, auth_headers, job_env.flight_test_id).status_code == 429
+    db_session.query(AnalysisJob).filter(AnalysisJob.id == live_id).update(
+        {"status": "completed"}, synchronize_session=False
+    )
+    db_session.commit()
+    assert _submit(client, auth_headers, job_env.flight_test_id).status_code == 202
+
+
+def test_queue_heartbeats_the_jobs_it_is_running():
+    queue = AnalysisJobQueue(workers=1, heartbeat_s=0.01)
+    release = threading.Event()
+    beats = []
+    try:
+        queue.submit(7, lambda job_id: release.wait(timeout=5))
+        queue.start_heartbeat(beats.append)
+        deadline = time.monotonic() + 5
+        while [7] not in beats and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert [7] in beats
+        release.set()
+    finally:
+        queue.shutdown()
@@ -0,0 +1,104 @@
+"""Tests for batched document and flight test data purges."""
+
+from datetime import datetime, timedelta
+
+from app import bulk_delete
+from app.bulk_delete import delete_in_batches
+from app.models import DataPoint, Document, DocumentChunk, FlightTest, TestParameter
+from app.routers import documents as documents_router
+
+
+class _InlinePurges:
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+def _seed_document(db_session, owner_id, chunk_count=5):
+    doc = Document(
+        filename="handbook.pdf",
+        title="Handbook",
+        status="ready",
+        uploaded_by_id=owner_id,
+    )
+    db_session.add(doc)
+    db_session.flush()
+    db_session.add_all(
+        DocumentChunk(document_id=doc.id, chunk_index=index, text=f"chunk {index}")
+        for index in range(chunk_count)
+    )
+    db_session.commit()
+    return doc.id
+
+
+def test_delete_in_batches_removes_only_matching_rows(db_session, test_user):
+    target = _seed_document(db_session, test_user["id"], chunk_count=7)
+    other = _seed_document(db_session, test_user["id"], chunk_count=2)
+
+    deleted = delete_in_batches(
+        db_session, DocumentChunk, DocumentChunk.document_id == target, batch_size=3
+    )
+
+    assert deleted == 7
+    remaining = {row.document_id for row in db_session.query(DocumentChunk.document_id)}
+    assert remaining == {other}
+
+
+def test_delete_document_hides_it_then_purges_chunks(
+    client, auth_headers, db_session, test_user, monkeypatch
+):
+    doc_id = _seed_document(db_session, test_user["id"])
+    monkeypatch.setattr(documents_router, "SessionLocal", lambda: db_session)
+    monkeypatch.setattr(documents_router, "_document_purges", _InlinePurges)
+    monkeypatch.setattr(bulk_delete, "BULK_DELETE_BATCH_SIZE", 2)
+
+    response = client.delete(f"/api/documents/{doc_id}", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert "handbook.pdf" in response.json()["message"]
+    assert db_session.query(DocumentChunk).count() == 0
+    assert db_session.query(Document).filter(Document.id == doc_id).first() is None
+
+
+def test_document_marked_deleting_is_hidden_and_not_replaceable(
+    client, auth_headers, db_session, test_user
+):
+    doc_id = _seed_document(db_session, test_user["id"])
+    db_session.query(Document).filter(Document.id == doc_id).update({"status": "deleting"})
+    db_session.commit()
+
+    listing = client.get("/api/documents/", headers=auth_headers)
+    assert listing.status_code == 200
+    assert all(item["id"] != doc_id for item in listing.json())
+
+    replace = client.post(
+        f"/api/documents/{doc_id}/replace",
+        headers=auth_headers,
+        files={"file": ("handbook.pdf", b"%PDF-1.4", "application/pdf")},
+    )
+    assert replace.status_code == 409
+
+
+def test_flight_test_delete_purges_data_points_in_batches(
+    client, auth_headers, db_session, test_user, monkeypatch
+):
+    flight_test = FlightTest(test_name="Bulk", aircraft_type="F-16", created_by_id=test_user["id"])
+    parameter = TestParameter(name="BULK_PARAM", unit="kt")
+    db_session.add_all([flight_test, parameter])
+    db_session.commit()
+    started = datetime(2026, 10, 19, 10, 0, 0)
+    db_session.add_all(
+        DataPoint(
+            flight_test_id=flight_test.id,
+            parameter_id=parameter.id,
+            timestamp=started + timedelta(seconds=index),
+            value=float(index),
+        )
+        for index in range(11)
+    )
+    db_session.commit()
+    monkeypatch.setattr(bulk_delete, "BULK_DELETE_BATCH_SIZE", 4)
+
+    response = client.delete(f"/api/flight-tests/{flight_test.id}", headers=auth_headers)
+
+    assert response.status_code == 204
+    assert db_session.query(DataPoint).count() == 0
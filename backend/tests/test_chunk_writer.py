@@ -0,0 +1,125 @@
+"""Tests for the COPY-based document chunk writer and atomic ingest finalize."""
+
+import struct
+
+from app.chunk_writer import (
+    CHUNK_COPY_COLUMNS,
+    build_chunk_row,
+    encode_binary_copy_row,
+    encode_text_copy_row,
+    write_document_chunks,
+)
+from app.models import Document, DocumentChunk
+from app.routers import documents as documents_router
+
+
+def _row(**overrides):
+    row = build_chunk_row(
+        document_id=7,
+        chunk_index=2,
+        chunk_info={"text": "V2 >= 1.13 VSR", "page_numbers": "4-5", "section_title": None},
+        embedding=[0.5, -1.25],
+        content_sha256="ab" * 32,
+        embedding_model="text-embedding-3-small",
+    )
+    row.update(overrides)
+    return row
+
+
+def _decode_binary_row(payload: bytes) -> list:
+    (field_count,) = struct.unpack_from("!h", payload, 0)
+    offset = 2
+    fields = []
+    for _ in range(field_count):
+        (length,) = struct.unpack_from("!i", payload, offset)
+        offset += 4
+        if length == -1:
+            fields.append(None)
+            continue
+        fields.append(payload[offset : offset + length])
+        offset += length
+    assert offset == len(payload)
+    return fields
+
+
+def test_binary_copy_row_uses_pgvector_binary_layout():
+    fields = _decode_binary_row(encode_binary_copy_row(_row()))
+
+    assert len(fields) == len(CHUNK_COPY_COLUMNS)
+    values = dict(zip(CHUNK_COPY_COLUMNS, fields))
+    assert struct.unpack("!i", values["document_id"]) == (7,)
+    assert struct.unpack("!i", values["chunk_index"]) == (2,)
+    assert values["text"].decode() == "V2 >= 1.13 VSR"
+    assert values["section_title"] is None
+    assert struct.unpack("!hhff", values["embedding"]) == (2, 0, 0.5, -1.25)
+
+
+def test_text_copy_row_escapes_control_characters():
+    row = build_chunk_row(
+        document_id=7,
+        chunk_index=0,
+        chunk_info={"text": "a\tb\nc\\d", "page_numbers": None},
+        embedding=None,
+        content_sha256=None,
+        embedding_model="text-embedding-3-small",
+    )
+    line = encode_text_copy_row(row).decode()
+
+    assert line.endswith("\n")
+    fields = line[:-1].split("\t")
+    assert fields[2] == "a\\tb\\nc\\\\d"
+    assert fields[4] == "\\N"
+    assert fields[5] == "\\N"
+    # embedding_model is cleared when there is no embedding.
+    assert fields[7] == "\\N"
+
+
+def test_write_document_chunks_does_not_commit(db_session, test_user):
+    doc = Document(
+        filename="a.pdf", title="a.pdf", status="processing", uploaded_by_id=test_user["id"]
+    )
+    db_session.add(doc)
+    db_session.commit()
+    doc_id = doc.id
+
+    mode = write_document_chunks(
+        db_session, [_row(document_id=doc_id), _row(document_id=doc_id, chunk_index=3)]
+    )
+    assert mode == "insert"
+    assert db_session.query(DocumentChunk).filter(DocumentChunk.document_id == doc_id).count() == 2
+
+    db_session.rollback()
+    assert db_session.query(DocumentChunk).filter(DocumentChunk.document_id == doc_id).count() == 0
+    assert write_document_chunks(db_session, []) == "none"
+
+
+def test_failed_persist_leaves_no_partial_chunks(monkeypatch, db_session, test_user):
+    doc = Document(
+        filename="b.pdf", title="b.pdf", status="processing", uploaded_by_id=test_user["id"]
+    )
+    db_session.add(doc)
+    db_session.commit()
+    doc_id = doc.id
+
+    def _write_then_fail(db, rows):
+        write_document_chunks(db, rows[:1])
+        raise RuntimeError("connection lost during COPY")
+
+    monkeypatch.setattr(documents_router, "SessionLocal", lambda: db_session)
+    monkeypatch.setattr(
+        documents_router,
+        "parse_and_chunk_pdf",
+        lambda pdf_path, file_size_bytes=None, doc_id=None, reservation=None: (
+            [{"text": f"chunk {i}", "page_numbers": "1", "section_title": None} for i in range(3)],
+            1,
+        ),
+    )
+    monkeypatch.setattr(documents_router, "embed_texts", lambda texts: [[1.0] for _ in texts])
+    monkeypatch.setattr(documents_router, "write_document_chunks", _write_then_fail)
+
+    documents_router._process_document_upload(doc_id, "/tmp/missing.pdf")
+
+    stored = db_session.query(Document).filter(Document.id == doc_id).one()
+    assert stored.status == "error"
+    assert "connection lost" in stored.error_message
+    assert db_session.query(DocumentChunk).filter(DocumentChunk.document_id == doc_id).count() == 0
@@ -0,0 +1,135 @@
+"""Tests for the opt-in LLM completion cache used by AI analysis."""
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.completion_cache import completion_fingerprint
+from app.models import AnalysisJob, DataPoint, FlightTest, LlmCompletionCache, TestParameter
+from app.routers import documents as documents_router
+
+_MESSAGES = [
+    {"role": "system", "content": "You are a flight test analyst."},
+    {"role": "user", "content": "Summarise the test."},
+]
+
+
+def _counting_client(calls, answer="Guidance [S1]."):
+    def _create(**kwargs):
+        calls.append(kwargs)
+        message = SimpleNamespace(content=answer)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=_create)))
+
+
+@pytest.fixture
+def analysis_env(db_session, test_user, monkeypatch):
+    flight_test = FlightTest(
+        test_name="Cache Test", aircraft_type="F-16", created_by_id=test_user["id"]
+    )
+    parameter = TestParameter(name="CACHE_SPEED", unit="kt")
+    db_session.add_all([flight_test, parameter])
+    db_session.commit()
+    db_session.add(
+        DataPoint(
+            flight_test_id=flight_test.id,
+            parameter_id=parameter.id,
+            timestamp=datetime(2026, 10, 19, 10, 0, 0),
+            value=120.0,
+        )
+    )
+    db_session.commit()
+
+    calls = []
+    monkeypatch.setattr(documents_router, "ANALYSIS_COMPLETION_CACHE_ENABLED", True)
+    monkeypatch.setattr(documents_router, "_require_ai_packages", lambda: None)
+    monkeypatch.setattr(documents_router, "get_openai_client", lambda: _counting_client(calls))
+    monkeypatch.setattr(documents_router.func, "stddev", lambda col: documents_router.func.avg(col))
+    monkeypatch.setattr(
+        documents_router,
+        "_retrieve_hybrid_sources",
+        lambda **kwargs: (
+            [
+                {
+                    "source_id": "S1",
+                    "filename": "std.pdf",
+                    "title": "Standard",
+                    "page_numbers": "1",
+                    "section_title": "General",
+                    "similarity": 0.9,
+                    "text": "excerpt",
+                }
+            ],
+            "[S1] excerpt",
+            {},
+        ),
+    )
+    return SimpleNamespace(flight_test_id=flight_test.id, calls=calls)
+
+
+def _analyse(client, auth_headers, flight_test_id, reuse):
+    return client.post(
+        f"/api/documents/flight-tests/{flight_test_id}/ai-analysis",
+        headers=auth_headers,
+        json={
+            "analysis_mode": "general",
+            "user_prompt": "Summarise the test",
+            "reuse_cached_completion": reuse,
+        },
+    )
+
+
+def test_fingerprint_is_stable_and_covers_every_request_field():
+    base = completion_fingerprint(
+        model="gpt-4o-mini", temperature=0.2, max_tokens=2600, messages=_MESSAGES
+    )
+    assert base == completion_fingerprint(
+        model="gpt-4o-mini", temperature=0.2, max_tokens=2600, messages=list(_MESSAGES)
+    )
+
+    changed_prompt = [_MESSAGES[0], {"role": "user", "content": "Summarise the tests."}]
+    variants = [
+        dict(model="gpt-4o", temperature=0.2, max_tokens=2600, messages=_MESSAGES),
+        dict(model="gpt-4o-mini", temperature=0.3, max_tokens=2600, messages=_MESSAGES),
+        dict(model="gpt-4o-mini", temperature=0.2, max_tokens=1000, messages=_MESSAGES),
+        dict(model="gpt-4o-mini", temperature=0.2, max_tokens=2600, messages=changed_prompt),
+    ]
+    assert all(completion_fingerprint(**variant) != base for variant in variants)
+
+
+def test_identical_rerun_reuses_completion_with_provenance(
+    client, auth_headers, db_session, analysis_env
+):
+    first = _analyse(client, auth_headers, analysis_env.flight_test_id, reuse=True)
+    assert first.status_code == 200
+    assert first.json()["completion_cache_hit"] is False
+    assert len(analysis_env.calls) == 1
+
+    second = _analyse(client, auth_headers, analysis_env.flight_test_id, reuse=True)
+    assert second.status_code == 200
+    payload = second.json()
+    assert len(analysis_env.calls) == 1
+    assert payload["completion_cache_hit"] is True
+    assert payload["reused_from_analysis_job_id"] == first.json()["analysis_job_id"]
+    assert payload["analysis"] == first.json()["analysis"]
+
+    entry = db_session.query(LlmCompletionCache).one()
+    assert entry.hit_count == 1
+    job = db_session.query(AnalysisJob).filter(AnalysisJob.id == payload["analysis_job_id"]).one()
+    assert job.completion_fingerprint == entry.prompt_sha256
+
+
+def test_reuse_requires_request_opt_in_and_server_setting(
+    client, auth_headers, analysis_env, monkeypatch
+):
+    _analyse(client, auth_headers, analysis_env.flight_test_id, reuse=True)
+    response = _analyse(client, auth_headers, analysis_env.flight_test_id, reuse=False)
+    assert response.json()["completion_cache_hit"] is False
+    assert len(analysis_env.calls) == 2
+
+    monkeypatch.setattr(documents_router, "ANALYSIS_COMPLETION_CACHE_ENABLED", False)
+    response = _analyse(client, auth_headers, analysis_env.flight_test_id, reuse=True)
+    assert response.json()["completion_cache_hit"] is False
+    assert len(analysis_env.calls) == 3
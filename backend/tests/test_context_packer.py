@@ -0,0 +1,127 @@
+"""Tests for token-budgeted packing of source excerpts."""
+
+from app import context_packer
+from app.context_packer import (
+    count_tokens,
+    excerpt_token_budget,
+    pack_context,
+    prompt_token_budget,
+    trim_to_relevant_sentences,
+)
+
+
+def _label(source):
+    return source.get("title") or ""
+
+
+def _source(source_id, text):
+    return {"source_id": source_id, "title": f"Doc {source_id}", "text": text}
+
+
+def test_prompt_budget_reserves_completion_tokens(monkeypatch):
+    monkeypatch.setattr(context_packer, "LLM_PROMPT_TOKEN_BUDGET", 12000)
+    assert prompt_token_budget("gpt-4o-mini", 2600) == 12000
+    assert prompt_token_budget("gpt-4", 2000) == 8192 - 2000
+    assert excerpt_token_budget("gpt-4o-mini", 2600, 11900) == (
+        context_packer.CONTEXT_PACK_MIN_EXCERPT_TOKENS
+    )
+
+
+def test_trim_keeps_most_relevant_sentences_in_order():
+    text = (
+        "The aircraft was painted blue. "
+        "Rotation speed VR shall not be less than 1.05 VMCA. "
+        "Lunch was served at noon. "
+        "Takeoff distance is measured to a 35 ft screen height."
+    )
+    relevant = [
+        "Rotation speed VR shall not be less than 1.05 VMCA.",
+        "Takeoff distance is measured to a 35 ft screen height.",
+    ]
+    budget = sum(count_tokens(sentence) + 1 for sentence in relevant)
+    trimmed = trim_to_relevant_sentences(text, "takeoff rotation speed and distance", budget)
+    assert "Rotation speed VR" in trimmed
+    assert "Takeoff distance" in trimmed
+    assert "Lunch" not in trimmed
+    assert trimmed.index("Rotation") < trimmed.index("Takeoff distance")
+
+
+def test_pack_fills_by_rank_and_reports_usage():
+    long_text = " ".join(f"Sentence {i} about stall speed margins." for i in range(200))
+    sources = [
+        _source("S1", "Stall speed margin requirements for approach."),
+        _source("S2", long_text),
+        _source("S3", "Another stall speed note."),
+    ]
+
+    packed = pack_context(
+        sources,
+        question="stall speed margin",
+        budget_tokens=300,
+        label_for=_label,
+        full_text_sources=4,
+    )
+
+    stats = packed.stats
+    assert [s["source_id"] for s in packed.sources] == ["S1", "S2", "S3"]
+    assert stats["trimmed_source_ids"] == ["S2"]
+    assert stats["dropped_source_ids"] == []
+    assert count_tokens(packed.context_text) <= stats["used_tokens"] <= 300
+    assert stats["dropped_tokens"] > 0
+    assert packed.context_text.startswith("[S1] Doc S1\nStall speed margin")
+
+
+def test_pack_drops_sources_once_budget_is_spent():
+    sources = [_source("S1", "word " * 400), _source("S2", "brief stall note.")]
+
+    packed = pack_context(
+        sources, question="stall", budget_tokens=40, label_for=_label, full_text_sources=4
+    )
+
+    assert [s["source_id"] for s in packed.sources] == ["S1"]
+    assert packed.stats["trimmed_source_ids"] == ["S1"]
+    assert packed.stats["dropped_source_ids"] == ["S2"]
+    assert packed.stats["used_tokens"] <= 40
+
+
+def test_low_ranked_sources_are_capped():
+    text = " ".join(f"Flap setting {i} changes climb gradient." for i in range(60))
+    sources = [_source("S1", text), _source("S2", text)]
+
+    packed = pack_context(
+        sources,
+        question="climb gradient",
+        budget_tokens=5000,
+        label_for=_label,
+        full_text_sources=1,
+        low_rank_max_tokens=50,
+    )
+
+    assert packed.stats["trimmed_source_ids"] == ["S2"]
+    assert len(packed.sources) == 2
+
+
+def test_query_does_not_fall_back_to_unpacked_context(client, auth_headers, monkeypatch):
+    from app.routers import documents as documents_router
+
+    def _no_llm():
+        raise AssertionError("the LLM must not be called without packed context")
+
+    monkeypatch.setattr(documents_router, "_require_ai_packages", lambda: None)
+    monkeypatch.setattr(documents_router, "get_openai_client", _no_llm)
+    monkeypatch.setattr(documents_router, "excerpt_token_budget", lambda *args: 0)
+    monkeypatch.setattr(
+        documents_router,
+        "_retrieve_hybrid_sources",
+        lambda **kwargs: ([_source("S1", "V2 shall be at least 1.13 VSR. " * 50)], "[S1] ...", {}),
+    )
+
+    response = client.post(
+        "/api/documents/query", headers=auth_headers, json={"question": "What is V2?"}
+    )
+
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["sources"] == []
+    assert "prompt budget" in payload["answer"]
+    assert payload["retrieval_metadata"]["context_packing"]["dropped_source_ids"] == ["S1"]
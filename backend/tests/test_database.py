@@ -0,0 +1,63 @@
+"""
+FTIAS Backend - Database Layer and Request Concurrency Tests
+"""
+
+import inspect
+
+import pytest
+from fastapi.routing import APIRoute
+
+from app.config import Settings
+from app.database import _pool_options, get_db
+from app.routers import auth, documents, flight_tests, health, parameters, users
+from benchmarks.concurrency_benchmark import add_scaling_efficiency, summarize_level
+
+
+def _uses_get_db(dependant) -> bool:
+    return any(dep.call is get_db or _uses_get_db(dep) for dep in dependant.dependencies)
+
+
+# Async handlers that push every Session call through run_in_threadpool themselves.
+EXPLICITLY_OFFLOADED = {auth.login}
+
+
+@pytest.mark.parametrize("module", [flight_tests, parameters, auth, users, health, documents])
+def test_sync_session_handlers_run_in_threadpool(module):
+    """Handlers holding a sync Session must not run (and block) on the event loop."""
+    routes = [
+        route
+        for route in module.router.routes
+        if isinstance(route, APIRoute) and _uses_get_db(route.dependant)
+    ]
+    assert routes
+    blocking = [
+        route.path
+        for route in routes
+        if inspect.iscoroutinefunction(route.endpoint)
+        and route.endpoint not in EXPLICITLY_OFFLOADED
+    ]
+    assert blocking == []
+
+
+def test_database_settings_resolve_pool_sizes():
+    configured = Settings(
+        DATABASE_URL="postgresql://u:p@db:5432/ftias", DB_POOL_SIZE=8, DB_MAX_OVERFLOW=4
+    )
+    assert configured.request_threadpool_size == 12
+    assert Settings(REQUEST_THREADPOOL_SIZE=50).request_threadpool_size == 50
+
+    assert _pool_options("sqlite:///:memory:", pool_size=5, max_overflow=5) == {}
+    options = _pool_options("postgresql://u@h/d", pool_size=0, max_overflow=-1)
+    assert options["pool_size"] == 1 and options["max_overflow"] == 0
+
+
+def test_concurrency_benchmark_scaling_efficiency():
+    levels = [
+        summarize_level(1, [10.0] * 100, 0, 1.0),
+        summarize_level(4, [10.0] * 400, 0, 1.0),
+        summarize_level(8, [80.0] * 100, 2, 1.0),
+    ]
+    add_scaling_efficiency(levels)
+    assert [level["scaling_efficiency"] for level in levels] == [1.0, 1.0, 0.125]
+    assert levels[2]["errors"] == 2
+    assert levels[0]["latency_ms"]["p50"] == 10.0
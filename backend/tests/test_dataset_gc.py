@@ -0,0 +1,217 @@
+"""Tests for dataset-version storage removal and background dataset GC jobs."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.exc import DBAPIError
+
+from app import dataset_gc, dataset_partitions
+from app.dataset_gc import select_gc_candidates
+from app.dataset_partitions import (
+    PartitionBusy,
+    ensure_dataset_partition,
+    remove_dataset_version_data,
+)
+from app.models import (
+    AnalysisJob,
+    DataPoint,
+    DatasetGcJob,
+    DatasetVersion,
+    FlightTest,
+    IngestionSession,
+    TestParameter,
+)
+
+
+def _seed_versions(db_session, owner_id, statuses, points_per_version=3):
+    flight_test = FlightTest(test_name="GC", aircraft_type="F-16", created_by_id=owner_id)
+    parameter = TestParameter(name=f"GC_PARAM_{len(statuses)}", unit="kt")
+    db_session.add_all([flight_test, parameter])
+    db_session.flush()
+    versions = []
+    for number, version_status in enumerate(statuses, start=1):
+        version = DatasetVersion(
+            flight_test_id=flight_test.id,
+            version_number=number,
+            label=f"v{number}",
+            status=version_status,
+            data_points_count=points_per_version,
+            created_by_id=owner_id,
+        )
+        db_session.add(version)
+        db_session.flush()
+        db_session.add_all(
+            DataPoint(
+                flight_test_id=flight_test.id,
+                dataset_version_id=version.id,
+                parameter_id=parameter.id,
+                timestamp=datetime(2026, 10, 19, 8, 0, index),
+                value=float(index),
+            )
+            for index in range(points_per_version)
+        )
+        versions.append(version)
+    db_session.commit()
+    return flight_test, versions
+
+
+def test_partition_helpers_fall_back_to_batched_deletes_on_sqlite(db_session, test_user):
+    _, versions = _seed_versions(db_session, test_user["id"], ["failed", "success"])
+
+    assert ensure_dataset_partition(db_session, versions[0].id) is False
+    assert remove_dataset_version_data(db_session, versions[0].id) == 3
+
+    remaining = {row.dataset_version_id for row in db_session.query(DataPoint.dataset_version_id)}
+    assert remaining == {versions[1].id}
+
+
+class _LockTimeout(Exception):
+    pgcode = "55P03"
+
+
+class _DetachSession:
+    """Records statements; DETACH fails with lock_timeout ``busy_attempts`` times."""
+
+    def __init__(self, busy_attempts):
+        self.busy_attempts = busy_attempts
+        self.statements = []
+        self.commits = self.rollbacks = 0
+
+    def execute(self, statement, params=None):
+        sql = str(statement)
+        self.statements.append(sql)
+        if "DETACH PARTITION" in sql and self.busy_attempts:
+            self.busy_attempts -= 1
+            raise DBAPIError(sql, params, _LockTimeout())
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def test_partition_detach_retries_lock_timeouts_then_reports_busy(monkeypatch):
+    monkeypatch.setattr(dataset_partitions, "PARTITION_DETACH_RETRY_DELAY_S", 0)
+    monkeypatch.setattr(dataset_partitions, "PARTITION_DETACH_ATTEMPTS", 3)
+
+    session = _DetachSession(busy_attempts=2)
+    dataset_partitions._detach_and_drop(session, "data_points_v7")
+    assert session.commits == 1 and session.rollbacks == 2
+    assert session.statements[0].startswith("SET LOCAL lock_timeout")
+    assert session.statements[-1] == "DROP TABLE data_points_v7"
+
+    session = _DetachSession(busy_attempts=3)
+    with pytest.raises(PartitionBusy):
+        dataset_partitions._detach_and_drop(session, "data_points_v7")
+    assert session.commits == 0
+    assert not any(sql.startswith("DROP") for sql in session.statements)
+
+
+def test_gc_candidates_cover_failed_stale_and_superseded_versions(
+    db_session, test_user, monkeypatch
+):
+    statuses = ["success", "success", "failed", "processing", "success", "success"]
+    flight_test, versions = _seed_versions(db_session, test_user["id"], statuses)
+    flight_test.active_dataset_version_id = versions[5].id
+    db_session.commit()
+    monkeypatch.setattr(dataset_gc, "DATASET_GC_KEEP_SUPERSEDED_VERSIONS", 1)
+
+    now = datetime.now(timezone.utc)
+    failed_only = select_gc_candidates(db_session, owner_id=test_user["id"], now=now)
+    assert [v.id for v in failed_only] == [versions[2].id]
+
+    later = now + timedelta(seconds=dataset_gc.DATASET_GC_STALE_AFTER_S + 60)
+    with_superseded = select_gc_candidates(
+        db_session, owner_id=test_user["id"], include_superseded=True, now=later
+    )
+    # v5 is the one retained superseded version; v6 is active.
+    assert {v.id for v in with_superseded} == {
+        versions[0].id,
+        versions[1].id,
+        versions[2].id,
+        versions[3].id,
+    }
+    assert select_gc_candidates(db_session, owner_id=test_user["id"] + 1, now=later) == []
+
+
+def test_gc_job_reclaims_versions_reports_progress_and_skips_referenced(
+    client, auth_headers, db_session, test_user, monkeypatch
+):
+    flight_test, versions = _seed_versions(db_session, test_user["id"], ["failed", "failed"])
+    session = IngestionSession(
+        flight_test_id=flight_test.id,
+        dataset_version_id=versions[0].id,
+        filename="bad.csv",
+        file_type="csv",
+        status="failed",
+        uploaded_by_id=test_user["id"],
+    )
+    db_session.add(session)
+    db_session.add(
+        AnalysisJob(
+            flight_test_id=flight_test.id,
+            dataset_version_id=versions[1].id,
+            created_by_id=test_user["id"],
+            status="completed",
+            model_name="gpt-4o-mini",
+            prompt_text="Prompt",
+            output_sha256="a" * 64,
+            analysis_text="Analysis",
+        )
+    )
+    db_session.commit()
+    reclaimed_id, referenced_id, session_id = versions[0].id, versions[1].id, session.id
+    monkeypatch.setattr(dataset_gc, "SessionLocal", lambda: db_session)
+
+    response = client.post(
+        "/api/flight-tests/dataset-gc-jobs",
+        headers=auth_headers,
+        json={"flight_test_id": flight_test.id},
+    )
+
+    assert response.status_code == 202, response.text
+    job_id = response.json()["id"]
+    progress = client.get(f"/api/flight-tests/dataset-gc-jobs/{job_id}", headers=auth_headers)
+    assert progress.status_code == 200
+    payload = progress.json()
+    assert payload["status"] == "completed"
+    assert payload["total_versions"] == 2
+    assert payload["processed_versions"] == 2
+    assert payload["reclaimed_versions"] == 1
+    assert payload["skipped_versions"] == 1
+    assert payload["reclaimed_data_points"] == 3
+
+    assert db_session.get(DatasetVersion, reclaimed_id) is None
+    assert db_session.get(DatasetVersion, referenced_id) is not None
+    assert db_session.get(IngestionSession, session_id).dataset_version_id is None
+    assert db_session.query(DataPoint).count() == 3
+
+
+def test_gc_job_rejects_concurrent_jobs_and_foreign_flight_tests(
+    client, auth_headers, db_session, test_user
+):
+    db_session.add(DatasetGcJob(requested_by_id=test_user["id"], status="running"))
+    db_session.commit()
+
+    busy = client.post("/api/flight-tests/dataset-gc-jobs", headers=auth_headers, json={})
+    assert busy.status_code == 409
+
+    missing = client.post(
+        "/api/flight-tests/dataset-gc-jobs", headers=auth_headers, json={"flight_test_id": 999}
+    )
+    assert missing.status_code == 404
+    unknown = client.get("/api/flight-tests/dataset-gc-jobs/999", headers=auth_headers)
+    assert unknown.status_code == 404
+
+
+def test_data_points_covering_index_matches_series_read_shape():
+    index = next(
+        idx for idx in DataPoint.__table__.indexes if idx.name == "ix_data_points_version_param_ts"
+    )
+    assert [column.name for column in index.columns] == [
+        "dataset_version_id",
+        "parameter_id",
+        "timestamp",
+    ]
+    assert index.dialect_options["postgresql"]["include"] == ["value", "flight_test_id"]
@@ -0,0 +1,282 @@
+"""Tests for the warm Docling worker pool (admission, timeouts, crash recovery)."""
+
+import os
+import threading
+import time
+
+import pytest
+
+from app import docling_workers
+from app.docling_workers import (
+    DoclingParseConfig,
+    DocumentWorkerCrashed,
+    DocumentWorkerPool,
+    DocumentWorkerQueueFull,
+    DocumentWorkerTimeout,
+    merge_shard_chunks,
+    plan_page_shards,
+    split_long_text,
+)
+
+
+def _worker_pid() -> int:
+    return os.getpid()
+
+
+def _sleep_then_pid(seconds: float) -> int:
+    time.sleep(seconds)
+    return os.getpid()
+
+
+def _crash_worker() -> None:
+    os._exit(3)
+
+
+def test_parse_config_keys_converters_by_pipeline_settings():
+    base = DoclingParseConfig(use_table_structure=True, num_threads=4, max_chunk_chars=5000)
+    same_converter = DoclingParseConfig(
+        use_table_structure=True, num_threads=4, max_chunk_chars=800
+    )
+    fast = DoclingParseConfig(use_table_structure=False, num_threads=4, max_chunk_chars=5000)
+
+    assert base.converter_key == same_converter.converter_key
+    assert base.converter_key != fast.converter_key
+
+
+def test_warm_converter_is_built_once_per_config(monkeypatch):
+    built = []
+    monkeypatch.setattr(docling_workers, "_WARM_CONVERTERS", {})
+    monkeypatch.setattr(
+        docling_workers,
+        "_build_converter",
+        lambda config: built.append(config.converter_key) or object(),
+    )
+    config = DoclingParseConfig(use_table_structure=True, num_threads=2, max_chunk_chars=0)
+
+    first = docling_workers.get_warm_converter(config)
+    second = docling_workers.get_warm_converter(config)
+    docling_workers.get_warm_converter(
+        DoclingParseConfig(use_table_structure=False, num_threads=2, max_chunk_chars=0)
+    )
+
+    assert first is second
+    assert built == [(True, 2), (False, 2)]
+
+
+def test_split_long_text_respects_limit():
+    text = "\n\n".join(["a" * 40, "b" * 40, "c" * 120])
+    pieces = split_long_text(text, 100)
+    assert all(len(piece) <= 100 for piece in pieces)
+    assert "".join(pieces).replace("\n", "") == text.replace("\n", "")
+
+
+def test_inline_pool_rejects_when_queue_is_full():
+    pool = DocumentWorkerPool(processes=0, queue_size=0, timeout_s=5)
+    started = threading.Event()
+    release = threading.Event()
+
+    def _blocking():
+        started.set()
+        release.wait(5)
+        return "done"
+
+    results = []
+    worker = threading.Thread(target=lambda: results.append(pool.run(_blocking)))
+    worker.start()
+    assert started.wait(5)
+    assert not pool.has_capacity()
+
+    with pytest.raises(DocumentWorkerQueueFull):
+        pool.run(lambda: "never")
+
+    release.set()
+    worker.join(5)
+    assert results == ["done"]
+    assert pool.has_capacity()
+    assert pool.stats()["in_flight"] == 0
+
+
+def test_reservation_holds_the_slot_until_its_parse_finishes():
+    pool = DocumentWorkerPool(processes=0, queue_size=0, timeout_s=5)
+    reservation = pool.reserve()
+
+    # A second upload is rejected at admission, not later in the background.
+    with pytest.raises(DocumentWorkerQueueFull):
+        pool.reserve()
+
+    assert pool.run(lambda: "parsed", reservation=reservation) == "parsed"
+    reservation.release()
+    assert pool.stats()["in_flight"] == 0
+    pool.reserve().release()
+    assert pool.has_capacity()
+
+
+def test_process_pool_reuses_worker_between_documents():
+    pool = DocumentWorkerPool(processes=1, queue_size=1, timeout_s=30)
+    try:
+        first = pool.run(_worker_pid)
+        second = pool.run(_worker_pid)
+        assert first == second
+        assert first != os.getpid()
+    finally:
+        pool.shutdown()
+
+
+def test_process_pool_timeout_recycles_worker():
+    pool = DocumentWorkerPool(processes=1, queue_size=1, timeout_s=30)
+    try:
+        stuck_pid = pool.run(_worker_pid)
+        with pytest.raises(DocumentWorkerTimeout):
+            pool.run(_sleep_then_pid, 30, timeout_s=0.5)
+
+        assert pool.stats()["restarts"] == 1
+        assert pool.run(_worker_pid) != stuck_pid
+    finally:
+        pool.shutdown()
+
+
+def test_process_pool_timeout_starts_when_the_parse_starts():
+    pool = DocumentWorkerPool(processes=1, queue_size=1, timeout_s=30)
+    try:
+        pool.prewarm()
+        results = []
+        busy = threading.Thread(target=lambda: results.append(pool.run(_sleep_then_pid, 1.0)))
+        busy.start()
+        time.sleep(0.2)
+        # Queued behind a 1 s parse, but runs well within its own 0.5 s budget.
+        assert pool.run(_worker_pid, timeout_s=0.5) == _wait_for(results, busy)
+        assert pool.stats()["restarts"] == 0
+    finally:
+        pool.shutdown()
+
+
+def test_process_pool_timeout_only_replaces_its_own_worker():
+    pool = DocumentWorkerPool(processes=2, queue_size=0, timeout_s=30)
+    try:
+        pool.prewarm()
+        results = []
+        healthy = threading.Thread(target=lambda: results.append(pool.run(_sleep_then_pid, 1.5)))
+        healthy.start()
+        time.sleep(0.2)
+        with pytest.raises(DocumentWorkerTimeout):
+            pool.run(_sleep_then_pid, 30, timeout_s=0.3)
+
+        healthy.join(10)
+        assert len(results) == 1 and results[0] != os.getpid()
+        assert pool.stats()["restarts"] == 1
+    finally:
+        pool.shutdown()
+
+
+def _wait_for(results, thread):
+    thread.join(10)
+    assert len(results) == 1
+    return results[0]
+
+
+def test_process_pool_recovers_after_worker_crash():
+    pool = DocumentWorkerPool(processes=1, queue_size=1, timeout_s=30, crash_retries=1)
+    try:
+        with pytest.raises(DocumentWorkerCrashed):
+            pool.run(_crash_worker)
+
+        # Initial attempt plus one retry, each on a fresh pool.
+        assert pool.stats()["restarts"] == 2
+        assert pool.run(_worker_pid) != os.getpid()
+    finally:
+        pool.shutdown()
+
+
+def test_plan_page_shards_covers_every_page_evenly():
+    shards = plan_page_shards(530, 40)
+
+    assert shards[0][0] == 1
+    assert shards[-1][1] == 530
+    assert all(prev[1] + 1 == nxt[0] for prev, nxt in zip(shards, shards[1:]))
+    sizes = [end - start + 1 for start, end in shards]
+    assert max(sizes) - min(sizes) <= 1
+    assert plan_page_shards(0, 40) == []
+    assert plan_page_shards(10, 40) == [(1, 10)]
+
+
+def test_merge_shard_chunks_carries_section_title_across_boundary():
+    merged = merge_shard_chunks(
+        [
+            [
+                {"text": "a", "page_numbers": "1", "section_title": "4 Performance"},
+                {"text": "b", "page_numbers": "2", "section_title": "4 Performance > 4.2 Takeoff"},
+            ],
+            [
+                {"text": "c", "page_numbers": "3", "section_title": None},
+                {"text": "d", "page_numbers": "3-4", "section_title": "5 Landing"},
+                {"text": "e", "page_numbers": "4", "section_title": None},
+            ],
+        ]
+    )
+
+    assert [chunk["text"] for chunk in merged] == ["a", "b", "c", "d", "e"]
+    assert merged[2]["section_title"] == "4 Performance > 4.2 Takeoff"
+    # Only leading chunks of a shard inherit; later untitled chunks are left alone.
+    assert merged[4]["section_title"] is None
+
+
+class _InlineParallelPool:
+    processes = 4
+
+    def __init__(self):
+        self.calls = []
+
+    def run(self, fn, *args, reservation=None):
+        self.calls.append(("run", fn.__name__, None))
+        return fn(*args)
+
+    def run_many(self, fn, arg_list, reservation=None):
+        self.calls.extend(("run_many", fn.__name__, args[2]) for args in arg_list)
+        return [fn(*args) for args in arg_list]
+
+
+def test_parse_and_chunk_pdf_shards_large_pdfs_with_table_structure(monkeypatch):
+    from app.routers import documents as documents_router
+
+    pool = _InlineParallelPool()
+    configs = []
+
+    def _fake_parse_range(pdf_path, config, page_range):
+        configs.append(config)
+        start, end = page_range
+        return [{"text": f"p{start}", "page_numbers": f"{start}-{end}", "section_title": None}]
+
+    monkeypatch.setenv("DOCLING_SHARDED_MODE", "true")
+    monkeypatch.setattr(documents_router, "_document_worker_pool", lambda: pool)
+    monkeypatch.setattr(documents_router, "count_pdf_pages", lambda path: 240)
+    monkeypatch.setattr(documents_router, "parse_pdf_page_range", _fake_parse_range)
+
+    chunks, total_pages = documents_router.parse_and_chunk_pdf(
+        "/tmp/large.pdf", file_size_bytes=80 * 1024 * 1024, doc_id=7
+    )
+
+    assert total_pages == 240
+    assert [call[0] for call in pool.calls] == ["run_many"] * len(chunks)
+    assert chunks[0]["page_numbers"].startswith("1-")
+    assert chunks[-1]["page_numbers"].endswith("-240")
+    # 80 MB would normally trigger auto fast mode; sharding keeps tables.
+    assert all(config.use_table_structure for config in configs)
+
+
+def test_parse_and_chunk_pdf_small_pdf_uses_single_parse(monkeypatch):
+    from app.routers import documents as documents_router
+
+    pool = _InlineParallelPool()
+    monkeypatch.setattr(documents_router, "_document_worker_pool", lambda: pool)
+    monkeypatch.setattr(documents_router, "count_pdf_pages", lambda path: 12)
+    monkeypatch.setattr(
+        documents_router,
+        "parse_pdf_with_warm_converter",
+        lambda path, config: ([{"text": "x", "page_numbers": "1", "section_title": None}], 12),
+    )
+
+    chunks, total_pages = documents_router.parse_and_chunk_pdf("/tmp/small.pdf", doc_id=8)
+
+    assert total_pages == 12
+    assert len(chunks) == 1
+    assert pool.calls == [("run", "<lambda>", None)]
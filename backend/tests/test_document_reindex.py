@@ -0,0 +1,228 @@
+"""Tests for content-hash chunk identity, embedding reuse and document replace."""
+
+from app.chunk_dedup import (
+    chunk_content_sha256,
+    diff_chunk_sets,
+    find_reusable_embeddings,
+    normalize_chunk_text,
+)
+from app.models import Document, DocumentChunk
+from app.routers import documents as documents_router
+
+
+def _create_document(db_session, owner_id: int, filename: str = "cs25.pdf") -> Document:
+    doc = Document(
+        filename=filename,
+        title=filename,
+        status="processing",
+        uploaded_by_id=owner_id,
+    )
+    db_session.add(doc)
+    db_session.commit()
+    db_session.refresh(doc)
+    return doc
+
+
+def _chunk(text: str, page: str = "1", section: str = "1 General") -> dict:
+    return {"text": text, "page_numbers": page, "section_title": section}
+
+
+def _run_ingest(monkeypatch, db_session, doc_id: int, chunks: list, *, replace: bool = False):
+    embedded_batches = []
+
+    def _fake_embed_texts(texts):
+        embedded_batches.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    monkeypatch.setattr(documents_router, "SessionLocal", lambda: db_session)
+    monkeypatch.setattr(
+        documents_router,
+        "parse_and_chunk_pdf",
+        lambda pdf_path, file_size_bytes=None, doc_id=None, reservation=None: (list(chunks), 3),
+    )
+    monkeypatch.setattr(documents_router, "embed_texts", _fake_embed_texts)
+    documents_router._process_document_upload(doc_id, "/tmp/does-not-exist.pdf", replace)
+    return [text for batch in embedded_batches for text in batch]
+
+
+def test_chunk_hash_ignores_whitespace_layout_differences():
+    assert normalize_chunk_text("  V1   shall\n\nbe  ") == "V1 shall be"
+    assert chunk_content_sha256("V1 shall\nbe") == chunk_content_sha256("V1  shall be ")
+    assert chunk_content_sha256("V1 shall be") != chunk_content_sha256("V2 shall be")
+
+
+def test_diff_chunk_sets_pairs_duplicates_one_to_one():
+    existing = [(10, "a"), (11, "b"), (12, "b"), (13, "c")]
+    diff = diff_chunk_sets(existing, ["b", "a", "d", "b", "b"])
+
+    assert diff.kept == [(11, 0), (10, 1), (12, 3)]
+    assert diff.inserted == [2, 4]
+    assert diff.deleted == [13]
+    assert diff.as_dict() == {"kept": 3, "inserted": 2, "deleted": 1}
+
+
+def test_find_reusable_embeddings_filters_by_model(db_session, test_user):
+    doc = _create_document(db_session, test_user["id"])
+    db_session.add_all(
+        [
+            DocumentChunk(
+                document_id=doc.id,
+                chunk_index=0,
+                text="alpha",
+                content_sha256=chunk_content_sha256("alpha"),
+                embedding=[1.0],
+                embedding_model="text-embedding-3-small",
+            ),
+            DocumentChunk(
+                document_id=doc.id,
+                chunk_index=1,
+                text="beta",
+                content_sha256=chunk_content_sha256("beta"),
+                embedding=[2.0],
+                embedding_model="text-embedding-3-large",
+            ),
+        ]
+    )
+    db_session.commit()
+
+    found = find_reusable_embeddings(
+        db_session,
+        content_hashes=[chunk_content_sha256("alpha"), chunk_content_sha256("beta")],
+        embedding_model="text-embedding-3-small",
+    )
+
+    assert list(found) == [chunk_content_sha256("alpha")]
+    assert list(found[chunk_content_sha256("alpha")]) == [1.0]
+
+
+def test_ingest_reuses_embeddings_for_known_text(monkeypatch, db_session, test_user):
+    first = _create_document(db_session, test_user["id"], "rev-a.pdf")
+    embedded = _run_ingest(
+        monkeypatch, db_session, first.id, [_chunk("Takeoff speeds"), _chunk("Landing distance")]
+    )
+    assert sorted(embedded) == ["Landing distance", "Takeoff speeds"]
+
+    second_id = _create_document(db_session, test_user["id"], "copy.pdf").id
+    embedded = _run_ingest(
+        monkeypatch,
+        db_session,
+        second_id,
+        [_chunk("Takeoff  speeds"), _chunk("Climb gradient"), _chunk("Climb gradient")],
+    )
+
+    # Known text is reused; a repeated new chunk is embedded only once.
+    assert embedded == ["Climb gradient"]
+    chunks = (
+        db_session.query(DocumentChunk)
+        .filter(DocumentChunk.document_id == second_id)
+        .order_by(DocumentChunk.chunk_index)
+        .all()
+    )
+    assert [list(c.embedding) for c in chunks] == [[14.0], [14.0], [14.0]]
+    assert all(c.embedding_model == documents_router.EMBEDDING_MODEL for c in chunks)
+    stored = db_session.query(Document).filter(Document.id == second_id).one()
+    assert stored.status == "ready"
+    assert stored.total_chunks == 3
+
+
+def test_ingest_holds_no_transaction_while_parsing(monkeypatch, db_session, test_user):
+    doc = _create_document(db_session, test_user["id"])
+    doc.file_size_bytes = 4096
+    db_session.commit()
+    doc_id = doc.id
+    parse_calls = []
+
+    def _fake_parse(pdf_path, file_size_bytes=None, doc_id=None, reservation=None):
+        parse_calls.append((file_size_bytes, db_session.in_transaction()))
+        return [_chunk("alpha")], 1
+
+    monkeypatch.setattr(documents_router, "SessionLocal", lambda: db_session)
+    monkeypatch.setattr(documents_router, "parse_and_chunk_pdf", _fake_parse)
+    monkeypatch.setattr(documents_router, "embed_texts", lambda texts: [[1.0] for _ in texts])
+    documents_router._process_document_upload(doc_id, "/tmp/does-not-exist.pdf")
+
+    assert parse_calls == [(4096, False)]
+    assert db_session.get(Document, doc_id).status == "ready"
+
+
+def test_replace_only_writes_changed_chunks(monkeypatch, db_session, test_user):
+    doc_id = _create_document(db_session, test_user["id"]).id
+    _run_ingest(
+        monkeypatch,
+        db_session,
+        doc_id,
+        [_chunk("Scope"), _chunk("Old limits", page="2"), _chunk("Definitions", page="3")],
+    )
+    original = {
+        c.text: c.id
+        for c in db_session.query(DocumentChunk).filter(DocumentChunk.document_id == doc_id)
+    }
+
+    embedded = _run_ingest(
+        monkeypatch,
+        db_session,
+        doc_id,
+        [_chunk("Scope"), _chunk("Definitions", page="2"), _chunk("New limits", page="3")],
+        replace=True,
+    )
+
+    assert embedded == ["New limits"]
+    db_session.expire_all()
+    chunks = (
+        db_session.query(DocumentChunk)
+        .filter(DocumentChunk.document_id == doc_id)
+        .order_by(DocumentChunk.chunk_index)
+        .all()
+    )
+    assert [c.text for c in chunks] == ["Scope", "Definitions", "New limits"]
+    # Unchanged chunks keep their rows; their order/page metadata is refreshed.
+    assert chunks[0].id == original["Scope"]
+    assert chunks[1].id == original["Definitions"]
+    assert chunks[1].page_numbers == "2"
+    assert "Old limits" not in {c.text for c in chunks}
+
+
+def test_replace_re_embeds_kept_chunks_without_embedding(monkeypatch, db_session, test_user):
+    doc_id = _create_document(db_session, test_user["id"]).id
+    _run_ingest(monkeypatch, db_session, doc_id, [_chunk("Scope"), _chunk("Limits", page="2")])
+    # Simulate an earlier embedding failure for one chunk.
+    db_session.query(DocumentChunk).filter(DocumentChunk.text == "Limits").update(
+        {"embedding": None}, synchronize_session=False
+    )
+    db_session.commit()
+
+    embedded = _run_ingest(
+        monkeypatch,
+        db_session,
+        doc_id,
+        [_chunk("Scope"), _chunk("Limits", page="2")],
+        replace=True,
+    )
+
+    assert embedded == ["Limits"]
+    db_session.expire_all()
+    chunks = db_session.query(DocumentChunk).filter(DocumentChunk.document_id == doc_id).all()
+    assert all(c.embedding is not None for c in chunks)
+
+
+def test_replace_document_rejects_other_users_document(client, db_session, auth_headers):
+    from app.models import User
+
+    other = User(
+        email="rev-owner@test.com",
+        username="revowner",
+        full_name="revowner",
+        hashed_password="x",
+        is_active=True,
+    )
+    db_session.add(other)
+    db_session.commit()
+    doc = _create_document(db_session, other.id)
+
+    response = client.post(
+        f"/api/documents/{doc.id}/replace",
+        headers=auth_headers,
+        files={"file": ("rev-b.pdf", b"%PDF-1.4", "application/pdf")},
+    )
+
+    assert response.status_code == 404
@@ -0,0 +1,52 @@
+"""Cold-import budget for the API entry point."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from app import optional_deps
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+# Generous for slow CI runners; a regression to eager docling/torch imports
+# costs several seconds on its own.
+IMPORT_BUDGET_S = float(os.getenv("FTIAS_IMPORT_BUDGET_S", "6"))
+DEFERRED_MODULES = ("openai", "docling", "reportlab", "sentence_transformers", "torch", "openpyxl")
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({"elapsed_s": elapsed, "loaded": sorted(sys.modules)}))
+"""
+
+
+def test_cold_import_of_app_main_stays_within_budget():
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+        check=True,
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+
+    eagerly_loaded = [name for name in report["loaded"] if name.split(".")[0] in DEFERRED_MODULES]
+    assert eagerly_loaded == []
+    assert report["elapsed_s"] < IMPORT_BUDGET_S
+
+
+def test_optional_dependency_checks_do_not_import(monkeypatch):
+    optional_deps.is_installed.cache_clear()
+    monkeypatch.delitem(sys.modules, "json.tool", raising=False)
+    assert optional_deps.is_installed("json.tool")
+    assert "json.tool" not in sys.modules
+    assert optional_deps.missing_packages(["json", "ftias-no-such-package"]) == [
+        "ftias-no-such-package"
+    ]
+    optional_deps.is_installed.cache_clear()
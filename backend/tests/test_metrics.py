@@ -0,0 +1,137 @@
+"""Tests for request/pipeline metrics and the /api/metrics endpoint."""
+
+import json
+import os
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app import metrics
+from app.metrics import MetricsRegistry, RequestStats
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    hits = registry.counter("demo_hits_total", "Hits.", ("cache",))
+    latency = registry.histogram("demo_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    hits.inc(cache='a"b')
+    hits.inc(2, cache='a"b')
+    latency.observe(0.05, route="/x")
+    latency.observe(0.5, route="/x")
+    latency.observe(5, route="/x")
+
+    rendered = registry.render().splitlines()
+    assert "# TYPE demo_hits_total counter" in rendered
+    assert 'demo_hits_total{cache="a\\"b"} 3' in rendered
+    assert 'demo_seconds_bucket{route="/x",le="0.1"} 1' in rendered
+    assert 'demo_seconds_bucket{route="/x",le="1"} 2' in rendered
+    assert 'demo_seconds_bucket{route="/x",le="+Inf"} 3' in rendered
+    assert 'demo_seconds_count{route="/x"} 3' in rendered
+    assert 'demo_seconds_sum{route="/x"} 5.55' in rendered
+
+
+def test_requests_get_route_metrics_and_server_timing(client, auth_headers, admin_headers):
+    route = "/api/flight-tests/{test_id}"
+    before = metrics.HTTP_REQUEST_DURATION.count(method="GET", route=route, status=404)
+
+    response = client.get("/api/flight-tests/999999", headers=auth_headers)
+
+    assert response.status_code == 404
+    assert response.headers["server-timing"].startswith("app;dur=")
+    assert 'queries"' in response.headers["server-timing"]
+    assert metrics.HTTP_REQUEST_DURATION.count(method="GET", route=route, status=404) == before + 1
+
+    scraped = client.get("/api/metrics", headers=admin_headers)
+    assert scraped.status_code == 200
+    assert scraped.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert f'route="{route}",status="404"' in scraped.text
+    assert "ftias_http_requests_in_flight" in scraped.text
+
+
+def test_metrics_scrape_token_is_enforced(client, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_SCRAPE_TOKEN", "s3cret")
+    assert client.get("/api/metrics").status_code == 401
+    assert client.get("/api/metrics", headers={"Authorization": "Bearer nope"}).status_code == 401
+    authorized = client.get("/api/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert authorized.status_code == 200
+
+
+def test_metrics_require_a_superuser_without_scrape_token(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_SCRAPE_TOKEN", "")
+    assert client.get("/api/metrics").status_code == 401
+    assert client.get("/api/metrics", headers=auth_headers).status_code == 403
+
+
+def test_metrics_sum_worker_snapshots(monkeypatch, tmp_path):
+    registry = MetricsRegistry()
+    hits = registry.counter("demo_hits_total", "Hits.", ("cache",))
+    busy = registry.gauge("demo_in_flight", "In flight.")
+    latency = registry.histogram("demo_seconds", "Latency.", buckets=(1.0,))
+    hits.inc(2, cache="a")
+    busy.inc(3)
+    latency.observe(0.5)
+    # Snapshots of a live worker (pid 1) and of one that has exited.
+    other = registry.empty_copy()
+    other.merge(registry.snapshot())
+    (tmp_path / "metrics-1.json").write_text(json.dumps(other.snapshot()))
+    (tmp_path / "metrics-999999999.json").write_text(json.dumps(other.snapshot()))
+    monkeypatch.setattr(metrics, "REGISTRY", registry)
+    monkeypatch.setattr(metrics, "METRICS_MULTIPROC_DIR", str(tmp_path))
+
+    rendered = metrics.render_metrics().splitlines()
+
+    assert (tmp_path / f"metrics-{os.getpid()}.json").exists()
+    assert 'demo_hits_total{cache="a"} 6' in rendered
+    # Gauges only count live workers: this process and pid 1.
+    assert "demo_in_flight 6" in rendered
+    assert 'demo_seconds_bucket{le="1"} 3' in rendered
+
+
+def test_engine_metrics_count_statements_and_checkout_wait():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    metrics.install_engine_metrics(engine, pool_name="test-engine")
+    stats = RequestStats()
+    token = metrics._request_stats.set(stats)
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+    finally:
+        metrics._request_stats.reset(token)
+        engine.dispose()
+    assert stats.db_statements == 2
+    assert stats.db_seconds >= 0
+    assert metrics.DB_POOL_CHECKOUT_WAIT.count(pool="test-engine") == 1
+    assert metrics.server_timing_header(0.0125, stats).endswith('desc="2 queries"')
+
+
+def test_openai_client_instrumentation_records_latency_and_tokens():
+    usage = SimpleNamespace(prompt_tokens=120, completion_tokens=30)
+    client = SimpleNamespace(
+        chat=SimpleNamespace(
+            completions=SimpleNamespace(
+                create=lambda **kwargs: (
+                    iter([SimpleNamespace(usage=None), SimpleNamespace(usage=usage)])
+                    if kwargs.get("stream")
+                    else SimpleNamespace(usage=usage)
+                )
+            )
+        ),
+        embeddings=SimpleNamespace(create=lambda **kwargs: SimpleNamespace(data=[])),
+    )
+    model = "metrics-test-model"
+    metrics.instrument_openai_client(client)
+
+    client.chat.completions.create(model=model, messages=[])
+    assert list(client.chat.completions.create(model=model, messages=[], stream=True))
+    client.embeddings.create(model=model, input=["a", "b", "c"])
+
+    assert metrics.LLM_REQUEST_DURATION.count(model=model, stream="false", outcome="ok") == 1
+    assert metrics.LLM_REQUEST_DURATION.count(model=model, stream="true", outcome="ok") == 1
+    assert metrics.LLM_TOKENS.value(model=model, kind="prompt") == 240
+    assert metrics.LLM_TOKENS.value(model=model, kind="completion") == 60
+    assert metrics.EMBEDDING_INPUTS.value(model=model) == 3
+    assert metrics.EMBEDDING_BATCH_DURATION.count(model=model) == 1
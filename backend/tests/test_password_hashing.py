@@ -0,0 +1,105 @@
+"""Tests for off-loop password hashing and login rehash/backpressure."""
+
+import threading
+
+from passlib.context import CryptContext
+
+from app import password_hashing
+from app.models import User
+from app.password_hashing import PasswordHasher, PasswordHashingBusy
+from benchmarks.login_storm_benchmark import summarize_probe, summarize_storm
+
+
+def test_hasher_bounds_pending_operations():
+    hasher = PasswordHasher(workers=1, max_pending=1)
+    gate = threading.Event()
+    blocked = hasher._submit(gate.wait)
+    try:
+        try:
+            hasher.hash("secret")
+        except PasswordHashingBusy:
+            pass
+        else:
+            raise AssertionError("expected PasswordHashingBusy")
+    finally:
+        gate.set()
+        blocked.result(timeout=5)
+    assert hasher.pending() == 0
+    assert hasher.verify("secret", hasher.hash("secret"))
+    hasher.shutdown()
+
+
+def test_login_rehashes_password_below_configured_rounds(client, db_session, test_user):
+    weak = CryptContext(schemes=["pbkdf2_sha256"], pbkdf2_sha256__default_rounds=1000)
+    user = db_session.get(User, test_user["id"])
+    user.hashed_password = weak.hash(test_user["password"])
+    db_session.commit()
+
+    credentials = {"username": test_user["username"], "password": test_user["password"]}
+    assert client.post("/api/auth/login", json=credentials).status_code == 200
+
+    db_session.refresh(user)
+    assert f"${password_hashing.PASSWORD_HASH_ROUNDS}$" in user.hashed_password
+    assert client.post("/api/auth/login", json=credentials).status_code == 200
+
+
+def test_login_returns_503_when_hashing_pool_is_saturated(client, test_user, monkeypatch):
+    busy = PasswordHasher(workers=1, max_pending=1)
+    gate = threading.Event()
+    blocked = busy._submit(gate.wait)
+    monkeypatch.setattr("app.routers.auth.password_hasher", busy)
+    try:
+        response = client.post(
+            "/api/auth/login",
+            json={"username": test_user["username"], "password": test_user["password"]},
+        )
+    finally:
+        gate.set()
+        blocked.result(timeout=5)
+        busy.shutdown()
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(password_hashing.PASSWORD_HASH_RETRY_AFTER_S)
+
+
+def test_login_storm_summary_reports_probe_inflation_and_outcomes():
+    baseline = summarize_probe([10.0] * 99 + [20.0], errors=0)
+    during = summarize_probe([15.0] * 99 + [60.0], errors=1)
+    report = summarize_storm(baseline, during, [200, 200, 503, 401, 0], elapsed_s=2.0)
+
+    assert during["errors"] == 1 and during["requests"] == 100
+    assert report["logins"] == {
+        "attempted": 5,
+        "succeeded": 2,
+        "busy_503": 1,
+        "failed": 2,
+        "throughput_rps": 1.0,
+    }
+    assert report["probe_p99_inflation"] == round(
+        during["latency_ms"]["p99"] / baseline["latency_ms"]["p99"], 2
+    )
+    assert summarize_storm(summarize_probe([], 0), during, [], 0)["probe_p99_inflation"] is None
+
+
+def test_admin_create_user_returns_503_when_hashing_pool_is_saturated(
+    client, admin_headers, monkeypatch
+):
+    busy = PasswordHasher(workers=1, max_pending=1)
+    gate = threading.Event()
+    blocked = busy._submit(gate.wait)
+    monkeypatch.setattr("app.auth.password_hasher", busy)
+    try:
+        response = client.post(
+            "/api/admin/users",
+            json={
+                "username": "busyhash",
+                "email": "busyhash@test.com",
+                "password": "longenough123",
+            },
+            headers=admin_headers,
+        )
+    finally:
+        gate.set()
+        blocked.result(timeout=5)
+        busy.shutdown()
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(password_hashing.PASSWORD_HASH_RETRY_AFTER_S)
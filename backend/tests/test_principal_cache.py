@@ -0,0 +1,66 @@
+"""Tests for the authenticated-principal cache used by polling endpoints."""
+
+from sqlalchemy import event
+
+from app import principal_cache as principal_cache_module
+from app.principal_cache import AuthenticatedPrincipal, PrincipalCache
+
+
+def _principal(user_id=1, username="pilot"):
+    return AuthenticatedPrincipal(id=user_id, username=username, is_active=True, is_superuser=False)
+
+
+def test_cache_expires_bounds_and_invalidates_per_user(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(principal_cache_module.time, "monotonic", lambda: now[0])
+    cache = PrincipalCache(ttl_seconds=30, max_entries=2)
+
+    cache.put("a", _principal(1))
+    cache.put("b", _principal(1))
+    assert cache.get(1, "a") == _principal(1)
+    cache.put("c", _principal(2))
+    assert len(cache) == 2 and cache.get(1, "b") is None  # least recently used evicted
+
+    cache.invalidate_user(1)
+    assert cache.get(1, "a") is None and cache.get(2, "c") is not None
+
+    now[0] += 31
+    assert cache.get(2, "c") is None
+    assert len(cache) == 0
+    assert PrincipalCache(ttl_seconds=0).get(1, "a") is None
+
+
+def test_polling_endpoint_skips_user_lookup_once_cached(client, auth_headers, db_session):
+    engine = db_session.get_bind()
+    user_queries = []
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        if "FROM users" in statement:
+            user_queries.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        assert client.get("/api/flight-tests/", headers=auth_headers).status_code == 200
+        first = len(user_queries)
+        for _ in range(3):
+            assert client.get("/api/flight-tests/", headers=auth_headers).status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+
+    assert first == 1
+    assert len(user_queries) == first
+
+
+def test_admin_deactivation_invalidates_cached_principal(
+    client, auth_headers, admin_headers, test_user
+):
+    assert client.get("/api/flight-tests/", headers=auth_headers).status_code == 200
+
+    response = client.patch(
+        f"/api/admin/users/{test_user['id']}", headers=admin_headers, json={"is_active": False}
+    )
+    assert response.status_code == 200
+
+    blocked = client.get("/api/flight-tests/", headers=auth_headers)
+    assert blocked.status_code == 400
+    assert blocked.json()["detail"] == "Inactive user"
@@ -0,0 +1,120 @@
+"""Tests for on-demand / slow-request sampling profiles."""
+
+import time
+
+import pytest
+
+from app import profiling
+
+
+@pytest.fixture(autouse=True)
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _busy_wait(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(200))
+
+
+def test_superuser_can_request_a_profile(client, admin_headers, profile_dir):
+    response = client.get("/api/flight-tests/", headers={**admin_headers, "X-FTIAS-Profile": "1"})
+
+    assert response.status_code == 200
+    profile_id = response.headers["x-ftias-profile-id"]
+    assert (profile_dir / f"{profile_id}.folded").exists()
+
+    listed = client.get("/api/admin/profiles", headers=admin_headers).json()
+    assert [p["id"] for p in listed] == [profile_id]
+    assert listed[0]["trigger"] == "requested"
+    assert listed[0]["label"] == "GET /api/flight-tests/"
+
+    detail = client.get(f"/api/admin/profiles/{profile_id}", headers=admin_headers)
+    assert detail.status_code == 200
+    assert "spans" in detail.json()
+    flamegraph = client.get(f"/api/admin/profiles/{profile_id}/flamegraph", headers=admin_headers)
+    assert flamegraph.status_code == 200
+    assert flamegraph.headers["content-type"].startswith("text/plain")
+
+
+def test_profile_request_is_ignored_for_regular_users(
+    client, auth_headers, profile_dir, monkeypatch
+):
+    armed = []
+    monkeypatch.setattr(profiling._sampler, "add", armed.append)
+    response = client.get("/api/flight-tests/?profile=1", headers=auth_headers)
+    anonymous = client.get("/api/flight-tests/", headers={"X-FTIAS-Profile": "1"})
+
+    assert anonymous.status_code == 401
+    assert [session.trigger for session in armed if session.trigger == "requested"] == []
+
+    assert response.status_code == 200
+    assert "x-ftias-profile-id" not in response.headers
+    assert list(profile_dir.iterdir()) == []
+    assert client.get("/api/admin/profiles", headers=auth_headers).status_code == 403
+
+
+def test_fast_requests_are_not_profiled_automatically(client, auth_headers, profile_dir):
+    assert profiling.PROFILE_SLOW_REQUEST_S > 0
+    assert client.get("/api/flight-tests/", headers=auth_headers).status_code == 200
+    assert list(profile_dir.iterdir()) == []
+
+
+def test_unknown_or_malformed_profile_ids_return_404(client, admin_headers):
+    for profile_id in ("0" * 32, "not-a-profile"):
+        detail = client.get(f"/api/admin/profiles/{profile_id}", headers=admin_headers)
+        assert detail.status_code == 404
+        flamegraph = client.get(
+            f"/api/admin/profiles/{profile_id}/flamegraph", headers=admin_headers
+        )
+        assert flamegraph.status_code == 404
+
+
+def test_slow_job_is_sampled_with_stage_spans(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_SLOW_JOB_S", 0.05)
+
+    with profiling.job_profile("analysis job 7"):
+        with profiling.profile_span("deterministic_metrics"):
+            _busy_wait(0.3)
+
+    [summary] = profiling.list_profiles()
+    assert summary["trigger"] == "slow_job"
+    assert summary["label"] == "analysis job 7"
+    assert summary["sample_count"] > 0
+
+    profile = profiling.load_profile(summary["id"])
+    assert [span["name"] for span in profile["spans"]] == ["deterministic_metrics"]
+    assert profile["spans"][0]["duration_ms"] >= 300
+    folded = profiling.load_folded_stacks(summary["id"])
+    assert "_busy_wait (test_profiling.py" in folded
+
+
+def test_fast_job_leaves_no_artifact(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_SLOW_JOB_S", 30.0)
+    with profiling.job_profile("analysis job 8"):
+        with profiling.profile_span("llm"):
+            pass
+    assert profiling.list_profiles() == []
+
+
+def test_spans_are_free_without_an_active_profile():
+    assert profiling.current_session() is None
+    with profiling.profile_span("retrieval"):
+        pass
+    profiling.record_span("llm", time.perf_counter())
+
+
+def test_artifacts_are_pruned_to_the_newest(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_MAX_ARTIFACTS", 2)
+    saved = []
+    for index in range(3):
+        session = profiling.ProfileSession(label=f"job {index}", trigger="slow_job")
+        session.sample_count = 1
+        profiling.save_artifact(session, 1.0)
+        saved.append(session.profile_id)
+        time.sleep(0.01)
+
+    assert {p["id"] for p in profiling.list_profiles()} == set(saved[1:])
+    assert profiling.load_folded_stacks(saved[0]) is None
@@ -0,0 +1,134 @@
+"""Tests for statement fingerprints, the slow-query log and sampled EXPLAIN."""
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import StaticPool
+
+from app.query_insights import (
+    QueryInsights,
+    fingerprint,
+    install_query_insights,
+    is_explainable,
+    normalize_statement,
+    query_insights,
+)
+
+
+def _sqlite_engine():
+    return create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+
+
+def test_fingerprint_ignores_literals_binds_and_in_list_length():
+    a = "SELECT id FROM data_points WHERE flight_test_id = %(id_1)s AND name IN (%s, %s)"
+    b = "SELECT  id FROM data_points\n WHERE flight_test_id = 42 AND name IN ('x', 'y', 'z')"
+
+    assert normalize_statement(a) == (
+        "SELECT id FROM data_points WHERE flight_test_id = ? AND name IN (...)"
+    )
+    assert fingerprint(a) == fingerprint(b)
+    assert fingerprint(a) != fingerprint("SELECT id FROM data_points")
+    assert normalize_statement("SELECT x::float FROM t WHERE y = :y") == (
+        "SELECT x::float FROM t WHERE y = ?"
+    )
+
+
+def test_only_read_only_selects_are_explainable():
+    assert is_explainable("SELECT * FROM t")
+    assert is_explainable(" (SELECT 1) UNION (SELECT 2)")
+    assert is_explainable("WITH x AS (SELECT 1) SELECT * FROM x")
+    assert not is_explainable("WITH x AS (DELETE FROM t RETURNING id) SELECT * FROM x")
+    assert not is_explainable("SELECT * FROM analysis_jobs WHERE id = 1 FOR UPDATE")
+    assert not is_explainable("UPDATE t SET a = 1")
+
+
+def test_engine_statements_are_aggregated_per_fingerprint():
+    engine = _sqlite_engine()
+    insights = QueryInsights(threshold_ms=0, explain_sample_rate=0)
+    install_query_insights(engine, insights)
+
+    with engine.connect() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER)"))
+        conn.execute(text("INSERT INTO t (id) VALUES (1), (2), (3)"))
+        for value in (1, 2, 3):
+            conn.execute(text("SELECT id FROM t WHERE id >= :v"), {"v": value})
+
+    [select_stats] = [
+        row for row in insights.top(order_by="calls") if row["statement"].startswith("SELECT")
+    ]
+    assert select_stats["calls"] == 3
+    assert select_stats["slow_calls"] == 3
+    assert select_stats["statement"] == "SELECT id FROM t WHERE id >= ?"
+    recent = insights.recent()
+    assert len(recent) == 5
+    assert recent[0]["fingerprint"] == select_stats["fingerprint"]
+
+    insights.reset()
+    assert insights.top() == [] and insights.recent() == []
+
+
+def test_failed_statements_do_not_leave_start_times_behind():
+    engine = _sqlite_engine()
+    insights = QueryInsights(threshold_ms=0, explain_sample_rate=0)
+    install_query_insights(engine, insights)
+
+    with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT id FROM missing_table"))
+        assert conn.info.get("ftias_query_insights_started") == []
+        conn.execute(text("SELECT 1"))
+
+    assert [row["statement"] for row in insights.top()] == ["SELECT ?"]
+
+
+def test_explain_is_sampled_for_slow_selects_only(monkeypatch):
+    insights = QueryInsights(threshold_ms=1, explain_sample_rate=1.0, explain_cooldown_s=60)
+    submitted = []
+    monkeypatch.setattr(
+        insights, "_submit_explain", lambda engine, key, sql, params: submitted.append(sql)
+    )
+    engine = object()
+
+    insights.record("SELECT * FROM t", 0.0001, 1, engine=engine)
+    insights.record("UPDATE t SET a = 1", 2.0, 1, engine=engine)
+    insights.record("SELECT * FROM t WHERE a = 1", 2.0, 10, engine=engine)
+    insights.record("SELECT * FROM t WHERE a = 2", 2.0, 10, engine=engine)
+
+    # Fast, write and (within the cooldown) repeated fingerprints get no plan.
+    assert submitted == ["SELECT * FROM t WHERE a = 1"]
+
+
+def test_explain_failure_is_recorded_not_raised():
+    engine = _sqlite_engine()
+    insights = QueryInsights(threshold_ms=1, explain_sample_rate=0)
+    insights.record("SELECT 1", 2.0, 1)
+    key = fingerprint("SELECT 1")
+
+    insights.explain_now(engine, key, "SELECT 1", None)
+
+    [stats] = insights.top()
+    assert stats["explain_plan"] is None
+    assert "not collected on sqlite" in stats["explain_error"]
+
+
+def test_admin_slow_query_endpoint(client, admin_headers, auth_headers):
+    query_insights.reset()
+    query_insights.record("SELECT * FROM data_points WHERE flight_test_id = 7", 9.0, 1200)
+
+    assert client.get("/api/admin/slow-queries", headers=auth_headers).status_code == 403
+    response = client.get("/api/admin/slow-queries?order_by=max", headers=admin_headers)
+    assert response.status_code == 200
+    payload = response.json()
+    offender = next(row for row in payload["top"] if "data_points" in row["statement"])
+    assert offender["slow_calls"] == 1
+    assert offender["rows"] == 1200
+    assert payload["recent"][0]["duration_ms"] == 9000.0
+
+    bad_order = client.get("/api/admin/slow-queries?order_by=nope", headers=admin_headers)
+    assert bad_order.status_code == 422
+    reset = client.delete("/api/admin/slow-queries", headers=admin_headers)
+    assert reset.status_code == 204
+    assert query_insights.recent() == []
@@ -0,0 +1,160 @@
+"""Tests for the offline RAG benchmark harness (stub providers, metrics, profile runs)."""
+
+import math
+
+import pytest
+
+from app.models import User
+from app.routers import documents as documents_router
+from benchmarks import rag_benchmark
+from benchmarks.corpus import CORPUS, QUESTIONS, load_corpus
+from benchmarks.stub_providers import StubOpenAIClient, canned_answer, hash_embedding
+
+
+def _cosine(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+def test_hash_embedding_is_deterministic_unit_length_and_term_sensitive():
+    vector = hash_embedding("Rotation speed VR")
+    assert vector == hash_embedding("rotation speed vr")
+    assert len(vector) == 1536
+    assert math.isclose(math.sqrt(sum(v * v for v in vector)), 1.0, rel_tol=1e-9)
+
+    related = hash_embedding("minimum rotation speed VR for takeoff")
+    unrelated = hash_embedding("pacer aircraft formation altitude calibration")
+    assert _cosine(vector, related) > _cosine(vector, unrelated)
+
+
+def test_stub_chat_cites_legend_ids_and_classifies_repair_calls():
+    client = StubOpenAIClient()
+    messages = [
+        {"role": "system", "content": "You are a senior flight-test engineer."},
+        {"role": "user", "content": "Source ID legend:\n- S1: Doc A\n- S2: Doc B\n"},
+    ]
+    answer = client.chat.completions.create(model="m", messages=messages).choices[0]
+    assert "[S1]" in answer.message.content and "[S2]" in answer.message.content
+
+    client.chat.completions.create(
+        model="m",
+        messages=[{"role": "system", "content": "You are a technical editor."}, messages[1]],
+    )
+    assert set(client.timings.drain()) == {"llm", "repair"}
+    assert client.timings.drain() == {}
+    assert "[S1]" in canned_answer([{"role": "user", "content": "no sources"}])
+
+
+def test_recall_and_summary_metrics():
+    assert rag_benchmark.recall_at_k(["a", "b", "c"], ["b", "z"], 1) == 0.0
+    assert rag_benchmark.recall_at_k(["a", "b", "c"], ["b", "z"], 3) == 0.5
+
+    runs = [
+        {
+            "latency_ms": {"end_to_end": float(value), "llm": 1.0},
+            "recall": {f"recall@{k}": 1.0 for k in rag_benchmark.RECALL_KS},
+            "peak_traced_kib": None,
+            "error": None,
+        }
+        for value in (10, 20, 30, 40)
+    ]
+    summary = rag_benchmark.summarize_runs(runs)
+    assert summary["latency_ms"]["end_to_end"]["p50"] == 25.0
+    assert summary["latency_ms"]["end_to_end"]["p95"] == pytest.approx(38.5)
+    assert summary["recall"]["recall@5"] == 1.0
+    assert summary["peak_traced_kib"] is None
+
+
+def test_apply_profile_overrides_and_restores_settings():
+    original_model = documents_router.QUERY_MODEL
+    original_limit = documents_router.QUERY_CONTEXT_LIMIT
+
+    with rag_benchmark.apply_profile(
+        {"QUERY_LLM_MODEL": "gpt-4o", "QUERY_CONTEXT_LIMIT": "9"}
+    ) as effective:
+        assert documents_router.QUERY_MODEL == "gpt-4o"
+        assert documents_router.QUERY_CONTEXT_LIMIT == 9
+        assert documents_router.RETRIEVAL_CACHE_ENABLED is False
+        assert effective["QUERY_CONTEXT_LIMIT"] == 9
+
+    assert documents_router.QUERY_MODEL == original_model
+    assert documents_router.QUERY_CONTEXT_LIMIT == original_limit
+    with pytest.raises(ValueError):
+        rag_benchmark._resolve_setting("NOT_A_SETTING")
+
+
+def test_run_profile_records_stages_and_recall(db_session, test_user, monkeypatch):
+    owner = db_session.query(User).filter(User.id == test_user["id"]).one()
+    corpus = load_corpus(db_session, owner, "stub-embedding", "t1")
+    chunks = {chunk.key: chunk for document in CORPUS for chunk in document.chunks}
+
+    def _fake_retrieval(question, **kwargs):
+        match = next(q for q in QUESTIONS if q.text in question)
+        sources = [
+            {"source_id": f"S{index}", "title": key, "text": chunks[key].text}
+            for index, key in enumerate(match.relevant_keys, start=1)
+        ]
+        debug = {"stage_timings_ms": {"embed": 1.0, "vector_sql": 2.0, "total": 4.0}}
+        return sources, "", debug
+
+    client = StubOpenAIClient()
+    monkeypatch.setattr(documents_router, "_retrieve_hybrid_sources", _fake_retrieval)
+    monkeypatch.setattr(documents_router, "get_openai_client", lambda: client)
+    monkeypatch.setattr(documents_router, "_require_ai_packages", lambda: None)
+    monkeypatch.setattr(documents_router.func, "stddev", lambda col: documents_router.func.avg(col))
+
+    report = rag_benchmark.run_profile(
+        db_session, corpus, client, {"name": "unit", "settings": {"QUERY_CONTEXT_LIMIT": 9}}
+    )
+
+    assert report["profile"] == "unit"
+    assert report["settings"]["QUERY_CONTEXT_LIMIT"] == 9
+    summary = report["summary"]
+    assert summary["questions"] == len(QUESTIONS)
+    assert summary["errors"] == 0
+    assert summary["recall"]["recall@8"] == 1.0
+    for stage in ("embed", "vector_sql", "retrieval_total", "llm", "end_to_end"):
+        assert stage in summary["latency_ms"]
+    assert {run["kind"] for run in report["runs"]} == {"query", "analysis"}
+
+
+def test_timeseries_index_plan_summary_flags_index_only_ordered_scans():
+    from benchmarks import timeseries_index_benchmark as ts_bench
+
+    covering = [
+        {
+            "Plan": {
+                "Node Type": "Limit",
+                "Actual Rows": 500,
+                "Shared Hit Blocks": 12,
+                "Plans": [{"Node Type": "Index Only Scan", "Heap Fetches": 0, "Actual Rows": 500}],
+            },
+            "Planning Time": 0.2,
+            "Execution Time": 1.5,
+        }
+    ]
+    baseline = [
+        {
+            "Plan": {
+                "Node Type": "Sort",
+                "Actual Rows": 500,
+                "Plans": [
+                    {
+                        "Node Type": "Bitmap Heap Scan",
+                        "Plans": [{"Node Type": "Bitmap Index Scan"}],
+                    }
+                ],
+            },
+            "Execution Time": 40.0,
+        }
+    ]
+
+    fast = ts_bench.summarize_plan(covering)
+    assert fast["index_only"] is True and fast["explicit_sort"] is False
+    assert fast["rows"] == 500 and fast["shared_hit_blocks"] == 12
+    slow = ts_bench.summarize_plan(baseline)
+    assert slow["index_only"] is False and slow["explicit_sort"] is True
+    assert slow["scan_types"] == ["Bitmap Heap Scan", "Bitmap Index Scan"]
+
+    summary = ts_bench.summarize_runs([fast, {**fast, "execution_ms": 3.5}])
+    assert summary["execution_ms"] == {"min": 1.5, "p50": 2.5, "max": 3.5}
+    assert "execution_ms" not in summary["plan"]
@@ -0,0 +1,169 @@
+"""Tests for read-replica routing with read-your-writes fallbacks."""
+
+import io
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import database, metrics
+from app.database import Base
+from app.models import User
+from app.read_routing import corpus_version_at_least, read_session
+from app.retrieval_cache import bump_corpus_version
+from app.routers import documents as documents_router
+from app.workloads import allow_connection_release
+
+
+def _use_replica(monkeypatch, replica_engine):
+    monkeypatch.setattr(database, "_read_engines", [replica_engine])
+    monkeypatch.setattr(database, "_read_session_factories", [sessionmaker(bind=replica_engine)])
+
+
+@pytest.fixture
+def replica_engine(db_session, monkeypatch):
+    """A second SQLite database standing in for a streaming replica."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    _use_replica(monkeypatch, engine)
+    yield engine
+    engine.dispose()
+
+
+def _replicate(primary_session, replica):
+    """Copy the primary test database onto the replica (replication caught up)."""
+    source = primary_session.get_bind().raw_connection()
+    target = replica.raw_connection()
+    try:
+        source.driver_connection.backup(target.driver_connection)
+    finally:
+        target.close()
+        source.close()
+
+
+def _upload(client, headers, flight_test_id, altitude):
+    csv_text = f"timestamp,ALT\ns,ft\n0.0,{altitude}"
+    response = client.post(
+        f"/api/flight-tests/{flight_test_id}/upload-csv",
+        files={"file": ("data.csv", io.BytesIO(csv_text.encode()), "text/csv")},
+        headers=headers,
+    )
+    assert response.status_code == 201
+    return response.json()["dataset_version_id"]
+
+
+def _altitude(client, headers, flight_test_id):
+    response = client.get(
+        f"/api/flight-tests/{flight_test_id}/parameters/data?parameters=ALT", headers=headers
+    )
+    assert response.status_code == 200
+    return response.json()[0]["data"][0]["value"]
+
+
+@pytest.fixture
+def flight_test_id(client, auth_headers):
+    response = client.post(
+        "/api/flight-tests/",
+        json={"test_name": "Replica routing", "aircraft_type": "F-16"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def test_without_replicas_reads_use_the_primary_session(db_session):
+    assert database.get_read_engines() == []
+    with read_session(db_session, lambda replica: True) as read_db:
+        assert read_db is db_session
+
+
+def test_chart_data_reads_from_a_caught_up_replica(
+    client, db_session, auth_headers, flight_test_id, replica_engine
+):
+    _upload(client, auth_headers, flight_test_id, 100.0)
+    _replicate(db_session, replica_engine)
+    with replica_engine.begin() as conn:
+        conn.execute(text("UPDATE data_points SET value = value + 1000"))
+
+    before = metrics.DB_READ_ROUTING.value(target="replica")
+    assert _altitude(client, auth_headers, flight_test_id) == 1100.0
+    assert metrics.DB_READ_ROUTING.value(target="replica") == before + 1
+
+
+def test_new_dataset_version_is_read_from_primary_until_replicated(
+    client, db_session, auth_headers, flight_test_id, replica_engine
+):
+    _upload(client, auth_headers, flight_test_id, 100.0)
+    _replicate(db_session, replica_engine)
+
+    # The replica has not replayed the second ingest yet: read-your-writes.
+    _upload(client, auth_headers, flight_test_id, 200.0)
+    before = metrics.DB_READ_ROUTING.value(target="primary_stale")
+    assert _altitude(client, auth_headers, flight_test_id) == 200.0
+    assert metrics.DB_READ_ROUTING.value(target="primary_stale") == before + 1
+
+    _replicate(db_session, replica_engine)
+    with replica_engine.begin() as conn:
+        conn.execute(text("UPDATE data_points SET value = -1"))
+    assert _altitude(client, auth_headers, flight_test_id) == -1
+
+
+def test_unreachable_replica_falls_back_to_primary(
+    client, auth_headers, flight_test_id, monkeypatch, tmp_path
+):
+    broken = create_engine(f"sqlite:///{tmp_path}/missing/dir/replica.db")
+    _use_replica(monkeypatch, broken)
+    _upload(client, auth_headers, flight_test_id, 100.0)
+
+    before = metrics.DB_READ_ROUTING.value(target="primary_unavailable")
+    assert _altitude(client, auth_headers, flight_test_id) == 100.0
+    assert metrics.DB_READ_ROUTING.value(target="primary_unavailable") == before + 1
+
+
+def test_replica_failing_mid_query_is_rerun_on_primary(
+    client, db_session, auth_headers, flight_test_id, replica_engine
+):
+    _upload(client, auth_headers, flight_test_id, 100.0)
+    _replicate(db_session, replica_engine)
+    # Fresh by its dataset version marker, but the chart scan itself fails.
+    with replica_engine.begin() as conn:
+        conn.execute(text("DROP TABLE data_points"))
+
+    before = metrics.DB_READ_ROUTING.value(target="primary_replica_failed")
+    assert _altitude(client, auth_headers, flight_test_id) == 100.0
+    assert metrics.DB_READ_ROUTING.value(target="primary_replica_failed") == before + 1
+
+
+def test_corpus_version_check_follows_the_primary(db_session, test_user, replica_engine):
+    owner_id = db_session.query(User.id).filter(User.username == test_user["username"]).scalar()
+    bump_corpus_version(db_session, owner_id)
+    db_session.commit()
+    check = corpus_version_at_least(owner_id, 1)
+
+    with read_session(db_session, check) as read_db:
+        assert read_db is db_session
+    _replicate(db_session, replica_engine)
+    with read_session(db_session, check) as read_db:
+        assert read_db is not db_session
+        assert read_db.get_bind() is replica_engine
+
+
+def test_retrieval_releases_the_primary_after_the_corpus_version_read(
+    db_session, test_user, monkeypatch
+):
+    owner_id = db_session.query(User.id).filter(User.username == test_user["username"]).scalar()
+    in_transaction = []
+
+    def fake_retrieval(read_db, *args):
+        in_transaction.append(db_session.in_transaction())
+        return [], "", {}
+
+    monkeypatch.setattr(documents_router, "RETRIEVAL_CACHE_ENABLED", False)
+    monkeypatch.setattr(documents_router, "_run_hybrid_retrieval", fake_retrieval)
+    with allow_connection_release(db_session):
+        documents_router._retrieve_hybrid_sources(db_session, "flaps?", 5, owner_id)
+
+    assert in_transaction == [False]
@@ -0,0 +1,147 @@
+"""Tests for the corpus-versioned retrieval result cache."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.models import Document, DocumentChunk, RetrievalCorpusVersion
+from app.retrieval_cache import (
+    RetrievalResultCache,
+    build_retrieval_cache_key,
+    bump_corpus_version,
+    get_corpus_version,
+    retrieval_result_cache,
+)
+from app.retrieval_metadata import document_metadata_cache
+from app.routers import documents as documents_router
+
+
+@pytest.fixture(autouse=True)
+def _clear_retrieval_caches():
+    document_metadata_cache.clear()
+    retrieval_result_cache.clear()
+    yield
+    document_metadata_cache.clear()
+    retrieval_result_cache.clear()
+
+
+def _key(**overrides):
+    params = {
+        "owner_user_id": 1,
+        "corpus_version": 3,
+        "question": "What is V2?",
+        "analysis_mode": "takeoff",
+        "capability_key": None,
+        "top_k": 8,
+        "retrieval_config": {"context_limit": 12},
+    }
+    params.update(overrides)
+    return build_retrieval_cache_key(**params)
+
+
+def test_cache_key_normalizes_question_and_tracks_inputs():
+    assert _key() == _key(question="  What   is\nV2? ")
+    assert _key() != _key(corpus_version=4)
+    assert _key() != _key(owner_user_id=2)
+    assert _key() != _key(analysis_mode="landing")
+    assert _key() != _key(top_k=4)
+    assert _key() != _key(retrieval_config={"context_limit": 6})
+
+
+def test_result_cache_evicts_least_recently_used_and_copies_values():
+    cache = RetrievalResultCache(max_entries=2, ttl_s=60)
+    cache.put("a", ([{"text": "A"}], "ctx-a", {}))
+    cache.put("b", ([{"text": "B"}], "ctx-b", {}))
+    sources, _, _ = cache.get("a")
+    sources[0]["text"] = "mutated"
+    cache.put("c", ([], "ctx-c", {}))
+
+    assert cache.get("b") is None
+    assert cache.get("a")[0] == [{"text": "A"}]
+    assert len(cache) == 2
+
+
+def test_corpus_version_bumps_inside_caller_transaction(db_session, test_user):
+    owner_id = test_user["id"]
+    assert get_corpus_version(db_session, owner_id) == 0
+
+    bump_corpus_version(db_session, owner_id)
+    bump_corpus_version(db_session, owner_id)
+    db_session.commit()
+    assert get_corpus_version(db_session, owner_id) == 2
+
+    bump_corpus_version(db_session, owner_id)
+    db_session.rollback()
+    assert get_corpus_version(db_session, owner_id) == 2
+
+
+def test_corpus_version_row_does_not_block_deleting_its_owner():
+    [foreign_key] = RetrievalCorpusVersion.__table__.c.owner_user_id.foreign_keys
+    assert foreign_key.ondelete == "CASCADE"
+
+
+def test_repeated_question_is_served_from_cache_until_corpus_changes(
+    monkeypatch, client, db_session, test_user, auth_headers
+):
+    doc = Document(
+        filename="cs25.pdf", title="CS-25", status="ready", uploaded_by_id=test_user["id"]
+    )
+    db_session.add(doc)
+    db_session.flush()
+    chunk = DocumentChunk(document_id=doc.id, chunk_index=0, text="V2 >= 1.13 VSR")
+    db_session.add(chunk)
+    db_session.commit()
+    doc_id, chunk_id = doc.id, chunk.id
+    embedded = []
+
+    def _fake_embed(question):
+        embedded.append(question)
+        return [0.0]
+
+    monkeypatch.setattr(documents_router, "embed_text", _fake_embed)
+    monkeypatch.setattr(
+        documents_router, "_fetch_lexical_candidates", lambda bind, question, owner_user_id: []
+    )
+    monkeypatch.setattr(
+        documents_router,
+        "_fetch_vector_candidates",
+        lambda db, embedding, owner_user_id: [
+            SimpleNamespace(id=chunk_id, document_id=doc_id, document_updated_at=None)
+        ],
+    )
+
+    def _retrieve():
+        return documents_router._retrieve_hybrid_sources(
+            db=db_session,
+            question="What is V2?",
+            requested_top_k=4,
+            owner_user_id=test_user["id"],
+            analysis_mode="takeoff",
+        )
+
+    first_sources, _, first_debug = _retrieve()
+    second_sources, second_context, second_debug = _retrieve()
+
+    assert len(embedded) == 1
+    assert first_debug["cache_hit"] is False
+    assert second_debug["cache_hit"] is True
+    assert "cache_lookup" in second_debug["stage_timings_ms"]
+    assert second_sources == first_sources
+    assert "V2 >= 1.13 VSR" in second_context
+
+    monkeypatch.setattr(documents_router, "SessionLocal", lambda: db_session)
+    monkeypatch.setattr(
+        documents_router,
+        "_document_purges",
+        lambda: SimpleNamespace(submit=lambda fn, *args: fn(*args)),
+    )
+    response = client.delete(f"/api/documents/{doc_id}", headers=auth_headers)
+    assert response.status_code == 200
+    monkeypatch.setattr(
+        documents_router, "_fetch_vector_candidates", lambda db, embedding, owner_user_id: []
+    )
+
+    sources, _, debug = _retrieve()
+    assert len(embedded) == 2
+    assert debug["cache_hit"] is False
+    assert sources == []
@@ -0,0 +1,203 @@
+"""Tests for concurrent hybrid retrieval stages, id-only candidates and hydration."""
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from app.models import Document, DocumentChunk
+from app.retrieval_cache import retrieval_result_cache
+from app.retrieval_executor import StageTimings, submit_stage
+from app.retrieval_metadata import (
+    DocumentMetadataCache,
+    build_document_retrieval_entry,
+    document_metadata_cache,
+)
+from app.routers import documents as documents_router
+
+
+@pytest.fixture(autouse=True)
+def _clear_retrieval_caches():
+    document_metadata_cache.clear()
+    retrieval_result_cache.clear()
+    yield
+    document_metadata_cache.clear()
+    retrieval_result_cache.clear()
+
+
+def _seed_chunks(db_session, owner_id: int, texts_by_doc: dict) -> dict:
+    """Create ready documents with chunks; returns {text: (chunk_id, document_id)}."""
+    refs = {}
+    for filename, texts in texts_by_doc.items():
+        doc = Document(
+            filename=filename,
+            title=filename.rsplit(".", 1)[0],
+            status="ready",
+            uploaded_by_id=owner_id,
+            authority_type="regulation",
+            source_priority=90,
+        )
+        db_session.add(doc)
+        db_session.flush()
+        for index, chunk_text in enumerate(texts):
+            chunk = DocumentChunk(
+                document_id=doc.id,
+                chunk_index=index,
+                text=chunk_text,
+                page_numbers="3",
+                section_title="4.2 Takeoff",
+            )
+            db_session.add(chunk)
+            db_session.flush()
+            refs[chunk_text] = (chunk.id, doc.id)
+    db_session.commit()
+    return refs
+
+
+def _candidate(refs: dict, chunk_text: str):
+    chunk_id, document_id = refs[chunk_text]
+    return SimpleNamespace(id=chunk_id, document_id=document_id, document_updated_at=None)
+
+
+def test_stage_timings_accumulate_and_report_total():
+    timings = StageTimings()
+    with timings.stage("embed"):
+        pass
+    timings.record("embed", 5.0)
+    future = submit_stage(timings, "lexical_sql", lambda value: value * 2, 21)
+
+    assert future.result(timeout=5) == 42
+    report = timings.as_dict()
+    assert report["embed"] >= 5.0
+    assert "lexical_sql" in report
+    assert report["total"] >= 0.0
+
+
+def test_lexical_query_runs_while_embedding_is_in_flight(monkeypatch, db_session, test_user):
+    refs = _seed_chunks(
+        db_session, test_user["id"], {"a.pdf": ["shared hit"], "b.pdf": ["lexical hit"]}
+    )
+    lexical_started = threading.Event()
+    overlap_observed = []
+
+    def _fake_embed(question):
+        # Blocks until the lexical branch is running: proves the stages overlap.
+        overlap_observed.append(lexical_started.wait(timeout=5))
+        return [0.1, 0.2]
+
+    def _fake_lexical(bind, question, owner_user_id):
+        lexical_started.set()
+        return [_candidate(refs, "lexical hit"), _candidate(refs, "shared hit")]
+
+    monkeypatch.setattr(documents_router, "embed_text", _fake_embed)
+    monkeypatch.setattr(documents_router, "_fetch_lexical_candidates", _fake_lexical)
+    monkeypatch.setattr(
+        documents_router,
+        "_fetch_vector_candidates",
+        lambda db, embedding, owner_user_id: [_candidate(refs, "shared hit")],
+    )
+
+    sources, context, debug = documents_router._retrieve_hybrid_sources(
+        db=db_session,
+        question="What is V2 minimum?",
+        requested_top_k=4,
+        owner_user_id=1,
+    )
+
+    assert overlap_observed == [True]
+    # RRF: the chunk found by both branches ranks first.
+    assert sources[0]["text"] == "shared hit"
+    assert {source["text"] for source in sources} == {"shared hit", "lexical hit"}
+    assert "[S1]" in context
+    timings = debug["stage_timings_ms"]
+    for stage in ("embed", "vector_sql", "lexical_sql", "fusion_rerank", "hydrate_sql", "total"):
+        assert stage in timings
+
+
+def test_only_selected_context_rows_are_hydrated(monkeypatch, db_session, test_user):
+    texts = [f"chunk {index}" for index in range(6)]
+    refs = _seed_chunks(db_session, test_user["id"], {"cs25.pdf": texts})
+    hydrated_batches = []
+    original_hydrate = documents_router._hydrate_chunk_rows
+
+    def _recording_hydrate(db, chunk_ids):
+        hydrated_batches.append(sorted(chunk_ids))
+        return original_hydrate(db, chunk_ids)
+
+    monkeypatch.setattr(documents_router, "QUERY_CONTEXT_LIMIT", 2)
+    monkeypatch.setattr(documents_router, "QUERY_MAX_CHUNKS_PER_DOCUMENT", 2)
+    monkeypatch.setattr(documents_router, "_hydrate_chunk_rows", _recording_hydrate)
+    monkeypatch.setattr(documents_router, "embed_text", lambda question: [0.0])
+    monkeypatch.setattr(
+        documents_router, "_fetch_lexical_candidates", lambda bind, question, owner_user_id: []
+    )
+    monkeypatch.setattr(
+        documents_router,
+        "_fetch_vector_candidates",
+        lambda db, embedding, owner_user_id: [_candidate(refs, text) for text in texts],
+    )
+
+    sources, context, debug = documents_router._retrieve_hybrid_sources(
+        db=db_session,
+        question="V2",
+        requested_top_k=2,
+        owner_user_id=test_user["id"],
+    )
+
+    assert hydrated_batches == [sorted([refs["chunk 0"][0], refs["chunk 1"][0]])]
+    assert [source["text"] for source in sources] == ["chunk 0", "chunk 1"]
+    assert sources[0]["title"] == "cs25"
+    assert sources[0]["authority_type"] == "regulation"
+    assert "[S1] cs25, p.3 — 4.2 Takeoff [regulation]" in context
+    assert debug["candidate_rows"] == 6
+    assert debug["hydrated_rows"] == 2
+
+
+def test_document_metadata_cache_reloads_stale_entries():
+    cache = DocumentMetadataCache(max_entries=2)
+    row = SimpleNamespace(
+        id=1,
+        filename="a.pdf",
+        title="A",
+        authority_type="advisory",
+        domain_tags_json='["takeoff"]',
+        updated_at=None,
+    )
+    cache.put_many([build_document_retrieval_entry(row)])
+
+    found, missing = cache.get_fresh({1: None, 2: None})
+    assert missing == [2]
+    assert found[1].metadata["domain_tags"] == ["takeoff"]
+
+    # A newer updated_at marker means the cached entry is stale.
+    found, missing = cache.get_fresh({1: "2026-10-19T00:00:00"})
+    assert found == {}
+    assert missing == [1]
+
+    cache.put_many(
+        [build_document_retrieval_entry(SimpleNamespace(id=doc_id)) for doc_id in (2, 3)]
+    )
+    assert len(cache) == 2
+    cache.invalidate(2)
+    assert cache.get_fresh({2: None, 3: None})[1] == [2]
+
+
+def test_empty_retrieval_still_reports_stage_timings(monkeypatch, db_session):
+    monkeypatch.setattr(documents_router, "embed_text", lambda question: [0.0])
+    monkeypatch.setattr(
+        documents_router, "_fetch_lexical_candidates", lambda bind, question, owner_user_id: []
+    )
+    monkeypatch.setattr(
+        documents_router, "_fetch_vector_candidates", lambda db, embedding, owner_user_id: []
+    )
+
+    sources, context, debug = documents_router._retrieve_hybrid_sources(
+        db=db_session,
+        question="anything",
+        requested_top_k=4,
+        owner_user_id=1,
+    )
+
+    assert sources == []
+    assert context == ""
+    assert set(debug["stage_timings_ms"]) >= {"embed", "vector_sql", "lexical_sql", "total"}
@@ -0,0 +1,96 @@
+"""Tests for the production launcher and the CPU-bound worker pool."""
+
+import fcntl
+
+import pytest
+from fastapi import HTTPException
+
+from app import cpu_workers, serve
+from app.docling_workers import DocumentWorkerPool
+
+
+def test_gunicorn_options_size_workers_from_cpus_and_env():
+    options = serve.build_gunicorn_options(env={}, cpus=16)
+    assert options["workers"] == 8
+    assert options["preload_app"] is True
+    assert options["worker_class"].endswith("UvicornWorker")
+    assert options["post_fork"] is serve._post_fork
+    assert serve.build_gunicorn_options(env={}, cpus=1)["workers"] == 2
+
+    configured = serve.build_gunicorn_options(
+        env={"WEB_CONCURRENCY": "3", "SERVE_MAX_REQUESTS": "5000", "SERVE_BIND": "127.0.0.1:9000"},
+        cpus=16,
+    )
+    assert configured["workers"] == 3
+    assert configured["max_requests"] == 5000
+    assert configured["bind"] == "127.0.0.1:9000"
+
+
+def test_docling_pool_settings_are_divided_across_workers():
+    env = {"DOCLING_WORKER_PROCESSES": "4", "DOCLING_WORKER_QUEUE_SIZE": "8"}
+    assert serve.split_docling_pool(env, 3) == {
+        "DOCLING_WORKER_PROCESSES": 2,
+        "DOCLING_WORKER_QUEUE_SIZE": 3,
+    }
+    assert env == {"DOCLING_WORKER_PROCESSES": "2", "DOCLING_WORKER_QUEUE_SIZE": "3"}
+
+    # Fewer parser processes than workers: each worker still gets one.
+    assert serve.split_docling_pool({}, 4)["DOCLING_WORKER_PROCESSES"] == 1
+    inline = {"DOCLING_WORKER_PROCESSES": "0"}
+    assert serve.split_docling_pool(inline, 4)["DOCLING_WORKER_PROCESSES"] == 0
+
+
+def test_background_leader_is_claimed_by_one_process(tmp_path, monkeypatch):
+    monkeypatch.setattr(serve, "_leader_lock_file", None)
+    monkeypatch.delenv(serve.LEADER_LOCK_ENV, raising=False)
+    assert serve.claim_background_leader()  # uvicorn / scripts: always leader
+
+    lock_path = tmp_path / "leader.lock"
+    monkeypatch.setenv(serve.LEADER_LOCK_ENV, str(lock_path))
+    assert serve.claim_background_leader()
+    held = serve._leader_lock_file
+    try:
+        # Another worker (a separate open file description) cannot take it.
+        with open(lock_path, "a+") as other:
+            with pytest.raises(OSError):
+                fcntl.flock(other.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    finally:
+        held.close()
+
+
+def _render(value: int) -> int:
+    if value < 0:
+        raise HTTPException(status_code=422, detail="negative")
+    return value * 2
+
+
+def test_run_cpu_bound_maps_worker_errors_to_http(monkeypatch):
+    monkeypatch.setattr(
+        cpu_workers,
+        "get_cpu_worker_pool",
+        lambda: DocumentWorkerPool(processes=0, queue_size=0, timeout_s=5),
+    )
+    assert cpu_workers.run_cpu_bound(_render, 21) == 42
+    with pytest.raises(HTTPException) as raised:
+        cpu_workers.run_cpu_bound(_render, -1)
+    assert raised.value.status_code == 422
+
+    full = DocumentWorkerPool(processes=0, queue_size=0, timeout_s=5)
+    full._slots.acquire()
+    monkeypatch.setattr(cpu_workers, "get_cpu_worker_pool", lambda: full)
+    with pytest.raises(HTTPException) as raised:
+        cpu_workers.run_cpu_bound(_render, 1)
+    assert raised.value.status_code == 503
+    assert raised.value.headers["Retry-After"] == str(cpu_workers.CPU_WORKER_RETRY_AFTER_S)
+
+
+def test_run_cpu_bound_returns_http_errors_across_processes(monkeypatch):
+    pool = DocumentWorkerPool(processes=1, queue_size=0, timeout_s=60)
+    monkeypatch.setattr(cpu_workers, "get_cpu_worker_pool", lambda: pool)
+    try:
+        assert cpu_workers.run_cpu_bound(_render, 4) == 8
+        with pytest.raises(HTTPException) as raised:
+            cpu_workers.run_cpu_bound(_render, -1)
+        assert raised.value.detail == "negative"
+    finally:
+        pool.shutdown()
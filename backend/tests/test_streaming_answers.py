@@ -0,0 +1,186 @@
+"""Tests for the server-sent-event variants of /query and ai-analysis."""
+
+import hashlib
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.models import AnalysisJob, DataPoint, FlightTest, TestParameter
+from app.routers import documents as documents_router
+
+_SOURCES = [
+    {
+        "source_id": "S1",
+        "filename": "std.pdf",
+        "title": "Standard",
+        "page_numbers": "12",
+        "section_title": "Takeoff",
+        "similarity": 0.98,
+        "text": "V2 shall not be less than 1.13 VSR",
+    },
+    {
+        "source_id": "S2",
+        "filename": "ac.pdf",
+        "title": "Advisory",
+        "page_numbers": "4",
+        "section_title": "Speeds",
+        "similarity": 0.91,
+        "text": "Demonstrate V2 during takeoff tests",
+    },
+]
+
+
+def _fake_retrieve(**kwargs):
+    return [dict(source) for source in _SOURCES], "[S1] excerpt\n\n---\n\n[S2] excerpt", {}
+
+
+def _streaming_client(deltas, fail_after=None):
+    calls = []
+
+    def _create(**kwargs):
+        calls.append(kwargs)
+        if not kwargs.get("stream"):
+            message = SimpleNamespace(content="".join(deltas))
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+        def _chunks():
+            for index, text in enumerate(deltas):
+                if fail_after is not None and index == fail_after:
+                    raise RuntimeError("upstream reset")
+                delta = SimpleNamespace(content=text)
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+            yield SimpleNamespace(choices=[])
+
+        return _chunks()
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=_create)))
+    return client, calls
+
+
+def _parse_events(body: str) -> list:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_query_stream_sends_sources_tokens_then_final(client, auth_headers, monkeypatch):
+    fake_client, calls = _streaming_client(["V2 >= 1.13 VSR [S1]. ", "Verify in test [S2]."])
+    monkeypatch.setattr(documents_router, "_require_ai_packages", lambda: None)
+    monkeypatch.setattr(documents_router, "_retrieve_hybrid_sources", _fake_retrieve)
+    monkeypatch.setattr(documents_router, "get_openai_client", lambda: fake_client)
+
+    response = client.post(
+        "/api/documents/query/stream",
+        headers=auth_headers,
+        json={"question": "What is the V2 minimum?"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _parse_events(response.text)
+    names = [name for name, _ in events]
+    assert names == ["sources", "token", "token", "final"]
+    assert [source["source_id"] for source in events[0][1]["sources"]] == ["S1", "S2"]
+    assert all("text" not in source for source in events[0][1]["sources"])
+
+    final = events[-1][1]
+    assert final["answer"] == "V2 >= 1.13 VSR [S1]. Verify in test [S2]."
+    assert final["answer_revised"] is False
+    assert final["coverage"]["has_inline_citations"] is True
+    assert {source["source_id"] for source in final["sources"]} == {"S1", "S2"}
+    assert calls[0]["stream"] is True
+
+
+def test_query_stream_reports_llm_failure_as_error_event(client, auth_headers, monkeypatch):
+    fake_client, _ = _streaming_client(["partial ", "answer"], fail_after=1)
+    monkeypatch.setattr(documents_router, "_require_ai_packages", lambda: None)
+    monkeypatch.setattr(documents_router, "_retrieve_hybrid_sources", _fake_retrieve)
+    monkeypatch.setattr(documents_router, "get_openai_client", lambda: fake_client)
+
+    response = client.post(
+        "/api/documents/query/stream",
+        headers=auth_headers,
+        json={"question": "What is the V2 minimum?"},
+    )
+
+    events = _parse_events(response.text)
+    assert [name for name, _ in events] == ["sources", "token", "error"]
+    assert "upstream reset" in events[-1][1]["detail"]
+
+
+def _seed_flight_test(db_session, test_user):
+    flight_test = FlightTest(
+        test_name="Stream Test", aircraft_type="F-16", created_by_id=test_user["id"]
+    )
+    parameter = TestParameter(name="STREAM_SPEED", unit="kt")
+    db_session.add_all([flight_test, parameter])
+    db_session.commit()
+    db_session.add(
+        DataPoint(
+            flight_test_id=flight_test.id,
+            parameter_id=parameter.id,
+            timestamp=datetime(2026, 10, 19, 10, 0, 0),
+            value=120.0,
+        )
+    )
+    db_session.commit()
+    return flight_test
+
+
+def test_ai_analysis_stream_persists_job_hashed_over_final_text(
+    client, db_session, test_user, auth_headers, monkeypatch
+):
+    flight_test = _seed_flight_test(db_session, test_user)
+
+    fake_client, _ = _streaming_client(["Executive summary [S1]. ", "Guidance [S2]."])
+    monkeypatch.setattr(documents_router, "_require_ai_packages", lambda: None)
+    monkeypatch.setattr(documents_router, "_retrieve_hybrid_sources", _fake_retrieve)
+    monkeypatch.setattr(documents_router, "get_openai_client", lambda: fake_client)
+    monkeypatch.setattr(documents_router.func, "stddev", lambda col: documents_router.func.avg(col))
+
+    response = client.post(
+        f"/api/documents/flight-tests/{flight_test.id}/ai-analysis/stream",
+        headers=auth_headers,
+        json={"analysis_mode": "general", "user_prompt": "Summarise the test"},
+    )
+
+    assert response.status_code == 200
+    events = _parse_events(response.text)
+    assert [name for name, _ in events] == ["sources", "token", "token", "final"]
+    assert events[0][1]["run_llm"] is True
+
+    final = events[-1][1]
+    assert "Executive summary [S1]. Guidance [S2]." in final["analysis"]
+    assert final["output_sha256"] == hashlib.sha256(final["analysis"].encode("utf-8")).hexdigest()
+    job = db_session.query(AnalysisJob).filter(AnalysisJob.id == final["analysis_job_id"]).one()
+    assert job.analysis_text == final["analysis"]
+    assert job.output_sha256 == final["output_sha256"]
+
+
+def test_ai_analysis_stream_reports_persistence_failure_as_error_event(
+    client, db_session, test_user, auth_headers, monkeypatch
+):
+    flight_test = _seed_flight_test(db_session, test_user)
+    fake_client, _ = _streaming_client(["Executive summary [S1]."])
+
+    def _fail_finalize(*args, **kwargs):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(documents_router, "_require_ai_packages", lambda: None)
+    monkeypatch.setattr(documents_router, "_retrieve_hybrid_sources", _fake_retrieve)
+    monkeypatch.setattr(documents_router, "get_openai_client", lambda: fake_client)
+    monkeypatch.setattr(documents_router, "_finalize_ai_analysis", _fail_finalize)
+    monkeypatch.setattr(documents_router.func, "stddev", lambda col: documents_router.func.avg(col))
+
+    response = client.post(
+        f"/api/documents/flight-tests/{flight_test.id}/ai-analysis/stream",
+        headers=auth_headers,
+        json={"analysis_mode": "general", "user_prompt": "Summarise the test"},
+    )
+
+    events = _parse_events(response.text)
+    assert [name for name, _ in events] == ["sources", "token", "error"]
+    assert "database went away" in events[-1][1]["detail"]
+    assert db_session.query(AnalysisJob).count() == 0
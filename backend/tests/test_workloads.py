@@ -0,0 +1,205 @@
+"""Tests for per-workload admission slots and connection release during LLM calls."""
+
+import io
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app import workloads
+from app.models import DataPoint, Document, FlightTest, TestParameter
+from app.routers import documents as documents_router
+from app.workloads import (
+    WorkloadSaturated,
+    allow_connection_release,
+    get_limiter,
+    release_connection,
+    release_connection_if_allowed,
+    workload_slot,
+)
+
+
+@pytest.fixture
+def no_admission_wait(monkeypatch):
+    monkeypatch.setattr(workloads, "WORKLOAD_ADMISSION_WAIT_S", 0.0)
+
+
+def _hold_all(workload):
+    limiter = get_limiter(workload)
+    held = 0
+    while limiter.acquire(0):
+        held += 1
+    return limiter, held
+
+
+def _release(limiter, held):
+    for _ in range(held):
+        limiter.release()
+
+
+def test_saturated_ingest_fails_fast_while_interactive_requests_proceed(
+    client, auth_headers, no_admission_wait
+):
+    created = client.post(
+        "/api/flight-tests/",
+        json={"test_name": "Busy ingest", "aircraft_type": "F-16"},
+        headers=auth_headers,
+    )
+    limiter, held = _hold_all("ingest")
+    try:
+        started = time.perf_counter()
+        response = client.post(
+            f"/api/flight-tests/{created.json()['id']}/upload-csv",
+            files={"file": ("d.csv", io.BytesIO(b"timestamp,ALT\ns,ft\n0.0,1.0"), "text/csv")},
+            headers=auth_headers,
+        )
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == str(workloads.WORKLOAD_RETRY_AFTER_S)
+        assert time.perf_counter() - started < 2.0
+
+        assert client.get("/api/flight-tests/", headers=auth_headers).status_code == 200
+        assert client.get("/api/health").status_code == 200
+    finally:
+        _release(limiter, held)
+
+
+def test_request_slots_are_returned_after_errors(client, auth_headers):
+    limiter = get_limiter("ingest")
+    before = limiter.in_use()
+
+    response = client.post(
+        "/api/flight-tests/999999/upload-csv",
+        files={"file": ("d.csv", io.BytesIO(b"timestamp,ALT\ns,ft\n0.0,1.0"), "text/csv")},
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 404
+    assert limiter.in_use() == before
+
+
+def test_background_slot_waits_instead_of_failing():
+    limiter, held = _hold_all("background")
+    try:
+        with pytest.raises(WorkloadSaturated):
+            with workload_slot("background", timeout=0):
+                pass
+
+        entered = threading.Event()
+
+        def background_job():
+            with workload_slot("background", timeout=None):
+                entered.set()
+
+        worker = threading.Thread(target=background_job)
+        worker.start()
+        assert not entered.wait(0.1)
+        limiter.release()
+        held -= 1
+        assert entered.wait(2.0)
+        worker.join(2.0)
+    finally:
+        _release(limiter, held)
+
+
+def test_release_connection_commits_and_ends_the_transaction(db_session, test_user):
+    parameter = TestParameter(name="RELEASE_ALT", unit="ft")
+    db_session.add(parameter)
+    db_session.flush()
+    assert db_session.in_transaction()
+
+    release_connection(db_session)
+
+    assert not db_session.in_transaction()
+    assert db_session.query(TestParameter).filter_by(name="RELEASE_ALT").count() == 1
+
+
+def test_shared_helpers_only_release_when_the_caller_allows_it(db_session, test_user):
+    db_session.add(TestParameter(name="PENDING_ALT", unit="ft"))
+    db_session.flush()
+
+    release_connection_if_allowed(db_session)
+    assert db_session.in_transaction()
+    db_session.rollback()
+    assert db_session.query(TestParameter).filter_by(name="PENDING_ALT").count() == 0
+
+    with allow_connection_release(db_session):
+        db_session.query(TestParameter).count()
+        release_connection_if_allowed(db_session)
+        assert not db_session.in_transaction()
+    assert not db_session.info.get("ftias_release_allowed")
+
+
+def test_document_delete_does_not_wait_for_a_background_slot(
+    client, auth_headers, db_session, test_user, monkeypatch
+):
+    doc = Document(
+        filename="busy.pdf", title="Busy", status="ready", uploaded_by_id=test_user["id"]
+    )
+    db_session.add(doc)
+    db_session.commit()
+    doc_id = doc.id
+    purged = threading.Event()
+    monkeypatch.setattr(documents_router, "_purge_document_rows", lambda _id: purged.set())
+    limiter, held = _hold_all("background")
+    try:
+        started = time.perf_counter()
+        response = client.delete(f"/api/documents/{doc_id}", headers=auth_headers)
+        assert response.status_code == 200
+        assert time.perf_counter() - started < 2.0
+        assert not purged.wait(0.1)
+    finally:
+        _release(limiter, held)
+    assert purged.wait(2.0)
+
+
+def test_ai_analysis_holds_no_connection_while_waiting_on_the_llm(
+    client, auth_headers, db_session, test_user, monkeypatch
+):
+    flight_test = FlightTest(
+        test_name="Release Test", aircraft_type="F-16", created_by_id=test_user["id"]
+    )
+    parameter = TestParameter(name="RELEASE_SPEED", unit="kt")
+    db_session.add_all([flight_test, parameter])
+    db_session.commit()
+    db_session.add(
+        DataPoint(
+            flight_test_id=flight_test.id,
+            parameter_id=parameter.id,
+            timestamp=datetime(2026, 10, 19, 10, 0, 0),
+            value=120.0,
+        )
+    )
+    db_session.commit()
+
+    in_transaction_during_llm = []
+
+    def _create(**kwargs):
+        in_transaction_during_llm.append(db_session.in_transaction())
+        message = SimpleNamespace(content="Guidance [S1].")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=_create)))
+    monkeypatch.setattr(documents_router, "get_openai_client", lambda: fake_client)
+    monkeypatch.setattr(documents_router, "_require_ai_packages", lambda: None)
+    monkeypatch.setattr(documents_router.func, "stddev", lambda col: documents_router.func.avg(col))
+    monkeypatch.setattr(
+        documents_router,
+        "_retrieve_hybrid_sources",
+        lambda **kwargs: (
+            [{"source_id": "S1", "filename": "std.pdf", "title": "Standard", "text": "excerpt"}],
+            "[S1] excerpt",
+            {},
+        ),
+    )
+
+    response = client.post(
+        f"/api/documents/flight-tests/{flight_test.id}/ai-analysis",
+        headers=auth_headers,
+        json={"analysis_mode": "general", "user_prompt": "Summarise the test"},
+    )
+
+    assert response.status_code == 200, response.text
+    assert in_transaction_during_llm == [False]
+    assert get_limiter("analysis").in_use() == 0